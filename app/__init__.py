@@ -1,7 +1,27 @@
+import os
 from flask import Flask
-from app.routes import routes
 
 def create_app():
+    # Import di dalam fungsi agar modul ringan seperti app.numpy_model bisa dipakai
+    # tanpa ikut memuat route (dan dependensinya)
+    from app.routes import routes, mulai_refresher_prediksi
+    from app.model_registry import model_registry, preload_is_fork_safe
+    from app.commands import register_commands
+    from app.inference_server import INFERENCE_MODE
+    from app.metrics import pasang_flask
+
     app = Flask(__name__)
+    pasang_flask(app)
     app.register_blueprint(routes)
+    register_commands(app)
+
+    # Load dan warm-up model sekali saat worker start, bukan di request pertama.
+    # Pada mode preload dengan backend keras, warm-up dilakukan di worker (post_fork).
+    preload = os.getenv('GUNICORN_PRELOAD', '0') == '1'
+    # Dengan INFERENCE_MODE=server model hanya di-load oleh proses inference bersama.
+    if (os.getenv('MODEL_WARMUP', '1') == '1' and INFERENCE_MODE != 'server'
+            and (not preload or preload_is_fork_safe())):
+        model_registry.warm_up()
+    if not preload:
+        mulai_refresher_prediksi()
     return app
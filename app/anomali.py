@@ -0,0 +1,169 @@
+"""
+Deteksi anomali harga untuk semua daerah x komoditas (`flask --app run deteksi-anomali`).
+
+Dua metode, keduanya dihitung sekaligus untuk semua deret yang dibaca (utils/anomali.py):
+- mad: perubahan harian log(harga) dibandingkan median perubahan ANOMALI_WINDOW hari
+  sebelumnya, skor robust (perubahan - median) / (1.4826 x MAD); anomali jika
+  |skor| >= ANOMALI_AMBANG_MAD. Acuan = harga sebelumnya x exp(median).
+- hp: deviasi relatif harga dari trend HP satu tahun terakhir, deret dan trend yang sama
+  dengan /harga_normal (cache trend dipakai bersama); anomali jika |deviasi| >= ANOMALI_AMBANG_HP.
+
+Mode penuh membaca seluruh harga_komoditas per kelompok ANOMALI_BATCH_DAERAH daerah. Mode
+inkremental hanya membaca deret yang punya baris baru sejak watermark id (seperti rollup
+harga_bulanan), mulai beberapa window sebelum tanggal baru pertama. Hasilnya disimpan di
+tabel anomali_harga sehingga /anomali_harga cukup membaca index.
+"""
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from .routes import start_date_time_range
+from utils.anomali import (
+    batas_deret, deviasi_trend, median_mad_bergulir, perubahan_log, posisi_dalam_deret, skor_mad,
+)
+from utils.hp_filter import HP_LAMBDA, kunci_trend, trend_cache
+
+# Muat variabel dari file .env
+load_dotenv()
+
+# Panjang jendela (observasi) median/MAD, ambang skor robust dan skala minimal perubahan log
+ANOMALI_WINDOW = int(os.getenv('ANOMALI_WINDOW', 30))
+ANOMALI_AMBANG_MAD = float(os.getenv('ANOMALI_AMBANG_MAD', 3.5))
+ANOMALI_SKALA_MIN = float(os.getenv('ANOMALI_SKALA_MIN', 0.01))
+# Ambang deviasi relatif dari trend HP
+ANOMALI_AMBANG_HP = float(os.getenv('ANOMALI_AMBANG_HP', 0.15))
+# Jumlah daerah per query dan transaksi
+ANOMALI_BATCH_DAERAH = int(os.getenv('ANOMALI_BATCH_DAERAH', 20))
+
+# timeRange deret trend HP, sama dengan default /harga_normal
+ANOMALI_HP_TIME_RANGE = 1
+# Histori (hari) yang dibaca sebelum tanggal baru pertama pada mode inkremental; 3x window
+# agar tetap cukup ANOMALI_WINDOW observasi walaupun ada hari tanpa data
+ANOMALI_HISTORI_HARI = 3 * ANOMALI_WINDOW
+TANGGAL_MIN = '1900-01-01'
+
+
+def deteksi_anomali(rows, hp_sejak, sejak_mad=None):
+    """
+    Menghitung anomali mad dan hp untuk banyak deret sekaligus.
+
+    :param rows: Baris (daerah_id, komoditas_id, tanggal_harga, harga) urut (daerah, komoditas, tanggal),
+                 misalnya dari Repository.deret_harga_banyak.
+    :param hp_sejak: Awal rentang trend HP (yyyy-mm-dd).
+    :param sejak_mad: Dict (daerah_id, komoditas_id) -> tanggal awal hasil mad untuk mode inkremental;
+                      deret yang tidak ada di dict dilewati. None untuk semua deret dan semua tanggal.
+    :return: Tuple (baris KOLOM_ANOMALI, jumlah deret yang diproses).
+    """
+    if not rows:
+        return [], 0
+    df = pd.DataFrame(rows, columns=['daerah_id', 'komoditas_id', 'tanggal', 'harga'])
+    daerah = df['daerah_id'].to_numpy(dtype=np.int64)
+    komoditas = df['komoditas_id'].to_numpy(dtype=np.int64)
+    harga = pd.to_numeric(df['harga']).to_numpy(dtype=np.float64)
+    hari = pd.to_datetime(df['tanggal']).values.astype('datetime64[D]')
+    tanggal = df['tanggal'].tolist()
+    awal, akhir = batas_deret(daerah, komoditas)
+    panjang = akhir - awal
+
+    # Batas tanggal hasil mad per deret; deret yang tidak diproses mendapat tanggal maksimum
+    if sejak_mad is None:
+        aktif = np.ones(len(awal), dtype=bool)
+        mulai_mad = np.full(len(awal), np.datetime64(TANGGAL_MIN, 'D'))
+    else:
+        pasangan = list(zip(daerah[awal].tolist(), komoditas[awal].tolist()))
+        aktif = np.array([p in sejak_mad for p in pasangan], dtype=bool)
+        mulai_mad = np.array([str(sejak_mad.get(p, '9999-12-31'))[:10] for p in pasangan], dtype='datetime64[D]')
+
+    # Perubahan harian dibandingkan median/MAD perubahan ANOMALI_WINDOW hari sebelumnya
+    posisi = posisi_dalam_deret(awal, akhir)
+    perubahan = perubahan_log(harga, posisi)
+    median, mad = median_mad_bergulir(perubahan, posisi - 1, ANOMALI_WINDOW)
+    skor = skor_mad(perubahan, median, mad, ANOMALI_SKALA_MIN)
+    with np.errstate(invalid='ignore'):
+        pilih = np.flatnonzero((np.abs(skor) >= ANOMALI_AMBANG_MAD) & (hari >= np.repeat(mulai_mad, panjang)))
+    # Acuan: harga sebelumnya dikali perubahan median
+    acuan = harga[pilih - 1] * np.exp(median[pilih])
+    hasil = list(zip(
+        daerah[pilih].tolist(), komoditas[pilih].tolist(), [tanggal[i] for i in pilih], ['mad'] * len(pilih),
+        harga[pilih].astype(np.int64).tolist(), np.round(acuan, 2).tolist(), np.round(skor[pilih], 4).tolist(),
+    ))
+
+    # Trend HP: setiap deret aktif dari tanggal hp_sejak (akhir deret), satu solve per kelompok panjang
+    dalam_rentang = (hari >= np.datetime64(hp_sejak[:10], 'D')) & np.repeat(aktif, panjang)
+    jumlah = np.add.reduceat(dalam_rentang.astype(np.int64), awal)
+    seri = np.flatnonzero(jumlah > 0)
+    mulai = (akhir - jumlah)[seri].tolist()
+    selesai = akhir[seri].tolist()
+    if seri.size:
+        keys = [
+            kunci_trend(int(daerah[a]), int(komoditas[a]), ANOMALI_HP_TIME_RANGE, HP_LAMBDA, tanggal[a], tanggal[b - 1],
+                        harga[a:b])
+            for a, b in zip(mulai, selesai)
+        ]
+        trends = trend_cache.get_or_compute_banyak(keys, [harga[a:b] for a, b in zip(mulai, selesai)], HP_LAMBDA)
+        # Baris dalam rentang berurutan sama dengan gabungan potongan [mulai, selesai) per deret
+        baris = np.flatnonzero(dalam_rentang)
+        trend = np.concatenate(trends)
+        deviasi = deviasi_trend(harga[baris], trend)
+        pilih = np.flatnonzero(np.abs(deviasi) >= ANOMALI_AMBANG_HP)
+        i = baris[pilih]
+        hasil.extend(zip(
+            daerah[i].tolist(), komoditas[i].tolist(), [tanggal[j] for j in i], ['hp'] * len(i),
+            harga[i].astype(np.int64).tolist(), np.round(trend[pilih], 2).tolist(), np.round(deviasi[pilih], 4).tolist(),
+        ))
+    return hasil, int(aktif.sum())
+
+
+def perbarui_anomali(repository, penuh=False, log=None):
+    """
+    Memperbarui tabel anomali_harga. Mode inkremental menghitung ulang hasil mad setiap deret
+    dengan baris baru sejak tanggal baru pertamanya dan hasil hp seluruh deret itu; penuh=True
+    (atau belum ada watermark) menghitung ulang semua deret. Setiap kelompok daerah ditulis
+    dalam transaksinya sendiri, watermark dicatat bersama kelompok terakhir.
+
+    Baris lama yang nilainya diperbarui lewat upsert tidak mengubah id, jadi baru ikut
+    dihitung ulang pada mode penuh berikutnya.
+
+    :param log: Fungsi penerima pesan per kelompok daerah, atau None.
+    :return: Dict mode, jumlah deret yang diproses, jumlah anomali dan id watermark baru.
+    """
+    id_terakhir = repository.id_harga_terakhir()
+    watermark = None if penuh else repository.watermark_rollup('anomali_harga')
+    hp_sejak = start_date_time_range(ANOMALI_HP_TIME_RANGE)
+
+    if watermark is None:
+        mode, sejak = 'penuh', None
+        daerah_ids = sorted(row[0] for row in repository.daftar_daerah())
+        komoditas_ids = repository.komoditas_ids()
+    else:
+        mode = 'inkremental'
+        sejak = {(d, k): awal for d, k, awal, _ in repository.rentang_baru(watermark, id_terakhir)}
+        daerah_ids = sorted({d for d, _ in sejak})
+
+    kelompok = [daerah_ids[i:i + ANOMALI_BATCH_DAERAH] for i in range(0, len(daerah_ids), ANOMALI_BATCH_DAERAH)]
+    total = {"deret": 0, "anomali": 0}
+    for nomor, batch in enumerate(kelompok, start=1):
+        watermark_baru = id_terakhir if nomor == len(kelompok) else None
+        if sejak is None:
+            rows = repository.deret_harga_banyak(batch, komoditas_ids, TANGGAL_MIN)
+            hasil, jumlah_deret = deteksi_anomali(rows, hp_sejak)
+            repository.simpan_anomali(hasil, hapus_daerah=batch, watermark=watermark_baru)
+        else:
+            sejak_batch = {p: awal for p, awal in sejak.items() if p[0] in batch}
+            awal_baca = min(min(sejak_batch.values()) - timedelta(days=ANOMALI_HISTORI_HARI), date.fromisoformat(hp_sejak))
+            rows = repository.deret_harga_banyak(batch, sorted({k for _, k in sejak_batch}), awal_baca.isoformat())
+            hasil, jumlah_deret = deteksi_anomali(rows, hp_sejak, sejak_batch)
+            hapus = [(d, k, 'mad', awal) for (d, k), awal in sejak_batch.items()]
+            hapus += [(d, k, 'hp', TANGGAL_MIN) for d, k in sejak_batch]
+            repository.simpan_anomali(hasil, hapus_deret=hapus, watermark=watermark_baru)
+        total['deret'] += jumlah_deret
+        total['anomali'] += len(hasil)
+        if log:
+            log('daerah {}-{}: {} deret, {} anomali'.format(batch[0], batch[-1], jumlah_deret, len(hasil)))
+    if not kelompok:
+        # Tidak ada baris baru: watermark tetap dimajukan
+        repository.simpan_anomali([], watermark=id_terakhir)
+    return {"mode": mode, "deret": total['deret'], "anomali": total['anomali'], "id_terakhir": id_terakhir}
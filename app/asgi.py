@@ -0,0 +1,758 @@
+"""
+Mode async (ASGI) dengan Quart dan aiomysql, dijalankan dengan:
+    hypercorn app.asgi:asgi_app
+
+Route sama dengan mode sync (app.routes). Query database berjalan di event loop lewat
+app.async_db (pool aiomysql, atau SQLite di thread khusus untuk pengembangan dan test),
+sedangkan kerja CPU (pandas, HP filter, model) dikirim ke thread pool berukuran tetap agar
+event loop tidak terblokir. Setiap route punya batas request bersamaan; request yang
+menunggu terlalu lama mendapat 503.
+
+Watermark conditional GET dan ingest memakai fungsi dan repository sync yang sama dengan
+mode sync, dijalankan di thread pool; ETag kedua mode identik untuk data yang sama.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+import pandas as pd
+from dotenv import load_dotenv
+from quart import Quart, Response, jsonify, make_response, request
+
+from .async_db import (
+    async_db_connection, async_pool_stats, buka_cursor, close_async_pool, fetchall, fetchone, kelas_repository,
+)
+from .db_connection import DatabaseConnectionError
+from .http_cache import REFERENCE_MAX_AGE, SERIES_MAX_AGE, belum_berubah, hitung_etag, kunci_validator, validator_cache
+from .ingest import IngestError
+from .model_registry import model_registry
+from .prediction_cache import prediction_cache
+from .repository import (
+    HARGA_BULANAN, HARGA_KOMODITAS_PK, awal_bulan, baris_harga_bulanan, sql_anomali_harga,
+    sql_export_harga,
+)
+from .routes import (
+    FORMAT_DERET, HARGA_STREAM_CHUNK, INGEST_MAX_BYTES, awal_window, cek_ingest, cek_jumlah_deret, format_anomali,
+    format_harga_bulanan, format_ingest, hitung_harga_normal, indeks_downsampling, jalankan_ingest, lengkapi_deret_kosong,
+    parse_anomali_harga, parse_export_harga, parse_horizon, parse_id_daerah,
+    parse_permintaan_batch, parse_points, pasangan_kosong, pesan_granularity_tidak_valid, pilih_granularity,
+    prediksi_batch, prediksi_dari_data, start_date_time_range, stats_inference, susun_deret_banyak,
+    watermark_daerah, watermark_deret_harga, watermark_harga_terakhir, watermark_inflasi, watermark_komoditas,
+)
+from .forecast import rollout_stats
+from .metrics import METRICS_ENABLED, METRICS_SERVER_TIMING, batalkan_request, mulai_request, registry, selesai_request
+from .inference_server import INFERENCE_MODE, InferenceUnavailableError
+from .scalers import scaler_store
+from .serialization import FORMAT_ROWS, pilih_format, render_deret
+from .streaming import encode_cursor
+from utils.hp_filter import HP_LAMBDA, HP_LAMBDA_BULANAN
+from utils.preprocessing_prediction import susun_fitur_prediksi
+
+# Muat variabel dari file .env
+load_dotenv()
+
+# Jumlah thread untuk kerja CPU (pandas, HP filter, model)
+ASYNC_CPU_WORKERS = int(os.getenv('ASYNC_CPU_WORKERS', os.cpu_count() or 4))
+# Batas request bersamaan per route, contoh: "prediksi=4,harga_normal=8"
+ASYNC_ROUTE_LIMITS = os.getenv('ASYNC_ROUTE_LIMITS', 'prediksi=4,prediksi_batch=2,harga_normal=8,harga_komoditas_batch=4')
+ASYNC_ROUTE_DEFAULT_LIMIT = int(os.getenv('ASYNC_ROUTE_DEFAULT_LIMIT', 64))
+# Batas waktu (detik) menunggu giliran sebelum 503
+ASYNC_ROUTE_WAIT_TIMEOUT = float(os.getenv('ASYNC_ROUTE_WAIT_TIMEOUT', 5))
+
+
+def parse_route_limits(nilai):
+    """
+    Membaca batas per route dari string "nama=angka,nama=angka".
+    """
+    limits = {}
+    for item in (nilai or '').split(','):
+        if not item.strip():
+            continue
+        nama, _, angka = item.partition('=')
+        limits[nama.strip()] = int(angka)
+    return limits
+
+
+class RouteLimiter:
+    """
+    Semaphore per route. Dibuat saat pertama dipakai agar terikat ke event loop yang berjalan.
+    """
+
+    def __init__(self, limits, default_limit, wait_timeout):
+        self.limits = limits
+        self.default_limit = default_limit
+        self.wait_timeout = wait_timeout
+        self._semaphores = {}
+        self._stats = {}
+
+    def _semaphore(self, nama):
+        if nama not in self._semaphores:
+            self._semaphores[nama] = asyncio.Semaphore(self.limits.get(nama, self.default_limit))
+            self._stats[nama] = {"limit": self.limits.get(nama, self.default_limit), "active": 0, "rejected": 0}
+        return self._semaphores[nama]
+
+    def __call__(self, nama):
+        def decorator(view):
+            @wraps(view)
+            async def wrapper(*args, **kwargs):
+                semaphore = self._semaphore(nama)
+                try:
+                    await asyncio.wait_for(semaphore.acquire(), self.wait_timeout)
+                except asyncio.TimeoutError:
+                    self._stats[nama]['rejected'] += 1
+                    return jsonify({
+                        "error": True,
+                        "message": "Server sibuk, coba lagi beberapa saat lagi ({})".format(nama)
+                    }), 503
+                self._stats[nama]['active'] += 1
+                try:
+                    return await view(*args, **kwargs)
+                finally:
+                    self._stats[nama]['active'] -= 1
+                    semaphore.release()
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return {nama: dict(stats) for nama, stats in self._stats.items()}
+
+
+cpu_executor = ThreadPoolExecutor(max_workers=ASYNC_CPU_WORKERS, thread_name_prefix='cpu')
+dibatasi = RouteLimiter(parse_route_limits(ASYNC_ROUTE_LIMITS), ASYNC_ROUTE_DEFAULT_LIMIT, ASYNC_ROUTE_WAIT_TIMEOUT)
+
+
+async def jalankan_cpu(fn, *args):
+    """
+    Menjalankan fungsi CPU-bound di thread pool tanpa memblokir event loop.
+    """
+    loop = asyncio.get_running_loop()
+    # Context disalin agar span di thread pool tercatat ke request yang menjalankannya
+    return await loop.run_in_executor(cpu_executor, partial(contextvars.copy_context().run, fn, *args))
+
+
+def conditional(watermark_fn, max_age=SERIES_MAX_AGE):
+    """
+    Versi async app.http_cache.conditional: watermark dihitung di thread pool dengan fungsi
+    dan validator_cache yang sama dengan mode sync, lalu 304 jika If-None-Match (atau
+    If-Modified-Since) masih cocok.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            kunci = kunci_validator(view.__name__, kwargs, request.query_string)
+            try:
+                validator = await jalankan_cpu(
+                    validator_cache.get_or_compute, kunci, partial(watermark_fn, request.args, **kwargs)
+                )
+            except DatabaseConnectionError:
+                raise
+            except Exception as e:
+                # Watermark gagal dihitung, layani request seperti biasa tanpa validator
+                print(f"Error: watermark {view.__name__} gagal: '{e}'")
+                return await view(*args, **kwargs)
+
+            etag = hitung_etag(validator.parts, request.query_string, request.headers.get('Accept', ''))
+            if belum_berubah(request.if_none_match, request.if_modified_since, etag, validator.diperbarui):
+                response = await make_response('', 304)
+            else:
+                response = await make_response(await view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if validator.diperbarui is not None:
+                response.last_modified = validator.diperbarui
+            response.headers['Cache-Control'] = 'public, max-age={}'.format(max_age)
+            response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
+
+
+def response_format(hasil):
+    body, status, mimetype = hasil
+    return Response(body, status=status, mimetype=mimetype)
+
+
+def pesan_format_tidak_valid():
+    return jsonify({"error": True, "message": "format harus salah satu dari {}".format(', '.join(FORMAT_DERET))}), 400
+
+
+# Hasil deteksi rollup harga_bulanan untuk proses ini (lihat Repository.pakai_harga_bulanan)
+_harga_bulanan = {"pakai": None, "dicek": 0.0}
+
+
+async def pakai_harga_bulanan():
+    """
+    Versi async Repository.pakai_harga_bulanan: rollup dipakai sesuai HARGA_BULANAN,
+    default setelah backfill pertama mencatat watermark.
+    """
+    if HARGA_BULANAN in ('0', '1'):
+        return HARGA_BULANAN == '1'
+    if _harga_bulanan['pakai'] or time.monotonic() - _harga_bulanan['dicek'] < kelas_repository().HARGA_BULANAN_CEK_ULANG:
+        return bool(_harga_bulanan['pakai'])
+    try:
+        row = await fetchone("SELECT COUNT(*) FROM rollup_watermark WHERE nama = %s", ('harga_bulanan',))
+        pakai = bool(row[0])
+    except DatabaseConnectionError:
+        raise
+    except Exception:
+        # Tabel rollup belum dibuat
+        pakai = False
+    _harga_bulanan.update(pakai=pakai, dicek=time.monotonic())
+    return pakai
+
+
+async def deret_harga_bulanan(daerah_id, komoditas_id, start_date):
+    """Versi async Repository.deret_harga_bulanan."""
+    rows = await fetchall(kelas_repository().sql_deret_harga_bulanan(await pakai_harga_bulanan()),
+                          (daerah_id, komoditas_id, awal_bulan(start_date)))
+    return baris_harga_bulanan(rows)
+
+
+def create_asgi_app():
+    app = Quart(__name__)
+    # Batas body Quart (default 16 MB) disamakan dengan batas ingest
+    app.config['MAX_CONTENT_LENGTH'] = INGEST_MAX_BYTES
+
+    @app.errorhandler(DatabaseConnectionError)
+    async def handle_database_error(e):
+        # Gagal meminjam koneksi dari pool (database mati atau pool penuh)
+        return jsonify({"error": str(e)}), e.status_code
+
+    @app.errorhandler(InferenceUnavailableError)
+    async def handle_inference_error(e):
+        # Proses inference bersama mati, sedang restart, atau terlalu lama menjawab
+        return jsonify({"error": str(e)}), e.status_code
+
+    @app.after_request
+    async def cors(response):
+        # Setara dengan CORS(app) di run.py untuk mode sync
+        response.headers.setdefault('Access-Control-Allow-Origin', '*')
+        return response
+
+    @app.before_serving
+    async def startup():
+        # Load model di thread pool agar server langsung bisa menerima koneksi
+        if os.getenv('MODEL_WARMUP', '1') == '1' and INFERENCE_MODE != 'server':
+            await jalankan_cpu(model_registry.warm_up)
+
+    @app.after_serving
+    async def shutdown():
+        await close_async_pool()
+
+    if METRICS_ENABLED:
+        @app.before_request
+        async def mulai_metrics():
+            mulai_request(request.url_rule.rule if request.url_rule is not None else 'unmatched')
+
+        @app.after_request
+        async def selesai_metrics(response):
+            timing = selesai_request(request.method, response.status_code)
+            if timing and METRICS_SERVER_TIMING:
+                response.headers['Server-Timing'] = timing
+            return response
+
+        @app.teardown_request
+        async def bersihkan_metrics(exc):
+            batalkan_request()
+
+    @app.route('/harga_komoditas', methods=['GET'])
+    @dibatasi('harga_komoditas')
+    async def get_time_series():
+        """
+        Export data harga_komoditas, dikirim bertahap dari cursor server-side (SSDictCursor).
+        Parameter sama dengan mode sync.
+        """
+        try:
+            filters, after, limit, format_output = parse_export_harga(request.args)
+        except ValueError as e:
+            return jsonify({"error": True, "message": str(e)}), 400
+        query, params = sql_export_harga(filters, after, limit)
+
+        dumps = app.json.dumps
+        mimetype = 'application/x-ndjson' if format_output == 'ndjson' else 'application/json'
+
+        def tulis(rows, first):
+            if format_output == 'ndjson':
+                return ''.join(dumps(row) + '\n' for row in rows)
+            body = ','.join(dumps(row) for row in rows)
+            return body if first else ',' + body
+
+        if limit is not None:
+            rows = await fetchall(query, params, dictionary=True)
+            body = tulis(rows, True) if format_output == 'ndjson' else '[' + tulis(rows, True) + ']\n'
+            response = Response(body, mimetype=mimetype)
+            if len(rows) == limit:
+                response.headers['X-Next-Cursor'] = encode_cursor(rows[-1]['tanggal_harga'], rows[-1][HARGA_KOMODITAS_PK])
+            return response
+
+        async def generate():
+            if format_output != 'ndjson':
+                yield '['
+            first = True
+            async with async_db_connection() as connection:
+                async with buka_cursor(connection, dictionary=True, streaming=True) as cursor:
+                    await cursor.execute(query, params)
+                    while True:
+                        rows = await cursor.fetchmany(HARGA_STREAM_CHUNK)
+                        if not rows:
+                            break
+                        yield tulis(rows, first)
+                        first = False
+            if format_output != 'ndjson':
+                yield ']\n'
+
+        return Response(generate(), mimetype=mimetype)
+
+    @app.route('/harga_komoditas/<int:daerah_id>/<int:komoditas_id>', methods=['GET'])
+    @dibatasi('harga_komoditas_deret')
+    @conditional(watermark_deret_harga)
+    async def get_time_series_by_region_and_commodity(daerah_id, komoditas_id):
+        time_range = request.args.get('timeRange', default=1, type=int)
+        format_output = pilih_format(request)
+        if format_output not in FORMAT_DERET:
+            return pesan_format_tidak_valid()
+
+        granularity = pilih_granularity(request)
+        if granularity is None:
+            return jsonify(pesan_granularity_tidak_valid()), 400
+        try:
+            points = parse_points(request.args.get('points'))
+        except ValueError as e:
+            return jsonify({"error": True, "message": "Parameter points tidak valid: {}".format(e)}), 400
+
+        start_date_str = start_date_time_range(time_range)
+        description = "Data harga komoditas{} dalam {} tahun terakhir untuk daerah {} dan komoditas {}.".format(
+            ' bulanan' if granularity == 'month' else '', time_range, daerah_id, komoditas_id
+        )
+        not_found = {
+            "error": True,
+            "message": "Data not found for daerah_id: {} and komoditas_id: {} in the last {} year(s)".format(
+                daerah_id, komoditas_id, time_range
+            )
+        }
+        try:
+            if granularity == 'month':
+                rows = await deret_harga_bulanan(daerah_id, komoditas_id, start_date_str)
+                if not rows:
+                    return jsonify(not_found), 404
+                indeks = indeks_downsampling([row[0] for row in rows], [row[2] for row in rows], points)
+                if indeks is not None:
+                    rows = [rows[i] for i in indeks]
+                if format_output != FORMAT_ROWS:
+                    return response_format(await jalankan_cpu(
+                        render_deret, format_output, [row[0] for row in rows], [row[2] for row in rows], 'harga', description
+                    ))
+                return jsonify({
+                    "error": False, "message": "Success", "prices": format_harga_bulanan(rows), "description": description
+                })
+
+            if format_output != FORMAT_ROWS:
+                rows = await fetchall("""
+                    SELECT tanggal_harga, harga
+                    FROM harga_komoditas
+                    WHERE daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s
+                    ORDER BY tanggal_harga ASC
+                """, (daerah_id, komoditas_id, start_date_str))
+                if not rows:
+                    return jsonify(not_found), 404
+                df = pd.DataFrame(list(rows), columns=['tanggal_harga', 'harga'])
+                indeks = await jalankan_cpu(
+                    indeks_downsampling, df['tanggal_harga'], pd.to_numeric(df['harga']).to_numpy(), points
+                )
+                if indeks is not None:
+                    df = df.iloc[indeks]
+                return response_format(await jalankan_cpu(
+                    render_deret, format_output, df['tanggal_harga'], pd.to_numeric(df['harga']), 'harga', description
+                ))
+
+            prices = await fetchall("""
+                SELECT *
+                FROM harga_komoditas
+                WHERE daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s
+                ORDER BY tanggal_harga ASC
+            """, (daerah_id, komoditas_id, start_date_str), dictionary=True)
+            if not prices:
+                return jsonify(not_found), 404
+            indeks = await jalankan_cpu(
+                indeks_downsampling, [price['tanggal_harga'] for price in prices],
+                [float(price['harga']) for price in prices], points
+            )
+            if indeks is not None:
+                prices = [prices[i] for i in indeks]
+            for price in prices:
+                if hasattr(price['tanggal_harga'], 'strftime'):
+                    price['tanggal_harga'] = price['tanggal_harga'].strftime('%d-%m-%Y')
+            return jsonify({"error": False, "message": "Success", "prices": prices, "description": description})
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/harga_komoditas/last/<int:daerah_id>/<int:komoditas_id>', methods=['GET'])
+    @dibatasi('harga_komoditas_last')
+    @conditional(watermark_harga_terakhir)
+    async def get_last_price(daerah_id, komoditas_id):
+        try:
+            last_price = await fetchone("""
+                SELECT *
+                FROM harga_komoditas
+                WHERE daerah_id = %s AND komoditas_id = %s
+                ORDER BY tanggal_harga DESC
+                LIMIT 1
+            """, (daerah_id, komoditas_id), dictionary=True)
+            if not last_price:
+                return jsonify({
+                    "error": True,
+                    "message": "No data found for daerah_id: {} and komoditas_id: {}".format(daerah_id, komoditas_id)
+                }), 404
+            if hasattr(last_price['tanggal_harga'], 'strftime'):
+                last_price['tanggal_harga'] = last_price['tanggal_harga'].strftime('%d-%m-%Y')
+            return jsonify({
+                "error": False,
+                "message": "Success",
+                "last_price": last_price,
+                "description": "Data harga komoditas terakhir untuk daerah {} dan komoditas {}.".format(daerah_id, komoditas_id)
+            })
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/harga_komoditas/batch', methods=['GET', 'POST'])
+    @dibatasi('harga_komoditas_batch')
+    async def get_time_series_batch():
+        """
+        Banyak deret harga sekaligus. Parameter sama dengan mode sync; query di event loop,
+        pengelompokan, trend HP dan downsampling di thread pool.
+        """
+        sumber = ((await request.get_json(silent=True)) or {}) if request.method == 'POST' else request.args
+        try:
+            permintaan = parse_permintaan_batch(sumber)
+        except ValueError as e:
+            return jsonify({"error": True, "message": str(e)}), 400
+
+        try:
+            bulanan = permintaan['granularity'] == 'month'
+            # Dicek sebelum meminjam koneksi agar tidak memegang dua koneksi pool sekaligus
+            rollup = bulanan and await pakai_harga_bulanan()
+            time_range = permintaan['time_range']
+            start_date = start_date_time_range(time_range)
+            async with async_db_connection() as connection:
+                async with buka_cursor(connection) as cursor:
+                    daerah_ids = permintaan['daerah_id']
+                    if daerah_ids == 'all':
+                        await cursor.execute("SELECT daerah_id FROM daerah ORDER BY daerah_id ASC")
+                        daerah_ids = [row[0] for row in await cursor.fetchall()]
+                    komoditas_ids = permintaan['komoditas_id']
+                    if komoditas_ids == 'all':
+                        await cursor.execute("SELECT id_komoditas FROM komoditas ORDER BY id_komoditas ASC")
+                        komoditas_ids = [row[0] for row in await cursor.fetchall()]
+                    try:
+                        cek_jumlah_deret(daerah_ids, komoditas_ids)
+                    except ValueError as e:
+                        return jsonify({"error": True, "message": str(e)}), 400
+                    await cursor.execute(
+                        kelas_repository().sql_deret_harga_banyak(len(daerah_ids), len(komoditas_ids), bulanan, rollup),
+                        tuple(daerah_ids) + tuple(komoditas_ids) + (awal_bulan(start_date) if bulanan else start_date,)
+                    )
+                    rows = await cursor.fetchall()
+            deret = await jalankan_cpu(susun_deret_banyak, rows, bulanan, time_range, permintaan['points'],
+                                       permintaan['trend'], permintaan['last'])
+
+            kosong = pasangan_kosong(deret, daerah_ids, komoditas_ids)
+            rows_terakhir = []
+            if kosong and permintaan['last']:
+                d_kosong, k_kosong = sorted({d for d, _ in kosong}), sorted({k for _, k in kosong})
+                rows_terakhir = await fetchall(kelas_repository().sql_harga_terakhir_banyak(len(d_kosong), len(k_kosong)),
+                                               tuple(d_kosong) + tuple(k_kosong))
+            lengkapi_deret_kosong(deret, kosong, rows_terakhir, permintaan)
+
+            return jsonify({
+                "error": False,
+                "message": "Success",
+                "series": deret,
+                "description": "Data harga komoditas{} dalam {} tahun terakhir untuk {} pasangan daerah x komoditas.".format(
+                    ' bulanan' if bulanan else '', time_range, len(deret)
+                )
+            })
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/anomali_harga', methods=['GET'])
+    async def get_anomali_harga():
+        try:
+            filters, limit = parse_anomali_harga(request.args)
+        except ValueError as e:
+            return jsonify({"error": True, "message": str(e)}), 400
+        try:
+            query, params = sql_anomali_harga(filters, limit)
+            rows = await fetchall(query, params, dictionary=True)
+            return jsonify({
+                "error": False,
+                "message": "Success",
+                "anomali": format_anomali(rows),
+                "description": "Anomali harga komoditas terbaru ({} baris).".format(len(rows))
+            })
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/harga_normal/<int:daerah_id>/<int:komoditas_id>', methods=['GET'])
+    @dibatasi('harga_normal')
+    @conditional(watermark_deret_harga)
+    async def get_harga_normal_time_range(daerah_id, komoditas_id):
+        time_range = request.args.get('timeRange', default=1, type=int)
+        format_output = pilih_format(request)
+        if format_output not in FORMAT_DERET:
+            return pesan_format_tidak_valid()
+
+        granularity = pilih_granularity(request)
+        if granularity is None:
+            return jsonify(pesan_granularity_tidak_valid()), 400
+        try:
+            points = parse_points(request.args.get('points'))
+        except ValueError as e:
+            return jsonify({"error": True, "message": "Parameter points tidak valid: {}".format(e)}), 400
+
+        try:
+            start_date_str = start_date_time_range(time_range)
+            if granularity == 'month':
+                data = [(row[0], row[2]) for row in await deret_harga_bulanan(daerah_id, komoditas_id, start_date_str)]
+            else:
+                data = await fetchall("""
+                    SELECT tanggal_harga, harga
+                    FROM harga_komoditas
+                    WHERE daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s
+                    ORDER BY tanggal_harga ASC
+                """, (daerah_id, komoditas_id, start_date_str))
+            if not data:
+                return jsonify({
+                    "error": True,
+                    "message": f"No data found for daerah_id: {daerah_id}, komoditas_id: {komoditas_id}, in the last {time_range} year(s)."
+                }), 404
+
+            description = f"Harga normal hasil dari aplikasi HP filter dalam {time_range} tahun terakhir untuk komoditas tertentu."
+
+            def hitung():
+                df = hitung_harga_normal(daerah_id, komoditas_id, time_range, list(data),
+                                         HP_LAMBDA_BULANAN if granularity == 'month' else HP_LAMBDA)
+                indeks = indeks_downsampling(df['tanggal_harga'], df['Harga_Normal'].to_numpy(), points)
+                if indeks is not None:
+                    df = df.iloc[indeks].reset_index(drop=True)
+                if format_output != FORMAT_ROWS:
+                    return render_deret(format_output, df['tanggal_harga'], df['Harga_Normal'].to_numpy(),
+                                        'Harga_Normal', description)
+                df['tanggal_harga'] = pd.to_datetime(df['tanggal_harga']).dt.strftime('%d-%m-%Y')
+                return df[['tanggal_harga', 'Harga_Normal']].to_dict(orient='records')
+
+            hasil = await jalankan_cpu(hitung)
+            if format_output != FORMAT_ROWS:
+                return response_format(hasil)
+            return jsonify({"error": False, "message": "Success", "prices": hasil, "description": description})
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/komoditas', methods=['GET'])
+    @dibatasi('komoditas')
+    @conditional(watermark_komoditas, max_age=REFERENCE_MAX_AGE)
+    async def get_all_komoditas():
+        try:
+            data = await fetchall("SELECT * FROM komoditas")
+            if not data:
+                return jsonify({"message": "No data found in komoditas table"}), 404
+            return jsonify({
+                "error": False,
+                "message": "Success",
+                "data": [{"id_komoditas": row[0], "nama_komoditas": row[1], "img_url": row[2]} for row in data]
+            })
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/inflasi/<int:id_daerah>', methods=['GET'])
+    @dibatasi('inflasi')
+    @conditional(watermark_inflasi)
+    async def get_last_inflasi(id_daerah):
+        try:
+            data = await fetchone("""
+                SELECT tingkat_inflasi, tanggal_inflasi
+                FROM inflasi
+                WHERE id_daerah = %s
+                ORDER BY tanggal_inflasi DESC
+                LIMIT 1
+            """, (id_daerah,))
+            if not data:
+                return jsonify({"message": f"No data found for id_daerah: {id_daerah}"}), 404
+            return jsonify({
+                "error": False,
+                "message": "Success",
+                "data": {"tingkat_inflasi": str(data[0]), "tanggal_inflasi": data[1]}
+            })
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/daerah', methods=['GET'])
+    @dibatasi('daerah')
+    @conditional(watermark_daerah, max_age=REFERENCE_MAX_AGE)
+    async def get_all_daerah():
+        try:
+            data = await fetchall("SELECT daerah_id, nama_daerah, img_url FROM daerah")
+            if not data:
+                return jsonify({"message": "No data found in daerah table"}), 404
+            return jsonify({
+                "error": False,
+                "message": "Success",
+                "data": [{"daerah_id": row[0], "nama_daerah": row[1], "img_url": row[2]} for row in data]
+            })
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    async def ambil_data_prediksi(id_daerah_list):
+        """
+        Versi async dari fitur_prediksi_batch: query di event loop,
+        penyusunan matriks di thread pool.
+        """
+        # Dicek sebelum meminjam koneksi agar tidak memegang dua koneksi pool sekaligus
+        rollup = await pakai_harga_bulanan()
+        async with async_db_connection() as connection:
+            async with buka_cursor(connection) as cursor:
+                if id_daerah_list == 'all':
+                    await cursor.execute("SELECT daerah_id FROM daerah ORDER BY daerah_id ASC")
+                    id_daerah_list = [row[0] for row in await cursor.fetchall()]
+                if not id_daerah_list:
+                    return {}, {}, {}
+                # Cukup window terakhir jika semua daerah sudah punya scaler tersimpan
+                sejak = awal_window([
+                    scaler_store.get(model_registry.path_for(id_daerah), id_daerah) for id_daerah in id_daerah_list
+                ])
+                params = tuple(id_daerah_list) + ((sejak,) if sejak else ())
+                await cursor.execute(kelas_repository().sql_fitur_bulanan(len(id_daerah_list), bool(sejak), rollup), params)
+                rows = await cursor.fetchall()
+        return await jalankan_cpu(susun_fitur_prediksi, id_daerah_list, rows)
+
+    @app.route('/prediksi/<int:id_daerah>', methods=['GET'])
+    @dibatasi('prediksi')
+    async def prediksi_inflasi_real(id_daerah):
+        """
+        Prediksi inflasi 1 bulan ke depan. Mode async tidak memakai cache prediksi
+        karena cache tersebut memakai lock thread (lihat app.prediction_cache).
+        """
+        try:
+            horizon = parse_horizon(request.args.get('horizon'))
+        except ValueError as e:
+            return jsonify({"error": True, "message": "Parameter horizon tidak valid: {}".format(e)}), 400
+
+        data_per_daerah, inflasi_terakhir, tanggal = await ambil_data_prediksi([id_daerah])
+        fitur = data_per_daerah[id_daerah]
+        if isinstance(fitur, dict):
+            return jsonify(fitur), 400
+        payload, status = await jalankan_cpu(
+            prediksi_dari_data, id_daerah, fitur, tanggal[id_daerah], inflasi_terakhir[id_daerah], horizon
+        )
+        return jsonify(payload), status
+
+    @app.route('/prediksi', methods=['GET', 'POST'])
+    @dibatasi('prediksi_batch')
+    async def prediksi_inflasi_batch():
+        if request.method == 'POST':
+            body = (await request.get_json(silent=True)) or {}
+            nilai, nilai_horizon = body.get('id_daerah'), body.get('horizon')
+        else:
+            nilai, nilai_horizon = request.args.get('id_daerah'), request.args.get('horizon')
+
+        try:
+            id_daerah_list = parse_id_daerah(nilai)
+        except (TypeError, ValueError):
+            return jsonify({"error": True, "message": "Parameter id_daerah tidak valid"}), 400
+        try:
+            horizon = parse_horizon(nilai_horizon)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": True, "message": "Parameter horizon tidak valid: {}".format(e)}), 400
+        if not id_daerah_list:
+            return jsonify({"error": True, "message": "Parameter id_daerah wajib diisi (list ID atau 'all')"}), 400
+
+        try:
+            data_per_daerah, inflasi_terakhir, tanggal = await ambil_data_prediksi(id_daerah_list)
+            hasil = await jalankan_cpu(prediksi_batch, data_per_daerah, inflasi_terakhir, tanggal, horizon)
+            return jsonify({"error": False, "message": "Success", "data": hasil})
+        except (DatabaseConnectionError, InferenceUnavailableError):
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/models/stats', methods=['GET'])
+    async def get_model_stats():
+        return jsonify(dict(model_registry.stats(), rollout=rollout_stats.stats()))
+
+    @app.route('/prediksi/cache/stats', methods=['GET'])
+    async def get_prediction_cache_stats():
+        return jsonify(prediction_cache.stats())
+
+    @app.route('/ingest/<jenis>', methods=['POST'])
+    @dibatasi('ingest')
+    async def ingest_data(jenis):
+        """
+        Ingest batch harga atau inflasi, parameter sama dengan mode sync. Parsing dan upsert
+        berjalan di thread pool lewat repository sync (executemany per batch).
+        """
+        format_data = format_ingest(request.args, request.mimetype)
+        ditolak = cek_ingest(jenis, request.headers.get('Authorization', ''), request.content_length, format_data)
+        if ditolak is not None:
+            return jsonify(ditolak[0]), ditolak[1]
+
+        try:
+            body = await request.get_data()
+            hasil = await jalankan_cpu(jalankan_ingest, jenis, body, format_data, request.args.get('on_error') == 'skip')
+            return jsonify({"error": False, "message": "Success", "data": hasil})
+        except IngestError as e:
+            return jsonify({"error": True, "message": str(e), "errors": e.errors}), 400
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/inference/stats', methods=['GET'])
+    async def get_inference_stats():
+        # Statistik proses inference bersama diminta lewat socket, jadi di thread pool
+        return jsonify(await jalankan_cpu(stats_inference))
+
+    @app.route('/prediksi/scalers/stats', methods=['GET'])
+    async def get_scaler_stats():
+        return jsonify(scaler_store.stats())
+
+    @app.route('/db/stats', methods=['GET'])
+    async def get_db_stats():
+        return jsonify(async_pool_stats())
+
+    @app.route('/async/stats', methods=['GET'])
+    async def get_async_stats():
+        """
+        Batas dan jumlah request aktif per route, serta ukuran thread pool CPU.
+        """
+        return jsonify({"cpu_workers": ASYNC_CPU_WORKERS, "routes": dibatasi.stats()})
+
+    @app.route('/metrics', methods=['GET'])
+    async def get_metrics():
+        if not METRICS_ENABLED:
+            return jsonify({"error": True, "message": "Metrik dinonaktifkan (METRICS_ENABLED=0)"}), 404
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    return app
+
+
+asgi_app = create_asgi_app()
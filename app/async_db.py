@@ -0,0 +1,209 @@
+"""
+Akses database untuk mode async. Backend mengikuti repository proses ini (DB_BACKEND):
+- mysql: pool aiomysql per event loop
+- sqlite: koneksi SQLiteRepository yang dijalankan di satu thread khusus, untuk
+  pengembangan lokal dan test tanpa MySQL (query diserialkan, bukan untuk produksi)
+
+Route memakai async_db_connection + buka_cursor atau fetchall/fetchone dengan query
+berplaceholder %s; SQL yang bergantung dialek disusun lewat kelas_repository().
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, asynccontextmanager
+from functools import partial
+
+from dotenv import load_dotenv
+
+from .db_connection import DatabaseConnectionError, PoolExhaustedError
+from .metrics import inc, span
+from .repository import get_repository
+
+# Muat variabel dari file .env
+load_dotenv()
+
+_pool = None
+_pool_lock = None
+_stats = {"acquired": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+# Batas waktu (detik) menunggu koneksi kosong, sama dengan pool sync
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+
+
+async def get_async_pool():
+    """
+    Pool aiomysql milik event loop ini, dibuat saat pertama kali dibutuhkan.
+    """
+    global _pool, _pool_lock
+    if _pool is None:
+        if _pool_lock is None:
+            _pool_lock = asyncio.Lock()
+        async with _pool_lock:
+            if _pool is None:
+                import aiomysql
+                try:
+                    _pool = await aiomysql.create_pool(
+                        host=os.getenv('DB_HOST'),
+                        user=os.getenv('DB_USER'),
+                        password=os.getenv('DB_PASSWORD'),
+                        db=os.getenv('DB_NAME'),
+                        minsize=int(os.getenv('ASYNC_DB_POOL_MIN', 1)),
+                        maxsize=int(os.getenv('ASYNC_DB_POOL_SIZE', 20)),
+                        pool_recycle=int(float(os.getenv('DB_POOL_RECYCLE', 1800))),
+                        autocommit=True,
+                    )
+                except Exception as e:
+                    raise DatabaseConnectionError("Database connection failed: {}".format(e))
+    return _pool
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+
+# Semua operasi SQLite mode async berjalan di thread ini, karena koneksi sqlite3 terikat thread
+_sqlite_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+
+
+async def _sqlite(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_sqlite_executor, partial(fn, *args))
+
+
+class _CursorSQLite:
+    """Cursor SQLiteRepository dengan method async seperti cursor aiomysql."""
+
+    def __init__(self, repository, connection, dictionary):
+        self._repository = repository
+        self._connection = connection
+        self._dictionary = dictionary
+        self._cursor = None
+
+    async def __aenter__(self):
+        self._cursor = await _sqlite(self._repository._cursor, self._connection, self._dictionary)
+        return self
+
+    async def __aexit__(self, *exc):
+        await _sqlite(self._cursor.close)
+
+    async def execute(self, query, params=()):
+        await _sqlite(self._cursor.execute, self._repository._sql(query), params)
+
+    async def fetchall(self):
+        return await _sqlite(self._cursor.fetchall)
+
+    async def fetchone(self):
+        return await _sqlite(self._cursor.fetchone)
+
+    async def fetchmany(self, size):
+        return await _sqlite(self._cursor.fetchmany, size)
+
+
+class _KoneksiSQLite:
+    def __init__(self, repository, connection):
+        self.repository = repository
+        self.connection = connection
+
+
+@asynccontextmanager
+async def _sqlite_connection(repository):
+    stack = ExitStack()
+    connection = await _sqlite(stack.enter_context, repository.connection())
+    try:
+        yield _KoneksiSQLite(repository, connection)
+    finally:
+        await _sqlite(stack.close)
+
+
+def kelas_repository():
+    """
+    Kelas repository backend proses ini; classmethod sql_* dan konstanta dialeknya dipakai
+    untuk menyusun query mode async.
+    """
+    return type(get_repository())
+
+
+def buka_cursor(connection, dictionary=False, streaming=False):
+    """
+    Cursor async untuk koneksi dari async_db_connection, dipakai dengan `async with`.
+
+    :param streaming: True untuk cursor server-side (MySQL SSCursor) yang dibaca dengan fetchmany.
+    """
+    if isinstance(connection, _KoneksiSQLite):
+        return _CursorSQLite(connection.repository, connection.connection, dictionary)
+    import aiomysql
+    if streaming:
+        return connection.cursor(aiomysql.SSDictCursor if dictionary else aiomysql.SSCursor)
+    return connection.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor)
+
+
+@asynccontextmanager
+async def async_db_connection():
+    """
+    Meminjam koneksi aiomysql dari pool tanpa memblokir event loop. Menunggu paling lama
+    DB_POOL_TIMEOUT detik sebelum PoolExhaustedError, sama seperti pool sync.
+    Dengan DB_BACKEND=sqlite, koneksi SQLiteRepository di thread SQLite.
+    """
+    repository = get_repository()
+    if repository.name == 'sqlite':
+        async with _sqlite_connection(repository) as connection:
+            yield connection
+        return
+
+    pool = await get_async_pool()
+    start = time.monotonic()
+    try:
+        with span('db.acquire'):
+            connection = await asyncio.wait_for(pool.acquire(), POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        _stats['timeouts'] += 1
+        inc('bangkit_db_errors_total', ('mysql',))
+        raise PoolExhaustedError(
+            "Database connection pool exhausted: tidak ada koneksi kosong dalam {} detik.".format(POOL_TIMEOUT)
+        )
+    except Exception as e:
+        inc('bangkit_db_errors_total', ('mysql',))
+        raise DatabaseConnectionError("Database connection failed: {}".format(e))
+    inc('bangkit_db_acquire_total', ('mysql',))
+
+    waited = time.monotonic() - start
+    _stats['acquired'] += 1
+    _stats['wait_seconds_total'] += waited
+    _stats['wait_seconds_max'] = max(_stats['wait_seconds_max'], waited)
+    try:
+        yield connection
+    finally:
+        pool.release(connection)
+
+
+async def fetchall(query, params=(), dictionary=False):
+    async with async_db_connection() as connection:
+        async with buka_cursor(connection, dictionary) as cursor:
+            inc('bangkit_db_queries_total', (get_repository().name,))
+            with span('db.query'):
+                await cursor.execute(query, params)
+            with span('db.fetch'):
+                return await cursor.fetchall()
+
+
+async def fetchone(query, params=(), dictionary=False):
+    async with async_db_connection() as connection:
+        async with buka_cursor(connection, dictionary) as cursor:
+            inc('bangkit_db_queries_total', (get_repository().name,))
+            with span('db.query'):
+                await cursor.execute(query, params)
+            with span('db.fetch'):
+                return await cursor.fetchone()
+
+
+def async_pool_stats():
+    if get_repository().name == 'sqlite':
+        return get_repository().stats()
+    stats = dict(_stats)
+    if _pool is not None:
+        stats.update(size=_pool.maxsize, open=_pool.size, idle=_pool.freesize, in_use=_pool.size - _pool.freesize)
+    return stats
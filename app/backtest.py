@@ -0,0 +1,241 @@
+"""
+Backtest walk-forward model inflasi (`flask --app run backtest`).
+
+Setiap bulan histori yang punya cukup bulan sebelumnya menjadi satu titik uji: input adalah
+`timesteps` bulan sebelumnya (semua komoditas dan inflasi), target adalah inflasi bulan itu.
+Jendela input dibentuk dengan sliding_window_view atas matriks fitur daerah (tanpa salinan
+DataFrame seperti series_to_supervised) dan semua jendela semua daerah yang memakai model
+yang sama diprediksi dalam satu panggilan prediksi_model.
+
+Parameter min-max setiap titik uji hanya dari bulan sampai input terakhirnya (min/max
+berjalan), sama dengan scaler produksi saat bulan itu adalah bulan terakhir, sehingga tidak
+ada informasi dari masa depan. Bobot model tidak dilatih ulang per titik uji.
+
+Daerah dibagi ke BACKTEST_WORKERS proses; setiap proses me-load model sendiri lewat
+model_registry. Metrik per daerah dan model: MAE, RMSE, bias (rata-rata prediksi - aktual)
+dan MAE pembanding naif (inflasi bulan sebelumnya dianggap tetap).
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .inference_server import prediksi_model
+from .model_registry import model_registry, preload_is_fork_safe, semua_model_h5
+from utils.preprocessing_prediction import fitur_prediksi_batch
+
+# Muat variabel dari file .env
+load_dotenv()
+
+# Jumlah proses backtest, 0 untuk jumlah CPU
+BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', 0))
+
+
+def jendela_input(fitur, timesteps):
+    """
+    Semua jendela input satu daerah tanpa menyalin data.
+
+    :param fitur: Matriks (n_bulan, n_fitur) dari fitur_prediksi, kolom terakhir inflasi.
+    :param timesteps: Jumlah bulan input model.
+    :return: Tuple (jendela, target). `jendela` adalah view (n, timesteps, n_fitur) dengan
+             jendela[i] = fitur[i:i + timesteps], `target` adalah indeks baris target
+             (bulan setelah jendela).
+    """
+    if len(fitur) <= timesteps:
+        return np.empty((0, timesteps, fitur.shape[1])), np.zeros(0, dtype=np.int64)
+    # sliding_window_view meletakkan sumbu jendela di belakang: (n, n_fitur, timesteps)
+    jendela = sliding_window_view(fitur[:-1], timesteps, axis=0).swapaxes(1, 2)
+    return jendela, np.arange(timesteps, len(fitur))
+
+
+def scaler_berjalan(fitur):
+    """
+    Parameter min-max setiap baris dari baris pertama sampai baris itu (NaN diabaikan).
+
+    :return: Tuple (data_min, rentang) matriks (n_bulan, n_fitur); rentang nol diganti 1
+             seperti _min_rentang.
+    """
+    data_min = np.fmin.accumulate(fitur, axis=0)
+    rentang = np.fmax.accumulate(fitur, axis=0) - data_min
+    rentang[rentang == 0] = 1.0
+    return data_min, rentang
+
+
+def siapkan_backtest(fitur, tanggal, timesteps, sejak=None):
+    """
+    Input ternormalisasi dan target semua titik uji satu daerah.
+
+    Titik uji dibuang jika ada NaN di jendela input atau di baris target, sama dengan
+    pasangan yang dibuang series_to_supervised(dropnan=True).
+
+    :param sejak: Tanggal target paling awal (yyyy-mm-dd), None untuk semua.
+    :return: Dict input_seq (n, timesteps, n_fitur) float32, aktual, naif, skala dan
+             minimum kolom target, dan tanggal target.
+    """
+    jendela, target = jendela_input(fitur, timesteps)
+    kosong = np.isnan(fitur).any(axis=1)
+    if len(target):
+        valid = ~kosong[target] & ~sliding_window_view(kosong[:-1], timesteps).any(axis=1)
+    else:
+        valid = np.zeros(0, dtype=bool)
+    if sejak is not None:
+        valid &= tanggal[target] >= np.datetime64(sejak, 'D')
+    pilih = np.flatnonzero(valid)
+    target = target[pilih]
+
+    # Skala dari histori sampai bulan input terakhir setiap titik uji
+    data_min, rentang = scaler_berjalan(fitur)
+    akhir_input = target - 1
+    input_seq = (jendela[pilih] - data_min[akhir_input, None, :]) / rentang[akhir_input, None, :]
+    return {
+        "input_seq": input_seq.astype(np.float32),
+        "aktual": fitur[target, -1],
+        "naif": fitur[akhir_input, -1],
+        "min": data_min[akhir_input, -1],
+        "rentang": rentang[akhir_input, -1],
+        "tanggal": tanggal[target],
+    }
+
+
+def metrik(prediksi, aktual, naif):
+    """
+    :return: Dict n, mae, rmse, bias dan mae_naif.
+    """
+    galat = prediksi - aktual
+    return {
+        "n": int(len(galat)),
+        "mae": float(np.mean(np.abs(galat))),
+        "rmse": float(np.sqrt(np.mean(galat ** 2))),
+        "bias": float(np.mean(galat)),
+        "mae_naif": float(np.mean(np.abs(naif - aktual))),
+    }
+
+
+def backtest_daerah(data_per_daerah, tanggal, model_per_daerah, sejak=None):
+    """
+    Backtest sekelompok daerah di proses ini: satu prediksi_model per file model untuk
+    semua jendela semua daerah yang memakainya.
+
+    :param data_per_daerah: Dict id_daerah -> matriks fitur.
+    :param tanggal: Dict id_daerah -> tanggal_inflasi tiap baris fitur.
+    :param model_per_daerah: Dict id_daerah -> list path model yang diuji.
+    :param sejak: Tanggal target paling awal, None untuk semua.
+    :return: List dict per (daerah, model): metrik, rentang tanggal target, atau error.
+    """
+    hasil = []
+    per_model = {}
+    for id_daerah, paths in model_per_daerah.items():
+        for path in paths:
+            per_model.setdefault(path, []).append(id_daerah)
+
+    for path, ids in per_model.items():
+        nama_model = os.path.basename(path)
+        model = model_registry.get_by_path(path)
+        _, timesteps, n_fitur = model.input_shape
+        siap = []
+        for id_daerah in ids:
+            fitur = data_per_daerah[id_daerah]
+            if fitur.shape[1] != n_fitur:
+                error = "Model {} membutuhkan {} fitur, data memiliki {} fitur.".format(nama_model, n_fitur, fitur.shape[1])
+                hasil.append({"daerah_id": id_daerah, "model": nama_model, "error": error})
+                continue
+            data = siapkan_backtest(fitur, tanggal[id_daerah], timesteps or 1, sejak)
+            if not len(data['aktual']):
+                hasil.append({"daerah_id": id_daerah, "model": nama_model, "error": "Data tidak cukup untuk backtest"})
+                continue
+            siap.append((id_daerah, data))
+        if not siap:
+            continue
+
+        # Satu panggilan inference untuk semua jendela semua daerah
+        batch = np.concatenate([data['input_seq'] for _, data in siap], axis=0)
+        preds = prediksi_model(path, batch, None, 1)[:, 0]
+        mulai = 0
+        for id_daerah, data in siap:
+            n = len(data['aktual'])
+            prediksi = np.asarray(preds[mulai:mulai + n], dtype=np.float64) * data['rentang'] + data['min']
+            mulai += n
+            hasil.append(dict(
+                metrik(prediksi, data['aktual'], data['naif']),
+                daerah_id=id_daerah, model=nama_model,
+                awal=str(data['tanggal'][0]), akhir=str(data['tanggal'][-1]),
+            ))
+    return hasil
+
+
+def ringkas_per_model(hasil):
+    """
+    Metrik gabungan semua titik uji per model dari metrik per daerah.
+
+    :return: Dict nama model -> dict daerah, n, mae, rmse, bias dan mae_naif.
+    """
+    total = {}
+    for row in hasil:
+        if 'error' in row:
+            continue
+        t = total.setdefault(row['model'], {"daerah": 0, "n": 0, "ae": 0.0, "se": 0.0, "e": 0.0, "ae_naif": 0.0})
+        t['daerah'] += 1
+        t['n'] += row['n']
+        t['ae'] += row['mae'] * row['n']
+        t['se'] += row['rmse'] ** 2 * row['n']
+        t['e'] += row['bias'] * row['n']
+        t['ae_naif'] += row['mae_naif'] * row['n']
+    return {
+        nama: {
+            "daerah": t['daerah'],
+            "n": t['n'],
+            "mae": t['ae'] / t['n'],
+            "rmse": float(np.sqrt(t['se'] / t['n'])),
+            "bias": t['e'] / t['n'],
+            "mae_naif": t['ae_naif'] / t['n'],
+        }
+        for nama, t in total.items()
+    }
+
+
+def jalankan_backtest(id_daerah_list, semua_model=False, sejak=None, workers=None):
+    """
+    Backtest banyak daerah: fitur semua daerah diambil dengan satu query, lalu daerah
+    dibagi rata ke `workers` proses.
+
+    :param id_daerah_list: List ID wilayah, atau "all".
+    :param semua_model: True untuk menguji setiap daerah dengan model.h5 dan semua model/*.h5,
+                        False untuk model yang dipakai daerah itu di route (path_for).
+    :param sejak: Tanggal target paling awal (yyyy-mm-dd), None untuk semua.
+    :param workers: Jumlah proses, None untuk BACKTEST_WORKERS (0 = jumlah CPU).
+    :return: List dict per (daerah, model) dari backtest_daerah, urut daerah lalu model.
+    """
+    data_per_daerah, _, tanggal = fitur_prediksi_batch(id_daerah_list)
+    hasil = []
+    model_per_daerah = {}
+    for id_daerah, fitur in data_per_daerah.items():
+        if isinstance(fitur, dict):
+            hasil.append({"daerah_id": id_daerah, "model": None, "error": fitur['error']})
+            continue
+        model_per_daerah[id_daerah] = semua_model_h5() if semua_model else [model_registry.path_for(id_daerah)]
+
+    if workers is None:
+        workers = BACKTEST_WORKERS
+    workers = min(workers or os.cpu_count() or 1, len(model_per_daerah))
+    if workers <= 1:
+        if model_per_daerah:
+            hasil.extend(backtest_daerah(data_per_daerah, tanggal, model_per_daerah, sejak))
+    else:
+        kelompok = [ids.tolist() for ids in np.array_split(np.asarray(sorted(model_per_daerah)), workers)]
+        # Runtime TensorFlow tidak aman dipakai setelah fork, jadi proses baru di-spawn
+        context = multiprocessing.get_context('fork' if preload_is_fork_safe() else 'spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(
+                    backtest_daerah,
+                    {i: data_per_daerah[i] for i in ids}, {i: tanggal[i] for i in ids},
+                    {i: model_per_daerah[i] for i in ids}, sejak,
+                )
+                for ids in kelompok
+            ]
+            for future in futures:
+                hasil.extend(future.result())
+    return sorted(hasil, key=lambda row: (row['daerah_id'], row['model'] or ''))
@@ -0,0 +1,266 @@
+import os
+import tempfile
+import time
+
+import click
+import numpy as np
+
+from app.anomali import perbarui_anomali
+from app.backtest import jalankan_backtest, ringkas_per_model
+from app.model_registry import model_registry, semua_model_h5
+from app.numpy_model import NumpyModel, export_model, npz_path_for
+from app.ingest import FORMAT_INGEST, IngestError, baca_file, ingest_batch
+from app.migrations import MIGRASI, MigrasiError, versi_terpasang
+from app.query_plan import cek_query
+from app.repository import TABEL_INGEST, SQLiteRepository, buat_repository, get_repository
+from app.scalers import scaler_store
+from app.synthetic_data import isi_repository
+from utils.preprocessing_prediction import fit_scaler, fitur_prediksi_batch, update_scaler
+
+
+@click.command('export-model')
+@click.option('--parity/--no-parity', default=True, help='Bandingkan output NumPy dengan Keras setelah ekspor.')
+@click.option('--atol', default=1e-5, show_default=True, help='Toleransi selisih absolut maksimum.')
+@click.option('--samples', default=256, show_default=True, help='Jumlah input acak untuk uji kesamaan.')
+def export_model_command(parity, atol, samples):
+    """Ekspor model.h5 dan model/*.h5 ke arsip NumPy (.npz) untuk INFERENCE_BACKEND=numpy."""
+    gagal = False
+    for h5_path in semua_model_h5():
+        npz_path = npz_path_for(h5_path)
+        layers = export_model(h5_path, npz_path)
+        click.echo('{} -> {} ({})'.format(h5_path, npz_path, ', '.join(layers)))
+
+        if not parity:
+            continue
+
+        from tensorflow.keras.models import load_model
+        keras_model = load_model(h5_path, compile=False)
+        numpy_model = NumpyModel(npz_path)
+
+        rng = np.random.default_rng(0)
+        _, timesteps, n_features = keras_model.input_shape
+        x = rng.random((samples, timesteps or 1, n_features), dtype=np.float32)
+        selisih = float(np.max(np.abs(keras_model.predict(x, verbose=0) - numpy_model.predict(x))))
+        status = 'OK' if selisih <= atol else 'GAGAL'
+        gagal = gagal or selisih > atol
+        click.echo('  parity {}: selisih maksimum {:.3e} (atol {:.0e})'.format(status, selisih, atol))
+
+    if gagal:
+        raise SystemExit(1)
+
+
+@click.command('generate-data')
+@click.option('--daerah', 'n_daerah', default=34, show_default=True, help='Jumlah daerah.')
+@click.option('--komoditas', 'n_komoditas', default=5, show_default=True, help='Jumlah komoditas (model bawaan memakai 5).')
+@click.option('--tahun', 'n_tahun', default=5, show_default=True, help='Panjang deret harga harian dalam tahun.')
+@click.option('--seed', default=0, show_default=True)
+@click.option('--sqlite', 'sqlite_path', default=None,
+              help='Tulis ke file SQLite baru (skema dibuat otomatis); default ke backend DB_BACKEND.')
+def generate_data_command(n_daerah, n_komoditas, n_tahun, seed, sqlite_path):
+    """Isi database dengan data sintetis daerah x komoditas x tahun."""
+    if sqlite_path:
+        if os.path.exists(sqlite_path):
+            raise click.ClickException('{} sudah ada'.format(sqlite_path))
+        repository = SQLiteRepository(sqlite_path)
+        repository.buat_schema()
+    else:
+        repository = get_repository()
+    jumlah = isi_repository(repository, n_daerah, n_komoditas, n_tahun, seed=seed)
+    click.echo('{}: {}'.format(repository.name, ', '.join('{} {}'.format(n, tabel) for tabel, n in jumlah.items())))
+
+
+def simpan_scalers(id_daerah_list, penuh=True):
+    """
+    Fit ulang (penuh) atau update inkremental scaler daerah lalu tulis ke file scaler tiap model.
+    Pada mode inkremental daerah yang belum punya scaler tetap di-fit dari seluruh histori.
+    """
+    data_per_daerah, _, tanggal = fitur_prediksi_batch(id_daerah_list)
+    per_model = {}
+    for id_daerah, fitur in data_per_daerah.items():
+        if isinstance(fitur, dict):
+            click.echo('daerah {}: {}'.format(id_daerah, fitur['error']))
+            continue
+        model_path = model_registry.path_for(id_daerah)
+        params = None if penuh else scaler_store.get(model_path, id_daerah)
+        if params is None:
+            params = fit_scaler(fitur, tanggal[id_daerah])
+        else:
+            params = update_scaler(params, fitur, tanggal[id_daerah])
+            if params is None:
+                continue
+        per_model.setdefault(model_path, {})[id_daerah] = params
+
+    for model_path, params_per_daerah in per_model.items():
+        scaler_store.put(model_path, params_per_daerah, fit=penuh, simpan=True)
+        click.echo('{}: {} daerah'.format(model_path, len(params_per_daerah)))
+
+
+@click.command('refit-scalers')
+@click.option('--daerah', 'id_daerah', default='all', show_default=True,
+              help="ID daerah dipisah koma, atau 'all'.")
+@click.option('--inkremental', is_flag=True, help='Hanya perlebar scaler tersimpan dengan bulan baru.')
+def refit_scalers_command(id_daerah, inkremental):
+    """Fit ulang scaler min-max per daerah dari seluruh histori dan simpan di samping file model."""
+    from app.routes import parse_id_daerah
+
+    simpan_scalers(parse_id_daerah(id_daerah), penuh=not inkremental)
+
+
+@click.command('siapkan-ingest')
+def siapkan_ingest_command():
+    """Buat tabel data_versi dan unique key yang dibutuhkan upsert ingest (menjalankan migrasi)."""
+    repository = get_repository()
+    repository.siapkan_ingest()
+    click.echo('{}: skema ingest siap'.format(repository.name))
+
+
+@click.command('migrasi')
+@click.option('--target', type=int, default=None, help='Versi terakhir yang diterapkan (default terbaru).')
+@click.option('--status', is_flag=True, help='Hanya tampilkan migrasi yang sudah dan belum diterapkan.')
+@click.option('--dedupe', is_flag=True,
+              help='Hapus baris ganda (simpan baris terakhir) sebelum unique key dibuat.')
+def migrasi_command(target, status, dedupe):
+    """Terapkan migrasi skema berversi yang belum tercatat di schema_migrasi."""
+    repository = get_repository()
+    if status:
+        sudah = versi_terpasang(repository)
+        for versi, nama, _ in MIGRASI:
+            click.echo('{:03d} {:<16} {}'.format(versi, nama, 'terpasang' if versi in sudah else 'belum'))
+        return
+    try:
+        diterapkan = repository.migrasi(target, log=click.echo, dedupe=dedupe)
+    except MigrasiError as e:
+        raise click.ClickException(str(e))
+    click.echo('{}: {} migrasi diterapkan'.format(repository.name, len(diterapkan)))
+
+
+@click.command('cek-query')
+@click.option('--mysql', 'pakai_mysql', is_flag=True, help='EXPLAIN di database MySQL (DB_*) alih-alih SQLite.')
+@click.option('--sqlite', 'sqlite_path', default=None,
+              help='File SQLite yang sudah ada; default database sementara dari migrasi dan data sintetis.')
+@click.option('--verbose', is_flag=True, help='Tampilkan rencana eksekusi semua query.')
+def cek_query_command(pakai_mysql, sqlite_path, verbose):
+    """EXPLAIN semua query route dan helper; gagal jika ada full scan atau sort tanpa index."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if pakai_mysql:
+            repository = buat_repository('mysql')
+        elif sqlite_path:
+            repository = SQLiteRepository(sqlite_path)
+        else:
+            repository = SQLiteRepository(os.path.join(tmpdir, 'cek_query.sqlite3'))
+            repository.buat_schema()
+            isi_repository(repository, 3, 5, 1)
+
+        hasil = cek_query(repository)
+        for cek in hasil:
+            status = 'GAGAL' if cek['gagal'] else ('boleh' if cek['masalah'] else 'ok')
+            click.echo('{:<6} {}{}'.format(status, cek['nama'], ' ({})'.format(cek['alasan']) if cek['masalah'] else ''))
+            if verbose or cek['gagal']:
+                for detail in cek['rencana']:
+                    click.echo('         {}{}'.format('! ' if detail in cek['masalah'] else '', detail))
+
+    gagal = sum(cek['gagal'] for cek in hasil)
+    click.echo('{}: {} query, {} gagal'.format(repository.name, len(hasil), gagal))
+    if gagal:
+        raise SystemExit(1)
+
+
+@click.command('rollup-harga')
+@click.option('--penuh', is_flag=True, help='Isi ulang seluruh harga_bulanan (backfill) alih-alih inkremental.')
+def rollup_harga_command(penuh):
+    """Perbarui rollup bulanan harga_komoditas (harga_bulanan) dari baris baru sejak watermark."""
+    repository = get_repository()
+    repository.siapkan_rollup()
+    start = time.perf_counter()
+    hasil = repository.perbarui_harga_bulanan(penuh=penuh)
+    rentang = '' if hasil['rentang'] is None else ', {} rentang daerah x komoditas'.format(hasil['rentang'])
+    click.echo('{}: rollup {} sampai id {}{} dalam {:.1f} s'.format(
+        repository.name, hasil['mode'], hasil['id_terakhir'], rentang, time.perf_counter() - start))
+
+
+@click.command('deteksi-anomali')
+@click.option('--penuh', is_flag=True, help='Hitung ulang semua deret alih-alih hanya deret dengan baris baru.')
+def deteksi_anomali_command(penuh):
+    """Deteksi anomali harga (median/MAD bergulir dan deviasi trend HP) dan simpan di anomali_harga."""
+    repository = get_repository()
+    repository.migrasi()
+    start = time.perf_counter()
+    hasil = perbarui_anomali(repository, penuh=penuh, log=click.echo)
+    click.echo('{}: deteksi {} sampai id {}, {} deret, {} anomali dalam {:.1f} s'.format(
+        repository.name, hasil['mode'], hasil['id_terakhir'], hasil['deret'], hasil['anomali'],
+        time.perf_counter() - start))
+
+
+@click.command('backtest')
+@click.option('--daerah', 'id_daerah', default='all', show_default=True,
+              help="ID daerah dipisah koma, atau 'all'.")
+@click.option('--semua-model', is_flag=True, help='Uji setiap daerah dengan model.h5 dan semua model/*.h5.')
+@click.option('--sejak', default=None, help='Tanggal target paling awal (yyyy-mm-dd).')
+@click.option('--workers', type=int, default=None, help='Jumlah proses (default BACKTEST_WORKERS, 0 = jumlah CPU).')
+def backtest_command(id_daerah, semua_model, sejak, workers):
+    """Backtest walk-forward model inflasi: MAE/RMSE per daerah dan per model."""
+    from app.routes import parse_id_daerah
+
+    start = time.perf_counter()
+    hasil = jalankan_backtest(parse_id_daerah(id_daerah), semua_model=semua_model, sejak=sejak, workers=workers)
+    for row in hasil:
+        if 'error' in row:
+            click.echo('daerah {} {}: {}'.format(row['daerah_id'], row['model'] or '-', row['error']))
+            continue
+        click.echo('daerah {} {}: {} bulan ({} - {}) MAE {:.3f} RMSE {:.3f} bias {:+.3f} (naif MAE {:.3f})'.format(
+            row['daerah_id'], row['model'], row['n'], row['awal'], row['akhir'],
+            row['mae'], row['rmse'], row['bias'], row['mae_naif']))
+    for nama, row in ringkas_per_model(hasil).items():
+        click.echo('{}: {} daerah, {} bulan MAE {:.3f} RMSE {:.3f} bias {:+.3f} (naif MAE {:.3f})'.format(
+            nama, row['daerah'], row['n'], row['mae'], row['rmse'], row['bias'], row['mae_naif']))
+    click.echo('backtest selesai dalam {:.1f} s'.format(time.perf_counter() - start))
+
+
+@click.command('ingest')
+@click.argument('jenis', type=click.Choice(list(TABEL_INGEST)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'format_data', type=click.Choice(FORMAT_INGEST), default=None,
+              help='Default dari ekstensi file (.csv atau .ndjson/.jsonl).')
+@click.option('--chunk-rows', default=100000, show_default=True, help='Jumlah baris per batch/transaksi.')
+@click.option('--batch-size', default=10000, show_default=True, help='Jumlah baris per executemany.')
+@click.option('--skip-invalid', is_flag=True, help='Buang baris invalid alih-alih menghentikan ingest.')
+@click.option('--scaler/--no-scaler', default=True, show_default=True,
+              help='Update inkremental file scaler daerah yang berubah setelah ingest.')
+def ingest_command(jenis, path, format_data, chunk_rows, batch_size, skip_invalid, scaler):
+    """Ingest file CSV/NDJSON harga atau inflasi, per batch dalam transaksi terpisah."""
+    if format_data is None:
+        format_data = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+    repository = get_repository()
+    total = {"diterima": 0, "duplikat": 0, "ditolak": 0}
+    daerah = set()
+    start = time.perf_counter()
+    for nomor, df in enumerate(baca_file(path, format_data, chunk_rows), start=1):
+        try:
+            hasil = ingest_batch(repository, jenis, df, lewati_invalid=skip_invalid, batch_size=batch_size)
+        except IngestError as e:
+            for error in e.errors:
+                click.echo('  batch {} baris {}: {} {}'.format(nomor, error['baris'], error['kolom'], error['pesan']))
+            raise click.ClickException('batch {}: {}'.format(nomor, e))
+        for key in total:
+            total[key] += hasil[key]
+        daerah.update(int(id_daerah) for id_daerah in hasil['versi'])
+        click.echo('batch {}: {} baris ({} duplikat, {} ditolak) {:.0f} ms'.format(
+            nomor, hasil['diterima'], hasil['duplikat'], hasil['ditolak'], hasil['total_ms']))
+    elapsed = time.perf_counter() - start
+    click.echo('{}: {} baris dalam {:.1f} s ({:.0f} baris/s)'.format(
+        jenis, total['diterima'], elapsed, total['diterima'] / elapsed if elapsed else 0))
+    if scaler and daerah:
+        simpan_scalers(sorted(daerah), penuh=False)
+
+
+def register_commands(app):
+    app.cli.add_command(export_model_command)
+    app.cli.add_command(generate_data_command)
+    app.cli.add_command(refit_scalers_command)
+    app.cli.add_command(siapkan_ingest_command)
+    app.cli.add_command(migrasi_command)
+    app.cli.add_command(cek_query_command)
+    app.cli.add_command(ingest_command)
+    app.cli.add_command(rollup_harga_command)
+    app.cli.add_command(deteksi_anomali_command)
+    app.cli.add_command(backtest_command)
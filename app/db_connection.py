@@ -1,23 +1,208 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
 
+from .metrics import inc, span
+
 # Muat variabel dari file .env
 load_dotenv()
 
-def create_db_connection():
-    try:
-        # Ambil nilai dari environment variables
-        connection = mysql.connector.connect(
+
+class DatabaseConnectionError(Exception):
+    """Koneksi ke database gagal dibuat."""
+    status_code = 500
+
+
+class PoolExhaustedError(DatabaseConnectionError):
+    """Semua koneksi di pool sedang dipakai dan batas waktu tunggu terlewati."""
+    status_code = 503
+
+
+class ConnectionPool:
+    """
+    Pool koneksi MySQL sederhana untuk satu proses worker. Koneksi di-ping sebelum
+    dipinjam (pre-ping), diganti jika umurnya melewati `recycle` detik, dan
+    peminjam menunggu paling lama `timeout` detik jika pool penuh.
+    """
+
+    def __init__(self, size, timeout=5.0, recycle=1800, pre_ping=True, connect=None):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.connect = connect or self._connect
+
+        self._idle = []  # list of (connection, created_at)
+        self._created_at = {}
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "acquired": 0, "created": 0, "recycled": 0, "ping_failed": 0,
+            "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+        }
+
+    @staticmethod
+    def _connect():
+        return mysql.connector.connect(
             host=os.getenv('DB_HOST'),
             user=os.getenv('DB_USER'),
             password=os.getenv('DB_PASSWORD'),
             database=os.getenv('DB_NAME')
         )
-        if connection.is_connected():
-            print("Connection to MySQL database was successful.")
+
+    def acquire(self):
+        start = time.monotonic()
+        with self._cond:
+            while not self._idle and self._in_use >= self.size:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolExhaustedError(
+                        "Database connection pool exhausted: {} koneksi dipakai, "
+                        "tidak ada yang kembali dalam {} detik.".format(self._in_use, self.timeout)
+                    )
+                self._cond.wait(remaining)
+            item = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            waited = time.monotonic() - start
+            self._stats['acquired'] += 1
+            self._stats['wait_seconds_total'] += waited
+            self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+
+        # Operasi jaringan dilakukan di luar lock
+        try:
+            connection = self._checkout(item)
+        except Exception as e:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise DatabaseConnectionError("Database connection failed: {}".format(e))
+        return connection
+
+    def _checkout(self, item):
+        if item is not None:
+            connection, created_at = item
+            if time.monotonic() - created_at > self.recycle:
+                self._count('recycled')
+                self._close(connection)
+            elif self.pre_ping and not self._ping(connection):
+                self._count('ping_failed')
+                self._close(connection)
+            else:
+                return connection
+
+        connection = self.connect()
+        inc('bangkit_db_connect_total', ('mysql',))
+        with self._cond:
+            self._stats['created'] += 1
+            self._created_at[id(connection)] = time.monotonic()
         return connection
-    except Error as e:
-        print(f"Error: '{e}'")
-        return None
\ No newline at end of file
+
+    def _count(self, key):
+        # _checkout berjalan di luar lock, counter tetap diubah di bawah lock pool
+        with self._cond:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _ping(connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        # Condition memakai RLock, aman dipanggil dari release yang sudah memegang lock
+        with self._cond:
+            self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def release(self, connection, discard=False):
+        if not discard:
+            try:
+                # Bersihkan sisa hasil query dan transaksi agar koneksi siap dipakai lagi
+                if connection.unread_result:
+                    connection.consume_results()
+                if connection.in_transaction:
+                    connection.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._close(connection)
+            else:
+                created_at = self._created_at.get(id(connection), time.monotonic())
+                self._idle.append((connection, created_at))
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats, size=self.size, in_use=self._in_use, idle=len(self._idle))
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Mengambil pool koneksi milik proses ini. Pool dibuat ulang setelah fork
+    sehingga worker gunicorn tidak berbagi socket dengan proses master.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(
+                    # Default: satu koneksi per thread gunicorn
+                    size=int(os.getenv('DB_POOL_SIZE', os.getenv('WEB_THREADS', 4))),
+                    timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+                    recycle=float(os.getenv('DB_POOL_RECYCLE', 1800)),
+                    pre_ping=os.getenv('DB_POOL_PRE_PING', '1') == '1',
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+
+@contextmanager
+def db_connection():
+    """
+    Meminjam koneksi dari pool dan selalu mengembalikannya, termasuk saat terjadi error.
+
+    Contoh:
+        with db_connection() as connection:
+            cursor = connection.cursor()
+    """
+    pool = get_pool()
+    # Termasuk menunggu pool, pre-ping dan handshake koneksi baru
+    with span('db.acquire'):
+        try:
+            connection = pool.acquire()
+        except DatabaseConnectionError:
+            inc('bangkit_db_errors_total', ('mysql',))
+            raise
+    inc('bangkit_db_acquire_total', ('mysql',))
+    discard = False
+    try:
+        yield connection
+    except Error:
+        # Error dari driver bisa berarti koneksi rusak, jangan dikembalikan ke pool
+        discard = True
+        raise
+    except GeneratorExit:
+        # Streaming dihentikan di tengah jalan (client putus); sisa hasil query
+        # tidak perlu dibaca, koneksi cukup ditutup
+        discard = True
+        raise
+    finally:
+        pool.release(connection, discard=discard)
@@ -0,0 +1,89 @@
+import threading
+import time
+import weakref
+
+import numpy as np
+
+
+class RolloutStats:
+    """
+    Jumlah rollout, jumlah langkah (horizon x daerah) dan total waktu rollout per proses,
+    untuk melihat latensi per langkah horizon di /models/stats.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"rollouts": 0, "steps": 0, "rows": 0, "seconds": 0.0}
+
+    def catat(self, horizon, rows, seconds):
+        with self._lock:
+            self._stats['rollouts'] += 1
+            self._stats['steps'] += horizon
+            self._stats['rows'] += rows
+            self._stats['seconds'] += seconds
+
+    def stats(self):
+        with self._lock:
+            hasil = dict(self._stats)
+        hasil['ms_per_step'] = hasil['seconds'] * 1000 / hasil['steps'] if hasil['steps'] else None
+        return hasil
+
+
+rollout_stats = RolloutStats()
+
+# Fungsi rollout tf.function per objek model Keras, dibuang bersama modelnya
+_keras_rollouts = weakref.WeakKeyDictionary()
+
+
+def _keras_rollout(model):
+    fn = _keras_rollouts.get(model)
+    if fn is not None:
+        return fn
+
+    import tensorflow as tf
+
+    @tf.function(reduce_retracing=True)
+    def rollout(x, eksogen, horizon):
+        # Satu graph untuk seluruh horizon: tf.range dikompilasi menjadi while_loop
+        preds = tf.TensorArray(tf.float32, size=horizon)
+        for step in tf.range(horizon):
+            y = model(x, training=False)[:, -1]
+            preds = preds.write(step, y)
+            x = tf.concat([eksogen[:, :-1], y[:, None]], axis=1)[:, None, :]
+        return tf.transpose(preds.stack())
+
+    _keras_rollouts[model] = rollout
+    return rollout
+
+
+def rollout(model, input_seq, eksogen, horizon, catat=True):
+    """
+    Prediksi rekursif `horizon` bulan untuk satu batch daerah (nilai masih ternormalisasi).
+    Langkah pertama memakai input_seq; langkah berikutnya memakai baris `eksogen` (harga
+    komoditas bulan terakhir dianggap tetap) dengan kolom inflasi diganti prediksi
+    langkah sebelumnya.
+
+    :param model: Model dari model_registry (Keras atau NumpyModel).
+    :param input_seq: Array (batch, 1, n_fitur) dari siapkan_input_prediksi.
+    :param eksogen: Array (batch, n_fitur) dari eksogen_prediksi, boleh None jika horizon 1.
+    :param horizon: Jumlah bulan ke depan.
+    :param catat: False untuk tidak mencatat latensi di rollout_stats (misalnya warm-up).
+    :return: Array (batch, horizon).
+    """
+    start = time.perf_counter()
+    if eksogen is None:
+        eksogen = np.asarray(input_seq)[:, -1, :]
+    if hasattr(model, 'rollout'):
+        hasil = model.rollout(input_seq, eksogen, horizon)
+    else:
+        # Juga untuk horizon 1: memanggil graph yang sudah dikompilasi jauh lebih murah
+        # daripada overhead model.predict Keras per request
+        import tensorflow as tf
+        hasil = _keras_rollout(model)(
+            tf.constant(input_seq, dtype=tf.float32),
+            tf.constant(eksogen, dtype=tf.float32),
+            tf.constant(horizon, dtype=tf.int32),
+        ).numpy()
+    if catat:
+        rollout_stats.catat(horizon, len(input_seq), time.perf_counter() - start)
+    return hasil
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from dotenv import load_dotenv
+from flask import make_response, request
+
+from .db_connection import DatabaseConnectionError
+
+# Muat variabel dari file .env
+load_dotenv()
+
+# Cache-Control untuk tabel referensi (komoditas, daerah) yang jarang berubah
+REFERENCE_MAX_AGE = int(os.getenv('HTTP_CACHE_REFERENCE_MAX_AGE', 3600))
+# Cache-Control untuk data deret (harga, inflasi)
+SERIES_MAX_AGE = int(os.getenv('HTTP_CACHE_SERIES_MAX_AGE', 60))
+# Lama (detik) watermark disimpan per proses sebelum di-query ulang, 0 untuk selalu query.
+# Dengan lebih dari satu worker, nilai > 0 bisa menjawab 304 selama `ttl` detik setelah
+# ingest di worker lain (clear() hanya membersihkan cache proses yang menerima ingest).
+VALIDATOR_TTL = float(os.getenv('HTTP_CACHE_VALIDATOR_TTL', 0))
+VALIDATOR_MAX_ENTRIES = int(os.getenv('HTTP_CACHE_VALIDATOR_MAX_ENTRIES', 4096))
+
+
+class ValidatorCache:
+    """
+    Cache watermark per proses, agar request yang tidak berakhir 304 tidak selalu
+    menjalankan query watermark sebelum query lengkap. Watermark boleh tertinggal paling
+    lama `ttl` detik, lebih pendek dari max-age yang sudah diterima client.
+    """
+
+    def __init__(self, ttl=VALIDATOR_TTL, max_entries=VALIDATOR_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get_or_compute(self, key, fn):
+        if self.ttl <= 0:
+            return fn()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+        # Query di luar lock; dua request bersamaan paling buruk menghitung dua kali
+        parts = fn()
+        with self._lock:
+            self._entries[key] = (now, parts)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parts
+
+    def clear(self):
+        """Dipanggil setelah ingest agar proses ini langsung melihat versi data baru."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), ttl=self.ttl)
+
+
+validator_cache = ValidatorCache()
+
+# Hasil watermark_fn: `parts` (tuple yang berubah setiap data berubah, bahan ETag) dan
+# `diperbarui` (waktu ingest terakhir dari data_versi untuk Last-Modified, None jika tidak ada)
+Validator = namedtuple('Validator', ['parts', 'diperbarui'])
+
+
+def hitung_etag(parts, query_string, accept):
+    """
+    ETag dari watermark data ditambah query string dan header Accept,
+    karena representasi response bergantung pada keduanya.
+    """
+    raw = repr((parts, query_string, accept))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def kunci_validator(nama, kwargs, query_string):
+    return (nama, tuple(sorted(kwargs.items())), query_string)
+
+
+def belum_berubah(if_none_match, if_modified_since, etag, diperbarui):
+    """
+    Menentukan apakah response 304 boleh dikirim (dipakai mode sync dan async).
+    If-None-Match didahulukan; If-Modified-Since hanya dipakai jika client tidak
+    mengirim If-None-Match dan waktu perubahan data diketahui.
+
+    :param if_none_match: ETags dari request.
+    :param if_modified_since: datetime UTC dari request atau None.
+    :param etag: ETag response saat ini.
+    :param diperbarui: Validator.diperbarui.
+    """
+    if if_none_match:
+        return if_none_match.contains_weak(etag)
+    if if_modified_since is None or diperbarui is None:
+        return False
+    # Header HTTP-date hanya sampai resolusi detik
+    return diperbarui.replace(microsecond=0) <= if_modified_since
+
+
+def conditional(watermark_fn, max_age=SERIES_MAX_AGE):
+    """
+    Decorator conditional GET. `watermark_fn(request.args, **view_args)` menjalankan query murah
+    (misalnya MAX(tanggal), COUNT(*) dan versi data) dan mengembalikan Validator; hasilnya
+    disimpan di validator_cache. Jika If-None-Match (atau If-Modified-Since) dari client
+    masih cocok, response 304 dikirim tanpa menjalankan query lengkap endpoint.
+
+    Last-Modified diambil dari waktu ingest di data_versi, bukan tanggal terakhir data,
+    agar backfill atau update baris lama ikut terlihat oleh If-Modified-Since.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                validator = validator_cache.get_or_compute(
+                    kunci_validator(view.__name__, kwargs, request.query_string), lambda: watermark_fn(request.args, **kwargs)
+                )
+            except DatabaseConnectionError:
+                raise
+            except Exception as e:
+                # Watermark gagal dihitung, layani request seperti biasa tanpa validator
+                print(f"Error: watermark {view.__name__} gagal: '{e}'")
+                return view(*args, **kwargs)
+
+            etag = hitung_etag(validator.parts, request.query_string, request.headers.get('Accept', ''))
+            cache_control = 'public, max-age={}'.format(max_age)
+
+            if belum_berubah(request.if_none_match, request.if_modified_since, etag, validator.diperbarui):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if validator.diperbarui is not None:
+                response.last_modified = validator.diperbarui
+            response.headers['Cache-Control'] = cache_control
+            response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
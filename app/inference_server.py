@@ -0,0 +1,396 @@
+"""
+Proses inference bersama untuk semua worker web (INFERENCE_MODE=server).
+
+Satu proses memegang model (lewat model_registry) dan menerima permintaan rollout dari
+semua worker melalui Unix socket INFERENCE_SOCKET. Permintaan yang datang bersamaan
+digabung menjadi satu batch per (model, horizon): batch diproses begitu berisi
+INFERENCE_MAX_BATCH baris atau INFERENCE_MAX_WAIT_MS sejak permintaan pertama masuk.
+
+Jalankan dari root repo (gunicorn.conf.py menjalankannya otomatis dengan --supervise):
+    INFERENCE_AUTHKEY=<rahasia> python -m app.inference_server --supervise
+
+Worker dan proses inference harus memakai INFERENCE_AUTHKEY yang sama. Di bawah gunicorn
+key acak dibuat di master jika env kosong; di luar gunicorn key wajib di-set.
+"""
+import argparse
+import itertools
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .metrics import inc, span
+
+# Muat variabel dari file .env
+load_dotenv()
+
+# local: model di-load dan dijalankan di tiap worker; server: lewat proses inference bersama
+INFERENCE_MODE = os.getenv('INFERENCE_MODE', 'local')
+INFERENCE_SOCKET = os.getenv('INFERENCE_SOCKET', '/tmp/bangkit-inference.sock')
+INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 64))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 5))
+INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', 10))
+
+
+class InferenceUnavailableError(Exception):
+    """Proses inference tidak bisa dihubungi."""
+    status_code = 503
+
+
+class InferenceTimeoutError(InferenceUnavailableError):
+    """Hasil inference tidak datang dalam batas waktu."""
+    status_code = 504
+
+
+def authkey_inference():
+    """
+    Authkey socket inference dari env INFERENCE_AUTHKEY. Dibaca saat dipakai, bukan saat
+    import, karena master gunicorn mengisinya di on_starting setelah app bisa saja sudah
+    di-import (preload).
+
+    :raises InferenceUnavailableError: Jika INFERENCE_AUTHKEY kosong.
+    """
+    authkey = os.getenv('INFERENCE_AUTHKEY', '')
+    if not authkey:
+        raise InferenceUnavailableError("INFERENCE_AUTHKEY belum di-set untuk INFERENCE_MODE=server")
+    return authkey.encode()
+
+
+def jalankan_model(model_path, input_seq, eksogen, horizon):
+    """
+    Rollout `horizon` langkah untuk satu batch input di proses ini.
+
+    :return: Array (batch, horizon), masih ternormalisasi.
+    """
+    from .forecast import rollout
+    from .model_registry import model_registry
+
+    model = model_registry.get_by_path(model_path)
+    if model.input_shape[-1] != input_seq.shape[-1]:
+        raise ValueError("Model {} membutuhkan {} fitur, data memiliki {} fitur.".format(
+            os.path.basename(model_path), model.input_shape[-1], input_seq.shape[-1]))
+    return rollout(model, input_seq, eksogen, horizon)
+
+
+def prediksi_model(model_path, input_seq, eksogen, horizon):
+    """
+    Titik masuk inference untuk route: di proses ini (INFERENCE_MODE=local) atau lewat
+    proses inference bersama (INFERENCE_MODE=server).
+    """
+    inc('bangkit_model_predict_total', (INFERENCE_MODE,))
+    inc('bangkit_model_predict_rows_total', (INFERENCE_MODE,), len(input_seq))
+    with span('model.predict'):
+        if INFERENCE_MODE == 'server':
+            return inference_client.rollout(model_path, input_seq, eksogen, horizon)
+        return jalankan_model(model_path, input_seq, eksogen, horizon)
+
+
+class _Permintaan:
+    __slots__ = ('conn', 'send_lock', 'req_id', 'model_path', 'input_seq', 'eksogen', 'horizon',
+                 'deadline', 'diterima')
+
+    def __init__(self, conn, send_lock, req_id, model_path, input_seq, eksogen, horizon, deadline):
+        self.conn = conn
+        self.send_lock = send_lock
+        self.req_id = req_id
+        self.model_path = model_path
+        self.input_seq = input_seq
+        self.eksogen = eksogen
+        self.horizon = horizon
+        self.deadline = deadline
+        self.diterima = time.monotonic()
+
+    def balas(self, status, hasil):
+        try:
+            with self.send_lock:
+                self.conn.send((self.req_id, status, hasil))
+        except (OSError, EOFError):
+            # Worker sudah menutup koneksi (misalnya timeout), hasil dibuang
+            pass
+
+
+class InferenceServer:
+    """
+    Menerima koneksi dari worker (satu thread per koneksi) dan menjalankan satu thread
+    batcher yang menggabungkan permintaan yang mengantre menjadi batch.
+    """
+
+    def __init__(self, address=INFERENCE_SOCKET, authkey=None,
+                 max_batch=INFERENCE_MAX_BATCH, max_wait=INFERENCE_MAX_WAIT_MS / 1000):
+        self.address = address
+        self.authkey = authkey
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"connections": 0, "requests": 0, "rows": 0, "batches": 0, "expired": 0, "errors": 0}
+        # Sampel terakhir untuk persentil ukuran batch dan waktu tunggu di antrean
+        self._batch_rows = deque(maxlen=1024)
+        self._queue_delay_ms = deque(maxlen=1024)
+        self._started = time.time()
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey or authkey_inference())
+        os.chmod(self.address, 0o600)
+
+        threading.Thread(target=self._batcher, name='inference-batcher', daemon=True).start()
+        print(f"Inference server siap di {self.address} (max batch {self.max_batch}, "
+              f"max wait {self.max_wait * 1000:.1f} ms)")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Misalnya authkey salah; koneksi lain tetap dilayani
+                print(f"Error: koneksi inference ditolak: '{e}'")
+                continue
+            with self._lock:
+                self._stats['connections'] += 1
+            threading.Thread(target=self._layani, args=(conn,), daemon=True).start()
+
+    def _layani(self, conn):
+        send_lock = threading.Lock()
+        try:
+            while True:
+                pesan = conn.recv()
+                req_id, op = pesan[0], pesan[1]
+                if op == 'rollout':
+                    _, _, model_path, input_seq, eksogen, horizon, deadline = pesan
+                    self._queue.put(_Permintaan(conn, send_lock, req_id, model_path,
+                                                input_seq, eksogen, horizon, deadline))
+                elif op == 'stats':
+                    with send_lock:
+                        conn.send((req_id, 'ok', self.stats()))
+                else:
+                    with send_lock:
+                        conn.send((req_id, 'error', 'op {} tidak dikenal'.format(op)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _kumpulkan(self):
+        # Tunggu permintaan pertama, lalu ambil yang lain sampai batch penuh atau max_wait lewat
+        pertama = self._queue.get()
+        batch, rows = [pertama], len(pertama.input_seq)
+        batas = time.monotonic() + self.max_wait
+        while rows < self.max_batch:
+            sisa = batas - time.monotonic()
+            if sisa <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=sisa)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item.input_seq)
+        return batch
+
+    def _batcher(self):
+        while True:
+            batch = self._kumpulkan()
+            mulai = time.monotonic()
+            sekarang = time.time()
+
+            kelompok = {}
+            for item in batch:
+                if item.deadline < sekarang:
+                    # Worker sudah berhenti menunggu, tidak perlu dihitung
+                    with self._lock:
+                        self._stats['expired'] += 1
+                    continue
+                kelompok.setdefault((item.model_path, item.horizon, item.input_seq.shape[-1]), []).append(item)
+
+            for (model_path, horizon, _), items in kelompok.items():
+                self._jalankan(model_path, horizon, items, mulai)
+
+    def _jalankan(self, model_path, horizon, items, mulai):
+        input_seq = np.concatenate([item.input_seq for item in items], axis=0)
+        eksogen = np.concatenate([
+            item.eksogen if item.eksogen is not None else item.input_seq[:, -1, :] for item in items
+        ], axis=0)
+        with self._lock:
+            self._stats['requests'] += len(items)
+            self._stats['rows'] += len(input_seq)
+            self._stats['batches'] += 1
+            self._batch_rows.append(len(input_seq))
+            self._queue_delay_ms.extend((mulai - item.diterima) * 1000 for item in items)
+
+        try:
+            hasil = jalankan_model(model_path, input_seq, eksogen, horizon)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+            for item in items:
+                item.balas('error', str(e))
+            return
+
+        offset = 0
+        for item in items:
+            n = len(item.input_seq)
+            item.balas('ok', hasil[offset:offset + n])
+            offset += n
+
+    def stats(self):
+        with self._lock:
+            hasil = dict(self._stats, pid=os.getpid(), uptime_s=time.time() - self._started,
+                         queued=self._queue.qsize(), max_batch=self.max_batch,
+                         max_wait_ms=self.max_wait * 1000)
+            batch_rows = np.asarray(self._batch_rows, dtype=np.float64)
+            queue_delay = np.asarray(self._queue_delay_ms, dtype=np.float64)
+        if len(batch_rows):
+            hasil['batch_rows'] = {"mean": float(batch_rows.mean()), "max": float(batch_rows.max()),
+                                   "p50": float(np.percentile(batch_rows, 50))}
+        if len(queue_delay):
+            p50, p95, p99 = np.percentile(queue_delay, [50, 95, 99])
+            hasil['queue_delay_ms'] = {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+        return hasil
+
+
+class InferenceClient:
+    """
+    Klien proses inference untuk worker web. Satu koneksi per thread (dibuat ulang setelah
+    fork); koneksi yang timeout dibuang agar balasan yang terlambat tidak terbaca oleh
+    permintaan berikutnya.
+    """
+
+    def __init__(self, address=INFERENCE_SOCKET, authkey=None, timeout=INFERENCE_TIMEOUT):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "timeouts": 0, "unavailable": 0, "connects": 0}
+
+    def _catat(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        authkey = self.authkey or authkey_inference()
+        try:
+            conn = Client(self.address, family='AF_UNIX', authkey=authkey)
+        except OSError as e:
+            self._catat('unavailable')
+            raise InferenceUnavailableError("Proses inference tidak bisa dihubungi: {}".format(e))
+        self._catat('connects')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _buang(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _request(self, *pesan):
+        conn = self._conn()
+        req_id = next(self._ids)
+        self._catat('requests')
+        try:
+            conn.send((req_id,) + pesan)
+            if not conn.poll(self.timeout):
+                self._buang()
+                self._catat('timeouts')
+                raise InferenceTimeoutError("Inference tidak selesai dalam {:.1f} detik".format(self.timeout))
+            balasan_id, status, hasil = conn.recv()
+        except (OSError, EOFError) as e:
+            # Proses inference restart di tengah permintaan
+            self._buang()
+            self._catat('unavailable')
+            raise InferenceUnavailableError("Koneksi ke proses inference terputus: {}".format(e))
+        if balasan_id != req_id:
+            self._buang()
+            raise InferenceUnavailableError("Balasan inference tidak sesuai permintaan")
+        if status == 'error':
+            raise ValueError(hasil)
+        return hasil
+
+    def rollout(self, model_path, input_seq, eksogen, horizon):
+        return self._request(
+            'rollout', model_path,
+            np.ascontiguousarray(input_seq, dtype=np.float32),
+            None if eksogen is None else np.ascontiguousarray(eksogen, dtype=np.float32),
+            horizon, time.time() + self.timeout,
+        )
+
+    def server_stats(self):
+        return self._request('stats')
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, timeout_s=self.timeout)
+
+
+inference_client = InferenceClient()
+
+
+def supervise(argv):
+    """
+    Menjalankan proses inference sebagai child dan me-restart-nya jika berhenti,
+    dengan jeda yang membesar (maksimal 30 detik) jika proses terus gagal saat start.
+    """
+    child = None
+
+    def berhenti(signum, frame):
+        if child is not None and child.poll() is None:
+            child.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, berhenti)
+    signal.signal(signal.SIGINT, berhenti)
+
+    jeda = 1
+    while True:
+        mulai = time.monotonic()
+        child = subprocess.Popen([sys.executable, '-m', 'app.inference_server'] + argv)
+        code = child.wait()
+        if time.monotonic() - mulai > 60:
+            jeda = 1
+        print(f"Proses inference berhenti (exit {code}), restart dalam {jeda} detik.")
+        time.sleep(jeda)
+        jeda = min(jeda * 2, 30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--supervise', action='store_true', help='Jalankan di bawah supervisor yang me-restart proses')
+    parser.add_argument('--socket', default=INFERENCE_SOCKET)
+    parser.add_argument('--max-batch', type=int, default=INFERENCE_MAX_BATCH)
+    parser.add_argument('--max-wait-ms', type=float, default=INFERENCE_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    # Tanpa key bersama, menolak start daripada memakai key yang bisa ditebak
+    try:
+        authkey_inference()
+    except InferenceUnavailableError as e:
+        sys.exit("Error: {}".format(e))
+
+    if args.supervise:
+        supervise(['--socket', args.socket, '--max-batch', str(args.max_batch),
+                   '--max-wait-ms', str(args.max_wait_ms)])
+        return
+
+    from .model_registry import model_registry
+    model_registry.warm_up()
+    InferenceServer(args.socket, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
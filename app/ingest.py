@@ -0,0 +1,169 @@
+"""
+Ingest batch harga komoditas dan inflasi dari CSV atau NDJSON.
+
+Satu batch dibaca sekaligus ke DataFrame, divalidasi per kolom dengan operasi vektor
+(bukan per baris), duplikat unique key di dalam batch dibuang (baris terakhir yang dipakai),
+lalu di-upsert dalam satu transaksi oleh Repository.upsert yang sekaligus menaikkan
+versi data tiap daerah.
+"""
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from .repository import TABEL_INGEST
+
+FORMAT_INGEST = ('csv', 'ndjson')
+
+# Jenis nilai tiap kolom untuk validasi
+TIPE_KOLOM = {
+    'daerah_id': 'id',
+    'komoditas_id': 'id',
+    'id_daerah': 'id',
+    'tanggal_harga': 'tanggal',
+    'tanggal_inflasi': 'tanggal',
+    'harga': 'harga',
+    'tingkat_inflasi': 'persen',
+}
+
+# Jumlah contoh baris gagal yang dilaporkan per aturan
+MAKS_CONTOH_ERROR = 20
+
+
+class IngestError(ValueError):
+    """Batch ditolak; `errors` berisi contoh baris yang gagal validasi."""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+def baca_batch(data, format_data):
+    """
+    Membaca isi batch menjadi DataFrame berisi teks (konversi tipe dilakukan saat validasi).
+
+    :param data: bytes, str, atau file-like.
+    :param format_data: 'csv' (dengan header) atau 'ndjson' (satu objek JSON per baris).
+    """
+    if isinstance(data, bytes):
+        data = io.BytesIO(data)
+    elif isinstance(data, str):
+        data = io.StringIO(data)
+    try:
+        if format_data == 'csv':
+            return pd.read_csv(data, dtype=str, keep_default_na=False, skipinitialspace=True)
+        if format_data == 'ndjson':
+            return pd.read_json(data, lines=True, dtype=False, convert_dates=False)
+    except (ValueError, pd.errors.ParserError) as e:
+        raise IngestError("Batch {} tidak bisa dibaca: {}".format(format_data, e))
+    raise IngestError("format harus salah satu dari {}".format(', '.join(FORMAT_INGEST)))
+
+
+def baca_file(path, format_data, chunk_rows):
+    """
+    Membaca file besar per potongan `chunk_rows` baris; tiap potongan di-ingest sebagai satu batch.
+    """
+    if format_data == 'csv':
+        return pd.read_csv(path, dtype=str, keep_default_na=False, skipinitialspace=True, chunksize=chunk_rows)
+    if format_data == 'ndjson':
+        return pd.read_json(path, lines=True, dtype=False, convert_dates=False, chunksize=chunk_rows)
+    raise IngestError("format harus salah satu dari {}".format(', '.join(FORMAT_INGEST)))
+
+
+def _konversi(nama, nilai):
+    # Mengembalikan (nilai hasil konversi, mask baris valid)
+    tipe = TIPE_KOLOM[nama]
+    if tipe == 'tanggal':
+        tanggal = pd.to_datetime(nilai.astype(str).str.strip(), format='%Y-%m-%d', errors='coerce')
+        return tanggal.dt.strftime('%Y-%m-%d'), tanggal.notna().to_numpy(), 'tanggal harus yyyy-mm-dd'
+
+    angka = pd.to_numeric(nilai, errors='coerce').to_numpy(dtype=np.float64)
+    valid = np.isfinite(angka)
+    if tipe == 'id':
+        valid &= (angka == np.round(angka)) & (angka > 0)
+        return angka, valid, 'harus bilangan bulat positif'
+    if tipe == 'harga':
+        valid &= angka > 0
+        return np.round(angka), valid, 'harus angka lebih dari 0'
+    # Tingkat inflasi dalam persen
+    valid &= np.abs(angka) < 100
+    return angka, valid, 'harus angka antara -100 dan 100'
+
+
+def validasi_batch(jenis, df, referensi=None):
+    """
+    Validasi dan konversi tipe semua kolom sekaligus.
+
+    :param jenis: 'harga' atau 'inflasi'.
+    :param df: DataFrame dari baca_batch.
+    :param referensi: Dict nama kolom -> array ID yang dikenal (daerah, komoditas), opsional.
+    :return: Tuple (DataFrame bertipe berisi baris valid, mask baris valid, list error).
+    """
+    kolom = TABEL_INGEST[jenis]['kolom']
+    hilang = [nama for nama in kolom if nama not in df.columns]
+    if hilang:
+        raise IngestError("Kolom wajib tidak ada: {}".format(', '.join(hilang)))
+
+    n = len(df)
+    valid = np.ones(n, dtype=bool)
+    errors = []
+    hasil = {}
+    for nama in kolom:
+        nilai, ok, pesan = _konversi(nama, df[nama])
+        if referensi and nama in referensi:
+            dikenal = np.isin(nilai, referensi[nama])
+            gagal_referensi = ok & ~dikenal
+            for baris in np.flatnonzero(gagal_referensi)[:MAKS_CONTOH_ERROR]:
+                errors.append({"baris": int(baris) + 1, "kolom": nama, "pesan": 'ID tidak dikenal'})
+            ok &= dikenal
+        for baris in np.flatnonzero(~ok & valid)[:MAKS_CONTOH_ERROR]:
+            if not any(e['baris'] == baris + 1 and e['kolom'] == nama for e in errors):
+                errors.append({"baris": int(baris) + 1, "kolom": nama, "pesan": pesan})
+        valid &= ok
+        hasil[nama] = nilai
+
+    bersih = pd.DataFrame({nama: hasil[nama] for nama in kolom})[valid]
+    for nama in kolom:
+        if TIPE_KOLOM[nama] in ('id', 'harga'):
+            bersih[nama] = bersih[nama].astype(np.int64)
+    return bersih, valid, errors
+
+
+def ingest_batch(repository, jenis, df, lewati_invalid=False, batch_size=10000):
+    """
+    Validasi, dedup dan upsert satu batch.
+
+    :param lewati_invalid: True untuk membuang baris invalid; default seluruh batch ditolak.
+    :return: Dict ringkasan (jumlah baris, duplikat, ditolak, versi data per daerah, waktu).
+    """
+    mulai = time.perf_counter()
+    referensi = {}
+    spec = TABEL_INGEST[jenis]
+    referensi[spec['daerah']] = np.asarray([row[0] for row in repository.daftar_daerah()], dtype=np.float64)
+    if 'komoditas_id' in spec['kolom']:
+        referensi['komoditas_id'] = np.asarray(repository.komoditas_ids(), dtype=np.float64)
+
+    bersih, valid, errors = validasi_batch(jenis, df, referensi)
+    ditolak = int((~valid).sum())
+    if ditolak and not lewati_invalid:
+        raise IngestError("{} baris tidak valid, batch ditolak".format(ditolak), errors)
+
+    # Unique key yang sama di dalam batch: baris terakhir yang dipakai
+    sebelum = len(bersih)
+    bersih = bersih.drop_duplicates(list(spec['kunci']), keep='last')
+    duplikat = sebelum - len(bersih)
+    validasi_s = time.perf_counter() - mulai
+
+    rows = list(zip(*(bersih[nama].tolist() for nama in spec['kolom'])))
+    versi = repository.upsert(jenis, rows, batch_size=batch_size) if rows else {}
+    return {
+        "jenis": jenis,
+        "diterima": len(rows),
+        "duplikat": duplikat,
+        "ditolak": ditolak,
+        "errors": errors,
+        "versi": {str(daerah_id): v for daerah_id, v in versi.items()},
+        "validasi_ms": validasi_s * 1000,
+        "total_ms": (time.perf_counter() - mulai) * 1000,
+    }
@@ -0,0 +1,254 @@
+"""
+Instrumentasi ringan per tahap request: span dicatat ke objek request aktif (contextvars,
+jadi ikut ke thread dan task async yang menyalin context), lalu di akhir request
+diringkas menjadi header Server-Timing dan histogram latensi per route dan per tahap.
+Counter database dan model ditambah langsung di titik pemanggilan. Semua metrik dibaca
+dalam format teks Prometheus di /metrics.
+
+Metrik disimpan per proses: dengan beberapa worker gunicorn setiap scrape /metrics
+hanya melihat worker yang menjawab. METRICS_ENABLED=0 mematikan semuanya (span menjadi
+no-op dan tidak ada hook request).
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from dotenv import load_dotenv
+
+# Muat variabel dari file .env
+load_dotenv()
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+# Header Server-Timing bisa dimatikan terpisah (misalnya agar tidak terlihat client publik)
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', '1') == '1'
+
+# Batas atas bucket histogram (detik)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_aktif = contextvars.ContextVar('metrics_request', default=None)
+_NOOP = nullcontext()
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, batas in enumerate(BUCKETS):
+            if value <= batas:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    Kumpulan counter dan histogram berlabel untuk satu proses.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def daftar(self, nama, jenis, help_text, label_names):
+        self._metrics[nama] = {"jenis": jenis, "help": help_text, "labels": label_names, "nilai": {}}
+
+    def inc(self, nama, labels=(), value=1):
+        nilai = self._metrics[nama]['nilai']
+        with self._lock:
+            nilai[labels] = nilai.get(labels, 0) + value
+
+    def observe(self, nama, labels, value):
+        nilai = self._metrics[nama]['nilai']
+        with self._lock:
+            histogram = nilai.get(labels)
+            if histogram is None:
+                histogram = nilai[labels] = _Histogram()
+            histogram.observe(value)
+
+    def render(self):
+        """Semua metrik dalam format teks Prometheus 0.0.4."""
+        baris = []
+        with self._lock:
+            for nama, metric in self._metrics.items():
+                baris.append('# HELP {} {}'.format(nama, metric['help']))
+                baris.append('# TYPE {} {}'.format(nama, metric['jenis']))
+                for labels, nilai in sorted(metric['nilai'].items()):
+                    pasangan = ['{}="{}"'.format(k, _escape(v)) for k, v in zip(metric['labels'], labels)]
+                    if metric['jenis'] == 'counter':
+                        baris.append('{}{} {}'.format(nama, _label_str(pasangan), _angka(nilai)))
+                        continue
+                    kumulatif = 0
+                    for batas, jumlah in zip(BUCKETS, nilai.counts):
+                        kumulatif += jumlah
+                        baris.append('{}_bucket{} {}'.format(
+                            nama, _label_str(pasangan + ['le="{}"'.format(batas)]), kumulatif))
+                    baris.append('{}_bucket{} {}'.format(nama, _label_str(pasangan + ['le="+Inf"']), nilai.count))
+                    baris.append('{}_sum{} {}'.format(nama, _label_str(pasangan), _angka(nilai.sum)))
+                    baris.append('{}_count{} {}'.format(nama, _label_str(pasangan), nilai.count))
+        return '\n'.join(baris) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_str(pasangan):
+    return '{' + ','.join(pasangan) + '}' if pasangan else ''
+
+
+def _angka(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+registry.daftar('bangkit_request_duration_seconds', 'histogram',
+                'Latensi request sampai response dibuat (tanpa body streaming).', ('route', 'method', 'status'))
+registry.daftar('bangkit_stage_duration_seconds', 'histogram',
+                'Total waktu per tahap dalam satu request.', ('route', 'stage'))
+registry.daftar('bangkit_db_acquire_total', 'counter', 'Koneksi database yang dipinjam.', ('backend',))
+registry.daftar('bangkit_db_connect_total', 'counter', 'Koneksi database baru yang dibuka.', ('backend',))
+registry.daftar('bangkit_db_queries_total', 'counter', 'Query yang dijalankan.', ('backend',))
+registry.daftar('bangkit_db_errors_total', 'counter', 'Query atau koneksi yang gagal.', ('backend',))
+registry.daftar('bangkit_model_loads_total', 'counter', 'Model yang di-load dari disk.', ('model',))
+registry.daftar('bangkit_model_predict_total', 'counter', 'Pemanggilan inference (satu rollout).', ('mode',))
+registry.daftar('bangkit_model_predict_rows_total', 'counter', 'Baris (daerah) yang diprediksi.', ('mode',))
+
+
+def inc(nama, labels=(), value=1):
+    """Menambah counter; no-op jika metrik dimatikan."""
+    if METRICS_ENABLED:
+        registry.inc(nama, labels, value)
+
+
+class RequestMetrics:
+    """Durasi per tahap untuk satu request yang sedang berjalan."""
+    __slots__ = ('route', 'start', 'stages')
+
+    def __init__(self, route):
+        self.route = route
+        self.start = time.perf_counter()
+        self.stages = {}
+
+    def catat(self, nama, durasi):
+        stage = self.stages.get(nama)
+        if stage is None:
+            self.stages[nama] = [durasi, 1]
+        else:
+            stage[0] += durasi
+            stage[1] += 1
+
+
+class _Span:
+    __slots__ = ('nama', 'req', 'start')
+
+    def __init__(self, nama, req):
+        self.nama = nama
+        self.req = req
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.req.catat(self.nama, time.perf_counter() - self.start)
+        return False
+
+
+def span(nama):
+    """
+    Context manager pengukur satu tahap, misalnya `with span('db.query'): ...`.
+    Di luar request (CLI, refresher latar) atau saat metrik dimatikan tidak mencatat apa-apa.
+    """
+    req = _request_aktif.get() if METRICS_ENABLED else None
+    if req is None:
+        return _NOOP
+    return _Span(nama, req)
+
+
+def terukur(nama):
+    """
+    Decorator: setiap pemanggilan fungsi dicatat sebagai span `nama`.
+    """
+    def decorator(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            req = _request_aktif.get()
+            if req is None:
+                return fn(*args, **kwargs)
+            with _Span(nama, req):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def mulai_request(route):
+    """Mulai mencatat request; dipanggil dari hook before_request."""
+    _request_aktif.set(RequestMetrics(route))
+
+
+def selesai_request(method, status):
+    """
+    Menutup request aktif: mencatat histogram dan mengembalikan nilai header Server-Timing,
+    atau None jika tidak ada request aktif.
+    """
+    req = _request_aktif.get()
+    if req is None:
+        return None
+    _request_aktif.set(None)
+    total = time.perf_counter() - req.start
+    registry.observe('bangkit_request_duration_seconds', (req.route, method, str(status)), total)
+    bagian = []
+    for nama, (durasi, jumlah) in req.stages.items():
+        registry.observe('bangkit_stage_duration_seconds', (req.route, nama), durasi)
+        bagian.append('{};dur={:.2f}'.format(nama, durasi * 1000) + (';desc="{}x"'.format(jumlah) if jumlah > 1 else ''))
+    bagian.append('total;dur={:.2f}'.format(total * 1000))
+    return ', '.join(bagian)
+
+
+def batalkan_request():
+    """Membuang request aktif yang tidak selesai normal (exception sebelum after_request)."""
+    _request_aktif.set(None)
+
+
+def pasang_flask(app):
+    """
+    Hook request Flask dan JSON provider yang mengukur serialisasi (tahap `json`).
+    """
+    if not METRICS_ENABLED:
+        return
+    from flask import request
+    from flask.json.provider import DefaultJSONProvider
+
+    class JSONProviderTerukur(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            with span('json'):
+                return super().dumps(obj, **kwargs)
+
+    app.json = JSONProviderTerukur(app)
+
+    @app.before_request
+    def _mulai_metrics():
+        mulai_request(request.url_rule.rule if request.url_rule is not None else 'unmatched')
+
+    @app.after_request
+    def _selesai_metrics(response):
+        timing = selesai_request(request.method, response.status_code)
+        if timing and METRICS_SERVER_TIMING:
+            response.headers['Server-Timing'] = timing
+        return response
+
+    @app.teardown_request
+    def _bersihkan_metrics(exc):
+        batalkan_request()
@@ -0,0 +1,347 @@
+"""
+Migrasi skema berversi untuk MySQL dan SQLite.
+
+Setiap migrasi punya nomor versi, nama dan daftar statement per dialek. Versi yang sudah
+diterapkan dicatat di tabel schema_migrasi sehingga `flask --app run migrasi` hanya
+menjalankan yang belum. Statement ditulis idempoten (IF NOT EXISTS, index yang sudah ada
+dilewati) agar database lama yang tabelnya dibuat manual bisa dimigrasi tanpa error.
+
+Index dipilih mengikuti query di app/repository.py (dicek dengan `flask --app run cek-query`):
+- harga_komoditas (daerah_id, komoditas_id, tanggal_harga): unique key upsert, juga melayani
+  rentang tanggal dan `ORDER BY tanggal_harga DESC LIMIT 1` per (daerah, komoditas).
+- harga_komoditas (daerah_id, komoditas_id, tanggal_harga, harga): covering untuk deret harga,
+  agregat bulanan dan fitur prediksi tanpa membaca baris tabel.
+- harga_komoditas (daerah_id, tanggal_harga): harga semua komoditas satu daerah dan export per
+  daerah; urutan (tanggal_harga, id) didapat dari primary key di ujung index.
+- harga_komoditas (tanggal_harga): halaman export tanpa filter daerah, urut (tanggal_harga, id)
+  dan dimulai dari cursor keyset tanpa sort seluruh tabel.
+- inflasi (id_daerah, tanggal_inflasi, tingkat_inflasi): covering untuk deret inflasi dan fitur prediksi.
+- anomali_harga: primary key untuk filter daerah + komoditas, (daerah_id, tanggal_harga) dan
+  (tanggal_harga) untuk anomali terbaru per daerah dan nasional tanpa sort.
+
+Unique key baru tidak bisa dibuat jika tabel lama sudah berisi baris ganda (MySQL error 1062,
+SQLite UNIQUE constraint failed). Sebelum migrasi yang menambah unique key, baris ganda dicek
+dan dilaporkan; `flask --app run migrasi --dedupe` menghapusnya dengan menyimpan baris terakhir
+(primary key terbesar), sama seperti ingest yang memakai nilai terakhir untuk key yang sama.
+"""
+import time
+
+# Error MySQL yang berarti statement sudah pernah diterapkan:
+# 1061 Duplicate key name (index sudah dibuat sebelumnya)
+MYSQL_ERRNO_SUDAH_ADA = (1061,)
+
+
+
+class MigrasiError(Exception):
+    """Migrasi tidak bisa diterapkan tanpa memperbaiki data lebih dulu."""
+
+
+MIGRASI = [
+    (1, 'skema_awal', {
+        'sqlite': [
+            """CREATE TABLE IF NOT EXISTS daerah (
+                daerah_id INTEGER PRIMARY KEY,
+                nama_daerah TEXT NOT NULL,
+                img_url TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS komoditas (
+                id_komoditas INTEGER PRIMARY KEY,
+                nama_komoditas TEXT NOT NULL,
+                img_url TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS harga_komoditas (
+                id INTEGER PRIMARY KEY,
+                daerah_id INTEGER NOT NULL,
+                komoditas_id INTEGER NOT NULL,
+                tanggal_harga DATE NOT NULL,
+                harga INTEGER NOT NULL
+            )""",
+            """CREATE TABLE IF NOT EXISTS inflasi (
+                id INTEGER PRIMARY KEY,
+                id_daerah INTEGER NOT NULL,
+                tingkat_inflasi REAL NOT NULL,
+                tanggal_inflasi DATE NOT NULL
+            )""",
+        ],
+        'mysql': [
+            """CREATE TABLE IF NOT EXISTS daerah (
+                daerah_id INT NOT NULL PRIMARY KEY,
+                nama_daerah VARCHAR(255) NOT NULL,
+                img_url VARCHAR(1024)
+            )""",
+            """CREATE TABLE IF NOT EXISTS komoditas (
+                id_komoditas INT NOT NULL PRIMARY KEY,
+                nama_komoditas VARCHAR(255) NOT NULL,
+                img_url VARCHAR(1024)
+            )""",
+            """CREATE TABLE IF NOT EXISTS harga_komoditas (
+                id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                daerah_id INT NOT NULL,
+                komoditas_id INT NOT NULL,
+                tanggal_harga DATE NOT NULL,
+                harga BIGINT NOT NULL
+            )""",
+            """CREATE TABLE IF NOT EXISTS inflasi (
+                id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                id_daerah INT NOT NULL,
+                tingkat_inflasi DOUBLE NOT NULL,
+                tanggal_inflasi DATE NOT NULL
+            )""",
+        ],
+    }),
+    # Unique key upsert dan tabel versi data per daerah
+    (2, 'ingest', {
+        'sqlite': [
+            """CREATE TABLE IF NOT EXISTS data_versi (
+                tabel TEXT NOT NULL,
+                daerah_id INTEGER NOT NULL,
+                versi INTEGER NOT NULL DEFAULT 0,
+                diperbarui TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (tabel, daerah_id)
+            )""",
+            """CREATE UNIQUE INDEX IF NOT EXISTS uq_harga_daerah_komoditas_tanggal
+                ON harga_komoditas (daerah_id, komoditas_id, tanggal_harga)""",
+            """CREATE UNIQUE INDEX IF NOT EXISTS uq_inflasi_daerah_tanggal
+                ON inflasi (id_daerah, tanggal_inflasi)""",
+        ],
+        'mysql': [
+            """CREATE TABLE IF NOT EXISTS data_versi (
+                tabel VARCHAR(32) NOT NULL,
+                daerah_id INT NOT NULL,
+                versi BIGINT NOT NULL DEFAULT 0,
+                diperbarui TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (tabel, daerah_id)
+            )""",
+            "ALTER TABLE harga_komoditas ADD UNIQUE KEY uq_harga_daerah_komoditas_tanggal (daerah_id, komoditas_id, tanggal_harga)",
+            "ALTER TABLE inflasi ADD UNIQUE KEY uq_inflasi_daerah_tanggal (id_daerah, tanggal_inflasi)",
+        ],
+    }),
+    # Rollup bulanan harga_komoditas dan watermark id baris terakhir yang sudah di-rollup
+    (3, 'rollup_bulanan', {
+        'sqlite': [
+            """CREATE TABLE IF NOT EXISTS harga_bulanan (
+                daerah_id INTEGER NOT NULL,
+                komoditas_id INTEGER NOT NULL,
+                bulan DATE NOT NULL,
+                jumlah INTEGER NOT NULL,
+                rata2 REAL NOT NULL,
+                minimum INTEGER NOT NULL,
+                maksimum INTEGER NOT NULL,
+                terakhir INTEGER NOT NULL,
+                tanggal_terakhir DATE NOT NULL,
+                PRIMARY KEY (daerah_id, komoditas_id, bulan)
+            )""",
+            """CREATE TABLE IF NOT EXISTS rollup_watermark (
+                nama TEXT PRIMARY KEY,
+                id_terakhir INTEGER NOT NULL,
+                diperbarui TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )""",
+        ],
+        'mysql': [
+            """CREATE TABLE IF NOT EXISTS harga_bulanan (
+                daerah_id INT NOT NULL,
+                komoditas_id INT NOT NULL,
+                bulan DATE NOT NULL,
+                jumlah INT NOT NULL,
+                rata2 DOUBLE NOT NULL,
+                minimum BIGINT NOT NULL,
+                maksimum BIGINT NOT NULL,
+                terakhir BIGINT NOT NULL,
+                tanggal_terakhir DATE NOT NULL,
+                PRIMARY KEY (daerah_id, komoditas_id, bulan)
+            )""",
+            """CREATE TABLE IF NOT EXISTS rollup_watermark (
+                nama VARCHAR(64) NOT NULL PRIMARY KEY,
+                id_terakhir BIGINT NOT NULL,
+                diperbarui TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )""",
+        ],
+    }),
+    # Index composite dan covering untuk query route (lihat docstring modul)
+    (4, 'index_query', {
+        'sqlite': [
+            """CREATE INDEX IF NOT EXISTS idx_harga_daerah_komoditas_tanggal_harga
+                ON harga_komoditas (daerah_id, komoditas_id, tanggal_harga, harga)""",
+            """CREATE INDEX IF NOT EXISTS idx_harga_daerah_tanggal
+                ON harga_komoditas (daerah_id, tanggal_harga)""",
+            """CREATE INDEX IF NOT EXISTS idx_harga_tanggal
+                ON harga_komoditas (tanggal_harga)""",
+            """CREATE INDEX IF NOT EXISTS idx_inflasi_daerah_tanggal_tingkat
+                ON inflasi (id_daerah, tanggal_inflasi, tingkat_inflasi)""",
+        ],
+        'mysql': [
+            """ALTER TABLE harga_komoditas ADD INDEX idx_harga_daerah_komoditas_tanggal_harga
+                (daerah_id, komoditas_id, tanggal_harga, harga)""",
+            "ALTER TABLE harga_komoditas ADD INDEX idx_harga_daerah_tanggal (daerah_id, tanggal_harga)",
+            "ALTER TABLE harga_komoditas ADD INDEX idx_harga_tanggal (tanggal_harga)",
+            "ALTER TABLE inflasi ADD INDEX idx_inflasi_daerah_tanggal_tingkat (id_daerah, tanggal_inflasi, tingkat_inflasi)",
+        ],
+    }),
+    # Hasil deteksi anomali harga (app/anomali.py), dibaca oleh /anomali_harga
+    (5, 'anomali_harga', {
+        'sqlite': [
+            """CREATE TABLE IF NOT EXISTS anomali_harga (
+                daerah_id INTEGER NOT NULL,
+                komoditas_id INTEGER NOT NULL,
+                tanggal_harga DATE NOT NULL,
+                metode TEXT NOT NULL,
+                harga INTEGER NOT NULL,
+                acuan REAL NOT NULL,
+                skor REAL NOT NULL,
+                PRIMARY KEY (daerah_id, komoditas_id, tanggal_harga, metode)
+            )""",
+            """CREATE INDEX IF NOT EXISTS idx_anomali_daerah_tanggal
+                ON anomali_harga (daerah_id, tanggal_harga)""",
+            """CREATE INDEX IF NOT EXISTS idx_anomali_tanggal
+                ON anomali_harga (tanggal_harga)""",
+        ],
+        'mysql': [
+            """CREATE TABLE IF NOT EXISTS anomali_harga (
+                daerah_id INT NOT NULL,
+                komoditas_id INT NOT NULL,
+                tanggal_harga DATE NOT NULL,
+                metode VARCHAR(8) NOT NULL,
+                harga BIGINT NOT NULL,
+                acuan DOUBLE NOT NULL,
+                skor DOUBLE NOT NULL,
+                PRIMARY KEY (daerah_id, komoditas_id, tanggal_harga, metode)
+            )""",
+            "ALTER TABLE anomali_harga ADD INDEX idx_anomali_daerah_tanggal (daerah_id, tanggal_harga)",
+            "ALTER TABLE anomali_harga ADD INDEX idx_anomali_tanggal (tanggal_harga)",
+        ],
+    }),
+]
+
+VERSI_TERBARU = MIGRASI[-1][0]
+
+# Unique key yang ditambahkan migrasi: versi -> list (tabel, kolom primary key, kolom unik).
+# Primary key None berarti HARGA_KOMODITAS_PK
+UNIQUE_KEY_BARU = {
+    2: [
+        ('harga_komoditas', None, ('daerah_id', 'komoditas_id', 'tanggal_harga')),
+        ('inflasi', 'id', ('id_daerah', 'tanggal_inflasi')),
+    ],
+}
+
+SQL_TABEL_MIGRASI = {
+    'sqlite': """CREATE TABLE IF NOT EXISTS schema_migrasi (
+        versi INTEGER PRIMARY KEY,
+        nama TEXT NOT NULL,
+        diterapkan TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    'mysql': """CREATE TABLE IF NOT EXISTS schema_migrasi (
+        versi INT NOT NULL PRIMARY KEY,
+        nama VARCHAR(64) NOT NULL,
+        diterapkan TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+}
+
+
+def _jalankan(cursor, dialek, query):
+    try:
+        cursor.execute(query)
+    except Exception as e:
+        if dialek != 'mysql' or getattr(e, 'errno', None) not in MYSQL_ERRNO_SUDAH_ADA:
+            raise
+
+
+def cek_duplikat(cursor, tabel, kolom, contoh=5):
+    """
+    Baris ganda yang akan menggagalkan unique key (tabel, kolom).
+
+    :return: Tuple (jumlah baris berlebih, list contoh key ganda beserta jumlahnya).
+    """
+    kunci = ', '.join(kolom)
+    cursor.execute(
+        "SELECT COALESCE(SUM(n - 1), 0) FROM (SELECT COUNT(*) AS n FROM {0} GROUP BY {1} HAVING COUNT(*) > 1) d"
+        .format(tabel, kunci)
+    )
+    berlebih = int(cursor.fetchall()[0][0])
+    if not berlebih:
+        return 0, []
+    cursor.execute("SELECT {1}, COUNT(*) FROM {0} GROUP BY {1} HAVING COUNT(*) > 1 LIMIT {2}".format(tabel, kunci, int(contoh)))
+    return berlebih, [tuple(row) for row in cursor.fetchall()]
+
+
+def hapus_duplikat(cursor, tabel, pk, kolom):
+    """
+    Menghapus baris ganda (tabel, kolom), menyimpan baris dengan primary key terbesar.
+    Subquery dibungkus tabel turunan karena MySQL tidak membolehkan DELETE membaca tabel
+    yang sama secara langsung.
+
+    :return: Jumlah baris yang dihapus.
+    """
+    cursor.execute(
+        "DELETE FROM {0} WHERE {1} NOT IN (SELECT {1} FROM (SELECT MAX({1}) AS {1} FROM {0} GROUP BY {2}) simpan)"
+        .format(tabel, pk, ', '.join(kolom))
+    )
+    return cursor.rowcount
+
+
+def _siapkan_unique_key(cursor, versi, dedupe, log):
+    from .repository import HARGA_KOMODITAS_PK
+
+    for tabel, pk, kolom in UNIQUE_KEY_BARU.get(versi, []):
+        berlebih, contoh = cek_duplikat(cursor, tabel, kolom)
+        if not berlebih:
+            continue
+        if not dedupe:
+            raise MigrasiError(
+                "migrasi {:03d}: {} baris ganda di {} untuk unique key ({}), contoh: {}. "
+                "Perbaiki datanya atau jalankan `flask --app run migrasi --dedupe` untuk menyimpan "
+                "baris terakhir tiap key.".format(versi, berlebih, tabel, ', '.join(kolom), ', '.join(
+                    '({}) x{}'.format(', '.join(str(nilai) for nilai in row[:-1]), row[-1]) for row in contoh))
+            )
+        dihapus = hapus_duplikat(cursor, tabel, pk or HARGA_KOMODITAS_PK, kolom)
+        if log:
+            log('migrasi {:03d}: {} baris ganda dihapus dari {}'.format(versi, dihapus, tabel))
+
+
+def versi_terpasang(repository):
+    """Set versi migrasi yang sudah diterapkan (kosong jika tabel schema_migrasi belum ada)."""
+    with repository.connection() as connection:
+        cursor = repository._cursor(connection)
+        cursor.execute(SQL_TABEL_MIGRASI[repository.name])
+        connection.commit()
+        cursor.execute("SELECT versi FROM schema_migrasi")
+        return {row[0] for row in cursor.fetchall()}
+
+
+def migrasi(repository, target=None, log=None, dedupe=False):
+    """
+    Menerapkan migrasi yang belum tercatat sampai versi target, berurutan.
+
+    Setiap migrasi di-commit bersama baris schema_migrasi-nya. Di MySQL DDL ter-commit
+    otomatis per statement, jadi migrasi yang gagal di tengah diulang dari awal pada
+    percobaan berikutnya (aman karena statement idempoten).
+
+    :param repository: Repository tujuan (MySQL atau SQLite).
+    :param target: Versi terakhir yang diterapkan, default VERSI_TERBARU.
+    :param log: Fungsi penerima pesan per migrasi, atau None.
+    :param dedupe: True untuk menghapus baris ganda sebelum unique key dibuat; jika False,
+                   MigrasiError dilempar dengan contoh baris gandanya.
+    :return: List versi yang baru diterapkan.
+    """
+    target = VERSI_TERBARU if target is None else target
+    dialek = repository.name
+    sudah = versi_terpasang(repository)
+    diterapkan = []
+    with repository.connection() as connection:
+        cursor = repository._cursor(connection)
+        for versi, nama, statements in MIGRASI:
+            if versi in sudah or versi > target:
+                continue
+            start = time.perf_counter()
+            try:
+                _siapkan_unique_key(cursor, versi, dedupe, log)
+                for query in statements[dialek]:
+                    _jalankan(cursor, dialek, query)
+                cursor.execute(repository._sql("INSERT INTO schema_migrasi (versi, nama) VALUES (%s, %s)"), (versi, nama))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            diterapkan.append(versi)
+            if log:
+                log('migrasi {:03d} {} ({:.1f} s)'.format(versi, nama, time.perf_counter() - start))
+    return diterapkan
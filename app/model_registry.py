@@ -0,0 +1,243 @@
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.forecast import rollout
+from app.metrics import inc, span
+from app.numpy_model import NumpyModel, export_model, npz_path_for, npz_sesuai
+
+# Muat variabel dari file .env
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODEL_PATH = os.path.join(BASE_DIR, 'model.h5')
+MODEL_DIR = os.path.join(BASE_DIR, 'model')
+
+
+def parse_model_daerah(value):
+    """
+    Mengubah nilai env MODEL_DAERAH (contoh: "3=banyuwangi,7=jakarta_pusat")
+    menjadi dict {id_daerah: path_model}.
+
+    :param value: String konfigurasi pemetaan daerah ke model.
+    :return: Dict id_daerah -> path file model di folder model/.
+    """
+    mapping = {}
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        id_daerah, nama_model = item.split('=', 1)
+        mapping[int(id_daerah)] = os.path.join(MODEL_DIR, 'model_{}.h5'.format(nama_model.strip()))
+    return mapping
+
+
+def semua_model_h5():
+    """
+    File model default dan semua model daerah di folder model/.
+    """
+    return [DEFAULT_MODEL_PATH] + sorted(glob.glob(os.path.join(MODEL_DIR, '*.h5')))
+
+
+def _load_keras_model(path):
+    # Import di dalam fungsi agar tensorflow hanya dimuat saat model benar-benar dibutuhkan
+    from tensorflow.keras.models import load_model
+    # compile=False: optimizer dan metric training tidak dibutuhkan untuk inference
+    return load_model(path, compile=False)
+
+
+def _load_numpy_model(path):
+    # Arsip .npz dibuat ulang otomatis jika belum ada atau diekspor dari isi .h5 yang lain
+    npz_path = npz_path_for(path)
+    if not npz_sesuai(path, npz_path):
+        export_model(path, npz_path)
+    return NumpyModel(npz_path)
+
+
+# Backend inference dipilih lewat env INFERENCE_BACKEND
+LOADERS = {
+    'keras': _load_keras_model,
+    'numpy': _load_numpy_model,
+}
+
+
+class _Loading:
+    def __init__(self):
+        self.event = threading.Event()
+        self.model = None
+        self.error = None
+
+
+class ModelRegistry:
+    """
+    Registry model per proses (per worker gunicorn). Setiap file model hanya di-load
+    sekali, disimpan dalam LRU yang dibatasi jumlah dan perkiraan ukuran memori,
+    dan di-reload otomatis jika mtime file berubah.
+    """
+
+    def __init__(self, default_path=DEFAULT_MODEL_PATH, region_paths=None,
+                 max_models=4, max_bytes=256 * 1024 * 1024, reload_interval=30.0,
+                 loader=_load_keras_model):
+        self.default_path = default_path
+        self.region_paths = dict(region_paths or {})
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.reload_interval = reload_interval
+        self.loader = loader
+
+        # path -> {"model", "mtime", "bytes", "checked_at"}
+        self._models = OrderedDict()
+        # path -> _Loading untuk load yang sedang berjalan
+        self._loading = {}
+        self._lock = threading.RLock()
+        self._stats = {"loads": 0, "hits": 0, "reloads": 0, "evictions": 0}
+
+    def path_for(self, id_daerah=None):
+        """
+        Menentukan file model untuk daerah tertentu. Jika daerah tidak punya model
+        sendiri (atau file-nya tidak ada), gunakan model.h5.
+        """
+        path = self.region_paths.get(id_daerah)
+        if path and os.path.exists(path):
+            return path
+        return self.default_path
+
+    def get(self, id_daerah=None):
+        """
+        Mengambil model untuk daerah tertentu, me-load dari disk hanya jika belum
+        ada di cache atau file model sudah berubah.
+
+        :param id_daerah: ID wilayah, None untuk model default.
+        :return: Objek model yang siap dipakai untuk predict.
+        """
+        return self.get_by_path(self.path_for(id_daerah))
+
+    def get_by_path(self, path):
+        """
+        Load model berjalan di luar lock, sehingga request untuk model lain yang sudah di-cache
+        tidak ikut menunggu; load path yang sama bersamaan hanya dilakukan sekali (single-flight).
+        Saat file berubah, model lama tetap dipakai request lain sampai model baru terpasang.
+        """
+        with self._lock:
+            entry = self._models.get(path)
+            if entry is not None:
+                now = time.monotonic()
+                stale = False
+                if now - entry['checked_at'] >= self.reload_interval:
+                    entry['checked_at'] = now
+                    if os.path.getmtime(path) != entry['mtime']:
+                        print(f"Model {path} berubah di disk, reload.")
+                        self._stats['reloads'] += 1
+                        stale = True
+                if not stale:
+                    self._models.move_to_end(path)
+                    self._stats['hits'] += 1
+                    return entry['model']
+            flight = self._loading.get(path)
+            leader = flight is None
+            if leader:
+                flight = self._loading[path] = _Loading()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.model
+
+        try:
+            flight.model = self._load(path)
+            return flight.model
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(path, None)
+            flight.event.set()
+
+    def version(self, id_daerah=None):
+        """
+        Versi model (nama file dan mtime) untuk dipakai sebagai bagian dari key cache.
+        """
+        path = self.path_for(id_daerah)
+        with self._lock:
+            entry = self._models.get(path)
+            mtime = entry['mtime'] if entry is not None else os.path.getmtime(path)
+        return '{}@{}'.format(os.path.basename(path), int(mtime))
+
+    def _load(self, path):
+        # Dipanggil tanpa lock; hanya pemasangan entry yang memegang lock
+        mtime = os.path.getmtime(path)
+        with span('model.load'):
+            model = self.loader(path)
+            self._warm(model)
+        inc('bangkit_model_loads_total', (os.path.basename(path),))
+        with self._lock:
+            self._stats['loads'] += 1
+            self._models[path] = {
+                "model": model,
+                "mtime": mtime,
+                # Perkiraan memori dari ukuran file bobot model
+                "bytes": os.path.getsize(path),
+                "checked_at": time.monotonic(),
+            }
+            self._models.move_to_end(path)
+            self._evict()
+        return model
+
+    def _evict(self):
+        while len(self._models) > 1 and (
+            len(self._models) > self.max_models
+            or sum(e['bytes'] for e in self._models.values()) > self.max_bytes
+        ):
+            path, _ = self._models.popitem(last=False)
+            self._stats['evictions'] += 1
+            print(f"Model {path} dikeluarkan dari cache.")
+
+    @staticmethod
+    def _warm(model):
+        # Dummy predict dan rollout agar graph sudah dibangun sebelum request pertama;
+        # tidak dicatat di rollout_stats agar statistik hanya berisi request sungguhan
+        n_features = model.input_shape[-1]
+        x = np.zeros((1, 1, n_features), dtype=np.float32)
+        model.predict(x, verbose=0)
+        rollout(model, x, None, 2, catat=False)
+
+    def warm_up(self):
+        """
+        Me-load dan melakukan warm-up semua model yang dikenal (default dan per daerah).
+        """
+        paths = [self.default_path] + [p for p in self.region_paths.values() if os.path.exists(p)]
+        for path in list(dict.fromkeys(paths))[:self.max_models]:
+            try:
+                self.get_by_path(path)
+            except Exception as e:
+                print(f"Error: gagal warm-up model {path}: '{e}'")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats,
+                        loaded=list(self._models.keys()),
+                        bytes=sum(e['bytes'] for e in self._models.values()))
+
+
+def preload_is_fork_safe():
+    """
+    Model boleh di-load di master gunicorn (mode preload) hanya untuk backend numpy;
+    runtime TensorFlow tidak aman dipakai setelah fork.
+    """
+    return os.getenv('INFERENCE_BACKEND', 'keras') == 'numpy'
+
+
+model_registry = ModelRegistry(
+    region_paths=parse_model_daerah(os.getenv('MODEL_DAERAH')),
+    max_models=int(os.getenv('MODEL_CACHE_MAX_MODELS', 4)),
+    max_bytes=int(os.getenv('MODEL_CACHE_MAX_MB', 256)) * 1024 * 1024,
+    reload_interval=float(os.getenv('MODEL_RELOAD_INTERVAL', 30)),
+    loader=LOADERS[os.getenv('INFERENCE_BACKEND', 'keras')],
+)
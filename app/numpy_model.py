@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x):
+    # Keras 3: relu6(x + 3) / 6
+    return np.clip(x / 6.0 + 0.5, 0.0, 1.0)
+
+
+def _hard_sigmoid_keras2(x):
+    # Keras 2 / tf.keras memakai kemiringan 0.2
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    None: lambda x: x,
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'hard_sigmoid_keras2': _hard_sigmoid_keras2,
+    'relu': lambda x: np.maximum(x, 0.0),
+}
+
+SUPPORTED_LAYERS = ('InputLayer', 'LSTM', 'Dense', 'Dropout')
+
+
+def _weight_key(name):
+    # "sequential_5/lstm_9/lstm_cell/recurrent_kernel:0" -> "recurrent_kernel"
+    return name.split('/')[-1].split(':')[0]
+
+
+def export_model(h5_path, npz_path):
+    """
+    Membaca arsitektur dan bobot dari file model Keras (.h5) lalu menyimpannya sebagai
+    arsip NumPy (.npz) yang bisa dijalankan tanpa TensorFlow.
+
+    :param h5_path: Path file model Keras (.h5).
+    :param npz_path: Path tujuan arsip NumPy (.npz).
+    :return: List nama layer yang diekspor.
+    """
+    # h5py jauh lebih ringan dari tensorflow dan hanya dibutuhkan saat ekspor
+    import h5py
+
+    with h5py.File(h5_path, 'r') as f:
+        model_config = f.attrs['model_config']
+        if isinstance(model_config, bytes):
+            model_config = model_config.decode('utf-8')
+        model_config = json.loads(model_config)
+        keras_version = f.attrs.get('keras_version', b'2')
+        keras_version = keras_version.decode('utf-8') if isinstance(keras_version, bytes) else str(keras_version)
+
+        weights_group = f['model_weights'] if 'model_weights' in f else f
+        weights = {}
+        for layer_name in weights_group.attrs['layer_names']:
+            layer_name = layer_name.decode('utf-8') if isinstance(layer_name, bytes) else layer_name
+            group = weights_group[layer_name]
+            for weight_name in group.attrs['weight_names']:
+                weight_name = weight_name.decode('utf-8') if isinstance(weight_name, bytes) else weight_name
+                weights[(layer_name, _weight_key(weight_name))] = np.asarray(group[weight_name][()], dtype=np.float32)
+
+    def aktivasi(nama):
+        # Definisi hard_sigmoid berubah di Keras 3, ikuti versi yang menyimpan file
+        if nama == 'hard_sigmoid' and int(keras_version.split('.')[0]) < 3:
+            return 'hard_sigmoid_keras2'
+        return nama
+
+    layers, arrays = [], {}
+    for layer in model_config['config']['layers']:
+        class_name = layer['class_name']
+        config = layer['config']
+        if class_name not in SUPPORTED_LAYERS:
+            raise ValueError("Layer {} belum didukung oleh inference NumPy".format(class_name))
+
+        if class_name == 'InputLayer':
+            shape = config.get('batch_shape') or config.get('batch_input_shape')
+            layers.append({"type": class_name, "batch_shape": shape})
+            continue
+
+        spec = {"type": class_name, "name": config['name'], "activation": aktivasi(config.get('activation'))}
+        if class_name == 'LSTM':
+            spec.update(units=config['units'], recurrent_activation=aktivasi(config['recurrent_activation']),
+                        return_sequences=config.get('return_sequences', False))
+        elif class_name == 'Dense':
+            spec.update(units=config['units'])
+
+        index = len(layers)
+        for key in ('kernel', 'recurrent_kernel', 'bias'):
+            if (config['name'], key) in weights:
+                arrays['{}/{}'.format(index, key)] = weights[(config['name'], key)]
+        layers.append(spec)
+
+    config = {"layers": layers, "sumber_sha256": sha256_file(h5_path)}
+    np.savez(npz_path, config=np.array(json.dumps(config)), **arrays)
+    return [layer.get('name', layer['type']) for layer in layers]
+
+
+class NumpyModel:
+    """
+    Forward pass LSTM/Dense murni NumPy dengan antarmuka yang sama dengan model Keras
+    yang dipakai di route (`input_shape` dan `predict`).
+    """
+
+    def __init__(self, npz_path):
+        with np.load(npz_path, allow_pickle=False) as archive:
+            self.layers = json.loads(str(archive['config']))['layers']
+            self.weights = {key: archive[key] for key in archive.files if key != 'config'}
+
+        input_layer = next((layer for layer in self.layers if layer['type'] == 'InputLayer'), None)
+        if input_layer is not None:
+            self.input_shape = tuple(input_layer['batch_shape'])
+        else:
+            first_kernel = next(w for k, w in self.weights.items() if k.endswith('/kernel'))
+            self.input_shape = (None, None, first_kernel.shape[0])
+
+    def predict(self, x, verbose=0, **kwargs):
+        """
+        :param x: Array (batch, timesteps, fitur).
+        :return: Array (batch, units layer terakhir), float32 seperti Keras.
+        """
+        out = np.asarray(x, dtype=np.float32)
+        for index, layer in enumerate(self.layers):
+            if layer['type'] == 'LSTM':
+                out = self._lstm(index, layer, out)
+            elif layer['type'] == 'Dense':
+                out = self._dense(index, layer, out)
+            # InputLayer dan Dropout tidak mengubah data saat inference
+        return out
+
+    def __call__(self, x):
+        return self.predict(x)
+
+    def rollout(self, x, eksogen, horizon):
+        """
+        Prediksi rekursif: output tiap langkah menjadi kolom terakhir input langkah berikutnya,
+        kolom lain diambil dari `eksogen`. Semua daerah di batch maju bersama setiap langkah.
+
+        :param x: Array (batch, 1, fitur) untuk langkah pertama.
+        :param eksogen: Array (batch, fitur) untuk langkah kedua dan seterusnya.
+        :return: Array (batch, horizon), float32.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        step_input = np.array(eksogen, dtype=np.float32)[:, None, :]
+        hasil = np.empty((x.shape[0], horizon), dtype=np.float32)
+        for step in range(horizon):
+            hasil[:, step] = self.predict(x)[:, -1]
+            step_input[:, 0, -1] = hasil[:, step]
+            x = step_input
+        return hasil
+
+    def _dense(self, index, layer, x):
+        out = x @ self.weights['{}/kernel'.format(index)]
+        bias = self.weights.get('{}/bias'.format(index))
+        if bias is not None:
+            out = out + bias
+        return ACTIVATIONS[layer['activation']](out)
+
+    def _lstm(self, index, layer, x):
+        kernel = self.weights['{}/kernel'.format(index)]
+        recurrent_kernel = self.weights['{}/recurrent_kernel'.format(index)]
+        bias = self.weights.get('{}/bias'.format(index), 0.0)
+        activation = ACTIVATIONS[layer['activation']]
+        recurrent_activation = ACTIVATIONS[layer['recurrent_activation']]
+        units = layer['units']
+
+        batch, timesteps = x.shape[0], x.shape[1]
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+
+        # Proyeksi input semua timestep sekaligus, loop hanya untuk bagian rekuren
+        x_proj = x @ kernel + bias
+        outputs = []
+        for t in range(timesteps):
+            z = x_proj[:, t, :] + h @ recurrent_kernel
+            # Urutan gate Keras: input, forget, cell, output
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            g = activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * activation(c)
+            if layer['return_sequences']:
+                outputs.append(h)
+
+        if layer['return_sequences']:
+            return np.stack(outputs, axis=1)
+        return h
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def npz_sesuai(h5_path, npz_path):
+    """
+    True jika arsip .npz ada dan diekspor dari isi file .h5 yang sekarang. Dibandingkan
+    lewat hash isi, bukan mtime, karena mtime setelah checkout atau COPY tidak berurutan.
+    """
+    if not os.path.exists(npz_path):
+        return False
+    with np.load(npz_path, allow_pickle=False) as archive:
+        config = json.loads(str(archive['config']))
+    return config.get('sumber_sha256') == sha256_file(h5_path)
+
+
+def npz_path_for(h5_path):
+    return h5_path[:-3] + '.npz' if h5_path.endswith('.h5') else h5_path + '.npz'
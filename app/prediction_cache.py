@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+# Muat variabel dari file .env
+load_dotenv()
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PredictionCache:
+    """
+    Cache hasil prediksi per daerah. Setiap entry menyimpan versi model dan versi data
+    (tanggal inflasi dan harga terakhir) saat hasil dihitung; hasil dihitung ulang hanya
+    jika salah satu versi berubah.
+
+    Versi data dicek ke database paling sering sekali per `version_ttl` detik per daerah,
+    sehingga hit di antara pengecekan tidak menyentuh database sama sekali.
+    """
+
+    def __init__(self, max_entries=256, version_ttl=60.0):
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+
+        # id_daerah -> {"version": (model_version, data_version), "value", "checked_at"}
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "waits": 0, "refreshed": 0,
+                       "invalidated": 0}
+
+        self._refresher = None
+        self._refresher_pid = None
+
+    def get_or_compute(self, id_daerah, version_fn, compute_fn):
+        """
+        Mengembalikan hasil prediksi dari cache atau menghitungnya.
+
+        :param id_daerah: ID wilayah.
+        :param version_fn: Fungsi tanpa argumen yang mengembalikan tuple versi (model, data).
+        :param compute_fn: Fungsi tanpa argumen yang menghitung hasil; mengembalikan
+                           (value, cacheable). Hasil dengan cacheable=False tidak disimpan.
+        :return: Hasil prediksi.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(id_daerah)
+            if entry is not None and now - entry['checked_at'] < self.version_ttl:
+                self._entries.move_to_end(id_daerah)
+                self._stats['hits'] += 1
+                return entry['value']
+
+        version = version_fn()
+        with self._lock:
+            entry = self._entries.get(id_daerah)
+            if entry is not None and entry['version'] == version:
+                entry['checked_at'] = time.monotonic()
+                self._entries.move_to_end(id_daerah)
+                self._stats['hits'] += 1
+                return entry['value']
+            self._stats['stale' if entry is not None else 'misses'] += 1
+
+        return self._compute(id_daerah, version, compute_fn)
+
+    def _compute(self, id_daerah, version, compute_fn):
+        key = (id_daerah, version)
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+            else:
+                self._stats['waits'] += 1
+
+        if not leader:
+            # Single-flight: tunggu hasil dari thread yang sedang menghitung key yang sama
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value, cacheable = compute_fn()
+            flight.value = value
+            if cacheable:
+                self._store(id_daerah, version, value)
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _store(self, id_daerah, version, value):
+        with self._lock:
+            self._entries[id_daerah] = {"version": version, "value": value, "checked_at": time.monotonic()}
+            self._entries.move_to_end(id_daerah)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def refresh(self, version_fn_for, compute_fn_for):
+        """
+        Mengecek ulang versi data semua entry dan menghitung ulang yang sudah usang.
+
+        :param version_fn_for: Fungsi id_daerah -> tuple versi.
+        :param compute_fn_for: Fungsi id_daerah -> (value, cacheable).
+        """
+        with self._lock:
+            items = [(id_daerah, entry['version']) for id_daerah, entry in self._entries.items()]
+        for id_daerah, old_version in items:
+            try:
+                version = version_fn_for(id_daerah)
+                if version == old_version:
+                    with self._lock:
+                        if id_daerah in self._entries:
+                            self._entries[id_daerah]['checked_at'] = time.monotonic()
+                    continue
+                self._compute(id_daerah, version, lambda: compute_fn_for(id_daerah))
+                with self._lock:
+                    self._stats['refreshed'] += 1
+            except Exception as e:
+                print(f"Error: refresh cache prediksi daerah {id_daerah} gagal: '{e}'")
+
+    def start_refresher(self, interval, version_fn_for, compute_fn_for):
+        """
+        Menjalankan thread latar yang memanggil refresh() setiap `interval` detik.
+        Aman dipanggil berkali-kali; thread dibuat sekali per proses (juga setelah fork).
+        """
+        if interval <= 0:
+            return
+        if self._refresher is not None and self._refresher_pid == os.getpid():
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.refresh(version_fn_for, compute_fn_for)
+
+        self._refresher = threading.Thread(target=loop, name='prediction-cache-refresher', daemon=True)
+        self._refresher_pid = os.getpid()
+        self._refresher.start()
+
+    def invalidate(self, id_daerah_list):
+        """
+        Membuang entry daerah yang datanya baru berubah (misalnya setelah ingest), untuk semua
+        horizon; request berikutnya langsung menghitung ulang tanpa menunggu version_ttl.
+
+        :param id_daerah_list: ID wilayah; key cache berbentuk id_daerah atau (id_daerah, horizon).
+        :return: Jumlah entry yang dibuang.
+        """
+        id_daerah_set = set(id_daerah_list)
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (key[0] if isinstance(key, tuple) else key) in id_daerah_set]
+            for key in keys:
+                del self._entries[key]
+            self._stats['invalidated'] += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+
+
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv('PREDIKSI_CACHE_MAX_ENTRIES', 256)),
+    version_ttl=float(os.getenv('PREDIKSI_CACHE_VERSION_TTL', 60)),
+)
@@ -0,0 +1,212 @@
+"""
+Pengecekan rencana eksekusi (EXPLAIN) semua query yang dipakai route dan helper.
+
+Query tidak disalin ke sini: setiap skenario memanggil method Repository yang asli, lalu
+query pertama yang sampai ke `_execute` direkam dan dibatalkan sebelum dijalankan. Query itu
+kemudian di-EXPLAIN di backend yang sama. Karena tidak ada query yang benar-benar dijalankan,
+pengecekan aman diarahkan ke database MySQL produksi.
+
+Sebuah query gagal jika membaca seluruh tabel (SQLite `SCAN tabel`, MySQL type ALL/index)
+selain tabel referensi kecil, atau butuh sort terpisah (SQLite `USE TEMP B-TREE`, MySQL
+`Using filesort`/`Using temporary`), kecuali skenario itu memang dicatat boleh beserta alasannya.
+"""
+import re
+
+from .repository import HARGA_KOMODITAS_PK
+
+# Tabel kecil (puluhan baris) yang boleh dibaca penuh
+TABEL_REFERENSI = ('daerah', 'komoditas')
+
+# Hasil subquery di FROM/JOIN (alias tabel turunan di query, MySQL <derivedN> dan sejenisnya) boleh
+# dibaca penuh karena tabel asal di dalam subquery dicek sendiri pada baris rencananya.
+# Nama lain yang tidak dikenali dianggap tabel besar.
+TABEL_TURUNAN = '<turunan>'
+PREFIX_TURUNAN_MYSQL = ('<derived', '<subquery', '<union')
+# Baris rencana SQLite tanpa tabel (SELECT berisi scalar subquery saja)
+SCAN_TANPA_TABEL = ('CONSTANT ROW',)
+
+# Nilai contoh parameter; rencana eksekusi tidak bergantung pada nilainya
+DAERAH, KOMODITAS = 1, 1
+SEJAK, SAMPAI = '2020-01-01', '2020-12-31'
+KONDISI_RENTANG = "daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s AND tanggal_harga < %s"
+
+
+class _QueryDirekam(BaseException):
+    # BaseException agar tidak tertangkap `except Exception` di method repository
+    def __init__(self, query, params):
+        super().__init__(query)
+        self.query = query
+        self.params = params
+
+
+def _reset_rollup(repository):
+    # Memaksa pakai_harga_bulanan membaca rollup_watermark lagi
+    repository._harga_bulanan = None
+    repository._harga_bulanan_dicek = 0.0
+    return repository.pakai_harga_bulanan()
+
+
+# (nama, fungsi yang menjalankan satu query lewat repository, alasan jika scan/sort memang wajar)
+SKENARIO = [
+    ('deret_harga', lambda r: r.deret_harga(DAERAH, KOMODITAS, SEJAK), None),
+    ('deret_harga_lengkap', lambda r: r.deret_harga_lengkap(DAERAH, KOMODITAS, SEJAK), None),
+    ('harga_terakhir', lambda r: r.harga_terakhir(DAERAH, KOMODITAS), None),
+    ('watermark_harga', lambda r: r.watermark_harga(DAERAH, KOMODITAS), None),
+    ('watermark_harga sejak', lambda r: r.watermark_harga(DAERAH, KOMODITAS, SEJAK), None),
+    ('export halaman', lambda r: r.halaman_export_harga({}, None, 1000),
+     'halaman pertama: index tanggal dibaca berurutan dan berhenti di LIMIT'),
+    ('export halaman cursor', lambda r: r.halaman_export_harga({}, (SEJAK, 1), 1000), None),
+    ('export halaman daerah', lambda r: r.halaman_export_harga({'daerah_id': DAERAH}, (SEJAK, 1), 1000), None),
+    ('export halaman daerah komoditas', lambda r: r.halaman_export_harga(
+        {'daerah_id': DAERAH, 'komoditas_id': KOMODITAS, 'start': SEJAK, 'end': SAMPAI}, (SEJAK, 1), 1000), None),
+    ('export halaman komoditas', lambda r: r.halaman_export_harga({'komoditas_id': KOMODITAS}, (SEJAK, 1), 1000), None),
+    ('export stream', lambda r: r.stream_export_harga({}, None, 1000),
+     'export tanpa filter dan tanpa limit memang membaca seluruh tabel'),
+    ('deret_harga_bulanan rollup', lambda r: r._fetchall(
+        r.sql_deret_harga_bulanan(True), (DAERAH, KOMODITAS, SEJAK)), None),
+    ('deret_harga_bulanan agregat', lambda r: r._fetchall(
+        r.sql_deret_harga_bulanan(False), (DAERAH, KOMODITAS, SEJAK)),
+     'fallback tanpa rollup: GROUP BY ekspresi bulan hanya mengurutkan baris satu (daerah, komoditas)'),
+    ('pakai_harga_bulanan', _reset_rollup, None),
+    ('rollup rentang', lambda r: r._execute(None, r._sql_rollup(KONDISI_RENTANG), (DAERAH, KOMODITAS, SEJAK, SAMPAI)),
+     'GROUP BY ekspresi bulan hanya mengurutkan baris bulan yang dihitung ulang'),
+    ('rollup baris baru', lambda r: r._execute(None, r.sql_rentang_baru(), (0, 1000)),
+     'GROUP BY hanya atas baris baru sejak watermark'),
+    ('rollup penuh', lambda r: r._execute(None, r._sql_rollup("{} <= %s".format(HARGA_KOMODITAS_PK)), (1000,)),
+     'backfill rollup memang membaca seluruh tabel'),
+    ('deret_harga_banyak', lambda r: r.deret_harga_banyak([1, 2, 3], [1, 2], SEJAK), None),
+    ('deret_harga_banyak bulanan rollup', lambda r: r._fetchall(
+        r.sql_deret_harga_banyak(3, 2, bulanan=True, rollup=True), (1, 2, 3, 1, 2, SEJAK)), None),
+    ('deret_harga_banyak bulanan agregat', lambda r: r._fetchall(
+        r.sql_deret_harga_banyak(3, 2, bulanan=True), (1, 2, 3, 1, 2, SEJAK)),
+     'fallback tanpa rollup: GROUP BY ekspresi bulan hanya mengurutkan baris deret yang diminta'),
+    ('harga_terakhir_banyak', lambda r: r.harga_terakhir_banyak([1, 2, 3], [1, 2]), None),
+    ('anomali_harga', lambda r: r.anomali_harga({}, 100),
+     'tanpa filter: index tanggal dibaca mundur dan berhenti di LIMIT'),
+    ('anomali_harga daerah', lambda r: r.anomali_harga({'daerah_id': DAERAH, 'start': SEJAK}, 100), None),
+    ('anomali_harga daerah komoditas', lambda r: r.anomali_harga(
+        {'daerah_id': DAERAH, 'komoditas_id': KOMODITAS, 'metode': 'mad'}, 100), None),
+    ('anomali_harga komoditas', lambda r: r.anomali_harga({'komoditas_id': KOMODITAS, 'start': SEJAK}, 100), None),
+    ('id_harga_terakhir', lambda r: r.id_harga_terakhir(), None),
+    ('watermark_rollup', lambda r: r.watermark_rollup('anomali_harga'), None),
+    ('inflasi_terakhir', lambda r: r.inflasi_terakhir(DAERAH), None),
+    ('watermark_inflasi', lambda r: r.watermark_inflasi(DAERAH), None),
+    ('daftar_komoditas', lambda r: r.daftar_komoditas(), None),
+    ('daftar_daerah', lambda r: r.daftar_daerah(), None),
+    ('komoditas_ids', lambda r: r.komoditas_ids(), None),
+    ('watermark_komoditas', lambda r: r.watermark_komoditas(), None),
+    ('watermark_daerah', lambda r: r.watermark_daerah(), None),
+    ('versi_data', lambda r: r.versi_data('harga', DAERAH), None),
+    ('versi_data_prediksi', lambda r: r.versi_data_prediksi(DAERAH), None),
+    ('fitur_bulanan', lambda r: r._execute(None, r.sql_fitur_bulanan(3), (1, 2, 3)), None),
+    ('fitur_bulanan sejak', lambda r: r._execute(None, r.sql_fitur_bulanan(3, sejak=True), (1, 2, 3, SEJAK)), None),
+    ('fitur_bulanan rollup', lambda r: r._execute(None, r.sql_fitur_bulanan(3, rollup=True), (1, 2, 3)), None),
+    ('fitur_bulanan rollup sejak', lambda r: r._execute(
+        None, r.sql_fitur_bulanan(3, sejak=True, rollup=True), (1, 2, 3, SEJAK)), None),
+]
+
+
+def rekam_query(repository, fungsi):
+    """
+    Menjalankan fungsi(repository) sampai query pertama dan mengembalikan (query, params)
+    tanpa menjalankannya.
+    """
+    def rekam(cursor, query, params=()):
+        raise _QueryDirekam(query, params)
+
+    repository._execute = rekam
+    try:
+        fungsi(repository)
+    except _QueryDirekam as direkam:
+        return direkam.query, direkam.params
+    finally:
+        del repository._execute
+    raise RuntimeError('skenario tidak menjalankan query')
+
+
+def _alias_tabel(query):
+    # alias -> nama tabel untuk setiap FROM/JOIN langsung ke tabel, alias subquery -> TABEL_TURUNAN
+    alias = {}
+    for tabel, nama in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?!ON\b|WHERE\b|JOIN\b|CROSS\b|LEFT\b|GROUP\b|ORDER\b|LIMIT\b)(\w+))?',
+                                  query, re.IGNORECASE):
+        alias[tabel] = tabel
+        if nama:
+            alias[nama] = tabel
+    for buka in re.finditer(r'\b(?:FROM|JOIN)\s*\(', query, re.IGNORECASE):
+        # Cari kurung tutup pasangannya, lalu alias di belakangnya
+        kedalaman, posisi = 0, buka.end() - 1
+        while posisi < len(query):
+            kedalaman += {'(': 1, ')': -1}.get(query[posisi], 0)
+            if kedalaman == 0:
+                break
+            posisi += 1
+        nama = re.match(r'\s*(?:AS\s+)?(\w+)', query[posisi + 1:], re.IGNORECASE)
+        if nama:
+            alias[nama.group(1)] = TABEL_TURUNAN
+    return alias
+
+
+def _boleh_dibaca_penuh(tabel):
+    return tabel in TABEL_REFERENSI or tabel == TABEL_TURUNAN
+
+
+def masalah_sqlite(repository, query, params):
+    """
+    :return: Tuple (baris rencana, list masalah) dari EXPLAIN QUERY PLAN.
+    """
+    alias = _alias_tabel(query)
+    with repository.connection() as connection:
+        rencana = [row[3] for row in connection.execute('EXPLAIN QUERY PLAN ' + repository._sql(query), params)]
+    masalah = []
+    for detail in rencana:
+        scan = re.match(r'SCAN (\w+)', detail)
+        if scan and not detail[5:].startswith(SCAN_TANPA_TABEL) and not _boleh_dibaca_penuh(alias.get(scan.group(1))):
+            masalah.append(detail)
+        elif 'USE TEMP B-TREE' in detail:
+            masalah.append(detail)
+    return rencana, masalah
+
+
+def masalah_mysql(repository, query, params):
+    """
+    :return: Tuple (baris rencana, list masalah) dari EXPLAIN tradisional MySQL.
+    """
+    alias = _alias_tabel(query)
+    with repository.connection() as connection:
+        cursor = repository._cursor(connection, dictionary=True)
+        cursor.execute('EXPLAIN ' + query, params)
+        baris = cursor.fetchall()
+    rencana, masalah = [], []
+    for row in baris:
+        tabel = row.get('table') or ''
+        extra = row.get('Extra') or ''
+        detail = '{} type={} key={} rows={} {}'.format(tabel, row.get('type'), row.get('key'), row.get('rows'), extra).strip()
+        rencana.append(detail)
+        tabel_asli = TABEL_TURUNAN if tabel.startswith(PREFIX_TURUNAN_MYSQL) else alias.get(tabel)
+        if row.get('type') in ('ALL', 'index') and not _boleh_dibaca_penuh(tabel_asli):
+            masalah.append(detail)
+        elif 'Using filesort' in extra or 'Using temporary' in extra:
+            masalah.append(detail)
+    return rencana, masalah
+
+
+def cek_query(repository, skenario=None):
+    """
+    EXPLAIN setiap skenario di backend repository.
+
+    :return: List dict nama, rencana, masalah dan alasan (jika scan/sort dibolehkan);
+             `gagal` True jika ada masalah tanpa alasan.
+    """
+    cek = masalah_mysql if repository.name == 'mysql' else masalah_sqlite
+    hasil = []
+    for nama, fungsi, alasan in skenario or SKENARIO:
+        query, params = rekam_query(repository, fungsi)
+        rencana, masalah = cek(repository, query, params)
+        hasil.append({
+            "nama": nama,
+            "rencana": rencana,
+            "masalah": masalah,
+            "alasan": alasan,
+            "gagal": bool(masalah) and alasan is None,
+        })
+    return hasil
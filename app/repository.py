@@ -0,0 +1,963 @@
+"""
+Lapisan akses data: semua query ke tabel harga_komoditas, inflasi, komoditas dan daerah
+ada di sini. Route dan utils tidak memanggil driver database secara langsung.
+
+Backend dipilih dengan DB_BACKEND:
+- mysql (default): pool mysql.connector dari app.db_connection
+- sqlite: file SQLITE_PATH dengan skema yang sama, untuk benchmark dan pengembangan lokal
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime, timezone
+
+from dotenv import load_dotenv
+
+from .db_connection import DatabaseConnectionError, db_connection, get_pool
+from .metrics import inc, span
+from .migrations import migrasi
+from .streaming import iter_rows
+
+# Muat variabel dari file .env
+load_dotenv()
+
+# Kolom primary key harga_komoditas, dipakai sebagai pemecah seri cursor keyset
+HARGA_KOMODITAS_PK = os.getenv('HARGA_KOMODITAS_PK', 'id')
+
+# Pemakaian rollup harga_bulanan untuk fitur prediksi dan deret bulanan:
+# auto = dipakai setelah backfill pertama (ada baris watermark), 1 = selalu, 0 = selalu dari baris harian
+HARGA_BULANAN = os.getenv('HARGA_BULANAN', 'auto')
+
+# Komoditas yang menjadi kolom fitur prediksi, urut sesuai kolom input model (kolom terakhir inflasi).
+# Komoditas lain di tabel komoditas tidak ikut, sehingga menambah komoditas tidak mengubah lebar input
+KOMODITAS_MODEL = tuple(int(k) for k in os.getenv('KOMODITAS_MODEL', '1,2,3,4,5').split(',') if k.strip())
+
+# Kolom harga_bulanan selain kunci, urutan sama dengan hasil sql_agregat_bulanan
+KOLOM_HARGA_BULANAN = ('jumlah', 'rata2', 'minimum', 'maksimum', 'terakhir', 'tanggal_terakhir')
+
+# Kolom anomali_harga, urutan baris yang ditulis deteksi anomali dan dibaca /anomali_harga
+KOLOM_ANOMALI = ('daerah_id', 'komoditas_id', 'tanggal_harga', 'metode', 'harga', 'acuan', 'skor')
+# Metode deteksi anomali (lihat app/anomali.py)
+METODE_ANOMALI = ('mad', 'hp')
+
+# Kolom dan unique key tabel yang bisa di-ingest; kolom daerah dipakai untuk versi data
+TABEL_INGEST = {
+    'harga': {
+        "tabel": 'harga_komoditas',
+        "kolom": ('daerah_id', 'komoditas_id', 'tanggal_harga', 'harga'),
+        "kunci": ('daerah_id', 'komoditas_id', 'tanggal_harga'),
+        "daerah": 'daerah_id',
+    },
+    'inflasi': {
+        "tabel": 'inflasi',
+        "kolom": ('id_daerah', 'tingkat_inflasi', 'tanggal_inflasi'),
+        "kunci": ('id_daerah', 'tanggal_inflasi'),
+        "daerah": 'id_daerah',
+    },
+}
+
+# Kolom DATE di SQLite disimpan sebagai teks ISO dan dibaca kembali sebagai date
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, datetime.isoformat)
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+
+
+def _as_date(value):
+    # Hasil agregat (MAX) di SQLite tidak membawa tipe kolom, jadi masih berupa teks
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _bulan_berikut(tanggal):
+    # 'yyyy-mm-dd' -> awal bulan berikutnya 'yyyy-mm-01'
+    tahun, bulan = int(tanggal[:4]), int(tanggal[5:7])
+    return '{:04d}-{:02d}-01'.format(tahun + bulan // 12, bulan % 12 + 1)
+
+
+def awal_bulan(tanggal):
+    # 'yyyy-mm-dd' atau date -> awal bulannya 'yyyy-mm-01'
+    return str(tanggal)[:8] + '01'
+
+
+def baris_harga_bulanan(rows):
+    """
+    Normalisasi baris deret bulanan: tanggal menjadi date dan rata-rata menjadi float
+    (teks di agregat SQLite, Decimal di AVG MySQL).
+    """
+    return [
+        (_as_date(bulan), jumlah, float(rata2), minimum, maksimum, terakhir, _as_date(tanggal_terakhir))
+        for bulan, jumlah, rata2, minimum, maksimum, terakhir, tanggal_terakhir in rows
+    ]
+
+
+def rentang_bulan(rows, index_daerah=0, index_komoditas=1, index_tanggal=2):
+    """
+    Rentang bulan yang tersentuh sekumpulan baris harga, per (daerah, komoditas).
+
+    :param rows: Baris dengan tanggal yyyy-mm-dd (teks atau date).
+    :return: List tuple (daerah_id, komoditas_id, awal bulan pertama, awal bulan setelah bulan terakhir).
+    """
+    rentang = {}
+    for row in rows:
+        key = (row[index_daerah], row[index_komoditas])
+        tanggal = str(row[index_tanggal])[:10]
+        lama = rentang.get(key)
+        if lama is None:
+            rentang[key] = [tanggal, tanggal]
+        elif tanggal < lama[0]:
+            lama[0] = tanggal
+        elif tanggal > lama[1]:
+            lama[1] = tanggal
+    return [(d, k, awal_bulan(awal), _bulan_berikut(akhir)) for (d, k), (awal, akhir) in sorted(rentang.items())]
+
+
+def sql_export_harga(filters, after=None, limit=None, pk=HARGA_KOMODITAS_PK):
+    """
+    Menyusun query export harga_komoditas.
+
+    :param filters: Dict opsional daerah_id, komoditas_id, start, end (yyyy-mm-dd).
+    :param after: Tuple (tanggal_harga, pk) dari cursor keyset, atau None.
+    :param limit: Jumlah baris maksimum, atau None untuk semua.
+    :return: Tuple (query, params) dengan placeholder %s.
+    """
+    conditions, params = [], []
+    for kolom in ('daerah_id', 'komoditas_id'):
+        if filters.get(kolom) is not None:
+            conditions.append("{} = %s".format(kolom))
+            params.append(filters[kolom])
+    for nama, operator in (('start', '>='), ('end', '<=')):
+        if filters.get(nama):
+            conditions.append("tanggal_harga {} %s".format(operator))
+            params.append(filters[nama])
+    if after is not None:
+        tanggal_cursor, pk_cursor = after
+        # Ditulis dengan batas bawah tanggal_harga >= %s di depan agar cursor menjadi rentang index
+        conditions.append("tanggal_harga >= %s AND (tanggal_harga > %s OR {} > %s)".format(pk))
+        params.extend([tanggal_cursor, tanggal_cursor, pk_cursor])
+
+    query = "SELECT * FROM harga_komoditas"  # Ganti dengan nama tabel Anda
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if limit is not None or after is not None:
+        # Urutan stabil dibutuhkan untuk pagination keyset
+        query += " ORDER BY tanggal_harga ASC, {} ASC".format(pk)
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, tuple(params)
+
+
+def sql_anomali_harga(filters, limit):
+    """
+    Menyusun query hasil deteksi anomali, terbaru dulu.
+
+    :param filters: Dict opsional daerah_id, komoditas_id, metode, start, end (yyyy-mm-dd).
+    :param limit: Jumlah baris maksimum.
+    :return: Tuple (query, params) dengan placeholder %s.
+    """
+    conditions, params = [], []
+    for kolom in ('daerah_id', 'komoditas_id', 'metode'):
+        if filters.get(kolom) is not None:
+            conditions.append("{} = %s".format(kolom))
+            params.append(filters[kolom])
+    for nama, operator in (('start', '>='), ('end', '<=')):
+        if filters.get(nama):
+            conditions.append("tanggal_harga {} %s".format(operator))
+            params.append(filters[nama])
+
+    query = "SELECT {} FROM anomali_harga".format(', '.join(KOLOM_ANOMALI))
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY tanggal_harga DESC LIMIT %s"
+    params.append(limit)
+    return query, tuple(params)
+
+
+class Repository:
+    """
+    Query yang dipakai aplikasi. Subclass menyediakan `connection()`, pembuatan cursor,
+    konversi placeholder dan ekspresi tanggal khusus dialek; semua query ditulis sekali
+    dengan placeholder %s.
+    """
+    name = None
+    # Awal bulan kalender sebuah kolom tanggal dan awal bulan berikutnya
+    SQL_AWAL_BULAN = None
+    SQL_BULAN_BERIKUT = None
+    # Upsert: INSERT {tabel} ({kolom}) VALUES (...) lalu klausa ini (kolom kunci, kolom yang diperbarui)
+    SQL_UPSERT = None
+    SQL_NILAI_BARU = None
+    # Kolom TIMESTAMP (UTC) sebagai detik epoch, agar waktu perubahan tidak bergantung zona waktu sesi
+    SQL_EPOCH = None
+    # Tabel data_versi belum dibuat (MySQL lama): versi data dianggap 0
+    _versi_tersedia = True
+    # Hasil deteksi rollup harga_bulanan (lihat pakai_harga_bulanan) dan waktu pengecekannya
+    _harga_bulanan = None
+    _harga_bulanan_dicek = 0.0
+    # Jeda (detik) sebelum mengecek ulang rollup yang belum di-backfill
+    HARGA_BULANAN_CEK_ULANG = 60
+
+    def connection(self):
+        raise NotImplementedError
+
+    def _cursor(self, connection, dictionary=False, streaming=False):
+        raise NotImplementedError
+
+    def _sql(self, query):
+        return query
+
+    def _execute(self, cursor, query, params=()):
+        inc('bangkit_db_queries_total', (self.name,))
+        try:
+            with span('db.query'):
+                cursor.execute(self._sql(query), params)
+        except Exception:
+            inc('bangkit_db_errors_total', (self.name,))
+            raise
+
+    def _fetchall(self, query, params=(), dictionary=False):
+        with self.connection() as connection:
+            cursor = self._cursor(connection, dictionary=dictionary)
+            self._execute(cursor, query, params)
+            with span('db.fetch'):
+                return cursor.fetchall()
+
+    def _fetchone(self, query, params=(), dictionary=False):
+        with self.connection() as connection:
+            cursor = self._cursor(connection, dictionary=dictionary)
+            self._execute(cursor, query, params)
+            with span('db.fetch'):
+                return cursor.fetchone()
+
+    # --- harga_komoditas ---
+
+    def deret_harga(self, daerah_id, komoditas_id, start_date):
+        """Baris (tanggal_harga, harga) sejak start_date, urut tanggal."""
+        return self._fetchall("""
+            SELECT tanggal_harga, harga
+            FROM harga_komoditas
+            WHERE daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s
+            ORDER BY tanggal_harga ASC
+        """, (daerah_id, komoditas_id, start_date))
+
+    def deret_harga_lengkap(self, daerah_id, komoditas_id, start_date):
+        """Semua kolom harga_komoditas (dict per baris) sejak start_date, urut tanggal."""
+        return self._fetchall("""
+            SELECT *
+            FROM harga_komoditas
+            WHERE daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s
+            ORDER BY tanggal_harga ASC
+        """, (daerah_id, komoditas_id, start_date), dictionary=True)
+
+    def harga_terakhir(self, daerah_id, komoditas_id):
+        """Baris harga terakhir (dict), atau None."""
+        return self._fetchone("""
+            SELECT *
+            FROM harga_komoditas
+            WHERE daerah_id = %s AND komoditas_id = %s
+            ORDER BY tanggal_harga DESC
+            LIMIT 1
+        """, (daerah_id, komoditas_id), dictionary=True)
+
+    def watermark_harga(self, daerah_id, komoditas_id, start_date=None):
+        """Tuple (tanggal_harga terakhir, jumlah baris) untuk conditional GET."""
+        query = """
+            SELECT MAX(tanggal_harga), COUNT(*)
+            FROM harga_komoditas
+            WHERE daerah_id = %s AND komoditas_id = %s
+        """
+        params = (daerah_id, komoditas_id)
+        if start_date is not None:
+            query += " AND tanggal_harga >= %s"
+            params += (start_date,)
+        tanggal_terakhir, jumlah = self._fetchone(query, params)
+        return _as_date(tanggal_terakhir), jumlah
+
+    def halaman_export_harga(self, filters, after=None, limit=None):
+        """Satu halaman export harga_komoditas (list dict)."""
+        query, params = sql_export_harga(filters, after, limit)
+        return self._fetchall(query, params, dictionary=True)
+
+    def stream_export_harga(self, filters, after, chunk_size):
+        """
+        Export tanpa limit dari cursor server-side. Query dijalankan sekarang (agar error
+        database muncul sebelum response dikirim), koneksi dipinjam sampai baris terakhir.
+
+        :return: Tuple (chunks, close). `chunks` menghasilkan list dict per potongan,
+                 `close` mengembalikan koneksi jika streaming berhenti di tengah jalan.
+        """
+        query, params = sql_export_harga(filters, after)
+        stack = ExitStack()
+        connection = stack.enter_context(self.connection())
+        try:
+            cursor = self._cursor(connection, dictionary=True, streaming=True)
+            self._execute(cursor, query, params)
+        except Exception:
+            stack.close()
+            raise
+
+        def generate():
+            with stack:
+                yield from iter_rows(cursor, chunk_size)
+
+        return generate(), stack.close
+
+    # --- rollup bulanan harga_komoditas ---
+
+    @classmethod
+    def sql_agregat_bulanan(cls, kondisi):
+        """
+        Agregat harga_komoditas per (daerah_id, komoditas_id, bulan kalender): jumlah baris,
+        rata-rata, minimum, maksimum dan harga pada tanggal terakhir bulan itu.
+
+        :param kondisi: Kondisi WHERE atas harga_komoditas (boleh berisi placeholder %s).
+        :return: Query SELECT dengan kolom daerah_id, komoditas_id, bulan lalu KOLOM_HARGA_BULANAN.
+        """
+        bulan = cls.SQL_AWAL_BULAN.format('tanggal_harga')
+        # WHERE 1 = 1 di luar subquery: tanpa WHERE, SQLite salah membaca ON CONFLICT
+        # setelah JOIN ... ON sebagai bagian dari join saat query ini dipakai di INSERT ... SELECT
+        return """
+            SELECT a.daerah_id, a.komoditas_id, a.bulan, a.jumlah, a.rata2, a.minimum, a.maksimum,
+                   h.harga AS terakhir, a.tanggal_terakhir
+            FROM (
+                SELECT daerah_id, komoditas_id, {bulan} AS bulan, COUNT(*) AS jumlah, AVG(harga) AS rata2,
+                       MIN(harga) AS minimum, MAX(harga) AS maksimum, MAX(tanggal_harga) AS tanggal_terakhir
+                FROM harga_komoditas
+                WHERE {kondisi}
+                GROUP BY daerah_id, komoditas_id, {bulan}
+            ) a
+            JOIN harga_komoditas h
+                ON h.daerah_id = a.daerah_id
+                AND h.komoditas_id = a.komoditas_id
+                AND h.tanggal_harga = a.tanggal_terakhir
+            WHERE 1 = 1
+        """.format(bulan=bulan, kondisi=kondisi)
+
+    def _sql_rollup(self, kondisi):
+        # Hitung ulang baris harga_bulanan untuk semua bulan yang cocok dengan kondisi
+        kolom = ('daerah_id', 'komoditas_id', 'bulan') + KOLOM_HARGA_BULANAN
+        return "INSERT INTO harga_bulanan ({}) {} {}".format(
+            ', '.join(kolom), self.sql_agregat_bulanan(kondisi),
+            self.SQL_UPSERT.format(
+                kunci='daerah_id, komoditas_id, bulan',
+                set=', '.join("{0} = {1}".format(k, self.SQL_NILAI_BARU.format(k)) for k in KOLOM_HARGA_BULANAN),
+            ),
+        )
+
+    def _rollup_rentang(self, cursor, rentang):
+        # rentang: list (daerah_id, komoditas_id, awal, akhir) dari rentang_bulan.
+        # Satu execute per rentang, bukan executemany: mysql.connector mencoba menulis ulang
+        # INSERT ... SELECT ... VALUES(x) menjadi INSERT multi-baris dan gagal (InterfaceError)
+        query = self._sql_rollup(
+            "daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s AND tanggal_harga < %s"
+        )
+        for params in rentang:
+            self._execute(cursor, query, params)
+
+    @classmethod
+    def sql_rentang_baru(cls, pk=HARGA_KOMODITAS_PK):
+        """
+        Rentang tanggal per (daerah, komoditas) dari baris dengan id di (%s, %s], untuk
+        rollup inkremental.
+        """
+        return """
+            SELECT daerah_id, komoditas_id, MIN(tanggal_harga), MAX(tanggal_harga)
+            FROM harga_komoditas
+            WHERE {0} > %s AND {0} <= %s
+            GROUP BY daerah_id, komoditas_id
+        """.format(pk)
+
+    def pakai_harga_bulanan(self):
+        """
+        True jika rollup harga_bulanan dipakai (HARGA_BULANAN, default auto: setelah
+        backfill pertama mencatat watermark). Selama belum ada, dicek ulang paling cepat
+        setiap HARGA_BULANAN_CEK_ULANG detik sehingga worker lain ikut memakai rollup
+        tanpa restart.
+        """
+        if HARGA_BULANAN in ('0', '1'):
+            return HARGA_BULANAN == '1'
+        if self._harga_bulanan or time.monotonic() - self._harga_bulanan_dicek < self.HARGA_BULANAN_CEK_ULANG:
+            return bool(self._harga_bulanan)
+        try:
+            row = self._fetchone("SELECT COUNT(*) FROM rollup_watermark WHERE nama = %s", ('harga_bulanan',))
+            self._harga_bulanan = bool(row[0])
+        except DatabaseConnectionError:
+            raise
+        except Exception:
+            # Tabel rollup belum dibuat (MySQL lama)
+            self._harga_bulanan = False
+        self._harga_bulanan_dicek = time.monotonic()
+        return self._harga_bulanan
+
+    def perbarui_harga_bulanan(self, penuh=False):
+        """
+        Memperbarui rollup harga_bulanan dalam satu transaksi. Mode inkremental menghitung
+        ulang hanya bulan (daerah, komoditas) yang punya baris dengan id lebih besar dari
+        watermark; penuh=True (atau belum ada watermark) mengisi ulang seluruh tabel.
+        Baris yang di-upsert lewat ingest sudah di-rollup di transaksi ingest itu sendiri.
+
+        :return: Dict mode, jumlah rentang (daerah, komoditas) yang dihitung ulang dan id watermark baru.
+        """
+        pk = HARGA_KOMODITAS_PK
+        with self.connection() as connection:
+            cursor = self._cursor(connection)
+            try:
+                self._execute(cursor, "SELECT MAX({}) FROM harga_komoditas".format(pk))
+                id_terakhir = cursor.fetchone()[0] or 0
+                watermark = None
+                if not penuh:
+                    self._execute(cursor, "SELECT id_terakhir FROM rollup_watermark WHERE nama = %s", ('harga_bulanan',))
+                    row = cursor.fetchone()
+                    watermark = row[0] if row else None
+
+                if watermark is None:
+                    self._execute(cursor, "DELETE FROM harga_bulanan")
+                    self._execute(cursor, self._sql_rollup("{} <= %s".format(pk)), (id_terakhir,))
+                    mode, jumlah_rentang = 'penuh', None
+                else:
+                    self._execute(cursor, self.sql_rentang_baru(), (watermark, id_terakhir))
+                    rentang = [
+                        (d, k, awal_bulan(awal), _bulan_berikut(str(akhir)))
+                        for d, k, awal, akhir in cursor.fetchall()
+                    ]
+                    self._rollup_rentang(cursor, rentang)
+                    mode, jumlah_rentang = 'inkremental', len(rentang)
+
+                self._execute(cursor, "INSERT INTO rollup_watermark (nama, id_terakhir) VALUES (%s, %s) " + self.SQL_UPSERT.format(
+                    kunci='nama', set="id_terakhir = {}".format(self.SQL_NILAI_BARU.format('id_terakhir'))
+                ), ('harga_bulanan', id_terakhir))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        self._harga_bulanan = True
+        return {"mode": mode, "rentang": jumlah_rentang, "id_terakhir": id_terakhir}
+
+    @classmethod
+    def sql_deret_harga_bulanan(cls, rollup):
+        """
+        Query deret bulanan satu (daerah, komoditas) sejak awal bulan %s, urut bulan.
+
+        :param rollup: True untuk membaca harga_bulanan, False untuk mengagregasi harga_komoditas.
+        :return: Query dengan placeholder %s (daerah_id, komoditas_id, awal bulan); baris
+                 (bulan, jumlah, rata2, minimum, maksimum, terakhir, tanggal_terakhir).
+        """
+        if rollup:
+            return """
+                SELECT bulan, {}
+                FROM harga_bulanan
+                WHERE daerah_id = %s AND komoditas_id = %s AND bulan >= %s
+                ORDER BY bulan ASC
+            """.format(', '.join(KOLOM_HARGA_BULANAN))
+        return "SELECT bulan, {} FROM ({}) r ORDER BY bulan ASC".format(
+            ', '.join(KOLOM_HARGA_BULANAN),
+            cls.sql_agregat_bulanan("daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s"),
+        )
+
+    def deret_harga_bulanan(self, daerah_id, komoditas_id, start_date):
+        """
+        Deret bulanan sejak bulan start_date (lihat sql_deret_harga_bulanan). Dibaca dari
+        harga_bulanan, atau diagregasi langsung dari harga_komoditas jika rollup tidak dipakai.
+        """
+        rows = self._fetchall(self.sql_deret_harga_bulanan(self.pakai_harga_bulanan()),
+                              (daerah_id, komoditas_id, awal_bulan(start_date)))
+        return baris_harga_bulanan(rows)
+
+    # --- deret banyak (daerah x komoditas) untuk dashboard ---
+
+    @classmethod
+    def sql_deret_harga_banyak(cls, n_daerah, n_komoditas, bulanan=False, rollup=False):
+        """
+        Query semua deret harga untuk daerah_id IN (...) x komoditas_id IN (...) sejak %s,
+        urut (daerah_id, komoditas_id, tanggal) sehingga tiap deret bersebelahan.
+
+        :param bulanan: True untuk deret bulanan (harga_bulanan, atau agregat jika rollup False).
+        :return: Query dengan placeholder daerah, komoditas lalu tanggal awal; baris
+                 (daerah_id, komoditas_id, tanggal, harga) untuk harian atau
+                 (daerah_id, komoditas_id, bulan, rata2, terakhir, tanggal_terakhir) untuk bulanan.
+        """
+        kondisi = "daerah_id IN ({}) AND komoditas_id IN ({})".format(
+            ', '.join(['%s'] * n_daerah), ', '.join(['%s'] * n_komoditas)
+        )
+        if not bulanan:
+            return """
+                SELECT daerah_id, komoditas_id, tanggal_harga, harga
+                FROM harga_komoditas
+                WHERE {} AND tanggal_harga >= %s
+                ORDER BY daerah_id ASC, komoditas_id ASC, tanggal_harga ASC
+            """.format(kondisi)
+        if rollup:
+            return """
+                SELECT daerah_id, komoditas_id, bulan, rata2, terakhir, tanggal_terakhir
+                FROM harga_bulanan
+                WHERE {} AND bulan >= %s
+                ORDER BY daerah_id ASC, komoditas_id ASC, bulan ASC
+            """.format(kondisi)
+        return """
+            SELECT daerah_id, komoditas_id, bulan, rata2, terakhir, tanggal_terakhir
+            FROM ({}) r
+            ORDER BY daerah_id ASC, komoditas_id ASC, bulan ASC
+        """.format(cls.sql_agregat_bulanan(kondisi + " AND tanggal_harga >= %s"))
+
+    def deret_harga_banyak(self, daerah_ids, komoditas_ids, start_date, bulanan=False):
+        """
+        Semua deret harga daerah_ids x komoditas_ids sejak start_date dalam satu query
+        (lihat sql_deret_harga_banyak); deret bulanan dimulai dari awal bulan start_date.
+        """
+        rollup = bulanan and self.pakai_harga_bulanan()
+        return self._fetchall(self.sql_deret_harga_banyak(len(daerah_ids), len(komoditas_ids), bulanan, rollup),
+                              tuple(daerah_ids) + tuple(komoditas_ids)
+                              + (awal_bulan(start_date) if bulanan else start_date,))
+
+    @classmethod
+    def sql_harga_terakhir_banyak(cls, n_daerah, n_komoditas):
+        """
+        Query harga terakhir setiap pasangan daerah_id IN (...) x komoditas_id IN (...);
+        baris (daerah_id, komoditas_id, tanggal_harga, harga).
+        """
+        return """
+            SELECT h.daerah_id, h.komoditas_id, h.tanggal_harga, h.harga
+            FROM (
+                SELECT daerah_id, komoditas_id, MAX(tanggal_harga) AS tanggal_terakhir
+                FROM harga_komoditas
+                WHERE daerah_id IN ({}) AND komoditas_id IN ({})
+                GROUP BY daerah_id, komoditas_id
+            ) m
+            JOIN harga_komoditas h
+                ON h.daerah_id = m.daerah_id
+                AND h.komoditas_id = m.komoditas_id
+                AND h.tanggal_harga = m.tanggal_terakhir
+        """.format(', '.join(['%s'] * n_daerah), ', '.join(['%s'] * n_komoditas))
+
+    def harga_terakhir_banyak(self, daerah_ids, komoditas_ids):
+        """Baris harga terakhir (lihat sql_harga_terakhir_banyak) untuk pasangan yang punya data."""
+        return self._fetchall(self.sql_harga_terakhir_banyak(len(daerah_ids), len(komoditas_ids)),
+                              tuple(daerah_ids) + tuple(komoditas_ids))
+
+    # --- anomali harga ---
+
+    def id_harga_terakhir(self):
+        """Primary key terbesar di harga_komoditas, 0 jika tabel kosong."""
+        return self._fetchone("SELECT MAX({}) FROM harga_komoditas".format(HARGA_KOMODITAS_PK))[0] or 0
+
+    def watermark_rollup(self, nama):
+        """id_terakhir di rollup_watermark untuk `nama`, atau None jika belum pernah diproses."""
+        row = self._fetchone("SELECT id_terakhir FROM rollup_watermark WHERE nama = %s", (nama,))
+        return row[0] if row else None
+
+    def rentang_baru(self, watermark, id_terakhir):
+        """Baris (daerah_id, komoditas_id, tanggal pertama, tanggal terakhir) dari baris baru (lihat sql_rentang_baru)."""
+        return [
+            (d, k, _as_date(awal), _as_date(akhir))
+            for d, k, awal, akhir in self._fetchall(self.sql_rentang_baru(), (watermark, id_terakhir))
+        ]
+
+    def anomali_harga(self, filters, limit):
+        """Baris dict hasil deteksi anomali (lihat sql_anomali_harga)."""
+        query, params = sql_anomali_harga(filters, limit)
+        return self._fetchall(query, params, dictionary=True)
+
+    def simpan_anomali(self, rows, hapus_daerah=(), hapus_deret=(), watermark=None):
+        """
+        Mengganti hasil deteksi anomali dalam satu transaksi: hasil lama dihapus, baris baru
+        di-insert, lalu watermark 'anomali_harga' dicatat jika diberikan.
+
+        :param rows: Baris dengan urutan KOLOM_ANOMALI.
+        :param hapus_daerah: daerah_id yang seluruh hasilnya dihapus (mode penuh).
+        :param hapus_deret: Tuple (daerah_id, komoditas_id, metode, sejak) yang hasilnya sejak tanggal itu dihapus.
+        :param watermark: id harga terakhir yang sudah diproses, atau None.
+        """
+        with self.connection() as connection, span('db.write'):
+            cursor = self._cursor(connection)
+            try:
+                if hapus_daerah:
+                    self._execute(cursor, "DELETE FROM anomali_harga WHERE daerah_id IN ({})".format(
+                        ', '.join(['%s'] * len(hapus_daerah))), tuple(hapus_daerah))
+                if hapus_deret:
+                    cursor.executemany(self._sql(
+                        "DELETE FROM anomali_harga "
+                        "WHERE daerah_id = %s AND komoditas_id = %s AND metode = %s AND tanggal_harga >= %s"
+                    ), list(hapus_deret))
+                if rows:
+                    cursor.executemany(self._sql("INSERT INTO anomali_harga ({}) VALUES ({})".format(
+                        ', '.join(KOLOM_ANOMALI), ', '.join(['%s'] * len(KOLOM_ANOMALI)))), rows)
+                if watermark is not None:
+                    self._execute(cursor, "INSERT INTO rollup_watermark (nama, id_terakhir) VALUES (%s, %s) " + self.SQL_UPSERT.format(
+                        kunci='nama', set="id_terakhir = {}".format(self.SQL_NILAI_BARU.format('id_terakhir'))
+                    ), ('anomali_harga', watermark))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+    # --- inflasi ---
+
+    def inflasi_terakhir(self, id_daerah):
+        """Tuple (tingkat_inflasi, tanggal_inflasi) terakhir, atau None."""
+        return self._fetchone("""
+            SELECT tingkat_inflasi, tanggal_inflasi
+            FROM inflasi
+            WHERE id_daerah = %s
+            ORDER BY tanggal_inflasi DESC
+            LIMIT 1
+        """, (id_daerah,))
+
+    def watermark_inflasi(self, id_daerah):
+        tanggal_terakhir, jumlah = self._fetchone(
+            "SELECT MAX(tanggal_inflasi), COUNT(*) FROM inflasi WHERE id_daerah = %s", (id_daerah,)
+        )
+        return _as_date(tanggal_terakhir), jumlah
+
+    # --- komoditas dan daerah ---
+
+    def daftar_komoditas(self):
+        """Baris (id_komoditas, nama_komoditas, img_url)."""
+        return self._fetchall("SELECT id_komoditas, nama_komoditas, img_url FROM komoditas")
+
+    def daftar_daerah(self):
+        """Baris (daerah_id, nama_daerah, img_url)."""
+        return self._fetchall("SELECT daerah_id, nama_daerah, img_url FROM daerah")
+
+    def komoditas_ids(self):
+        """ID komoditas urut naik."""
+        return [row[0] for row in self._fetchall("SELECT id_komoditas FROM komoditas ORDER BY id_komoditas ASC")]
+
+    def watermark_komoditas(self):
+        return tuple(self._fetchone("SELECT COUNT(*), MAX(id_komoditas) FROM komoditas"))
+
+    def watermark_daerah(self):
+        return tuple(self._fetchone("SELECT COUNT(*), MAX(daerah_id) FROM daerah"))
+
+    # --- versi data (dinaikkan setiap batch ingest) ---
+
+    def versi_data(self, tabel, daerah_id):
+        """
+        Versi data satu daerah untuk tabel ingest ('harga' atau 'inflasi'). Berubah setiap
+        batch ingest menyentuh daerah ini, termasuk saat nilai baris lama diperbarui
+        (yang tidak terlihat dari tanggal terakhir dan jumlah baris).
+        """
+        return self.versi_data_diperbarui(tabel, daerah_id)[0]
+
+    def versi_data_diperbarui(self, tabel, daerah_id):
+        """
+        Versi data beserta waktu ingest terakhir yang menyentuh daerah ini (dipakai sebagai
+        Last-Modified conditional GET).
+
+        :return: Tuple (versi, datetime UTC atau None jika daerah belum pernah di-ingest).
+        """
+        if not self._versi_tersedia:
+            return 0, None
+        try:
+            row = self._fetchone(
+                "SELECT versi, {} FROM data_versi WHERE tabel = %s AND daerah_id = %s".format(
+                    self.SQL_EPOCH.format('diperbarui')), (tabel, daerah_id)
+            )
+        except DatabaseConnectionError:
+            raise
+        except Exception as e:
+            print(f"Error: tabel data_versi tidak bisa dibaca, versi data diabaikan: '{e}'")
+            self._versi_tersedia = False
+            return 0, None
+        if not row:
+            return 0, None
+        diperbarui = datetime.fromtimestamp(int(row[1]), timezone.utc) if row[1] is not None else None
+        return row[0], diperbarui
+
+    def upsert(self, jenis, rows, batch_size=10000):
+        """
+        Upsert baris ke tabel ingest dalam satu transaksi, per batch executemany, lalu
+        menaikkan versi data setiap daerah yang tersentuh di transaksi yang sama.
+        Untuk harga, rollup harga_bulanan bulan yang tersentuh ikut dihitung ulang.
+        Baris dengan unique key yang sudah ada diperbarui nilainya, sehingga mengirim
+        ulang batch yang sama tidak menggandakan data.
+
+        :param jenis: 'harga' atau 'inflasi' (lihat TABEL_INGEST).
+        :param rows: List tuple dengan urutan kolom TABEL_INGEST[jenis]['kolom'].
+        :return: Dict daerah_id -> versi data baru.
+        """
+        spec = TABEL_INGEST[jenis]
+        kolom = spec['kolom']
+        nilai = [k for k in kolom if k not in spec['kunci']]
+        query = "INSERT INTO {} ({}) VALUES ({}) {}".format(
+            spec['tabel'], ', '.join(kolom), ', '.join(['%s'] * len(kolom)),
+            self.SQL_UPSERT.format(
+                kunci=', '.join(spec['kunci']),
+                set=', '.join("{0} = {1}".format(k, self.SQL_NILAI_BARU.format(k)) for k in nilai),
+            ),
+        )
+        index_daerah = kolom.index(spec['daerah'])
+        daerah_ids = sorted({row[index_daerah] for row in rows})
+        # Bulan yang tersentuh di-rollup ulang di transaksi yang sama (dicek sebelum transaksi dibuka)
+        rentang = rentang_bulan(rows) if jenis == 'harga' and self.pakai_harga_bulanan() else []
+
+        with self.connection() as connection, span('db.write'):
+            cursor = self._cursor(connection)
+            try:
+                for start in range(0, len(rows), batch_size):
+                    cursor.executemany(self._sql(query), rows[start:start + batch_size])
+                self._rollup_rentang(cursor, rentang)
+                cursor.executemany(self._sql(
+                    "INSERT INTO data_versi (tabel, daerah_id, versi) VALUES (%s, %s, 1) "
+                    + self.SQL_UPSERT.format(kunci='tabel, daerah_id', set='versi = data_versi.versi + 1, diperbarui = CURRENT_TIMESTAMP')
+                ), [(jenis, daerah_id) for daerah_id in daerah_ids])
+                if daerah_ids:
+                    self._execute(cursor, "SELECT daerah_id, versi FROM data_versi WHERE tabel = %s AND daerah_id IN ({})".format(
+                        ', '.join(['%s'] * len(daerah_ids))), (jenis,) + tuple(daerah_ids))
+                    versi = dict(cursor.fetchall())
+                else:
+                    versi = {}
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        self._versi_tersedia = True
+        return versi
+
+    # --- prediksi ---
+
+    def versi_data_prediksi(self, id_daerah):
+        """Tuple (tanggal_inflasi terakhir, tanggal_harga terakhir) satu daerah."""
+        row = self._fetchone("""
+            SELECT
+                (SELECT MAX(tanggal_inflasi) FROM inflasi WHERE id_daerah = %s),
+                (SELECT MAX(tanggal_harga) FROM harga_komoditas WHERE daerah_id = %s)
+        """, (id_daerah, id_daerah))
+        return _as_date(row[0]), _as_date(row[1])
+
+    @classmethod
+    def sql_fitur_bulanan(cls, n_daerah, sejak=False, rollup=False):
+        """
+        Query fitur prediksi: setiap baris inflasi digabung dengan rata-rata harga harian
+        tiap komoditas KOMODITAS_MODEL pada bulan kalender tanggal_inflasi. CROSS JOIN komoditas
+        membuat satu baris per bulan dan komoditas (harga NULL jika bulan itu kosong). Rentang
+        tanggal_harga memakai index (daerah_id, komoditas_id, tanggal_harga).
+
+        :param n_daerah: Jumlah placeholder untuk id_daerah IN (...).
+        :param sejak: True untuk menambah filter tanggal_inflasi >= %s setelah daftar daerah.
+        :param rollup: True untuk membaca rata-rata dari harga_bulanan (satu baris per bulan)
+                       alih-alih mengagregasi baris harian.
+        :return: Query dengan placeholder %s; baris (id_daerah, tanggal_inflasi,
+                 tingkat_inflasi, komoditas_id, harga_rata2) urut daerah, tanggal, komoditas.
+        """
+        awal_bulan = cls.SQL_AWAL_BULAN.format('i.tanggal_inflasi')
+        # ID komoditas berupa int dari konfigurasi, aman ditulis langsung tanpa mengubah urutan placeholder
+        filter_daerah = "WHERE i.id_daerah IN ({}) AND k.id_komoditas IN ({}){}".format(
+            ', '.join(['%s'] * n_daerah), ', '.join(str(int(k)) for k in KOMODITAS_MODEL),
+            " AND i.tanggal_inflasi >= %s" if sejak else ""
+        )
+        if rollup:
+            return """
+                SELECT i.id_daerah, i.tanggal_inflasi, i.tingkat_inflasi, k.id_komoditas, b.rata2
+                FROM inflasi i
+                CROSS JOIN komoditas k
+                LEFT JOIN harga_bulanan b
+                    ON b.daerah_id = i.id_daerah
+                    AND b.komoditas_id = k.id_komoditas
+                    AND b.bulan = {}
+                {}
+                ORDER BY i.id_daerah ASC, i.tanggal_inflasi ASC, k.id_komoditas ASC
+            """.format(awal_bulan, filter_daerah)
+
+        bulan_berikut = cls.SQL_BULAN_BERIKUT.format('i.tanggal_inflasi')
+        # tingkat_inflasi ikut di ORDER BY agar sama dengan GROUP BY (tanpa sort kedua); urutan
+        # hasil tidak berubah karena (id_daerah, tanggal_inflasi) unik
+        return """
+            SELECT i.id_daerah, i.tanggal_inflasi, i.tingkat_inflasi, k.id_komoditas, AVG(h.harga)
+            FROM inflasi i
+            CROSS JOIN komoditas k
+            LEFT JOIN harga_komoditas h
+                ON h.daerah_id = i.id_daerah
+                AND h.komoditas_id = k.id_komoditas
+                AND h.tanggal_harga >= {}
+                AND h.tanggal_harga < {}
+            {}
+            GROUP BY i.id_daerah, i.tanggal_inflasi, i.tingkat_inflasi, k.id_komoditas
+            ORDER BY i.id_daerah ASC, i.tanggal_inflasi ASC, i.tingkat_inflasi ASC, k.id_komoditas ASC
+        """.format(awal_bulan, bulan_berikut, filter_daerah)
+
+    def fitur_bulanan(self, id_daerah_list, sejak=None):
+        """
+        Data fitur prediksi banyak daerah dalam satu query (lihat sql_fitur_bulanan).
+
+        :param id_daerah_list: List ID wilayah, atau "all" untuk semua daerah.
+        :param sejak: Tanggal awal (yyyy-mm-dd) untuk hanya mengambil bulan terakhir, atau None.
+        :return: Tuple (id_daerah_list, rows).
+        """
+        rollup = self.pakai_harga_bulanan()
+        with self.connection() as connection:
+            cursor = self._cursor(connection)
+            if id_daerah_list == 'all':
+                self._execute(cursor, "SELECT daerah_id FROM daerah ORDER BY daerah_id ASC")
+                id_daerah_list = [row[0] for row in cursor.fetchall()]
+            if not id_daerah_list:
+                return [], []
+            params = tuple(id_daerah_list) + ((sejak,) if sejak else ())
+            self._execute(cursor, self.sql_fitur_bulanan(len(id_daerah_list), bool(sejak), rollup), params)
+            with span('db.fetch'):
+                return id_daerah_list, cursor.fetchall()
+
+    # --- penulisan (generator data sintetis) ---
+
+    def tulis_dataset(self, daerah, komoditas, harga, inflasi, batch_size=10000):
+        """
+        Menulis data ke keempat tabel dalam satu transaksi, per batch executemany.
+
+        :param daerah: Baris (daerah_id, nama_daerah, img_url).
+        :param komoditas: Baris (id_komoditas, nama_komoditas, img_url).
+        :param harga: Baris (daerah_id, komoditas_id, tanggal_harga, harga).
+        :param inflasi: Baris (id_daerah, tingkat_inflasi, tanggal_inflasi).
+        """
+        statements = [
+            ("INSERT INTO daerah (daerah_id, nama_daerah, img_url) VALUES (%s, %s, %s)", daerah),
+            ("INSERT INTO komoditas (id_komoditas, nama_komoditas, img_url) VALUES (%s, %s, %s)", komoditas),
+            ("INSERT INTO harga_komoditas (daerah_id, komoditas_id, tanggal_harga, harga) VALUES (%s, %s, %s, %s)", harga),
+            ("INSERT INTO inflasi (id_daerah, tingkat_inflasi, tanggal_inflasi) VALUES (%s, %s, %s)", inflasi),
+        ]
+        with self.connection() as connection:
+            cursor = self._cursor(connection)
+            try:
+                for query, rows in statements:
+                    for start in range(0, len(rows), batch_size):
+                        cursor.executemany(self._sql(query), rows[start:start + batch_size])
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+    # --- skema ---
+
+    def migrasi(self, target=None, log=None, dedupe=False):
+        """Menerapkan migrasi skema yang belum tercatat (lihat app/migrations.py)."""
+        diterapkan = migrasi(self, target, log, dedupe)
+        self._versi_tersedia = True
+        self._harga_bulanan_dicek = 0.0
+        return diterapkan
+
+    def siapkan_ingest(self):
+        # Tabel data_versi dan unique key upsert dibuat oleh migrasi
+        self.migrasi()
+
+    def siapkan_rollup(self):
+        # Tabel harga_bulanan dan rollup_watermark dibuat oleh migrasi
+        self.migrasi()
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+class MySQLRepository(Repository):
+    """Backend MySQL memakai pool koneksi per worker (app.db_connection)."""
+    name = 'mysql'
+    SQL_AWAL_BULAN = "DATE_SUB({0}, INTERVAL DAYOFMONTH({0}) - 1 DAY)"
+    SQL_BULAN_BERIKUT = "DATE_ADD(DATE_SUB({0}, INTERVAL DAYOFMONTH({0}) - 1 DAY), INTERVAL 1 MONTH)"
+    SQL_UPSERT = "ON DUPLICATE KEY UPDATE {set}"
+    SQL_NILAI_BARU = "VALUES({0})"
+    SQL_EPOCH = "UNIX_TIMESTAMP({0})"
+
+    def connection(self):
+        return db_connection()
+
+    def _cursor(self, connection, dictionary=False, streaming=False):
+        if streaming:
+            return connection.cursor(dictionary=dictionary, buffered=False)
+        return connection.cursor(dictionary=dictionary)
+
+    def stats(self):
+        return dict(get_pool().stats(), backend=self.name)
+
+
+def _dict_factory(cursor, row):
+    return {kolom[0]: nilai for kolom, nilai in zip(cursor.description, row)}
+
+
+class SQLiteRepository(Repository):
+    """
+    Backend SQLite dengan skema yang sama. Koneksi dibuka per thread dan dipakai ulang,
+    karena membuka file SQLite murah tetapi objek koneksinya tidak boleh dipakai lintas thread.
+    """
+    name = 'sqlite'
+    SQL_AWAL_BULAN = "date({0}, 'start of month')"
+    SQL_BULAN_BERIKUT = "date({0}, 'start of month', '+1 month')"
+    SQL_UPSERT = "ON CONFLICT ({kunci}) DO UPDATE SET {set}"
+    SQL_NILAI_BARU = "excluded.{0}"
+    # strftime('%s') tidak bisa dipakai karena %s diganti placeholder oleh _sql
+    SQL_EPOCH = "CAST(ROUND((julianday({0}) - 2440587.5) * 86400) AS INTEGER)"
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._stats = {"opened": 0}
+
+    @contextmanager
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES)
+            inc('bangkit_db_connect_total', (self.name,))
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._stats['opened'] += 1
+        inc('bangkit_db_acquire_total', (self.name,))
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+
+    def _cursor(self, connection, dictionary=False, streaming=False):
+        cursor = connection.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_factory
+        return cursor
+
+    def _sql(self, query):
+        return query.replace('%s', '?')
+
+    def buat_schema(self):
+        """Membuat skema lengkap (semua migrasi) di file SQLite."""
+        self.migrasi()
+
+    def stats(self):
+        return dict(self._stats, backend=self.name, path=self.path)
+
+
+_repository = None
+_repository_pid = None
+_repository_lock = threading.Lock()
+
+
+def buat_repository(backend=None, sqlite_path=None):
+    """
+    Membuat repository dari nama backend (default DB_BACKEND).
+    """
+    backend = backend or os.getenv('DB_BACKEND', 'mysql')
+    if backend == 'mysql':
+        return MySQLRepository()
+    if backend == 'sqlite':
+        return SQLiteRepository(sqlite_path or os.getenv('SQLITE_PATH', 'bangkit.sqlite3'))
+    raise ValueError("DB_BACKEND tidak dikenal: {} (mysql atau sqlite)".format(backend))
+
+
+def get_repository():
+    """
+    Repository milik proses ini, dibuat dari environment saat pertama dipakai.
+    """
+    global _repository, _repository_pid
+    if _repository is None or _repository_pid != os.getpid():
+        with _repository_lock:
+            if _repository is None or _repository_pid != os.getpid():
+                _repository = buat_repository()
+                _repository_pid = os.getpid()
+    return _repository
+
+
+def set_repository(repository):
+    """
+    Mengganti repository proses ini (dipakai benchmark untuk berpindah dataset).
+    """
+    global _repository, _repository_pid
+    with _repository_lock:
+        _repository = repository
+        _repository_pid = os.getpid()
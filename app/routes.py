@@ -1,65 +1,308 @@
-from flask import Blueprint, jsonify, request
-from .db_connection import create_db_connection
+import hmac
+import os
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from .db_connection import DatabaseConnectionError
+from .http_cache import REFERENCE_MAX_AGE, Validator, conditional, validator_cache
+from .model_registry import model_registry
+from .prediction_cache import prediction_cache
+from .repository import HARGA_KOMODITAS_PK, METODE_ANOMALI, TABEL_INGEST, get_repository
+from .ingest import FORMAT_INGEST, IngestError, baca_batch, ingest_batch
+from .metrics import METRICS_ENABLED, registry, span
+from .forecast import rollout_stats
+from .inference_server import INFERENCE_MODE, InferenceUnavailableError, inference_client, prediksi_model
+from .scalers import scaler_store
+from .serialization import (
+    FORMAT_ROWS, FORMAT_COLUMNAR, FORMAT_CSV, FORMAT_ARROW, format_tanggal, pilih_format, response_deret,
+)
+from .streaming import decode_cursor, encode_cursor, stream_json_array, stream_ndjson
 import numpy as np
-from tensorflow.keras.models import load_model
-import tensorflow as tf
-from sklearn.preprocessing import MinMaxScaler
-from statsmodels.tsa.filters.hp_filter import hpfilter
-import requests
-from io import BytesIO
 import pandas as pd
-import pickle
-from tensorflow.keras.models import load_model
-from tensorflow.keras import metrics
 from datetime import datetime, timedelta, date
-from utils.preprocessing_prediction import data_inflasi_dan_komoditas, series_to_supervised
+from utils.anomali import batas_deret
+from utils.downsampling import lttb, sumbu_tanggal
+from utils.hp_filter import kunci_trend, trend_cache, HP_LAMBDA, HP_LAMBDA_BULANAN
+from utils.preprocessing_prediction import (
+    fitur_prediksi, fitur_prediksi_batch, fit_scaler, update_scaler, bulan_target,
+    siapkan_input_prediksi, eksogen_prediksi, denormalisasi_target, interpretasi_prediksi, versi_data_prediksi,
+)
 
 
 routes = Blueprint('routes', __name__)
 
+# Interval (detik) refresher latar cache prediksi, 0 = nonaktif
+PREDIKSI_CACHE_REFRESH_INTERVAL = float(os.getenv('PREDIKSI_CACHE_REFRESH_INTERVAL', 0))
+
+# Jumlah bulan terakhir yang diambil untuk prediksi jika scaler daerah sudah tersimpan
+PREDIKSI_WINDOW_BULAN = int(os.getenv('PREDIKSI_WINDOW_BULAN', 12))
+
+# Horizon maksimum prediksi rekursif (bulan)
+PREDIKSI_HORIZON_MAX = int(os.getenv('PREDIKSI_HORIZON_MAX', 12))
+
+# Jumlah baris per fetchmany saat streaming dan batas ukuran satu halaman
+HARGA_STREAM_CHUNK = int(os.getenv('HARGA_STREAM_CHUNK', 1000))
+HARGA_PAGE_MAX_LIMIT = int(os.getenv('HARGA_PAGE_MAX_LIMIT', 10000))
+
+# Ingest: endpoint nonaktif jika INGEST_TOKEN kosong; batas ukuran body dan baris per executemany
+INGEST_TOKEN = os.getenv('INGEST_TOKEN', '')
+INGEST_MAX_BYTES = int(os.getenv('INGEST_MAX_BYTES', 50 * 1024 * 1024))
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 10000))
+
+# Jumlah pasangan daerah x komoditas maksimum per request /harga_komoditas/batch
+HARGA_BATCH_MAX_DERET = int(os.getenv('HARGA_BATCH_MAX_DERET', 200))
+
+# Jumlah baris default dan maksimum per request /anomali_harga
+ANOMALI_LIMIT = int(os.getenv('ANOMALI_LIMIT', 100))
+ANOMALI_MAX_LIMIT = int(os.getenv('ANOMALI_MAX_LIMIT', 1000))
+
+# Format response yang didukung endpoint deret waktu harga
+FORMAT_DERET = (FORMAT_ROWS, FORMAT_COLUMNAR, FORMAT_CSV, FORMAT_ARROW)
+
+# Granularitas deret harga: day (baris harian) atau month (rollup harga_bulanan)
+GRANULARITY_DERET = ('day', 'month')
+
+
+@routes.errorhandler(DatabaseConnectionError)
+def handle_database_error(e):
+    # Gagal meminjam koneksi dari pool (database mati atau pool penuh)
+    return jsonify({"error": str(e)}), e.status_code
+
+
+@routes.errorhandler(InferenceUnavailableError)
+def handle_inference_error(e):
+    # Proses inference bersama mati, sedang restart, atau terlalu lama menjawab
+    return jsonify({"error": str(e)}), e.status_code
+
+
+def start_date_time_range(time_range):
+    # Tanggal awal rentang timeRange, sama dengan yang dipakai route deret harga
+    return (datetime.now() - timedelta(days=time_range * 365)).strftime('%Y-%m-%d')
+
+
+def pilih_granularity(request):
+    # Nilai parameter granularity (default day), atau None jika tidak dikenal
+    granularity = request.args.get('granularity', default='day').lower()
+    return granularity if granularity in GRANULARITY_DERET else None
+
+
+def pesan_granularity_tidak_valid():
+    return {"error": True, "message": "granularity harus salah satu dari {}".format(', '.join(GRANULARITY_DERET))}
+
+
+def parse_points(nilai):
+    """
+    Membaca parameter points (jumlah titik maksimum setelah downsampling LTTB), None = semua titik.
+    """
+    if nilai is None or nilai == '':
+        return None
+    points = int(nilai)
+    if points < 3:
+        raise ValueError("points minimal 3")
+    return points
+
+
+def indeks_downsampling(tanggal, nilai, points):
+    """
+    Indeks titik yang dikirim untuk ?points=N (LTTB, titik pertama dan terakhir selalu ikut),
+    atau None jika deret sudah tidak lebih panjang dari N.
+    """
+    if points is None or len(nilai) <= points:
+        return None
+    with span('downsample'):
+        return lttb(sumbu_tanggal(tanggal), nilai, points)
+
+
+def format_harga_bulanan(rows):
+    """
+    Baris deret_harga_bulanan menjadi list dict untuk format rows; tanggal dd-mm-yyyy.
+    """
+    return [{
+        "bulan": bulan.strftime('%d-%m-%Y'),
+        "jumlah": jumlah,
+        "rata2": round(rata2, 2),
+        "minimum": minimum,
+        "maksimum": maksimum,
+        "terakhir": terakhir,
+        "tanggal_terakhir": tanggal_terakhir.strftime('%d-%m-%Y'),
+    } for bulan, jumlah, rata2, minimum, maksimum, terakhir, tanggal_terakhir in rows]
+
+
+# Watermark untuk conditional GET: query murah yang berubah setiap data berubah.
+# `args` adalah query string request, agar fungsi yang sama dipakai mode sync dan async.
+def watermark_deret_harga(args, daerah_id, komoditas_id):
+    start_date_str = start_date_time_range(args.get('timeRange', default=1, type=int))
+    repository = get_repository()
+    tanggal_terakhir, jumlah = repository.watermark_harga(daerah_id, komoditas_id, start_date_str)
+    # Versi data ikut berubah jika ingest memperbarui nilai baris lama
+    versi, diperbarui = repository.versi_data_diperbarui('harga', daerah_id)
+    return Validator(('harga', daerah_id, komoditas_id, start_date_str, str(tanggal_terakhir), jumlah, versi), diperbarui)
+
+
+def watermark_harga_terakhir(args, daerah_id, komoditas_id):
+    repository = get_repository()
+    tanggal_terakhir, jumlah = repository.watermark_harga(daerah_id, komoditas_id)
+    versi, diperbarui = repository.versi_data_diperbarui('harga', daerah_id)
+    return Validator(('harga_terakhir', daerah_id, komoditas_id, str(tanggal_terakhir), jumlah, versi), diperbarui)
+
+
+def watermark_inflasi(args, id_daerah):
+    repository = get_repository()
+    tanggal_terakhir, jumlah = repository.watermark_inflasi(id_daerah)
+    versi, diperbarui = repository.versi_data_diperbarui('inflasi', id_daerah)
+    return Validator(('inflasi', id_daerah, str(tanggal_terakhir), jumlah, versi), diperbarui)
+
+
+# Tabel referensi tidak dicatat di data_versi, sehingga tanpa Last-Modified
+def watermark_komoditas(args):
+    return Validator(('komoditas',) + get_repository().watermark_komoditas(), None)
+
+
+def watermark_daerah(args):
+    return Validator(('daerah',) + get_repository().watermark_daerah(), None)
+
+
+def parse_export_harga(args):
+    """
+    Membaca parameter export harga_komoditas dari query string (dipakai mode sync dan async).
+
+    :return: Tuple (filters, after, limit, format_output); query-nya disusun oleh
+             app.repository.sql_export_harga.
+    :raises ValueError: Jika parameter tidak valid; pesannya siap dikirim ke client.
+    """
+    format_output = args.get('format', 'json')
+    if format_output not in ('json', 'ndjson'):
+        raise ValueError("format harus json atau ndjson")
+
+    limit = args.get('limit', type=int)
+    if limit is not None and not 0 < limit <= HARGA_PAGE_MAX_LIMIT:
+        raise ValueError("limit harus antara 1 dan {}".format(HARGA_PAGE_MAX_LIMIT))
+
+    filters = {kolom: args.get(kolom, type=int) for kolom in ('daerah_id', 'komoditas_id')}
+    after = None
+    try:
+        for nama in ('start', 'end'):
+            nilai = args.get(nama)
+            if nilai:
+                datetime.strptime(nilai, '%Y-%m-%d')
+                filters[nama] = nilai
+        token = args.get('cursor')
+        if token:
+            after = decode_cursor(token)
+    except ValueError:
+        raise ValueError("Parameter tanggal atau cursor tidak valid")
+    return filters, after, limit, format_output
+
+
 @routes.route('/harga_komoditas', methods=['GET'])
 def get_time_series():
-    connection = create_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
+    """
+    Export data harga_komoditas, dikirim bertahap dari cursor server-side tanpa fetchall.
+
+    Query string (semua opsional):
+    - format: json (default, satu JSON array) atau ndjson (satu objek per baris)
+    - daerah_id, komoditas_id: filter
+    - start, end: rentang tanggal_harga (yyyy-mm-dd)
+    - limit, cursor: pagination keyset berdasarkan (tanggal_harga, primary key);
+      cursor halaman berikutnya dikirim di header X-Next-Cursor
+    """
+    try:
+        filters, after, limit, format_output = parse_export_harga(request.args)
+    except ValueError as e:
+        return jsonify({"error": True, "message": str(e)}), 400
 
-    cursor = connection.cursor(dictionary=True)
-    query = "SELECT * FROM harga_komoditas"  # Ganti dengan nama tabel Anda
-    cursor.execute(query)
-    result = cursor.fetchall()
-    connection.close()
-    return jsonify(result)
+    writer = stream_ndjson if format_output == 'ndjson' else stream_json_array
+    mimetype = 'application/x-ndjson' if format_output == 'ndjson' else 'application/json'
+    repository = get_repository()
 
+    if limit is not None:
+        # Satu halaman ukurannya terbatas, koneksi langsung dikembalikan ke pool
+        rows = repository.halaman_export_harga(filters, after, limit)
+        response = Response(stream_with_context(writer([rows] if rows else [])), mimetype=mimetype)
+        if len(rows) == limit:
+            response.headers['X-Next-Cursor'] = encode_cursor(rows[-1]['tanggal_harga'], rows[-1][HARGA_KOMODITAS_PK])
+        return response
+
+    # Tanpa limit: koneksi dipinjam selama streaming dan dikembalikan setelah baris terakhir terkirim
+    chunks, close = repository.stream_export_harga(filters, after, HARGA_STREAM_CHUNK)
+    response = Response(stream_with_context(writer(chunks)), mimetype=mimetype)
+    response.call_on_close(close)
+    return response
 
 
 @routes.route('/harga_komoditas/<int:daerah_id>/<int:komoditas_id>', methods=['GET'])
+@conditional(watermark_deret_harga)
 def get_time_series_by_region_and_commodity(daerah_id, komoditas_id):
     # Baca parameter `timeRange` dari query string
     time_range = request.args.get('timeRange', default=1, type=int)  # Default 1 tahun jika tidak ada parameter
 
-    # Buat koneksi ke database
-    connection = create_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
+    # Format response: rows (default), columnar, csv atau arrow
+    format_output = pilih_format(request)
+    if format_output not in FORMAT_DERET:
+        return jsonify({"error": True, "message": "format harus salah satu dari {}".format(', '.join(FORMAT_DERET))}), 400
+
+    granularity = pilih_granularity(request)
+    if granularity is None:
+        return jsonify(pesan_granularity_tidak_valid()), 400
 
     try:
-        cursor = connection.cursor(dictionary=True)
+        points = parse_points(request.args.get('points'))
+    except ValueError as e:
+        return jsonify({"error": True, "message": "Parameter points tidak valid: {}".format(e)}), 400
 
+    repository = get_repository()
+    try:
         # Hitung tanggal awal berdasarkan timeRange
-        start_date = datetime.now() - timedelta(days=time_range * 365)
-        start_date_str = start_date.strftime('%Y-%m-%d')
-
-        # Query untuk mengambil data dengan filter timeRange
-        query = """
-            SELECT * 
-            FROM harga_komoditas
-            WHERE daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s
-            ORDER BY tanggal_harga ASC
-        """  # Pastikan nama kolom sesuai dengan tabel Anda
-        cursor.execute(query, (daerah_id, komoditas_id, start_date_str))
+        start_date_str = start_date_time_range(time_range)
+
+        if granularity == 'month':
+            # Satu baris per bulan dari rollup: jumlah, rata-rata, minimum, maksimum dan harga terakhir
+            rows = repository.deret_harga_bulanan(daerah_id, komoditas_id, start_date_str)
+            if not rows:
+                return jsonify({
+                    "error": True,
+                    "message": "Data not found for daerah_id: {} and komoditas_id: {} in the last {} year(s)".format(
+                        daerah_id, komoditas_id, time_range
+                    )
+                }), 404
+            description = "Data harga komoditas bulanan dalam {} tahun terakhir untuk daerah {} dan komoditas {}.".format(
+                time_range, daerah_id, komoditas_id
+            )
+            indeks = indeks_downsampling([row[0] for row in rows], [row[2] for row in rows], points)
+            if indeks is not None:
+                rows = [rows[i] for i in indeks]
+            if format_output != FORMAT_ROWS:
+                # Nilai deret format kolom adalah rata-rata harga bulanan
+                return response_deret(format_output, [row[0] for row in rows],
+                                      np.array([row[2] for row in rows]), 'harga', description)
+            return jsonify({
+                "error": False,
+                "message": "Success",
+                "prices": format_harga_bulanan(rows),
+                "description": description
+            })
+
+        if format_output != FORMAT_ROWS:
+            # Format kolom hanya butuh tanggal dan harga, dikonversi sekaligus tanpa loop per baris
+            rows = repository.deret_harga(daerah_id, komoditas_id, start_date_str)
+            if not rows:
+                return jsonify({
+                    "error": True,
+                    "message": "Data not found for daerah_id: {} and komoditas_id: {} in the last {} year(s)".format(
+                        daerah_id, komoditas_id, time_range
+                    )
+                }), 404
+            df = pd.DataFrame(rows, columns=['tanggal_harga', 'harga'])
+            indeks = indeks_downsampling(df['tanggal_harga'], pd.to_numeric(df['harga']).to_numpy(), points)
+            if indeks is not None:
+                df = df.iloc[indeks]
+            return response_deret(
+                format_output, df['tanggal_harga'], pd.to_numeric(df['harga']), 'harga',
+                "Data harga komoditas dalam {} tahun terakhir untuk daerah {} dan komoditas {}.".format(
+                    time_range, daerah_id, komoditas_id
+                )
+            )
 
-        # Ambil hasil query
-        prices = cursor.fetchall()
+        # Ambil data dengan filter timeRange
+        prices = repository.deret_harga_lengkap(daerah_id, komoditas_id, start_date_str)
 
         # Jika tidak ada data
         if not prices:
@@ -69,16 +312,19 @@ def get_time_series_by_region_and_commodity(daerah_id, komoditas_id):
                     daerah_id, komoditas_id, time_range
                 )
             }), 404
-        
-        
+
+        indeks = indeks_downsampling([price['tanggal_harga'] for price in prices],
+                                     np.array([price['harga'] for price in prices], dtype=np.float64), points)
+        if indeks is not None:
+            prices = [prices[i] for i in indeks]
+
         # Format tanggal menjadi dd-mm-yyyy
         for price in prices:
             tanggal_harga = price['tanggal_harga']
-            
+
             # If tanggal_harga is already a datetime object, format it directly
             if isinstance(tanggal_harga, date):
                 price['tanggal_harga'] = tanggal_harga.strftime('%d-%m-%Y')
-            
 
         # Format hasil
         result = {
@@ -90,37 +336,19 @@ def get_time_series_by_region_and_commodity(daerah_id, komoditas_id):
             )
         }
 
-        # Tutup koneksi
-        connection.close()
-
         return jsonify(result)
+    except DatabaseConnectionError:
+        raise
     except Exception as e:
-        # Tutup koneksi jika terjadi error
-        connection.close()
         return jsonify({"error": str(e)}), 500
-    
+
+
 @routes.route('/harga_komoditas/last/<int:daerah_id>/<int:komoditas_id>', methods=['GET'])
+@conditional(watermark_harga_terakhir)
 def get_last_price(daerah_id, komoditas_id):
-    # Buat koneksi ke database
-    connection = create_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Query untuk mengambil data harga terakhir
-        query = """
-            SELECT *
-            FROM harga_komoditas
-            WHERE daerah_id = %s AND komoditas_id = %s
-            ORDER BY tanggal_harga DESC
-            LIMIT 1
-        """  
-        cursor.execute(query, (daerah_id, komoditas_id))
-
-        # Ambil hasil query
-        last_price = cursor.fetchone()
+        # Ambil data harga terakhir
+        last_price = get_repository().harga_terakhir(daerah_id, komoditas_id)
 
         # Jika tidak ada data
         if not last_price:
@@ -141,48 +369,204 @@ def get_last_price(daerah_id, komoditas_id):
             "description": "Data harga komoditas terakhir untuk daerah {} dan komoditas {}.".format(daerah_id, komoditas_id)
         }
 
-        # Tutup koneksi
-        connection.close()
-
         return jsonify(result)
 
+    except DatabaseConnectionError:
+        raise
     except Exception as e:
-        # Tutup koneksi jika terjadi error
-        connection.close()
         return jsonify({"error": str(e)}), 500
 
 
+def parse_flag(nilai):
+    """
+    Membaca parameter boolean (1/true/yes atau true JSON), default False.
+    """
+    if isinstance(nilai, bool):
+        return nilai
+    return str(nilai).strip().lower() in ('1', 'true', 'yes') if nilai is not None else False
+
+
+def parse_permintaan_batch(sumber):
+    """
+    Membaca parameter /harga_komoditas/batch dari query string atau body JSON (dipakai mode sync dan async).
+
+    :param sumber: request.args atau dict body JSON.
+    :return: Dict daerah_id, komoditas_id (list ID atau 'all'), time_range, granularity, points, last, trend.
+    :raises ValueError: Jika parameter tidak valid; pesannya siap dikirim ke client.
+    """
+    try:
+        daerah_ids = parse_id_daerah(sumber.get('daerah_id'))
+        komoditas_ids = parse_id_daerah(sumber.get('komoditas_id'))
+        time_range = int(sumber.get('timeRange') or 1)
+        points = parse_points(sumber.get('points'))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Parameter tidak valid: {}".format(e))
+    if not daerah_ids or not komoditas_ids:
+        raise ValueError("Parameter daerah_id dan komoditas_id wajib diisi (list ID atau 'all')")
+    granularity = str(sumber.get('granularity') or 'day').lower()
+    if granularity not in GRANULARITY_DERET:
+        raise ValueError(pesan_granularity_tidak_valid()['message'])
+    return {
+        "daerah_id": daerah_ids,
+        "komoditas_id": komoditas_ids,
+        "time_range": time_range,
+        "granularity": granularity,
+        "points": points,
+        "last": parse_flag(sumber.get('last')),
+        "trend": parse_flag(sumber.get('trend')),
+    }
+
+
+def cek_jumlah_deret(daerah_ids, komoditas_ids):
+    # Pasangan daerah x komoditas setelah 'all' diganti daftar ID
+    if len(daerah_ids) * len(komoditas_ids) > HARGA_BATCH_MAX_DERET:
+        raise ValueError("Maksimal {} pasangan daerah x komoditas per request".format(HARGA_BATCH_MAX_DERET))
+
+
+def kunci_deret(daerah_id, komoditas_id):
+    return '{}:{}'.format(daerah_id, komoditas_id)
+
+
+def susun_deret_banyak(rows, bulanan, time_range, points=None, trend=False, last=False):
+    """
+    Mengelompokkan baris Repository.deret_harga_banyak per (daerah, komoditas). Semua baris
+    dikonversi sekaligus (tanggal, harga) lalu dipotong di batas pasangan, tanpa loop per baris.
+    Trend HP deret yang belum di-cache dihitung per kelompok panjang deret dalam satu solve,
+    dengan key cache yang sama dengan /harga_normal.
+
+    :param rows: Baris urut (daerah_id, komoditas_id, tanggal).
+    :param bulanan: True jika baris berasal dari deret bulanan (nilai = rata-rata bulanan).
+    :param points: Jumlah titik maksimum per deret setelah LTTB, atau None.
+    :param trend: True untuk menambah harga_normal (trend HP dari deret lengkap).
+    :param last: True untuk menambah last_price (baris terakhir deret).
+    :return: Dict kunci_deret -> dict deret.
+    """
+    if not rows:
+        return {}
+    kolom = ['daerah_id', 'komoditas_id', 'tanggal', 'harga'] + (['terakhir', 'tanggal_terakhir'] if bulanan else [])
+    df = pd.DataFrame(rows, columns=kolom)
+    daerah = df['daerah_id'].to_numpy(dtype=np.int64)
+    komoditas = df['komoditas_id'].to_numpy(dtype=np.int64)
+    harga = pd.to_numeric(df['harga']).to_numpy(dtype=np.float64)
+    tanggal = df['tanggal'].tolist()
+    tanggal_str = format_tanggal(df['tanggal'])
+    nilai = np.round(harga, 2) if bulanan else harga.astype(np.int64)
+
+    # Batas deret: baris pertama setiap pasangan (daerah, komoditas)
+    awal, akhir = (batas.tolist() for batas in batas_deret(daerah, komoditas))
+
+    trends = None
+    if trend:
+        lamb = HP_LAMBDA_BULANAN if bulanan else HP_LAMBDA
+        keys = [
+            kunci_trend(int(daerah[a]), int(komoditas[a]), time_range, lamb, tanggal[a], tanggal[b - 1], harga[a:b])
+            for a, b in zip(awal, akhir)
+        ]
+        with span('hpfilter'):
+            trends = trend_cache.get_or_compute_banyak(keys, [harga[a:b] for a, b in zip(awal, akhir)], lamb)
+
+    sumbu = sumbu_tanggal(df['tanggal']) if points is not None else None
+    if bulanan and last:
+        terakhir = df['terakhir'].to_numpy()
+        tanggal_terakhir = format_tanggal(df['tanggal_terakhir'])
+
+    hasil = {}
+    for nomor, (a, b) in enumerate(zip(awal, akhir)):
+        pilih = slice(a, b)
+        indeks = None
+        if points is not None and b - a > points:
+            with span('downsample'):
+                indeks = lttb(sumbu[a:b], harga[a:b], points)
+            pilih = a + indeks
+        deret = {
+            "daerah_id": int(daerah[a]),
+            "komoditas_id": int(komoditas[a]),
+            "tanggal_harga": tanggal_str[pilih].tolist(),
+            "harga": nilai[pilih].tolist(),
+        }
+        if trends is not None:
+            harga_normal = trends[nomor].astype(int)
+            deret['harga_normal'] = (harga_normal if indeks is None else harga_normal[indeks]).tolist()
+        if last:
+            if bulanan:
+                deret['last_price'] = {"tanggal_harga": str(tanggal_terakhir[b - 1]), "harga": int(terakhir[b - 1])}
+            else:
+                deret['last_price'] = {"tanggal_harga": str(tanggal_str[b - 1]), "harga": int(nilai[b - 1])}
+        hasil[kunci_deret(daerah[a], komoditas[a])] = deret
+    return hasil
+
+
+def pasangan_kosong(deret, daerah_ids, komoditas_ids):
+    """Pasangan (daerah_id, komoditas_id) yang tidak punya data dalam rentang."""
+    return [(d, k) for d in daerah_ids for k in komoditas_ids if kunci_deret(d, k) not in deret]
+
+
+def lengkapi_deret_kosong(deret, kosong, rows_terakhir, permintaan):
+    """
+    Menambah entri kosong untuk pasangan tanpa data dalam rentang, sehingga setiap pasangan
+    yang diminta ada di response. last_price diambil dari rows_terakhir (harga terakhir di
+    luar rentang) jika diminta, atau None.
+    """
+    terakhir = {
+        kunci_deret(d, k): {"tanggal_harga": tanggal.strftime('%d-%m-%Y'), "harga": int(harga)}
+        for d, k, tanggal, harga in rows_terakhir
+    }
+    for d, k in kosong:
+        entri = {"daerah_id": d, "komoditas_id": k, "tanggal_harga": [], "harga": []}
+        if permintaan['trend']:
+            entri['harga_normal'] = []
+        if permintaan['last']:
+            entri['last_price'] = terakhir.get(kunci_deret(d, k))
+        deret[kunci_deret(d, k)] = entri
+    return deret
+
+
+def hitung_harga_normal(daerah_id, komoditas_id, time_range, data, lamb=HP_LAMBDA):
+    """
+    Menghitung harga normal (trend HP filter) dari baris (tanggal_harga, harga).
+
+    :param lamb: Lambda HP filter; HP_LAMBDA_BULANAN untuk deret rata-rata bulanan.
+    :return: DataFrame dengan kolom tanggal_harga, Harga dan Harga_Normal.
+    """
+    df = pd.DataFrame(data, columns=['tanggal_harga', 'Harga'])
+
+    # Terapkan HP Filter; faktorisasi di-cache per panjang deret dan
+    # trend di-cache per deret selama tidak ada data baru (lihat kunci_trend)
+    harga = df['Harga'].to_numpy(dtype=np.float64)
+    key = kunci_trend(daerah_id, komoditas_id, time_range, lamb, data[0][0], data[-1][0], harga)
+    with span('hpfilter'):
+        trend = trend_cache.get_or_compute(key, harga, lamb)
+    df['Harga_Normal'] = trend.astype(int)  # Tambahkan kolom harga normal
+    return df
+
+
 @routes.route('/harga_normal/<int:daerah_id>/<int:komoditas_id>', methods=['GET'])
+@conditional(watermark_deret_harga)
 def get_harga_normal_time_range(daerah_id, komoditas_id):
     # Baca parameter `timeRange` dari query string
     time_range = request.args.get('timeRange', default=1, type=int)  # Default 1 tahun jika tidak ada parameter
 
-    # Buat koneksi ke database
-    connection = create_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
+    # Format response: rows (default), columnar, csv atau arrow
+    format_output = pilih_format(request)
+    if format_output not in FORMAT_DERET:
+        return jsonify({"error": True, "message": "format harus salah satu dari {}".format(', '.join(FORMAT_DERET))}), 400
 
-    try:
-        cursor = connection.cursor()
+    granularity = pilih_granularity(request)
+    if granularity is None:
+        return jsonify(pesan_granularity_tidak_valid()), 400
 
-        # Hitung tanggal awal berdasarkan timeRange
-        start_date = datetime.now() - timedelta(days=time_range * 365)
-        start_date_str = start_date.strftime('%Y-%m-%d')
-
-        # Query untuk mengambil data dengan filter timeRange
-        query = """
-            SELECT tanggal_harga, harga
-            FROM harga_komoditas
-            WHERE daerah_id = %s AND komoditas_id = %s AND tanggal_harga >= %s
-            ORDER BY tanggal_harga ASC
-        """
-        cursor.execute(query, (daerah_id, komoditas_id, start_date_str))
-
-        # Ambil hasil query
-        data = cursor.fetchall()
+    try:
+        points = parse_points(request.args.get('points'))
+    except ValueError as e:
+        return jsonify({"error": True, "message": "Parameter points tidak valid: {}".format(e)}), 400
 
-        # Tutup koneksi database
-        connection.close()
+    try:
+        # Ambil data dengan filter timeRange; granularity=month memakai rata-rata bulanan dari rollup
+        start_date_str = start_date_time_range(time_range)
+        if granularity == 'month':
+            data = [(row[0], row[2]) for row in get_repository().deret_harga_bulanan(daerah_id, komoditas_id, start_date_str)]
+        else:
+            data = get_repository().deret_harga(daerah_id, komoditas_id, start_date_str)
 
         # Cek apakah data tersedia
         if not data:
@@ -191,52 +575,170 @@ def get_harga_normal_time_range(daerah_id, komoditas_id):
                 "message": f"No data found for daerah_id: {daerah_id}, komoditas_id: {komoditas_id}, in the last {time_range} year(s)."
             }), 404
 
-        # Konversi hasil query menjadi DataFrame
-        df = pd.DataFrame(data, columns=['tanggal_harga', 'Harga'])
+        # Konversi hasil query menjadi DataFrame dan terapkan HP filter
+        df = hitung_harga_normal(daerah_id, komoditas_id, time_range, data,
+                                 HP_LAMBDA_BULANAN if granularity == 'month' else HP_LAMBDA)
+        # Trend dihitung dari deret lengkap, baru kemudian di-downsample
+        indeks = indeks_downsampling(df['tanggal_harga'], df['Harga_Normal'].to_numpy(), points)
+        if indeks is not None:
+            df = df.iloc[indeks].reset_index(drop=True)
 
-        # Terapkan HP Filter
-        cycle, trend = hpfilter(df['Harga'], lamb=24414062500)
-        df['Harga_Normal'] = trend.astype(int)  # Tambahkan kolom harga normal
+        description = f"Harga normal hasil dari aplikasi HP filter dalam {time_range} tahun terakhir untuk komoditas tertentu."
+        if format_output != FORMAT_ROWS:
+            return response_deret(format_output, df['tanggal_harga'], df['Harga_Normal'].to_numpy(),
+                                  'Harga_Normal', description)
 
         # Format tanggal jika tanggal_harga adalah tipe data date
         df['tanggal_harga'] = pd.to_datetime(df['tanggal_harga']).dt.strftime('%d-%m-%Y')
-        
 
         # Konversi hasil ke JSON
         result = {
             "error": False,
             "message": "Success",
             "prices": df[['tanggal_harga', 'Harga_Normal']].to_dict(orient='records'),
-            "description": f"Harga normal hasil dari aplikasi HP filter dalam {time_range} tahun terakhir untuk komoditas tertentu."
+            "description": description
         }
 
         return jsonify(result)
 
+    except DatabaseConnectionError:
+        raise
+    except Exception as e:
+        # Tangani kesalahan
+        return jsonify({"error": str(e)}), 500
+
+
+@routes.route('/harga_komoditas/batch', methods=['GET', 'POST'])
+def get_time_series_batch():
+    """
+    Endpoint API untuk banyak deret harga sekaligus (misalnya dashboard perbandingan daerah).
+    Semua pasangan daerah x komoditas diambil dengan satu query dan dikelompokkan per pasangan.
+
+    Parameter (query string atau body JSON):
+    - daerah_id, komoditas_id: list ID ("1,2,3" atau list JSON) atau "all"
+    - timeRange, granularity (day/month), points: sama dengan /harga_komoditas/<daerah>/<komoditas>
+    - last=1: tambahkan harga terakhir setiap pasangan
+    - trend=1: tambahkan harga_normal (trend HP filter) setiap deret
+    """
+    sumber = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    try:
+        permintaan = parse_permintaan_batch(sumber)
+    except ValueError as e:
+        return jsonify({"error": True, "message": str(e)}), 400
+
+    repository = get_repository()
+    try:
+        daerah_ids = permintaan['daerah_id']
+        if daerah_ids == 'all':
+            daerah_ids = [row[0] for row in repository.daftar_daerah()]
+        komoditas_ids = permintaan['komoditas_id']
+        if komoditas_ids == 'all':
+            komoditas_ids = repository.komoditas_ids()
+        try:
+            cek_jumlah_deret(daerah_ids, komoditas_ids)
+        except ValueError as e:
+            return jsonify({"error": True, "message": str(e)}), 400
+
+        time_range = permintaan['time_range']
+        bulanan = permintaan['granularity'] == 'month'
+        rows = repository.deret_harga_banyak(daerah_ids, komoditas_ids, start_date_time_range(time_range), bulanan)
+        deret = susun_deret_banyak(rows, bulanan, time_range, permintaan['points'],
+                                   permintaan['trend'], permintaan['last'])
+
+        # Harga terakhir pasangan yang tidak punya data dalam rentang, satu query untuk semuanya
+        kosong = pasangan_kosong(deret, daerah_ids, komoditas_ids)
+        rows_terakhir = []
+        if kosong and permintaan['last']:
+            rows_terakhir = repository.harga_terakhir_banyak(sorted({d for d, _ in kosong}), sorted({k for _, k in kosong}))
+        lengkapi_deret_kosong(deret, kosong, rows_terakhir, permintaan)
+
+        return jsonify({
+            "error": False,
+            "message": "Success",
+            "series": deret,
+            "description": "Data harga komoditas{} dalam {} tahun terakhir untuk {} pasangan daerah x komoditas.".format(
+                ' bulanan' if bulanan else '', time_range, len(deret)
+            )
+        })
+    except DatabaseConnectionError:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def parse_anomali_harga(args):
+    """
+    Membaca parameter /anomali_harga dari query string (dipakai mode sync dan async).
+
+    :return: Tuple (filters, limit); query-nya disusun oleh app.repository.sql_anomali_harga.
+    :raises ValueError: Jika parameter tidak valid; pesannya siap dikirim ke client.
+    """
+    limit = args.get('limit', default=ANOMALI_LIMIT, type=int)
+    if not 0 < limit <= ANOMALI_MAX_LIMIT:
+        raise ValueError("limit harus antara 1 dan {}".format(ANOMALI_MAX_LIMIT))
+    filters = {kolom: args.get(kolom, type=int) for kolom in ('daerah_id', 'komoditas_id')}
+    metode = args.get('metode')
+    if metode is not None and metode not in METODE_ANOMALI:
+        raise ValueError("metode harus salah satu dari {}".format(', '.join(METODE_ANOMALI)))
+    filters['metode'] = metode
+    try:
+        for nama in ('start', 'end'):
+            nilai = args.get(nama)
+            if nilai:
+                datetime.strptime(nilai, '%Y-%m-%d')
+                filters[nama] = nilai
+    except ValueError:
+        raise ValueError("Parameter tanggal tidak valid")
+    return filters, limit
+
+
+def format_anomali(rows):
+    # Baris dict anomali_harga -> response, tanggal dd-mm-yyyy seperti endpoint harga
+    for row in rows:
+        if hasattr(row['tanggal_harga'], 'strftime'):
+            row['tanggal_harga'] = row['tanggal_harga'].strftime('%d-%m-%Y')
+    return rows
+
+
+@routes.route('/anomali_harga', methods=['GET'])
+def get_anomali_harga():
+    """
+    Endpoint API hasil deteksi anomali harga (tabel anomali_harga, diisi oleh
+    `flask --app run deteksi-anomali`), terbaru dulu.
+
+    Query string (semua opsional):
+    - daerah_id, komoditas_id: filter
+    - metode: mad (lonjakan terhadap median bergulir) atau hp (deviasi dari trend /harga_normal)
+    - start, end: rentang tanggal_harga (yyyy-mm-dd)
+    - limit: jumlah baris (default ANOMALI_LIMIT)
+    """
+    try:
+        filters, limit = parse_anomali_harga(request.args)
+    except ValueError as e:
+        return jsonify({"error": True, "message": str(e)}), 400
+
+    try:
+        rows = get_repository().anomali_harga(filters, limit)
+        return jsonify({
+            "error": False,
+            "message": "Success",
+            "anomali": format_anomali(rows),
+            "description": "Anomali harga komoditas terbaru ({} baris).".format(len(rows))
+        })
+    except DatabaseConnectionError:
+        raise
     except Exception as e:
-        # Tangani kesalahan dan tutup koneksi jika belum ditutup
-        if connection.is_connected():
-            connection.close()
         return jsonify({"error": str(e)}), 500
 
 
 # get all data komoditas
 # Route untuk mengambil semua data dari tabel `komoditas`
 @routes.route('/komoditas', methods=['GET'])
+@conditional(watermark_komoditas, max_age=REFERENCE_MAX_AGE)
 def get_all_komoditas():
-    # Buat koneksi ke database
-    connection = create_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        # Query untuk mengambil semua data dari tabel komoditas
-        query = "SELECT * FROM komoditas"
-        cursor = connection.cursor()
-        cursor.execute(query)
-        data = cursor.fetchall()
-
-        # Tutup koneksi database
-        connection.close()
+        # Ambil semua data dari tabel komoditas
+        data = get_repository().daftar_komoditas()
 
         # Cek apakah data tersedia
         if not data:
@@ -252,35 +754,19 @@ def get_all_komoditas():
                 "img_url": row[2]
             } for row in data]
         })
+    except DatabaseConnectionError:
+        raise
     except Exception as e:
         # Handle error
         return jsonify({"error": str(e)}), 500
 
-# get all data daerah 
-
 
 @routes.route('/inflasi/<int:id_daerah>', methods=['GET'])
+@conditional(watermark_inflasi)
 def get_last_inflasi(id_daerah):
-    # Buat koneksi ke database
-    connection = create_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        # Query untuk mengambil data terakhir berdasarkan id_daerah
-        query = """
-            SELECT tingkat_inflasi, tanggal_inflasi
-            FROM inflasi
-            WHERE id_daerah = %s
-            ORDER BY tanggal_inflasi DESC
-            LIMIT 1
-        """
-        cursor = connection.cursor()
-        cursor.execute(query, (id_daerah,))
-        data = cursor.fetchone()
-
-        # Tutup koneksi database
-        connection.close()
+        # Ambil data inflasi terakhir berdasarkan id_daerah
+        data = get_repository().inflasi_terakhir(id_daerah)
 
         # Cek apakah data tersedia
         if not data:
@@ -295,28 +781,20 @@ def get_last_inflasi(id_daerah):
                 "tanggal_inflasi": data[1]
             }
         })
+    except DatabaseConnectionError:
+        raise
     except Exception as e:
         # Handle error
         return jsonify({"error": str(e)}), 500
-    
 
 
+# get all data daerah
 @routes.route('/daerah', methods=['GET'])
+@conditional(watermark_daerah, max_age=REFERENCE_MAX_AGE)
 def get_all_daerah():
-    # Buat koneksi ke database
-    connection = create_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        # Query untuk mengambil semua data dari tabel daerah
-        query = "SELECT daerah_id, nama_daerah, img_url FROM daerah"
-        cursor = connection.cursor()
-        cursor.execute(query)
-        data = cursor.fetchall()
-
-        # Tutup koneksi database
-        connection.close()
+        # Ambil semua data dari tabel daerah
+        data = get_repository().daftar_daerah()
 
         # Cek apakah data tersedia
         if not data:
@@ -337,91 +815,424 @@ def get_all_daerah():
             "message": "Success",
             "data": formatted_data
         })
+    except DatabaseConnectionError:
+        raise
     except Exception as e:
         # Handle error
         return jsonify({"error": str(e)}), 500
 
+
+def awal_window(params_list):
+    """
+    Tanggal awal query fitur prediksi. Jika semua daerah sudah punya scaler tersimpan,
+    cukup PREDIKSI_WINDOW_BULAN bulan sebelum bulan terakhir yang dicakup scaler;
+    jika ada yang belum, seluruh histori dibutuhkan untuk fit.
+    """
+    if not params_list or any(params is None for params in params_list):
+        return None
+    terakhir = min(np.datetime64(params['tanggal_terakhir'], 'M') for params in params_list)
+    return str((terakhir - PREDIKSI_WINDOW_BULAN).astype('datetime64[D]'))
+
+
+def scaler_daerah(model_path, id_daerah, fitur, tanggal):
+    """
+    Parameter scaler daerah untuk model ini: di-fit dari histori jika belum ada, atau
+    di-update inkremental jika ada bulan baru. Hasilnya hanya disimpan di memori worker;
+    file scaler ditulis oleh `flask refit-scalers` dan `flask ingest`.
+    """
+    params = scaler_store.get(model_path, id_daerah)
+    if params is None:
+        params = fit_scaler(fitur, tanggal)
+        scaler_store.put(model_path, {id_daerah: params}, fit=True)
+        return params
+    baru = update_scaler(params, fitur, tanggal)
+    if baru is not None:
+        scaler_store.put(model_path, {id_daerah: baru})
+        return baru
+    return params
+
+
+def parse_horizon(nilai):
+    """
+    Membaca parameter horizon (jumlah bulan ke depan), default 1.
+    """
+    if nilai is None or nilai == '':
+        return 1
+    horizon = int(nilai)
+    if not 1 <= horizon <= PREDIKSI_HORIZON_MAX:
+        raise ValueError("horizon harus antara 1 dan {}".format(PREDIKSI_HORIZON_MAX))
+    return horizon
+
+
+def format_bulan(bulan):
+    return bulan.astype(object).strftime('%d-%m-%Y')
+
+
+def format_horizon(nilai_prediksi, bulan):
+    """
+    Daftar prediksi per bulan untuk respons multi-bulan.
+
+    :param bulan: Bulan target tiap langkah dari bulan_target.
+    """
+    return [
+        {'bulan_ke': step, 'bulan': format_bulan(target), 'prediksi_inflasi': str(round(float(nilai), 2))}
+        for step, (nilai, target) in enumerate(zip(nilai_prediksi, bulan), start=1)
+    ]
+
+
+def hitung_prediksi(id_daerah, horizon=1):
+    """
+    Menghitung prediksi inflasi `horizon` bulan ke depan untuk id_daerah.
+
+    :return: Tuple (payload, status_code); payload berupa dict siap di-jsonify.
+    """
+    # Jika scaler sudah tersimpan, cukup ambil bulan-bulan terakhir
+    sejak = awal_window([scaler_store.get(model_registry.path_for(id_daerah), id_daerah)])
+
+    # Inflasi dan harga bulanan untuk wilayah yang diminta, satu query
+    data_prediksi = fitur_prediksi(id_daerah, sejak)
+
+    if isinstance(data_prediksi, dict) and "error" in data_prediksi:
+        return data_prediksi, 400  # Return error if data fetching fails
+
+    fitur, tanggal, last_inflation = data_prediksi
+    return prediksi_dari_data(id_daerah, fitur, tanggal, last_inflation, horizon)
+
+
+def prediksi_dari_data(id_daerah, fitur, tanggal, last_inflation, horizon=1):
+    """
+    Bagian CPU dari prediksi (normalisasi, model, interpretasi) untuk fitur yang sudah diambil.
+    Dipakai juga oleh mode async agar query dan komputasi bisa dipisah.
+
+    :param fitur: Matriks fitur dari fitur_prediksi.
+    :param tanggal: tanggal_inflasi tiap baris fitur.
+    :param last_inflation: Inflasi terakhir, untuk interpretasi.
+    :param horizon: Jumlah bulan ke depan (prediksi rekursif jika lebih dari 1).
+    :return: Tuple (payload, status_code).
+    """
+    try:
+        # Normalisasi hanya baris input dengan scaler tersimpan
+        model_path = model_registry.path_for(id_daerah)
+        params = scaler_daerah(model_path, id_daerah, fitur, tanggal)
+        input_seq = siapkan_input_prediksi(fitur, params)
+        bulan = bulan_target(fitur, tanggal, horizon)
+
+        # Prediksi 1 bulan ke depan, atau seluruh horizon dalam satu rollout
+        # (di worker ini atau di proses inference bersama, lihat INFERENCE_MODE)
+        eksogen = eksogen_prediksi(fitur, params) if horizon > 1 else None
+        pred = prediksi_model(model_path, input_seq, eksogen, horizon)
+
+        # Denormalisasi hasil prediksi
+        nilai_prediksi = denormalisasi_target(pred.reshape(-1), params)
+        predicted_inflation_value = float(nilai_prediksi[0])
+
+        data = {
+            'prediksi_inflasi': str(round(predicted_inflation_value, 2)),
+            'bulan_prediksi': format_bulan(bulan[0]),
+            'deskripsi': interpretasi_prediksi(predicted_inflation_value, last_inflation)
+        }
+        if horizon > 1:
+            data['horizon'] = format_horizon(nilai_prediksi, bulan)
+        return {
+            "error": False,
+            "message": "Success",
+            "data": data
+        }, 200
+
+    except InferenceUnavailableError:
+        raise
+    except Exception as e:
+        # Handle errors
+        return {"error": str(e)}, 500
+
+
+def versi_prediksi(id_daerah):
+    """
+    Versi (model, scaler, data) untuk key cache prediksi daerah.
+    """
+    model_path = model_registry.path_for(id_daerah)
+    return model_registry.version(id_daerah), scaler_store.version(model_path), versi_data_prediksi(id_daerah)
+
+
+def hitung_prediksi_cache(id_daerah, horizon=1):
+    # Hanya hasil sukses yang disimpan di cache
+    payload, status = hitung_prediksi(id_daerah, horizon)
+    return (payload, status), status == 200
+
+
+def mulai_refresher_prediksi():
+    """
+    Menjalankan refresher cache prediksi di proses ini jika PREDIKSI_CACHE_REFRESH_INTERVAL > 0.
+    """
+    # Key cache: (id_daerah, horizon)
+    prediction_cache.start_refresher(
+        PREDIKSI_CACHE_REFRESH_INTERVAL,
+        lambda key: versi_prediksi(key[0]),
+        lambda key: hitung_prediksi_cache(*key),
+    )
+
+
 # code preidksi inflasi
 @routes.route('/prediksi/<int:id_daerah>', methods=['GET'])
 def prediksi_inflasi_real(id_daerah):
     """
-    Endpoint API untuk melakukan prediksi inflasi 1 bulan ke depan berdasarkan id_daerah
+    Endpoint API untuk melakukan prediksi inflasi 1 bulan ke depan berdasarkan id_daerah.
+    `?horizon=3` (maksimal PREDIKSI_HORIZON_MAX) untuk prediksi rekursif beberapa bulan.
     """
-    # Mengambil data untuk wilayah yang diminta
-    data_prediksi = data_inflasi_dan_komoditas(id_daerah)
+    try:
+        horizon = parse_horizon(request.args.get('horizon'))
+    except ValueError as e:
+        return jsonify({"error": True, "message": "Parameter horizon tidak valid: {}".format(e)}), 400
 
-    if isinstance(data_prediksi, dict) and "error" in data_prediksi:
-        return jsonify(data_prediksi), 400  # Return error if data fetching fails
+    # Thread refresher tidak ikut ter-fork, pastikan berjalan di worker ini
+    mulai_refresher_prediksi()
 
-    try:
-        # Menyiapkan fitur dan target
-        features = data_prediksi[['komoditas_id_1', 'komoditas_id_2', 'komoditas_id_3', 'komoditas_id_4', 'komoditas_id_5']].values
-        target = data_prediksi['tingkat_inflasi'].values.reshape(-1, 1)
+    payload, status = prediction_cache.get_or_compute(
+        (id_daerah, horizon),
+        lambda: versi_prediksi(id_daerah),
+        lambda: hitung_prediksi_cache(id_daerah, horizon),
+    )
+    return jsonify(payload), status
 
-        # Normalisasi fitur (harga komoditas)
-        scaler_features = MinMaxScaler(feature_range=(0, 1))
-        scaled_features = scaler_features.fit_transform(features)
 
-        # Normalisasi target (inflasi)
-        scaler_target = MinMaxScaler(feature_range=(0, 1))
-        scaled_target = scaler_target.fit_transform(target)
+def parse_id_daerah(nilai):
+    """
+    Membaca parameter id_daerah untuk prediksi batch: "all", string "1,2,3", atau list JSON.
+    """
+    if nilai is None:
+        return None
+    if isinstance(nilai, str):
+        if nilai.strip().lower() == 'all':
+            return 'all'
+        nilai = [item for item in nilai.split(',') if item.strip()]
+    return list(dict.fromkeys(int(item) for item in nilai))
 
-        # Gabungkan kembali fitur dan target yang sudah dinormalisasi
-        scaled_data = np.hstack((scaled_features, scaled_target))
 
-        # frame as supervised learning
-        reframed = series_to_supervised(scaled_data, 1, 1)
-        reframed.drop(reframed.columns[[6, 7, 8, 9, 10]], axis=1, inplace=True)
+def prediksi_batch(data_per_daerah, inflasi_terakhir, tanggal, horizon=1):
+    """
+    Prediksi banyak daerah dari data yang sudah diambil: input dikelompokkan per file
+    model dan tiap model cukup satu kali predict (atau satu rollout untuk seluruh horizon).
+    Dipakai mode sync dan async.
+
+    :param data_per_daerah: Dict id_daerah -> matriks fitur (atau dict error).
+    :param inflasi_terakhir: Dict id_daerah -> inflasi terakhir.
+    :param tanggal: Dict id_daerah -> tanggal_inflasi tiap baris fitur.
+    :param horizon: Jumlah bulan ke depan.
+    :return: Dict str(id_daerah) -> hasil prediksi atau error.
+    """
+    hasil = {}
+    # Kelompokkan input per file model agar tiap model cukup satu kali predict
+    kelompok = {}
+    for id_daerah, fitur in data_per_daerah.items():
+        if isinstance(fitur, dict):
+            hasil[str(id_daerah)] = fitur
+            continue
+        model_path = model_registry.path_for(id_daerah)
+        try:
+            params = scaler_daerah(model_path, id_daerah, fitur, tanggal[id_daerah])
+            input_seq = siapkan_input_prediksi(fitur, params)
+            eksogen = eksogen_prediksi(fitur, params) if horizon > 1 else None
+            bulan = bulan_target(fitur, tanggal[id_daerah], horizon)
+        except Exception as e:
+            hasil[str(id_daerah)] = {"error": str(e)}
+            continue
+        kelompok.setdefault((model_path, input_seq.shape[-1]), []).append((id_daerah, input_seq, eksogen, params, bulan))
+
+    for (path, _), items in kelompok.items():
+        # Satu forward pass (atau satu rollout) untuk semua daerah yang memakai model ini
+        batch = np.concatenate([item[1] for item in items], axis=0)
+        eksogen_batch = np.concatenate([item[2] for item in items], axis=0) if horizon > 1 else None
+        try:
+            preds = prediksi_model(path, batch, eksogen_batch, horizon)
+        except ValueError as e:
+            # Misalnya jumlah fitur data tidak sesuai dengan model
+            for item in items:
+                hasil[str(item[0])] = {"error": str(e)}
+            continue
+
+        for (id_daerah, _, _, params, bulan), pred in zip(items, preds):
+            nilai_prediksi = denormalisasi_target(pred, params)
+            predicted_inflation_value = float(nilai_prediksi[0])
+            hasil[str(id_daerah)] = {
+                'prediksi_inflasi': str(round(predicted_inflation_value, 2)),
+                'bulan_prediksi': format_bulan(bulan[0]),
+                'deskripsi': interpretasi_prediksi(predicted_inflation_value, inflasi_terakhir.get(id_daerah))
+            }
+            if horizon > 1:
+                hasil[str(id_daerah)]['horizon'] = format_horizon(nilai_prediksi, bulan)
+    return hasil
 
-        # Pisahkan input dan output untuk prediksi
-        values = reframed.values
-        test_X = values[:, :-1]
 
-        # Ambil data terakhir untuk prediksi 1 bulan ke depan
-        input_seq = test_X[-1].reshape(1, 1, test_X.shape[1])  # Ambil data terakhir dan reshape
+@routes.route('/prediksi', methods=['GET', 'POST'])
+def prediksi_inflasi_batch():
+    """
+    Endpoint API untuk prediksi inflasi 1 bulan ke depan untuk banyak daerah sekaligus.
+    Daftar daerah dikirim lewat `?id_daerah=1,2,3` atau body JSON {"id_daerah": [1, 2, 3]},
+    atau "all" untuk semua daerah. Fitur semua daerah diambil dengan satu query dan semua input
+    diprediksi dalam satu forward pass per model. `horizon` (query atau body) untuk prediksi
+    beberapa bulan ke depan.
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        nilai, nilai_horizon = body.get('id_daerah'), body.get('horizon')
+    else:
+        nilai, nilai_horizon = request.args.get('id_daerah'), request.args.get('horizon')
 
-        # Load the model (ensure model path is correct)
-        model = load_model('model.h5')  # Replace with actual model path
+    try:
+        id_daerah_list = parse_id_daerah(nilai)
+    except (TypeError, ValueError):
+        return jsonify({"error": True, "message": "Parameter id_daerah tidak valid"}), 400
+    try:
+        horizon = parse_horizon(nilai_horizon)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": True, "message": "Parameter horizon tidak valid: {}".format(e)}), 400
+    if not id_daerah_list:
+        return jsonify({"error": True, "message": "Parameter id_daerah wajib diisi (list ID atau 'all')"}), 400
 
-        # Prediksi untuk 1 bulan ke depan
-        pred = model.predict(input_seq)
+    try:
+        # "all" selalu membaca seluruh histori karena daftar daerahnya belum diketahui
+        sejak = None if id_daerah_list == 'all' else awal_window(
+            [scaler_store.get(model_registry.path_for(id_daerah), id_daerah) for id_daerah in id_daerah_list]
+        )
+        data_per_daerah, inflasi_terakhir, tanggal = fitur_prediksi_batch(id_daerah_list, sejak)
 
-        # Denormalisasi hasil prediksi
-        predicted_inflation = scaler_target.inverse_transform(pred.reshape(-1, 1))
-
-        # Ambil nilai prediksi pertama (karena hanya satu nilai untuk satu prediksi)
-        predicted_inflation_value = predicted_inflation.flatten()[0]
-
-        # Dapatkan data inflasi terakhir dari database
-        last_inflation = get_last_inflasi(id_daerah).json.get('data', {}).get('tingkat_inflasi', None)
-        if last_inflation is not None:
-            last_inflation = float(last_inflation)
-
-        # Interpretasi hasil prediksi
-        if last_inflation is not None:
-            if predicted_inflation_value > last_inflation:
-                deskripsi = ("Inflasi diprediksi akan meningkat dibandingkan bulan sebelumnya, "
-                             "yang dapat menunjukkan adanya tekanan pada harga komoditas utama di daerah ini.")
-            elif predicted_inflation_value < last_inflation:
-                deskripsi = ("Inflasi diprediksi akan menurun dibandingkan bulan sebelumnya, "
-                             "menandakan potensi stabilisasi harga komoditas utama di daerah ini.")
-            else:
-                deskripsi = ("Inflasi diprediksi akan tetap stabil dibandingkan bulan sebelumnya, "
-                             "mengindikasikan tidak adanya perubahan signifikan pada harga komoditas utama.")
-        else:
-            deskripsi = "Data inflasi terakhir tidak tersedia untuk membuat interpretasi."
+        hasil = prediksi_batch(data_per_daerah, inflasi_terakhir, tanggal, horizon)
 
-        # Jika Anda ingin mengembalikan prediksi sebagai response JSON:
         return jsonify({
             "error": False,
             "message": "Success",
-            "data": {
-                'prediksi_inflasi': str(round(predicted_inflation_value, 2)),
-                'deskripsi': deskripsi
-            }
+            "data": hasil
         })
-    
 
+    except (DatabaseConnectionError, InferenceUnavailableError):
+        raise
     except Exception as e:
         # Handle errors
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@routes.route('/models/stats', methods=['GET'])
+def get_model_stats():
+    """
+    Statistik registry model di worker ini (jumlah load vs hit cache) dan latensi rollout per langkah.
+    """
+    return jsonify(dict(model_registry.stats(), rollout=rollout_stats.stats()))
+
+
+@routes.route('/prediksi/cache/stats', methods=['GET'])
+def get_prediction_cache_stats():
+    """
+    Statistik cache prediksi di worker ini (hit, miss, entry usang, eviction).
+    """
+    return jsonify(prediction_cache.stats())
+
+
+@routes.route('/ingest/<jenis>', methods=['POST'])
+def ingest_data(jenis):
+    """
+    Endpoint API untuk ingest batch harga (`/ingest/harga`) atau inflasi (`/ingest/inflasi`).
+    Body CSV dengan header atau NDJSON (`Content-Type: application/x-ndjson` atau `?format=ndjson`),
+    header `Authorization: Bearer <INGEST_TOKEN>`. Baris dengan unique key yang sudah ada
+    diperbarui; `?on_error=skip` membuang baris invalid alih-alih menolak seluruh batch.
+    """
+    format_data = format_ingest(request.args, request.mimetype)
+    ditolak = cek_ingest(jenis, request.headers.get('Authorization', ''), request.content_length, format_data)
+    if ditolak is not None:
+        return jsonify(ditolak[0]), ditolak[1]
+
+    try:
+        hasil = jalankan_ingest(jenis, request.get_data(), format_data, request.args.get('on_error') == 'skip')
+        return jsonify({"error": False, "message": "Success", "data": hasil})
+    except IngestError as e:
+        return jsonify({"error": True, "message": str(e), "errors": e.errors}), 400
+    except DatabaseConnectionError:
+        raise
+    except Exception as e:
+        # Handle errors
+        return jsonify({"error": str(e)}), 500
+
+
+def format_ingest(args, mimetype):
+    return args.get('format') or ('ndjson' if 'json' in (mimetype or '') else 'csv')
+
+
+def cek_ingest(jenis, authorization, content_length, format_data):
+    """
+    Validasi request ingest sebelum body dibaca (dipakai mode sync dan async).
+
+    :return: Tuple (payload error, status), atau None jika request boleh diproses.
+    """
+    if not INGEST_TOKEN:
+        return {"error": True, "message": "Ingest tidak aktif (INGEST_TOKEN belum di-set)"}, 403
+    if not hmac.compare_digest(authorization, 'Bearer ' + INGEST_TOKEN):
+        return {"error": True, "message": "Token ingest tidak valid"}, 401
+    if jenis not in TABEL_INGEST:
+        return {"error": True, "message": "Jenis ingest harus salah satu dari {}".format(', '.join(TABEL_INGEST))}, 404
+    if content_length is not None and content_length > INGEST_MAX_BYTES:
+        return {"error": True, "message": "Batch lebih besar dari {} byte".format(INGEST_MAX_BYTES)}, 413
+    if format_data not in FORMAT_INGEST:
+        return {"error": True, "message": "format harus salah satu dari {}".format(', '.join(FORMAT_INGEST))}, 400
+    return None
+
+
+def jalankan_ingest(jenis, body, format_data, lewati_invalid):
+    """
+    Membaca dan menulis satu batch ingest lewat repository sync.
+
+    :return: Ringkasan dari ingest_batch.
+    """
+    df = baca_batch(body, format_data)
+    hasil = ingest_batch(get_repository(), jenis, df, lewati_invalid, INGEST_BATCH_SIZE)
+    # Worker ini langsung memakai versi data baru; worker lain setelah HTTP_CACHE_VALIDATOR_TTL
+    # dan PREDIKSI_CACHE_VERSION_TTL (versi data ikut berubah)
+    validator_cache.clear()
+    prediction_cache.invalidate(int(id_daerah) for id_daerah in hasil['versi'])
+    return hasil
+
+
+@routes.route('/inference/stats', methods=['GET'])
+def get_inference_stats():
+    """
+    Mode inference, statistik klien di worker ini dan (mode server) statistik proses
+    inference bersama: ukuran batch, waktu tunggu di antrean, permintaan kedaluwarsa.
+    """
+    return jsonify(stats_inference())
+
+
+def stats_inference():
+    hasil = {"mode": INFERENCE_MODE}
+    if INFERENCE_MODE == 'server':
+        hasil['client'] = inference_client.stats()
+        try:
+            hasil['server'] = inference_client.server_stats()
+        except InferenceUnavailableError as e:
+            hasil['server'] = {"error": str(e)}
+    return hasil
+
+
+@routes.route('/prediksi/scalers/stats', methods=['GET'])
+def get_scaler_stats():
+    """
+    Statistik parameter scaler di worker ini (file yang di-load, fit, update inkremental).
+    """
+    return jsonify(scaler_store.stats())
+
+
+@routes.route('/db/stats', methods=['GET'])
+def get_db_stats():
+    """
+    Statistik backend database di worker ini (untuk MySQL: in use, idle, waktu tunggu pool).
+    """
+    return jsonify(get_repository().stats())
+
+
+@routes.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Metrik worker ini dalam format teks Prometheus: histogram latensi per route dan per tahap
+    (db.acquire, db.query, db.fetch, pivot, scaler, model.load, model.predict, hpfilter,
+    downsample, json), serta counter database dan model.
+    """
+    if not METRICS_ENABLED:
+        return jsonify({"error": True, "message": "Metrik dinonaktifkan (METRICS_ENABLED=0)"}), 404
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
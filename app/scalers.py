@@ -0,0 +1,133 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Muat variabel dari file .env
+load_dotenv()
+
+
+def scaler_path_for(model_path):
+    """
+    File parameter scaler disimpan di samping file model: model.h5 -> model.scalers.json.
+    """
+    return os.path.splitext(model_path)[0] + '.scalers.json'
+
+
+class ScalerStore:
+    """
+    Parameter min-max (fitur dan target) per daerah, satu file JSON per model.
+    File di-load sekali per proses dan dibaca ulang jika mtime-nya berubah (misalnya
+    setelah `flask refit-scalers` atau `flask ingest`). Entry per daerah berbentuk:
+        {"min": [...], "max": [...], "tanggal_terakhir": "yyyy-mm-dd"}
+    dengan kolom terakhir min/max adalah target (tingkat_inflasi).
+
+    Hanya command CLI yang menulis file (put dengan simpan=True). Parameter yang di-fit
+    atau di-update saat melayani request disimpan di memori proses saja, sehingga worker
+    tidak saling menimpa file dan versi file (bagian key cache prediksi) tidak berubah.
+    """
+
+    def __init__(self, reload_interval=30.0):
+        self.reload_interval = reload_interval
+        # path -> {"entries", "mtime", "checked_at"}
+        self._files = {}
+        # path -> {id_daerah: parameter} hasil fit/update di proses ini, dibuang saat file berubah
+        self._lokal = {}
+        self._lock = threading.RLock()
+        self._stats = {"loads": 0, "fits": 0, "updates": 0, "saves": 0, "save_errors": 0}
+
+    def _file(self, model_path):
+        path = scaler_path_for(model_path)
+        now = time.monotonic()
+        entry = self._files.get(path)
+        if entry is not None and now - entry['checked_at'] < self.reload_interval:
+            return path, entry
+
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if entry is None or entry['mtime'] != mtime:
+            entries = {}
+            if mtime is not None:
+                with open(path) as f:
+                    entries = json.load(f)
+                self._stats['loads'] += 1
+            entry = {"entries": entries, "mtime": mtime}
+            self._files[path] = entry
+            self._lokal.pop(path, None)
+        entry['checked_at'] = now
+        return path, entry
+
+    def get(self, model_path, id_daerah):
+        """
+        :return: Dict parameter scaler daerah untuk model ini, atau None jika belum ada.
+        """
+        with self._lock:
+            path, entry = self._file(model_path)
+            params = self._lokal.get(path, {}).get(str(id_daerah))
+            return params if params is not None else entry['entries'].get(str(id_daerah))
+
+    def put(self, model_path, params_per_daerah, fit=False, simpan=False):
+        """
+        Menyimpan parameter beberapa daerah sekaligus.
+
+        :param params_per_daerah: Dict id_daerah -> parameter scaler.
+        :param fit: True jika parameter hasil fit penuh, False jika update inkremental.
+        :param simpan: True untuk menulis ke file (command CLI); False hanya di memori proses ini.
+        """
+        params_per_daerah = {str(id_daerah): params for id_daerah, params in params_per_daerah.items()}
+        with self._lock:
+            path, _ = self._file(model_path)
+            self._stats['fits' if fit else 'updates'] += len(params_per_daerah)
+            if not simpan:
+                self._lokal.setdefault(path, {}).update(params_per_daerah)
+                return
+            try:
+                entries = self._simpan(path, params_per_daerah)
+            except OSError as e:
+                # File tidak bisa ditulis (misalnya filesystem read-only), parameter tetap dipakai dari memori
+                self._stats['save_errors'] += 1
+                print(f"Error: gagal menyimpan scaler {path}: '{e}'")
+                self._lokal.setdefault(path, {}).update(params_per_daerah)
+                return
+            self._stats['saves'] += 1
+            self._files[path] = {"entries": entries, "mtime": os.path.getmtime(path), "checked_at": time.monotonic()}
+            self._lokal.pop(path, None)
+
+    def _simpan(self, path, params_per_daerah):
+        """
+        Menggabungkan parameter ke isi file terbaru di bawah flock, lalu atomic replace;
+        entry daerah lain yang ditulis proses lain sejak file di-load tidak tertimpa.
+
+        :return: Isi file setelah digabung.
+        """
+        with open(path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            entries = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    entries = json.load(f)
+            entries.update(params_per_daerah)
+            tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, path)
+        return entries
+
+    def version(self, model_path):
+        """
+        Versi file scaler (mtime) untuk dipakai sebagai bagian dari key cache prediksi.
+        """
+        with self._lock:
+            _, entry = self._file(model_path)
+            return entry['mtime']
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, files={
+                path: len(entry['entries']) for path, entry in self._files.items()
+            }, lokal={path: len(entries) for path, entries in self._lokal.items()})
+
+
+scaler_store = ScalerStore(reload_interval=float(os.getenv('MODEL_RELOAD_INTERVAL', 30)))
@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+import pandas as pd
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # orjson opsional, fallback ke json standar
+    orjson = None
+
+# Format response untuk endpoint deret waktu harga
+FORMAT_ROWS = 'rows'
+FORMAT_COLUMNAR = 'columnar'
+FORMAT_CSV = 'csv'
+FORMAT_ARROW = 'arrow'
+
+MIMETYPES = {
+    FORMAT_COLUMNAR: 'application/json',
+    FORMAT_CSV: 'text/csv',
+    FORMAT_ARROW: 'application/vnd.apache.arrow.stream',
+}
+
+
+def pilih_format(request):
+    """
+    Menentukan format response dari query `?format=` atau header Accept.
+    Format baris (array of dict) tetap menjadi default.
+    """
+    format_query = request.args.get('format')
+    if format_query:
+        return format_query
+    best = request.accept_mimetypes.best_match(
+        ['application/json', MIMETYPES[FORMAT_CSV], MIMETYPES[FORMAT_ARROW]], default='application/json'
+    )
+    if best == MIMETYPES[FORMAT_CSV]:
+        return FORMAT_CSV
+    if best == MIMETYPES[FORMAT_ARROW]:
+        return FORMAT_ARROW
+    return FORMAT_ROWS
+
+
+def format_tanggal(values):
+    """
+    Mengubah array tanggal menjadi string dd-mm-yyyy secara vektor (tanpa strftime per baris).
+    """
+    iso = np.asarray(pd.to_datetime(values).values.astype('datetime64[D]')).astype('U10')
+    chars = iso.view('U1').reshape(-1, 10)
+    # yyyy-mm-dd -> dd-mm-yyyy
+    return chars[:, [8, 9, 7, 5, 6, 4, 0, 1, 2, 3]].copy().view('U10').reshape(-1)
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=lambda o: o.tolist() if isinstance(o, np.ndarray) else str(o))
+
+
+def render_deret(format_output, tanggal, nilai, nama_nilai, description):
+    """
+    Membuat body response deret waktu (tanggal, nilai) dalam format kolom.
+
+    :param format_output: columnar, csv atau arrow.
+    :param tanggal: Array tanggal (date/datetime).
+    :param nilai: Array nilai numerik.
+    :param nama_nilai: Nama kolom nilai (misalnya harga atau Harga_Normal).
+    :param description: Deskripsi untuk format columnar.
+    :return: Tuple (body, status, mimetype), atau None jika format tidak dikenal.
+    """
+    tanggal_str = format_tanggal(tanggal)
+    nilai = np.asarray(nilai)
+
+    if format_output == FORMAT_COLUMNAR:
+        body = dumps({
+            "error": False,
+            "message": "Success",
+            "tanggal_harga": tanggal_str.tolist(),
+            nama_nilai: nilai,
+            "description": description,
+        })
+        return body, 200, MIMETYPES[FORMAT_COLUMNAR]
+
+    if format_output == FORMAT_CSV:
+        body = pd.DataFrame({"tanggal_harga": tanggal_str, nama_nilai: nilai}).to_csv(index=False)
+        return body, 200, MIMETYPES[FORMAT_CSV]
+
+    if format_output == FORMAT_ARROW:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return dumps({"error": True, "message": "Format arrow membutuhkan paket pyarrow"}), 406, 'application/json'
+        table = pa.table({
+            "tanggal_harga": pa.array(pd.to_datetime(tanggal).values.astype('datetime64[D]')),
+            nama_nilai: pa.array(nilai),
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), 200, MIMETYPES[FORMAT_ARROW]
+
+    return None
+
+
+def response_deret(format_output, tanggal, nilai, nama_nilai, description):
+    """
+    Versi Flask dari render_deret.
+
+    :return: Response Flask, atau None jika format tidak dikenal.
+    """
+    hasil = render_deret(format_output, tanggal, nilai, nama_nilai, description)
+    if hasil is None:
+        return None
+    body, status, mimetype = hasil
+    return Response(body, status=status, mimetype=mimetype)
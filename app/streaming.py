@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+from flask import current_app
+
+
+def encode_cursor(tanggal_harga, pk):
+    """
+    Membuat token cursor keyset dari baris terakhir halaman: "<yyyy-mm-dd>_<pk>".
+    """
+    if isinstance(tanggal_harga, (date, datetime)):
+        tanggal_harga = tanggal_harga.strftime('%Y-%m-%d')
+    return '{}_{}'.format(tanggal_harga, pk)
+
+
+def decode_cursor(token):
+    """
+    Kebalikan encode_cursor.
+
+    :return: Tuple (tanggal_harga, pk).
+    :raises ValueError: Jika format token tidak valid.
+    """
+    tanggal_harga, pk = token.rsplit('_', 1)
+    datetime.strptime(tanggal_harga, '%Y-%m-%d')
+    return tanggal_harga, int(pk)
+
+
+def iter_rows(cursor, chunk_size):
+    """
+    Membaca hasil query per potongan dengan fetchmany agar memori tetap konstan.
+    """
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def stream_json_array(chunks):
+    """
+    Menulis potongan baris sebagai satu JSON array yang dikirim bertahap (chunked).
+    Encoding per baris sama dengan jsonify.
+    """
+    dumps = current_app.json.dumps
+    yield '['
+    first = True
+    for rows in chunks:
+        body = ','.join(dumps(row) for row in rows)
+        yield body if first else ',' + body
+        first = False
+    yield ']\n'
+
+
+def stream_ndjson(chunks):
+    """
+    Menulis potongan baris sebagai NDJSON (satu objek JSON per baris).
+    """
+    dumps = current_app.json.dumps
+    for rows in chunks:
+        yield ''.join(dumps(row) + '\n' for row in rows)
@@ -0,0 +1,72 @@
+"""
+Generator dataset sintetis (daerah x komoditas x tahun) untuk benchmark dan pengembangan lokal.
+Harga harian dibuat dari random walk log-normal ditambah musiman tahunan, inflasi bulanan
+dari random walk di sekitar 3%. Semua deret dihitung sekaligus dengan NumPy.
+"""
+import numpy as np
+import pandas as pd
+
+NAMA_KOMODITAS = ['Beras', 'Cabai Merah', 'Bawang Merah', 'Daging Ayam', 'Telur Ayam',
+                  'Minyak Goreng', 'Gula Pasir', 'Daging Sapi', 'Bawang Putih', 'Cabai Rawit']
+
+
+def buat_dataset(n_daerah, n_komoditas, n_tahun, seed=0, end=None, freq='D'):
+    """
+    Membuat isi keempat tabel sebagai list tuple siap ditulis oleh Repository.tulis_dataset.
+
+    :param n_daerah: Jumlah daerah (daerah_id 1..n).
+    :param n_komoditas: Jumlah komoditas (id_komoditas 1..n). Model bawaan memakai 5.
+    :param n_tahun: Panjang deret dalam tahun, berakhir di `end` (default hari ini).
+    :param seed: Seed generator acak.
+    :param freq: Frekuensi harga (pandas offset), default harian.
+    :return: Dict daerah, komoditas, harga, inflasi.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end or pd.Timestamp.today()).normalize()
+    start = end - pd.DateOffset(years=n_tahun)
+
+    tanggal = pd.date_range(start, end, freq=freq)
+    n_hari = len(tanggal)
+    tanggal_str = np.asarray(tanggal.strftime('%Y-%m-%d'))
+
+    # Harga: (daerah, komoditas, hari)
+    base = rng.uniform(10000, 120000, size=(1, n_komoditas, 1)) * rng.uniform(0.85, 1.15, size=(n_daerah, 1, 1))
+    walk = np.cumsum(rng.normal(0, 0.01, size=(n_daerah, n_komoditas, n_hari)), axis=2)
+    musiman = 0.05 * np.sin(2 * np.pi * np.arange(n_hari) / 365.25 + rng.uniform(0, 2 * np.pi, size=(1, n_komoditas, 1)))
+    harga = np.round(base * np.exp(walk + musiman), -1).astype(np.int64)
+
+    daerah_id = np.repeat(np.arange(1, n_daerah + 1), n_komoditas * n_hari)
+    komoditas_id = np.tile(np.repeat(np.arange(1, n_komoditas + 1), n_hari), n_daerah)
+    tanggal_harga = np.tile(tanggal_str, n_daerah * n_komoditas)
+
+    # Inflasi bulanan per daerah, tanggal = awal bulan
+    bulan = pd.date_range(start.to_period('M').to_timestamp(), end, freq='MS')
+    inflasi = np.clip(3 + np.cumsum(rng.normal(0, 0.2, size=(n_daerah, len(bulan))), axis=1), -2, 10).round(2)
+    bulan_str = np.asarray(bulan.strftime('%Y-%m-%d'))
+
+    return {
+        "daerah": [(i, 'Daerah {}'.format(i), None) for i in range(1, n_daerah + 1)],
+        "komoditas": [
+            (i, NAMA_KOMODITAS[i - 1] if i <= len(NAMA_KOMODITAS) else 'Komoditas {}'.format(i), None)
+            for i in range(1, n_komoditas + 1)
+        ],
+        "harga": list(zip(daerah_id.tolist(), komoditas_id.tolist(), tanggal_harga.tolist(), harga.reshape(-1).tolist())),
+        "inflasi": list(zip(
+            np.repeat(np.arange(1, n_daerah + 1), len(bulan)).tolist(),
+            inflasi.reshape(-1).tolist(),
+            np.tile(bulan_str, n_daerah).tolist(),
+        )),
+    }
+
+
+def isi_repository(repository, n_daerah, n_komoditas, n_tahun, seed=0, freq='D'):
+    """
+    Membuat dataset sintetis dan menulisnya ke repository (tabel harus sudah ada dan kosong),
+    lalu mengisi rollup harga_bulanan.
+
+    :return: Dict jumlah baris per tabel.
+    """
+    dataset = buat_dataset(n_daerah, n_komoditas, n_tahun, seed=seed, freq=freq)
+    repository.tulis_dataset(dataset['daerah'], dataset['komoditas'], dataset['harga'], dataset['inflasi'])
+    repository.perbarui_harga_bulanan(penuh=True)
+    return {tabel: len(rows) for tabel, rows in dataset.items()}
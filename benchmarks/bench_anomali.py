@@ -0,0 +1,122 @@
+"""
+Benchmark deteksi anomali harga pada SQLite skala nasional (default 100 daerah x 10 komoditas x 5 tahun):
+- hitung: deteksi_anomali atas semua baris di memori, dibandingkan loop pandas per deret
+  (rolling median/MAD dan HP filter satu deret per iterasi) pada sebagian deret
+- job penuh: baca per kelompok daerah, hitung dan tulis anomali_harga
+- job inkremental: setelah ingest satu hari baru untuk semua deret
+- baca: /anomali_harga dengan beberapa filter (p50 dari --repeat request)
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_anomali --daerah 100 --komoditas 10 --tahun 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.anomali import ANOMALI_AMBANG_HP, ANOMALI_AMBANG_MAD, ANOMALI_SKALA_MIN, ANOMALI_WINDOW
+from app.anomali import deteksi_anomali, perbarui_anomali
+from app.repository import SQLiteRepository, set_repository
+from app.routes import start_date_time_range
+from app.synthetic_data import buat_dataset
+from utils.anomali import MAD_KE_SIGMA
+from utils.hp_filter import HP_LAMBDA, hp_trend, trend_cache
+
+URL_BACA = [
+    ('terbaru', '/anomali_harga'),
+    ('daerah', '/anomali_harga?daerah_id=1'),
+    ('daerah komoditas', '/anomali_harga?daerah_id=1&komoditas_id=1&metode=mad'),
+    ('komoditas 30 hari', '/anomali_harga?komoditas_id=1&start={}'),
+]
+
+
+def baseline_per_deret(df, hp_sejak):
+    """Loop pandas satu deret per iterasi, definisi anomali sama dengan deteksi_anomali."""
+    jumlah = 0
+    for _, deret in df.groupby(['daerah_id', 'komoditas_id'], sort=False):
+        harga = deret['harga'].astype(float)
+        perubahan = np.log(harga).diff()
+        jendela = perubahan.shift(1).rolling(ANOMALI_WINDOW)
+        median = jendela.median()
+        mad = jendela.apply(lambda w: np.median(np.abs(w - np.median(w))), raw=True)
+        skor = (perubahan - median) / np.maximum(MAD_KE_SIGMA * mad, ANOMALI_SKALA_MIN)
+        jumlah += int((skor.abs() >= ANOMALI_AMBANG_MAD).sum())
+
+        rentang = deret['tanggal'] >= hp_sejak
+        if rentang.any():
+            y = harga[rentang].to_numpy()
+            trend = hp_trend(y, HP_LAMBDA)
+            jumlah += int((np.abs((y - trend) / trend) >= ANOMALI_AMBANG_HP).sum())
+    return jumlah
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--daerah', type=int, default=100)
+    parser.add_argument('--komoditas', type=int, default=10)
+    parser.add_argument('--tahun', type=int, default=5)
+    parser.add_argument('--baseline-deret', type=int, default=50, help='Jumlah deret untuk pembanding loop per deret')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    dataset = buat_dataset(args.daerah, args.komoditas, args.tahun)
+    # Hari terakhir ditahan untuk job inkremental
+    tanggal_terakhir = max(row[2] for row in dataset['harga'])
+    lama = [row for row in dataset['harga'] if row[2] != tanggal_terakhir]
+    baru = [row for row in dataset['harga'] if row[2] == tanggal_terakhir]
+    n_deret = args.daerah * args.komoditas
+    print('{} baris harga ({} deret, {} daerah x {} komoditas x {} tahun)'.format(
+        len(dataset['harga']), n_deret, args.daerah, args.komoditas, args.tahun))
+
+    hp_sejak = start_date_time_range(1)
+    rows = [(d, k, date.fromisoformat(t), h) for d, k, t, h in lama]
+    start = time.perf_counter()
+    hasil, _ = deteksi_anomali(rows, hp_sejak)
+    vektor = time.perf_counter() - start
+    trend_cache.clear()
+
+    df = pd.DataFrame(lama, columns=['daerah_id', 'komoditas_id', 'tanggal', 'harga'])
+    sebagian = df[df['daerah_id'] <= max(1, args.baseline_deret // args.komoditas)]
+    n_baseline = sebagian.groupby(['daerah_id', 'komoditas_id']).ngroups
+    start = time.perf_counter()
+    baseline_per_deret(sebagian, hp_sejak)
+    baseline = (time.perf_counter() - start) / n_baseline * n_deret
+    print('hitung vektor       {:>8.2f} s  ({} anomali)'.format(vektor, len(hasil)))
+    print('hitung per deret    {:>8.2f} s  (estimasi dari {} deret)'.format(baseline, n_baseline))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repository = SQLiteRepository(os.path.join(tmpdir, 'anomali.sqlite3'))
+        repository.buat_schema()
+        repository.tulis_dataset(dataset['daerah'], dataset['komoditas'], lama, dataset['inflasi'])
+        set_repository(repository)
+
+        start = time.perf_counter()
+        penuh = perbarui_anomali(repository, penuh=True)
+        print('job penuh           {:>8.2f} s  ({} anomali)'.format(time.perf_counter() - start, penuh['anomali']))
+
+        repository.upsert('harga', baru)
+        start = time.perf_counter()
+        inkremental = perbarui_anomali(repository)
+        print('job inkremental     {:>8.2f} s  ({} baris baru, {} deret)'.format(
+            time.perf_counter() - start, len(baru), inkremental['deret']))
+
+        from app import create_app
+        client = create_app().test_client()
+        for nama, url in URL_BACA:
+            url = url.format((date.today() - timedelta(days=30)).isoformat())
+            durasi = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = client.get(url)
+                durasi.append(time.perf_counter() - start)
+            print('baca {:<17} {:>8.2f} ms p50 ({} baris)'.format(
+                nama, statistics.median(durasi) * 1000, len(response.get_json()['anomali'])))
+
+
+if __name__ == '__main__':
+    main()
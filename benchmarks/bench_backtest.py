@@ -0,0 +1,85 @@
+"""
+Benchmark backtest walk-forward model inflasi pada SQLite sintetis (default 100 daerah x 5 komoditas x
+10 tahun, harga mingguan):
+- loop: jalur prediksi lama diulang per daerah per bulan (fit scaler, series_to_supervised atas
+  histori ternormalisasi, satu predict per bulan), diukur pada sebagian daerah lalu diekstrapolasi
+- vektor: jalankan_backtest dengan 1 proses (sliding_window_view, satu inference per model)
+- pool: jalankan_backtest dengan --workers proses
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_backtest --backend numpy --daerah 100 --tahun 10 --workers 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def backtest_loop(data_per_daerah, tanggal, model):
+    """Satu predict per daerah per bulan, input dari series_to_supervised seperti route lama."""
+    from utils.preprocessing_prediction import denormalisasi_target, fit_scaler, series_to_supervised, _min_rentang
+
+    galat = []
+    for id_daerah, fitur in data_per_daerah.items():
+        for target in range(1, len(fitur)):
+            params = fit_scaler(fitur[:target], tanggal[id_daerah][:target])
+            data_min, rentang = _min_rentang(params)
+            scaled = (fitur[:target + 1] - data_min) / rentang
+            pasangan = series_to_supervised(scaled, 1, 1).to_numpy()
+            if not len(pasangan) or np.isnan(fitur[target]).any() or np.isnan(fitur[target - 1]).any():
+                continue
+            x = pasangan[-1, :fitur.shape[1]].reshape(1, 1, -1)
+            pred = denormalisasi_target(model.predict(x, verbose=0)[:, -1], params)
+            galat.append(float(pred[0]) - fitur[target, -1])
+    return galat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', default='numpy', choices=['keras', 'numpy'])
+    parser.add_argument('--daerah', type=int, default=100)
+    parser.add_argument('--komoditas', type=int, default=5, help='Model bawaan memakai 5')
+    parser.add_argument('--tahun', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--baseline-daerah', type=int, default=5, help='Jumlah daerah untuk pembanding loop')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Backend inference dipilih lewat env sebelum model_registry di-import
+        os.environ['INFERENCE_BACKEND'] = args.backend
+        from app.backtest import jalankan_backtest, ringkas_per_model
+        from app.model_registry import model_registry
+        from app.repository import SQLiteRepository, set_repository
+        from app.synthetic_data import isi_repository
+        from utils.preprocessing_prediction import fitur_prediksi_batch
+
+        repository = SQLiteRepository(os.path.join(tmpdir, 'backtest.sqlite3'))
+        repository.buat_schema()
+        set_repository(repository)
+        jumlah = isi_repository(repository, args.daerah, args.komoditas, args.tahun, freq='W')
+        print('{} daerah x {} komoditas, {} baris harga, {} bulan inflasi per daerah'.format(
+            args.daerah, args.komoditas, jumlah['harga'], jumlah['inflasi'] // args.daerah))
+
+        data_per_daerah, _, tanggal = fitur_prediksi_batch(list(range(1, args.baseline_daerah + 1)))
+        model = model_registry.get(None)
+        start = time.perf_counter()
+        galat = backtest_loop(data_per_daerah, tanggal, model)
+        loop = (time.perf_counter() - start) / args.baseline_daerah * args.daerah
+        print('loop per bulan   {:>8.2f} s  (estimasi dari {} daerah, {} titik uji)'.format(
+            loop, args.baseline_daerah, len(galat)))
+
+        for nama, workers in (('vektor', 1), ('pool', args.workers)):
+            start = time.perf_counter()
+            hasil = jalankan_backtest('all', workers=workers)
+            durasi = time.perf_counter() - start
+            ringkasan = ringkas_per_model(hasil)
+            n = sum(row['n'] for row in ringkasan.values())
+            mae = ', '.join('{} MAE {:.3f}'.format(m, row['mae']) for m, row in ringkasan.items())
+            print('{:<6} {:>2} proses {:>8.2f} s  ({} titik uji, {:.1f}x dari loop; {})'.format(
+                nama, workers, durasi, n, loop / durasi, mae))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark penyusunan fitur prediksi dari hasil fitur_bulanan: pivot pandas per daerah
+vs susun_fitur_prediksi (NumPy, dipakai route prediksi, backtest dan refit-scalers).
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_data_komoditas --daerah 34 --bulan 60 --komoditas 5
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.preprocessing_prediction import susun_fitur_prediksi
+
+
+def pivot_pandas(id_daerah_list, rows, komoditas_ids):
+    """
+    Pembanding: pivot pandas per daerah (bentuk penyusunan fitur sebelum memakai NumPy).
+    """
+    df = pd.DataFrame(rows, columns=['id_daerah', 'tanggal_inflasi', 'tingkat_inflasi', 'komoditas_id', 'harga'])
+    df['harga'] = pd.to_numeric(df['harga'], errors='coerce').astype('float64')
+    hasil = {}
+    for id_daerah, data in df.groupby('id_daerah', sort=False):
+        wide = data.pivot(index='tanggal_inflasi', columns='komoditas_id', values='harga')
+        wide = wide.reindex(columns=list(komoditas_ids)).sort_index()
+        inflasi = data.groupby('tanggal_inflasi')['tingkat_inflasi'].first().sort_index()
+        hasil[id_daerah] = np.column_stack([wide.to_numpy(), inflasi.to_numpy()])
+    for id_daerah in id_daerah_list:
+        hasil.setdefault(id_daerah, {"error": f"No data found for id_daerah: {id_daerah}"})
+    return hasil
+
+
+def buat_rows(n_daerah, n_bulan, n_komoditas, seed=0):
+    # Bentuk hasil sql_fitur_bulanan: urut daerah, tanggal, komoditas; sekitar 5% harga NULL
+    rng = np.random.default_rng(seed)
+    bulan = np.datetime64('2000-01', 'M') + np.arange(n_bulan)
+    rows = []
+    for id_daerah in range(1, n_daerah + 1):
+        for tanggal in bulan.astype('datetime64[D]').astype(str):
+            inflasi = float(rng.normal(3, 1))
+            for komoditas_id in range(1, n_komoditas + 1):
+                harga = None if rng.random() < 0.05 else float(rng.uniform(10000, 60000))
+                rows.append((id_daerah, tanggal, inflasi, komoditas_id, harga))
+    return rows
+
+
+def ukur(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--daerah', type=int, default=34, help='Jumlah daerah pada skala 1x')
+    parser.add_argument('--bulan', type=int, default=60)
+    parser.add_argument('--komoditas', type=int, default=5)
+    parser.add_argument('--scales', default='1,10,100')
+    args = parser.parse_args()
+
+    komoditas_ids = tuple(range(1, args.komoditas + 1))
+    print(f"{'skala':>6} {'baris':>10} {'pandas (s)':>12} {'numpy (s)':>12} {'speedup':>9}")
+    for scale in (int(s) for s in args.scales.split(',')):
+        id_daerah_list = list(range(1, args.daerah * scale + 1))
+        rows = buat_rows(len(id_daerah_list), args.bulan, args.komoditas)
+
+        # Kedua cara harus menghasilkan matriks yang sama
+        hasil, _, _ = susun_fitur_prediksi(id_daerah_list, rows, komoditas_ids)
+        pembanding = pivot_pandas(id_daerah_list, rows, komoditas_ids)
+        for id_daerah in id_daerah_list:
+            assert np.array_equal(hasil[id_daerah], pembanding[id_daerah], equal_nan=True), id_daerah
+
+        t_pandas = ukur(pivot_pandas, id_daerah_list, rows, komoditas_ids)
+        t_numpy = ukur(susun_fitur_prediksi, id_daerah_list, rows, komoditas_ids)
+        print(f"{scale:>5}x {len(rows):>10} {t_pandas:>12.4f} {t_numpy:>12.4f} {t_pandas / t_numpy:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark downsampling LTTB (?points=N) pada /harga_komoditas dan /harga_normal: ukuran payload
+(mentah dan gzip) serta latensi end-to-end lewat Flask test client dibanding deret lengkap,
+untuk timeRange panjang pada dataset sintetis SQLite. Juga waktu LTTB saja per panjang deret.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_downsampling --tahun 10 --points 100,300,1000 --repeat 30
+"""
+import argparse
+import gzip
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Harus di-set sebelum app di-import
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+os.environ.setdefault('MODEL_WARMUP', '0')
+os.environ.setdefault('INFERENCE_BACKEND', 'numpy')
+
+from app import create_app  # noqa: E402
+from app.repository import SQLiteRepository, set_repository  # noqa: E402
+from app.synthetic_data import isi_repository  # noqa: E402
+from utils.downsampling import lttb  # noqa: E402
+
+
+def ukur(client, url, repeat):
+    # Request pertama mengisi cache trend HP, tidak ikut dihitung
+    body = client.get(url).get_data()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url).get_data()
+        latencies.append((time.perf_counter() - start) * 1000)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return body, p50, p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tahun', type=int, default=10, help='Panjang deret harga harian sintetis')
+    parser.add_argument('--time-ranges', default='5,10')
+    parser.add_argument('--points', default='100,300,1000')
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+    daftar_points = [int(x) for x in args.points.split(',')]
+
+    print('LTTB saja (deret acak):')
+    rng = np.random.default_rng(0)
+    for n in (365 * 5, 365 * 10, 365 * 50):
+        y = np.cumsum(rng.normal(size=n))
+        x = np.arange(n, dtype=np.float64)
+        for points in daftar_points:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                lttb(x, y, points)
+            print('  n={:<6} points={:<5} {:.3f} ms'.format(n, points, (time.perf_counter() - start) * 1000 / args.repeat))
+
+    app = create_app()
+    client = app.test_client()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repository = SQLiteRepository(os.path.join(tmpdir, 'bench_downsampling.sqlite3'))
+        repository.buat_schema()
+        isi_repository(repository, 2, 5, args.tahun)
+        set_repository(repository)
+
+        print('\n{:<40} {:>10} {:>10} {:>9} {:>9}'.format('endpoint', 'bytes', 'gzip', 'p50 ms', 'p95 ms'))
+        for time_range in (int(x) for x in args.time_ranges.split(',')):
+            for path in ('/harga_komoditas/1/1', '/harga_normal/1/1'):
+                for format_output in ('rows', 'columnar'):
+                    for points in [None] + daftar_points:
+                        url = '{}?timeRange={}&format={}'.format(path, time_range, format_output)
+                        if points:
+                            url += '&points={}'.format(points)
+                        body, p50, p95 = ukur(client, url, args.repeat)
+                        print('{:<40} {:>10} {:>10} {:>9.2f} {:>9.2f}'.format(
+                            url.replace('/1/1?', ' ').replace('timeRange=', 'tr=').replace('&format=', ' '),
+                            len(body), len(gzip.compress(body)), p50, p95))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark semua endpoint lewat Flask test client pada dataset sintetis SQLite
+di beberapa skala (daerah x komoditas x tahun). Untuk setiap endpoint dilaporkan
+latensi p50/p95/p99 dan puncak alokasi memori (tracemalloc) satu request,
+serta RSS proses setelah setiap skala.
+
+Tidak membutuhkan MySQL. Jalankan dari root repo:
+    python -m benchmarks.bench_endpoints --scales 5x5x1,34x5x3,100x5x5 --repeat 30
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Harus di-set sebelum app di-import
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+os.environ.setdefault('MODEL_WARMUP', '0')
+os.environ.setdefault('INFERENCE_BACKEND', 'numpy')
+
+from app import create_app  # noqa: E402
+from app.prediction_cache import prediction_cache  # noqa: E402
+from app.repository import SQLiteRepository, set_repository  # noqa: E402
+from app.synthetic_data import isi_repository  # noqa: E402
+from utils.hp_filter import trend_cache  # noqa: E402
+
+ENDPOINTS = [
+    ('daerah', '/daerah'),
+    ('komoditas', '/komoditas'),
+    ('inflasi', '/inflasi/1'),
+    ('harga 1y', '/harga_komoditas/1/1?timeRange=1'),
+    ('harga 1y columnar', '/harga_komoditas/1/1?timeRange=1&format=columnar'),
+    ('harga 5y', '/harga_komoditas/1/1?timeRange=5'),
+    ('harga 5y month', '/harga_komoditas/1/1?timeRange=5&granularity=month'),
+    ('harga last', '/harga_komoditas/last/1/1'),
+    ('harga_normal 1y', '/harga_normal/1/1?timeRange=1'),
+    ('harga_normal 5y', '/harga_normal/1/1?timeRange=5'),
+    ('harga_normal 5y month', '/harga_normal/1/1?timeRange=5&granularity=month'),
+    ('harga batch 5x5 1y', '/harga_komoditas/batch?daerah_id=1,2,3,4,5&komoditas_id=all&timeRange=1&last=1&trend=1'),
+    ('harga batch 5x5 5y month',
+     '/harga_komoditas/batch?daerah_id=1,2,3,4,5&komoditas_id=all&timeRange=5&granularity=month&trend=1'),
+    ('export page 1000', '/harga_komoditas?limit=1000'),
+    ('export 1 daerah', '/harga_komoditas?daerah_id=1&format=ndjson'),
+    ('prediksi', '/prediksi/1'),
+    ('prediksi all', '/prediksi?id_daerah=all'),
+]
+
+
+def parse_scales(nilai):
+    scales = []
+    for item in nilai.split(','):
+        n_daerah, n_komoditas, n_tahun = (int(x) for x in item.lower().split('x'))
+        scales.append((n_daerah, n_komoditas, n_tahun))
+    return scales
+
+
+def reset_cache():
+    # Setiap skala memakai dataset baru, cache dari skala sebelumnya tidak berlaku
+    trend_cache.clear()
+    prediction_cache.clear()
+
+
+def ukur_endpoint(client, url, repeat):
+    # Request pertama (cache dingin, lazy import) dilaporkan terpisah
+    start = time.perf_counter()
+    response = client.get(url)
+    response.get_data()
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url).get_data()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    client.get(url).get_data()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "status": response.status_code,
+        "bytes": len(response.get_data()),
+        "cold_ms": cold_ms,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='5x5x1,34x5x3,100x5x5', help='daerah x komoditas x tahun, dipisah koma')
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--only', help='Hanya endpoint yang namanya mengandung teks ini')
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    endpoints = [(nama, url) for nama, url in ENDPOINTS if not args.only or args.only in nama]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n_daerah, n_komoditas, n_tahun in parse_scales(args.scales):
+            path = os.path.join(tmpdir, 'bench_{}x{}x{}.sqlite3'.format(n_daerah, n_komoditas, n_tahun))
+            repository = SQLiteRepository(path)
+            repository.buat_schema()
+            start = time.perf_counter()
+            jumlah = isi_repository(repository, n_daerah, n_komoditas, n_tahun)
+            gen_s = time.perf_counter() - start
+
+            set_repository(repository)
+            reset_cache()
+
+            print('\n== skala {}x{}x{}: {} baris harga, {} baris inflasi (generate {:.1f} s)'.format(
+                n_daerah, n_komoditas, n_tahun, jumlah['harga'], jumlah['inflasi'], gen_s))
+            print('{:<22} {:>6} {:>10} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+                'endpoint', 'status', 'bytes', 'cold ms', 'p50 ms', 'p95 ms', 'p99 ms', 'peak MB'))
+            for nama, url in endpoints:
+                hasil = ukur_endpoint(client, url, args.repeat)
+                print('{:<22} {:>6} {:>10} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}'.format(
+                    nama, hasil['status'], hasil['bytes'], hasil['cold_ms'],
+                    hasil['p50_ms'], hasil['p95_ms'], hasil['p99_ms'], hasil['peak_mb']))
+            print('max RSS proses: {:.0f} MB'.format(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark prediksi multi-bulan: rollout rekursif dalam satu fungsi (tf.function untuk Keras,
+loop ter-vektorisasi untuk NumPy) vs jalur lama satu `model.predict` per langkah per daerah.
+Dilaporkan latensi total dan latensi per langkah horizon untuk 1 daerah dan semua daerah
+dalam satu batch.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_forecast --backends keras,numpy --daerah 34 --horizons 1,3,6,12
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault('MODEL_WARMUP', '0')
+
+from app.forecast import rollout  # noqa: E402
+from app.model_registry import LOADERS  # noqa: E402
+
+
+def predict_per_langkah(model, input_seq, eksogen, horizon):
+    # Jalur satu langkah yang diulang: satu predict per daerah per bulan
+    hasil = np.empty((len(input_seq), horizon), dtype=np.float32)
+    for i in range(len(input_seq)):
+        x = input_seq[i:i + 1]
+        for step in range(horizon):
+            hasil[i, step] = model.predict(x, verbose=0).reshape(-1)[-1]
+            x = eksogen[i:i + 1].copy()
+            x[0, -1] = hasil[i, step]
+            x = x[:, None, :]
+    return hasil
+
+
+def ukur(fn, repeat):
+    fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='model.h5')
+    parser.add_argument('--backends', default='keras,numpy')
+    parser.add_argument('--daerah', type=int, default=34, help='Jumlah daerah dalam satu batch')
+    parser.add_argument('--horizons', default='1,3,6,12')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    horizons = [int(h) for h in args.horizons.split(',')]
+
+    print('{:>8} {:>7} {:>8} {:>14} {:>14} {:>14} {:>9}'.format(
+        'backend', 'daerah', 'horizon', 'predict ms', 'rollout ms', 'ms/langkah', 'speedup'))
+    for backend in args.backends.split(','):
+        model = LOADERS[backend](args.model)
+        n_fitur = model.input_shape[-1]
+        rng = np.random.default_rng(0)
+        input_all = rng.random((args.daerah, 1, n_fitur), dtype=np.float32)
+        eksogen_all = rng.random((args.daerah, n_fitur), dtype=np.float32)
+
+        for n_daerah in sorted({1, args.daerah}):
+            input_seq, eksogen = input_all[:n_daerah], eksogen_all[:n_daerah]
+            for horizon in horizons:
+                lama = ukur(lambda: predict_per_langkah(model, input_seq, eksogen, horizon), args.repeat)
+                baru = ukur(lambda: rollout(model, input_seq, eksogen, horizon), args.repeat)
+                print('{:>8} {:>7} {:>8} {:>14.3f} {:>14.3f} {:>14.4f} {:>8.1f}x'.format(
+                    backend, n_daerah, horizon, lama, baru, baru / horizon, lama / baru))
+
+
+if __name__ == '__main__':
+    main()
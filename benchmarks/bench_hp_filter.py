@@ -0,0 +1,56 @@
+"""
+Benchmark HP filter: statsmodels `hpfilter` vs utils.hp_filter (Cholesky banded yang di-cache).
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_hp_filter --batch 50
+"""
+import argparse
+import time
+
+import numpy as np
+from statsmodels.tsa.filters.hp_filter import hpfilter
+
+from utils.hp_filter import HP_LAMBDA, _faktorisasi, hp_trend
+
+
+def ukur(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', default='1,5,10')
+    parser.add_argument('--batch', type=int, default=50, help='Jumlah deret untuk uji batch')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'tahun':>5} {'n':>6} {'statsmodels':>12} {'cold':>9} {'warm':>9} "
+          f"{'batch sm':>10} {'batch':>9} {'maks |selisih|':>15}")
+    for years in (int(y) for y in args.years.split(',')):
+        n = 365 * years
+        y = np.cumsum(rng.normal(0, 100, n)) + 20000
+        Y = np.cumsum(rng.normal(0, 100, (n, args.batch)), axis=0) + 20000
+
+        t_sm = ukur(lambda: hpfilter(y, lamb=HP_LAMBDA))
+
+        def cold():
+            _faktorisasi.cache_clear()
+            hp_trend(y, HP_LAMBDA)
+        t_cold = ukur(cold)
+        t_warm = ukur(lambda: hp_trend(y, HP_LAMBDA))
+
+        t_batch_sm = ukur(lambda: [hpfilter(Y[:, i], lamb=HP_LAMBDA) for i in range(args.batch)], repeat=1)
+        t_batch = ukur(lambda: hp_trend(Y, HP_LAMBDA))
+
+        selisih = np.max(np.abs(np.asarray(hpfilter(y, lamb=HP_LAMBDA)[1]) - hp_trend(y, HP_LAMBDA)))
+        print(f"{years:>5} {n:>6} {t_sm:>10.2f}ms {t_cold:>7.2f}ms {t_warm:>7.2f}ms "
+              f"{t_batch_sm:>8.1f}ms {t_batch:>7.2f}ms {selisih:>15.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark backend inference: Keras (TensorFlow) vs NumPy.
+
+Setiap backend diukur di proses terpisah agar waktu import dan memori tidak tercampur.
+Jalankan dari root repo (arsip .npz dibuat dulu dengan `flask --app run export-model`):
+    python -m benchmarks.bench_inference --iterations 500
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+WORKER = r'''
+import json, resource, sys, time
+backend, model_path, iterations, batch = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+
+start = time.perf_counter()
+import numpy as np
+if backend == 'keras':
+    from tensorflow.keras.models import load_model
+else:
+    from app.numpy_model import NumpyModel, npz_path_for
+import_s = time.perf_counter() - start
+
+start = time.perf_counter()
+model = load_model(model_path, compile=False) if backend == 'keras' else NumpyModel(npz_path_for(model_path))
+load_s = time.perf_counter() - start
+
+x = np.random.default_rng(0).random((batch, 1, model.input_shape[-1]), dtype=np.float32)
+model.predict(x, verbose=0)
+latencies = []
+for _ in range(iterations):
+    start = time.perf_counter()
+    model.predict(x, verbose=0)
+    latencies.append(time.perf_counter() - start)
+latencies.sort()
+
+print(json.dumps({
+    "import_s": import_s,
+    "load_s": load_s,
+    "p50_ms": latencies[len(latencies) // 2] * 1000,
+    "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default='model.h5')
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--batch', type=int, default=1)
+    parser.add_argument('--backends', default='keras,numpy')
+    args = parser.parse_args()
+
+    print(f"{'backend':>8} {'import (s)':>11} {'load (s)':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'RSS (MB)':>9}")
+    for backend in args.backends.split(','):
+        output = subprocess.run(
+            [sys.executable, '-c', WORKER, backend, args.model, str(args.iterations), str(args.batch)],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip().splitlines()[-1]
+        hasil = json.loads(output)
+        print(f"{backend:>8} {hasil['import_s']:>11.3f} {hasil['load_s']:>9.3f} {hasil['p50_ms']:>9.3f} "
+              f"{hasil['p99_ms']:>9.3f} {hasil['max_rss_mb']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
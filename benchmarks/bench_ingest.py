@@ -0,0 +1,85 @@
+"""
+Benchmark throughput ingest (baris/detik) pada SQLite: baca CSV/NDJSON, validasi vektor dan upsert
+per batch dalam satu transaksi, untuk insert baru dan ingest ulang (semua baris menjadi update).
+Sebagai pembanding: insert satu baris per statement dan commit per baris, seperti jalur lama.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_ingest --daerah 34 --tahun 2 --chunk-rows 1000,10000,100000
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from app.ingest import baca_batch, ingest_batch
+from app.repository import SQLiteRepository
+from app.synthetic_data import buat_dataset
+
+
+def buat_repository(tmpdir, nama, dataset):
+    repository = SQLiteRepository(os.path.join(tmpdir, nama))
+    repository.buat_schema()
+    # Hanya tabel referensi, tabel harga diisi oleh benchmark
+    repository.tulis_dataset(dataset['daerah'], dataset['komoditas'], [], [])
+    return repository
+
+
+def ukur_ingest(repository, data, format_data, chunk_rows, n_baris):
+    start = time.perf_counter()
+    for offset in range(0, n_baris, chunk_rows):
+        df = baca_batch(data[offset // chunk_rows], format_data)
+        ingest_batch(repository, 'harga', df)
+    return n_baris / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--daerah', type=int, default=34)
+    parser.add_argument('--komoditas', type=int, default=5)
+    parser.add_argument('--tahun', type=int, default=2)
+    parser.add_argument('--chunk-rows', default='1000,10000,100000')
+    parser.add_argument('--baseline-rows', type=int, default=5000, help='Jumlah baris untuk pembanding per baris')
+    args = parser.parse_args()
+
+    dataset = buat_dataset(args.daerah, args.komoditas, args.tahun)
+    harga = pd.DataFrame(dataset['harga'], columns=['daerah_id', 'komoditas_id', 'tanggal_harga', 'harga'])
+    n_baris = len(harga)
+    print('{} baris harga ({} daerah x {} komoditas x {} tahun)'.format(n_baris, args.daerah, args.komoditas, args.tahun))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Pembanding: satu INSERT dan satu commit per baris
+        repository = buat_repository(tmpdir, 'baseline.sqlite3', dataset)
+        rows = dataset['harga'][:args.baseline_rows]
+        with repository.connection() as connection:
+            start = time.perf_counter()
+            for row in rows:
+                connection.execute(
+                    "INSERT INTO harga_komoditas (daerah_id, komoditas_id, tanggal_harga, harga) VALUES (?, ?, ?, ?)", row)
+                connection.commit()
+            baseline = len(rows) / (time.perf_counter() - start)
+        print('{:<8} {:>10} {:>14} {:>14}'.format('format', 'chunk', 'insert baris/s', 'update baris/s'))
+        print('{:<8} {:>10} {:>14.0f} {:>14}'.format('per-row', 1, baseline, '-'))
+
+        for format_data in ('csv', 'ndjson'):
+            for chunk_rows in (int(x) for x in args.chunk_rows.split(',')):
+                data = []
+                for offset in range(0, n_baris, chunk_rows):
+                    potongan = harga.iloc[offset:offset + chunk_rows]
+                    buffer = io.StringIO()
+                    if format_data == 'csv':
+                        potongan.to_csv(buffer, index=False)
+                    else:
+                        potongan.to_json(buffer, orient='records', lines=True)
+                    data.append(buffer.getvalue())
+
+                repository = buat_repository(tmpdir, '{}_{}.sqlite3'.format(format_data, chunk_rows), dataset)
+                insert = ukur_ingest(repository, data, format_data, chunk_rows, n_baris)
+                update = ukur_ingest(repository, data, format_data, chunk_rows, n_baris)
+                print('{:<8} {:>10} {:>14.0f} {:>14.0f}'.format(format_data, chunk_rows, insert, update))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Load test sederhana untuk membandingkan mode sync (gunicorn + Flask) dan async (hypercorn + Quart)
+pada endpoint campuran: query ringan, deret harga, HP filter dan prediksi.
+
+Jalankan kedua server terlebih dahulu, misalnya:
+    gunicorn -c gunicorn.conf.py -b :8080 run:app
+    hypercorn -b :8081 -w 3 app.asgi:asgi_app
+
+lalu dari root repo:
+    python -m benchmarks.bench_load --sync http://127.0.0.1:8080 --async http://127.0.0.1:8081 \
+        --concurrency 16 64 --duration 20
+"""
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+DEFAULT_PATHS = [
+    '/daerah',
+    '/komoditas',
+    '/inflasi/1',
+    '/harga_komoditas/1/1?timeRange=1',
+    '/harga_normal/1/1?timeRange=5',
+    '/prediksi/1',
+]
+
+
+def jalankan(base_url, paths, concurrency, duration, timeout):
+    """
+    Mengirim request berurutan dari `concurrency` thread selama `duration` detik.
+
+    :return: Dict throughput, persentil latensi (ms) dan jumlah status per kelas.
+    """
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        i = offset
+        local_lat, local_status = [], {}
+        while time.perf_counter() < deadline:
+            url = base_url + paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except Exception:
+                status = 'error'
+            local_lat.append(time.perf_counter() - start)
+            key = status if status == 'error' else '{}xx'.format(status // 100)
+            local_status[key] = local_status.get(key, 0) + 1
+        with lock:
+            latencies.extend(local_lat)
+            for key, jumlah in local_status.items():
+                statuses[key] = statuses.get(key, 0) + jumlah
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    lat_ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(lat_ms, [50, 95, 99]) if len(lat_ms) else (np.nan,) * 3
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "status": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync', dest='sync_url', help='Base URL server mode sync')
+    parser.add_argument('--async', dest='async_url', help='Base URL server mode async')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64])
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--path', action='append', help='Endpoint yang diuji (boleh berulang), default campuran')
+    args = parser.parse_args()
+
+    targets = [(nama, url.rstrip('/')) for nama, url in (('sync', args.sync_url), ('async', args.async_url)) if url]
+    if not targets:
+        parser.error('Minimal salah satu dari --sync atau --async harus diisi')
+    paths = args.path or DEFAULT_PATHS
+
+    print('{:<6} {:>5} {:>8} {:>8} {:>9} {:>9} {:>9}  status'.format(
+        'mode', 'conc', 'req', 'rps', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for concurrency in args.concurrency:
+        for nama, url in targets:
+            hasil = jalankan(url, paths, concurrency, args.duration, args.timeout)
+            print('{:<6} {:>5} {:>8} {:>8.1f} {:>9.1f} {:>9.1f} {:>9.1f}  {}'.format(
+                nama, concurrency, hasil['requests'], hasil['rps'],
+                hasil['p50_ms'], hasil['p95_ms'], hasil['p99_ms'], hasil['status']))
+
+
+if __name__ == '__main__':
+    main()
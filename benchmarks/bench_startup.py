@@ -0,0 +1,104 @@
+"""
+Benchmark startup worker: waktu import app dan RSS/PSS per worker gunicorn
+untuk setiap kombinasi mode preload dan backend inference.
+
+Tidak membutuhkan database (startup hanya me-load model). Jalankan dari root repo:
+    python -m benchmarks.bench_startup --workers 3
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+IMPORT_WORKER = r'''
+import json, resource, time
+start = time.perf_counter()
+import run
+print(json.dumps({"import_s": time.perf_counter() - start,
+                  "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+'''
+
+
+def port_bebas():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def baca_memori(pid):
+    # Pss membagi halaman bersama secara proporsional, jadi mencerminkan penghematan copy-on-write
+    hasil = {}
+    with open('/proc/{}/smaps_rollup'.format(pid)) as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                hasil[key.lower() + '_mb'] = int(value.split()[0]) / 1024
+    return hasil
+
+
+def anak_proses(pid):
+    with open('/proc/{}/task/{}/children'.format(pid, pid)) as f:
+        return [int(child) for child in f.read().split()]
+
+
+def ukur_import(env):
+    output = subprocess.run([sys.executable, '-c', IMPORT_WORKER], env=env, check=True,
+                            capture_output=True, text=True).stdout.strip().splitlines()[-1]
+    return json.loads(output)
+
+
+def ukur_gunicorn(env, workers, settle):
+    port = port_bebas()
+    env = dict(env, PORT=str(port), WEB_WORKERS=str(workers))
+    start = time.perf_counter()
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready_s = None
+        while time.perf_counter() - start < 120:
+            try:
+                urllib.request.urlopen('http://127.0.0.1:{}/models/stats'.format(port), timeout=1)
+                ready_s = time.perf_counter() - start
+                break
+            except OSError:
+                time.sleep(0.1)
+        time.sleep(settle)
+        pids = anak_proses(master.pid)
+        per_worker = [baca_memori(pid) for pid in pids]
+        return {
+            "ready_s": ready_s,
+            "workers": len(pids),
+            "master": baca_memori(master.pid),
+            "rss_mb": sum(m['rss_mb'] for m in per_worker) / max(len(per_worker), 1),
+            "pss_mb": sum(m['pss_mb'] for m in per_worker) / max(len(per_worker), 1),
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--backends', default='keras,numpy')
+    parser.add_argument('--settle', type=float, default=5.0, help='Detik menunggu semua worker selesai warm-up')
+    args = parser.parse_args()
+
+    print(f"{'backend':>8} {'preload':>8} {'import (s)':>11} {'ready (s)':>10} "
+          f"{'RSS/worker':>11} {'PSS/worker':>11} {'PSS master':>11}")
+    for backend in args.backends.split(','):
+        for preload in ('0', '1'):
+            env = dict(os.environ, INFERENCE_BACKEND=backend, GUNICORN_PRELOAD=preload)
+            imp = ukur_import(env)
+            gun = ukur_gunicorn(env, args.workers, args.settle)
+            print(f"{backend:>8} {preload:>8} {imp['import_s']:>11.2f} {gun['ready_s'] or float('nan'):>10.2f} "
+                  f"{gun['rss_mb']:>10.1f}M {gun['pss_mb']:>10.1f}M {gun['master']['pss_mb']:>10.1f}M")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import gc
+import os
+import secrets
+import subprocess
+import sys
+
+# Konfigurasi gunicorn, dibaca dari environment variables
+bind = ':{}'.format(os.getenv('PORT', '8080'))
+workers = int(os.getenv('WEB_WORKERS', 3))
+threads = int(os.getenv('WEB_THREADS', 4))
+timeout = 120
+
+# Mode preload: app, model dan state read-only diinisialisasi sekali di master,
+# lalu dibagi copy-on-write ke worker hasil fork.
+preload_app = os.getenv('GUNICORN_PRELOAD', '0') == '1'
+
+# INFERENCE_MODE=server: model dijalankan oleh satu proses inference bersama (app/inference_server.py)
+# yang di-start dan diawasi dari master gunicorn
+inference_server = os.getenv('INFERENCE_MODE', 'local') == 'server'
+_inference_supervisor = None
+
+
+def on_starting(server):
+    global _inference_supervisor
+    if inference_server:
+        # Key socket inference acak per start jika tidak di-set; proses inference dan
+        # worker (hasil fork master) mewarisinya lewat environment
+        if not os.environ.get('INFERENCE_AUTHKEY'):
+            os.environ['INFERENCE_AUTHKEY'] = secrets.token_hex(32)
+        _inference_supervisor = subprocess.Popen([sys.executable, '-m', 'app.inference_server', '--supervise'])
+
+
+def on_exit(server):
+    if _inference_supervisor is not None and _inference_supervisor.poll() is None:
+        _inference_supervisor.terminate()
+        _inference_supervisor.wait(timeout=10)
+
+
+def pre_fork(server, worker):
+    # Pindahkan objek hasil preload ke generasi permanen GC agar GC di worker
+    # tidak menyentuh (dan menyalin) halaman memori yang dibagi dengan master
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+
+    # TensorFlow tidak aman di-fork, jadi untuk backend keras model di-load per worker.
+    # Backend numpy sudah di-load di master dan dipakai bersama.
+    from app.model_registry import model_registry, preload_is_fork_safe
+    if not preload_is_fork_safe() and not inference_server:
+        model_registry.warm_up()
+
+    # Pool koneksi database dan thread refresher dibuat ulang per proses
+    from app.routes import mulai_refresher_prediksi
+    mulai_refresher_prediksi()
@@ -0,0 +1,57 @@
+"""
+Fixture bersama: dataset sintetis kecil di file SQLite sementara, dipasang sebagai repository
+proses ini sebelum app dibuat. Environment di-set sebelum modul app di-import karena
+konfigurasi dibaca saat import.
+"""
+import os
+import shutil
+
+import pytest
+
+os.environ.setdefault('DB_BACKEND', 'sqlite')
+os.environ.setdefault('MODEL_WARMUP', '0')
+os.environ.setdefault('INFERENCE_BACKEND', 'numpy')
+os.environ.setdefault('INGEST_TOKEN', 'token-test')
+
+INGEST_TOKEN = os.environ['INGEST_TOKEN']
+
+
+@pytest.fixture(scope='session')
+def dataset_sqlite(tmp_path_factory):
+    from app.repository import SQLiteRepository
+    from app.synthetic_data import isi_repository
+
+    path = str(tmp_path_factory.mktemp('data') / 'dasar.sqlite3')
+    repository = SQLiteRepository(path)
+    repository.buat_schema()
+    isi_repository(repository, 3, 5, 2)
+    return path
+
+
+@pytest.fixture
+def repository(dataset_sqlite, tmp_path, monkeypatch):
+    """
+    Salinan dataset per test, sehingga test yang menulis tidak saling mempengaruhi. File
+    scaler juga diarahkan ke tmp_path agar scaler milik dataset lain di repo tidak terbaca.
+    """
+    from app import scalers
+    from app.http_cache import validator_cache
+    from app.repository import SQLiteRepository, set_repository
+
+    path = str(tmp_path / 'bangkit.sqlite3')
+    shutil.copy(dataset_sqlite, path)
+    repository = SQLiteRepository(path)
+    set_repository(repository)
+    validator_cache.clear()
+    monkeypatch.setattr(scalers, 'scaler_path_for', lambda model_path: str(
+        tmp_path / (os.path.splitext(os.path.basename(model_path))[0] + '.scalers.json')))
+    monkeypatch.setattr(scalers.scaler_store, '_files', {})
+    monkeypatch.setattr(scalers.scaler_store, '_lokal', {})
+    return repository
+
+
+@pytest.fixture
+def client(repository):
+    from app import create_app
+
+    return create_app().test_client()
@@ -0,0 +1,84 @@
+"""Deteksi anomali harga: median/MAD bergulir per deret, lonjakan yang disisipkan terdeteksi dan terbaca di /anomali_harga."""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.anomali import perbarui_anomali
+from app.routes import start_date_time_range
+from utils.anomali import batas_deret, median_mad_bergulir, perubahan_log, posisi_dalam_deret
+
+
+def test_median_mad_sama_dengan_pandas():
+    rng = np.random.default_rng(0)
+    panjang = [50, 8, 70]
+    harga = np.exp(np.cumsum(rng.normal(0, 0.02, sum(panjang)))) * 1000
+    daerah = np.repeat([1, 1, 2], panjang)
+    komoditas = np.repeat([1, 2, 1], panjang)
+    awal, akhir = batas_deret(daerah, komoditas)
+    assert awal.tolist() == [0, 50, 58]
+
+    posisi = posisi_dalam_deret(awal, akhir)
+    perubahan = perubahan_log(harga, posisi)
+    median, mad = median_mad_bergulir(perubahan, posisi - 1, 10)
+
+    for a, b in zip(awal, akhir):
+        # Histori 10 perubahan sebelumnya di deret yang sama, tanpa baris itu sendiri
+        deret = pd.Series(np.diff(np.log(harga[a:b])))
+        histori = deret.shift(1).rolling(10)
+        acuan_median = histori.median().to_numpy()
+        acuan_mad = histori.apply(lambda w: np.median(np.abs(w - np.median(w))), raw=True).to_numpy()
+        assert np.isnan(median[a])
+        assert np.allclose(median[a + 1:b], acuan_median, equal_nan=True)
+        assert np.allclose(mad[a + 1:b], acuan_mad, equal_nan=True)
+    # Deret yang lebih pendek dari window tidak punya skor
+    assert np.isnan(median[50:58]).all()
+
+
+def _lonjakan(repository, tanggal, faktor=3):
+    rows = repository.deret_harga(2, 4, str(tanggal))
+    harga = int(rows[0][1] * faktor)
+    repository.upsert('harga', [(2, 4, str(tanggal), harga)])
+    return harga, rows
+
+
+def _anomali(client, query):
+    response = client.get('/anomali_harga?' + query)
+    assert response.status_code == 200
+    return response.get_json()['anomali']
+
+
+def test_lonjakan_terdeteksi(client, repository):
+    tanggal = pd.Timestamp(start_date_time_range(1)).date() + timedelta(days=200)
+    harga, rows = _lonjakan(repository, tanggal)
+    hasil = perbarui_anomali(repository, penuh=True)
+    assert hasil['mode'] == 'penuh' and hasil['deret'] == 15
+
+    label = tanggal.strftime('%d-%m-%Y')
+    for metode in ('mad', 'hp'):
+        anomali = [a for a in _anomali(client, 'daerah_id=2&komoditas_id=4&metode=' + metode) if a['tanggal_harga'] == label]
+        assert len(anomali) == 1, metode
+        assert anomali[0]['harga'] == harga
+    mad = [a for a in _anomali(client, 'daerah_id=2&komoditas_id=4&metode=mad') if a['tanggal_harga'] == label][0]
+    assert mad['skor'] >= 3.5
+    # Acuan mad: harga hari sebelumnya dikali perubahan median, dekat dengan harga normal
+    sebelumnya = repository.deret_harga(2, 4, str(tanggal - timedelta(days=1)))[0][1]
+    assert abs(mad['acuan'] / sebelumnya - 1) < 0.05
+
+
+def test_inkremental_dan_filter(client, repository):
+    perbarui_anomali(repository, penuh=True)
+    # Baris baru setelah tanggal terakhir hanya diproses deretnya sendiri
+    terakhir = repository.harga_terakhir(2, 4)
+    besok = terakhir['tanggal_harga'] + timedelta(days=1)
+    repository.upsert('harga', [(2, 4, str(besok), int(terakhir['harga']) * 3)])
+    hasil = perbarui_anomali(repository)
+    assert (hasil['mode'], hasil['deret']) == ('inkremental', 1)
+
+    terbaru = _anomali(client, 'limit=5')
+    assert len(terbaru) == 5
+    assert terbaru[0]['tanggal_harga'] == besok.strftime('%d-%m-%Y')
+    assert (terbaru[0]['daerah_id'], terbaru[0]['komoditas_id']) == (2, 4)
+    assert {a['daerah_id'] for a in _anomali(client, 'daerah_id=3')} <= {3}
+    assert client.get('/anomali_harga?metode=zscore').status_code == 400
+    assert client.get('/anomali_harga?limit=0').status_code == 400
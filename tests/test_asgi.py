@@ -0,0 +1,93 @@
+"""
+Mode async (app.asgi) dengan backend SQLite: setiap route dibandingkan dengan mode sync
+pada dataset yang sama.
+"""
+import asyncio
+
+import pytest
+
+from tests.conftest import INGEST_TOKEN
+
+# Dependensi mode async (requirements-async.txt) opsional
+pytest.importorskip('quart')
+
+ROUTE_GET = [
+    '/harga_komoditas?limit=5',
+    '/harga_komoditas?komoditas_id=2&format=ndjson',
+    '/harga_komoditas/1/1?timeRange=2',
+    '/harga_komoditas/1/1?timeRange=2&granularity=month',
+    '/harga_komoditas/1/1?timeRange=2&format=columnar&points=20',
+    '/harga_komoditas/9/9',
+    '/harga_komoditas/last/1/2',
+    '/harga_komoditas/batch?daerah_id=1,2&komoditas_id=all&timeRange=2&granularity=month&trend=1',
+    '/anomali_harga',
+    '/harga_normal/2/1?timeRange=2',
+    '/harga_normal/2/1?timeRange=2&granularity=month',
+    '/komoditas',
+    '/inflasi/1',
+    '/inflasi/99',
+    '/daerah',
+    '/prediksi/1?horizon=3',
+    '/prediksi?id_daerah=1,2',
+    '/inference/stats',
+]
+
+
+@pytest.fixture
+def asgi_client(repository):
+    from app.asgi import create_asgi_app
+
+    return create_asgi_app().test_client()
+
+
+def _async(asgi_client, method, url, **kwargs):
+    async def kirim():
+        response = await getattr(asgi_client, method)(url, **kwargs)
+        return response.status_code, response.headers, await response.get_data()
+    return asyncio.run(kirim())
+
+
+@pytest.mark.parametrize('url', ROUTE_GET)
+def test_route_sama_dengan_sync(client, asgi_client, url):
+    sync = client.get(url)
+    status, headers, body = _async(asgi_client, 'get', url)
+    assert status == sync.status_code
+    assert headers.get('ETag') == sync.headers.get('ETag')
+    assert body == sync.get_data()
+
+
+def test_conditional_get(asgi_client):
+    url = '/harga_komoditas/1/1?timeRange=1'
+    status, headers, _ = _async(asgi_client, 'get', url)
+    assert status == 200 and headers['ETag']
+    status, _, body = _async(asgi_client, 'get', url, headers={'If-None-Match': headers['ETag']})
+    assert status == 304 and body == b''
+
+
+def test_ingest(client, asgi_client):
+    url = '/harga_komoditas/last/1/1'
+    _, sebelum, _ = _async(asgi_client, 'get', url)
+
+    csv = b'daerah_id,komoditas_id,tanggal_harga,harga\n1,1,2099-01-01,12345\n'
+    status, _, _ = _async(asgi_client, 'post', '/ingest/harga', data=csv)
+    assert status == 401
+    status, _, body = _async(asgi_client, 'post', '/ingest/harga', data=csv,
+                             headers={'Authorization': 'Bearer ' + INGEST_TOKEN})
+    assert status == 200, body
+
+    status, sesudah, body = _async(asgi_client, 'get', url)
+    assert status == 200 and b'01-01-2099' in body
+    assert sesudah['ETag'] != sebelum['ETag']
+    assert client.get(url).get_data() == body
+
+    # Last-Modified dari waktu ingest, sama dengan mode sync
+    assert 'Last-Modified' not in sebelum
+    assert sesudah['Last-Modified'] == client.get(url).headers['Last-Modified']
+    status, _, _ = _async(asgi_client, 'get', url, headers={'If-Modified-Since': sesudah['Last-Modified']})
+    assert status == 304
+
+
+def test_stats(asgi_client):
+    for url in ('/prediksi/scalers/stats', '/db/stats', '/async/stats'):
+        status, _, _ = _async(asgi_client, 'get', url)
+        assert status == 200
@@ -0,0 +1,84 @@
+"""Backtest walk-forward: titik uji, skala berjalan dan metrik sama dengan perhitungan per bulan biasa."""
+import numpy as np
+import pytest
+
+from app.backtest import jalankan_backtest, metrik, ringkas_per_model, siapkan_backtest
+from app.model_registry import model_registry
+from utils.preprocessing_prediction import fitur_prediksi_batch
+
+
+def siapkan_loop(fitur, tanggal, timesteps, sejak=None):
+    # Pembanding: satu titik uji per bulan target, scaler dari histori sampai bulan input terakhir
+    titik = []
+    for t in range(timesteps, len(fitur)):
+        jendela = fitur[t - timesteps:t]
+        if np.isnan(jendela).any() or np.isnan(fitur[t]).any():
+            continue
+        if sejak is not None and tanggal[t] < np.datetime64(sejak):
+            continue
+        histori = fitur[:t]
+        data_min = np.nanmin(histori, axis=0)
+        rentang = np.nanmax(histori, axis=0) - data_min
+        rentang[rentang == 0] = 1.0
+        titik.append(((jendela - data_min) / rentang, fitur[t, -1], fitur[t - 1, -1], data_min[-1], rentang[-1], tanggal[t]))
+    return titik
+
+
+@pytest.mark.parametrize('timesteps, sejak', [(1, None), (3, None), (2, '2024-06-01')])
+def test_siapkan_sama_dengan_loop(timesteps, sejak):
+    rng = np.random.default_rng(timesteps)
+    fitur = rng.normal(size=(24, 4))
+    fitur[5, 1] = np.nan
+    fitur[11, 3] = np.nan
+    fitur[:, 2] = 7.0  # kolom konstan: rentang diganti 1
+    tanggal = np.arange('2023-01', '2025-01', dtype='datetime64[M]').astype('datetime64[D]')
+
+    data = siapkan_backtest(fitur, tanggal, timesteps, sejak)
+    titik = siapkan_loop(fitur, tanggal, timesteps, sejak)
+    assert len(data['aktual']) == len(titik) > 0
+    input_seq, aktual, naif, minimum, rentang, target = zip(*titik)
+    assert np.allclose(data['input_seq'], np.array(input_seq, dtype=np.float32))
+    assert np.array_equal(data['aktual'], aktual)
+    assert np.array_equal(data['naif'], naif)
+    assert np.array_equal(data['min'], minimum)
+    assert np.array_equal(data['rentang'], rentang)
+    assert np.array_equal(data['tanggal'], target)
+
+
+def test_metrik():
+    hasil = metrik(np.array([1.0, 2.0, 4.0]), np.array([2.0, 2.0, 2.0]), np.array([2.5, 1.0, 2.0]))
+    assert hasil == {"n": 3, "mae": 1.0, "rmse": pytest.approx(np.sqrt(5 / 3)), "bias": pytest.approx(1 / 3),
+                     "mae_naif": 0.5}
+
+
+def test_backtest_daerah_sama_dengan_prediksi_per_titik(repository):
+    hasil = jalankan_backtest([1, 2], workers=1)
+    assert [(row['daerah_id'], row['model']) for row in hasil] == [(1, 'model.h5'), (2, 'model.h5')]
+
+    data_per_daerah, _, tanggal = fitur_prediksi_batch([1, 2])
+    model = model_registry.get_by_path(model_registry.path_for(1))
+    timesteps = model.input_shape[1] or 1
+    for row in hasil:
+        titik = siapkan_loop(data_per_daerah[row['daerah_id']], tanggal[row['daerah_id']], timesteps)
+        # Setiap titik uji diprediksi sendiri-sendiri lalu didenormalisasi dengan skalanya
+        prediksi = np.array([
+            float(model.predict(input_seq[None].astype(np.float32), verbose=0).reshape(-1)[-1]) * rentang + minimum
+            for input_seq, _, _, minimum, rentang, _ in titik
+        ])
+        aktual = np.array([t[1] for t in titik])
+        naif = np.array([t[2] for t in titik])
+        acuan = metrik(prediksi, aktual, naif)
+        assert row['n'] == acuan['n'] > 12
+        for nama in ('mae', 'rmse', 'bias', 'mae_naif'):
+            assert row[nama] == pytest.approx(acuan[nama], rel=1e-5, abs=1e-6), nama
+        assert (row['awal'], row['akhir']) == (str(titik[0][5]), str(titik[-1][5]))
+
+    ringkas = ringkas_per_model(hasil)['model.h5']
+    n = sum(row['n'] for row in hasil)
+    assert (ringkas['daerah'], ringkas['n']) == (2, n)
+    assert ringkas['mae'] == pytest.approx(sum(row['mae'] * row['n'] for row in hasil) / n)
+
+
+def test_daerah_tanpa_data(repository):
+    hasil = jalankan_backtest([99], workers=1)
+    assert hasil == [{"daerah_id": 99, "model": None, "error": 'No data found for id_daerah: 99'}]
@@ -0,0 +1,68 @@
+"""Downsampling LTTB: sama dengan implementasi loop biasa, titik ujung tetap, jumlah titik sesuai ?points."""
+import numpy as np
+import pytest
+
+from utils.downsampling import LTTB_TABEL_MAKS_KANDIDAT, lttb
+
+
+def lttb_loop(x, y, n_out):
+    # Pembanding: LTTB satu bucket per iterasi dengan batas bucket yang sama
+    n = len(y)
+    batas = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(int)
+    terpilih = [0]
+    for i in range(len(batas) - 1):
+        if i + 2 < len(batas):
+            cx, cy = x[batas[i + 1]:batas[i + 2]].mean(), y[batas[i + 1]:batas[i + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[terpilih[-1]], y[terpilih[-1]]
+        kandidat = np.arange(batas[i], batas[i + 1])
+        luas = np.abs((ax - cx) * (y[kandidat] - ay) - (ax - x[kandidat]) * (cy - ay))
+        terpilih.append(int(kandidat[luas.argmax()]))
+    return terpilih + [n - 1]
+
+
+@pytest.mark.parametrize('n, n_out', [
+    (100, 10), (1000, 97), (731, 300),
+    # Bucket lebih lebar dari LTTB_TABEL_MAKS_KANDIDAT: jalur argmax per bucket
+    (5000, 5000 // (LTTB_TABEL_MAKS_KANDIDAT * 2)),
+])
+def test_sama_dengan_loop(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = np.cumsum(rng.normal(size=n))
+    indeks = lttb(x, y, n_out)
+    assert indeks.tolist() == lttb_loop(x, y, n_out)
+    assert len(indeks) == n_out
+    assert indeks[0] == 0 and indeks[-1] == n - 1
+    assert np.all(np.diff(indeks) > 0)
+
+
+def test_puncak_dipertahankan():
+    y = np.zeros(1000)
+    y[437], y[802] = 50.0, -30.0
+    indeks = lttb(np.arange(1000.0), y, 20)
+    assert 437 in indeks and 802 in indeks
+
+
+def test_deret_pendek_tidak_diubah():
+    assert lttb(np.arange(5.0), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_route_points(client):
+    url = '/harga_komoditas/1/1?timeRange=2'
+    penuh = client.get(url).get_json()['prices']
+    assert len(penuh) > 300
+
+    hasil = client.get(url + '&points=50').get_json()['prices']
+    assert len(hasil) == 50
+    assert hasil[0] == penuh[0] and hasil[-1] == penuh[-1]
+    # Setiap titik adalah baris asli, urutan tanggal tetap
+    indeks = [penuh.index(price) for price in hasil]
+    assert indeks == sorted(indeks)
+
+    columnar = client.get(url + '&points=50&format=columnar').get_json()
+    assert columnar['tanggal_harga'] == [price['tanggal_harga'] for price in hasil]
+
+    assert len(client.get(url + '&points=5000').get_json()['prices']) == len(penuh)
+    assert client.get(url + '&points=2').status_code == 400
@@ -0,0 +1,35 @@
+"""Export /harga_komoditas: halaman keyset lewat X-Next-Cursor sama dengan export tanpa limit."""
+import json
+
+FILTER = 'daerah_id=1&start=2026-01-01&end=2026-01-31'
+
+
+def test_halaman_cursor_sama_dengan_export_penuh(client):
+    penuh = client.get('/harga_komoditas?' + FILTER).get_json()
+    # Lima komoditas per tanggal: batas halaman jatuh di tengah tanggal yang sama
+    assert len(penuh) == 5 * 31
+
+    halaman, cursor = [], None
+    while True:
+        url = '/harga_komoditas?{}&limit=7{}'.format(FILTER, '&cursor=' + cursor if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        rows = response.get_json()
+        halaman.append(rows)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+        assert len(rows) == 7
+
+    assert [row for rows in halaman for row in rows] == penuh
+    assert len(halaman) == -(-len(penuh) // 7)
+
+    ndjson = client.get('/harga_komoditas?{}&format=ndjson'.format(FILTER))
+    assert ndjson.mimetype == 'application/x-ndjson'
+    assert [json.loads(baris) for baris in ndjson.get_data(as_text=True).splitlines()] == penuh
+
+
+def test_parameter_tidak_valid(client):
+    for query in ('limit=0', 'cursor=bukan-cursor', 'start=01-01-2026', 'format=xml'):
+        response = client.get('/harga_komoditas?' + query)
+        assert response.status_code == 400, query
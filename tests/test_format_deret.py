@@ -0,0 +1,59 @@
+"""Format kolom deret harga (columnar, csv, arrow) berisi nilai yang sama dengan format baris."""
+import io
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.serialization import format_tanggal
+
+URL = '/harga_komoditas/1/2?timeRange=1'
+
+
+def test_format_tanggal():
+    tanggal = [date(2024, 1, 5), date(1999, 12, 31), date(2026, 10, 18)]
+    assert format_tanggal(tanggal).tolist() == [t.strftime('%d-%m-%Y') for t in tanggal]
+    assert format_tanggal([datetime(2024, 2, 29, 23, 59), '2024-03-01']).tolist() == ['29-02-2024', '01-03-2024']
+
+
+def _rows(client, url=URL):
+    prices = client.get(url).get_json()['prices']
+    return [p['tanggal_harga'] for p in prices], [float(p['harga']) for p in prices]
+
+
+def test_columnar_dan_csv_sama_dengan_rows(client):
+    tanggal, harga = _rows(client)
+    assert len(tanggal) > 300
+
+    columnar = client.get(URL + '&format=columnar')
+    assert columnar.mimetype == 'application/json'
+    body = columnar.get_json()
+    assert body['tanggal_harga'] == tanggal
+    assert body['harga'] == harga
+
+    # Header Accept juga memilih format
+    csv = client.get(URL, headers={'Accept': 'text/csv'})
+    assert csv.mimetype == 'text/csv'
+    df = pd.read_csv(io.StringIO(csv.get_data(as_text=True)), dtype={'tanggal_harga': str})
+    assert df.columns.tolist() == ['tanggal_harga', 'harga']
+    assert df['tanggal_harga'].tolist() == tanggal
+    assert df['harga'].tolist() == harga
+
+
+def test_arrow_sama_dengan_rows(client):
+    pa = pytest.importorskip('pyarrow')
+    tanggal, harga = _rows(client)
+    response = client.get(URL + '&format=arrow')
+    assert response.mimetype == 'application/vnd.apache.arrow.stream'
+    table = pa.ipc.open_stream(response.get_data()).read_all()
+    assert [t.strftime('%d-%m-%Y') for t in table.column('tanggal_harga').to_pylist()] == tanggal
+    assert np.array_equal(table.column('harga').to_numpy(), harga)
+
+
+def test_format_bulanan_dan_tidak_dikenal(client):
+    bulanan = client.get(URL + '&granularity=month').get_json()['prices']
+    columnar = client.get(URL + '&granularity=month&format=columnar').get_json()
+    assert columnar['tanggal_harga'] == [p['bulan'] for p in bulanan]
+    assert np.allclose(columnar['harga'], [p['rata2'] for p in bulanan], atol=0.005)
+    assert client.get(URL + '&format=xml').status_code == 400
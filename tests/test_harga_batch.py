@@ -0,0 +1,60 @@
+"""/harga_komoditas/batch: setiap deret sama dengan endpoint satu deret untuk pasangan yang sama."""
+
+
+def _series(client, query):
+    response = client.get('/harga_komoditas/batch?' + query)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['series']
+
+
+def test_deret_sama_dengan_endpoint_satuan(client):
+    series = _series(client, 'daerah_id=1,2&komoditas_id=1,3&timeRange=1&trend=1&last=1')
+    assert sorted(series) == ['1:1', '1:3', '2:1', '2:3']
+    for daerah_id, komoditas_id in ((1, 1), (1, 3), (2, 1), (2, 3)):
+        deret = series['{}:{}'.format(daerah_id, komoditas_id)]
+        assert (deret['daerah_id'], deret['komoditas_id']) == (daerah_id, komoditas_id)
+
+        satuan = client.get('/harga_komoditas/{}/{}?timeRange=1&format=columnar'.format(daerah_id, komoditas_id)).get_json()
+        assert deret['tanggal_harga'] == satuan['tanggal_harga']
+        assert deret['harga'] == satuan['harga']
+
+        normal = client.get('/harga_normal/{}/{}?timeRange=1&format=columnar'.format(daerah_id, komoditas_id)).get_json()
+        assert deret['harga_normal'] == normal['Harga_Normal']
+
+        last = client.get('/harga_komoditas/last/{}/{}'.format(daerah_id, komoditas_id)).get_json()['last_price']
+        assert deret['last_price'] == {"tanggal_harga": last['tanggal_harga'], "harga": last['harga']}
+
+
+def test_bulanan_dan_points(client):
+    series = _series(client, 'daerah_id=all&komoditas_id=2&timeRange=2&granularity=month')
+    assert sorted(series) == ['1:2', '2:2', '3:2']
+    satuan = client.get('/harga_komoditas/3/2?timeRange=2&granularity=month&format=columnar').get_json()
+    assert series['3:2']['tanggal_harga'] == satuan['tanggal_harga']
+    # Rata-rata bulanan batch dibulatkan 2 desimal
+    assert series['3:2']['harga'] == [round(harga, 2) for harga in satuan['harga']]
+
+    series = _series(client, 'daerah_id=1&komoditas_id=all&timeRange=2&points=40')
+    assert len(series) == 5
+    satuan = client.get('/harga_komoditas/1/4?timeRange=2&points=40&format=columnar').get_json()
+    assert len(series['1:4']['harga']) == 40
+    assert series['1:4']['tanggal_harga'] == satuan['tanggal_harga']
+
+
+def test_pasangan_tanpa_data_dalam_rentang(client, repository):
+    # Komoditas 6 hanya punya harga lama di luar timeRange
+    repository.tulis_dataset([], [(6, 'Komoditas lama', None)], [(1, 6, '2001-02-03', 4500)], [])
+    body = client.post('/harga_komoditas/batch', json={"daerah_id": [1], "komoditas_id": [1, 6], "last": True}).get_json()
+    assert body['series']['1:6'] == {
+        "daerah_id": 1, "komoditas_id": 6, "tanggal_harga": [], "harga": [],
+        "last_price": {"tanggal_harga": '03-02-2001', "harga": 4500},
+    }
+    assert len(body['series']['1:1']['harga']) > 300
+
+
+def test_parameter_tidak_valid(client, monkeypatch):
+    from app import routes
+
+    assert client.get('/harga_komoditas/batch?daerah_id=1').status_code == 400
+    assert client.get('/harga_komoditas/batch?daerah_id=1&komoditas_id=1&granularity=week').status_code == 400
+    monkeypatch.setattr(routes, 'HARGA_BATCH_MAX_DERET', 4)
+    assert client.get('/harga_komoditas/batch?daerah_id=all&komoditas_id=1,2').status_code == 400
@@ -0,0 +1,98 @@
+"""HP filter banded: hasil sama dengan statsmodels hpfilter, dan key/invalidasi TrendCache."""
+import numpy as np
+import pytest
+
+from utils.hp_filter import HP_LAMBDA, HP_LAMBDA_BULANAN, TrendCache, hp_filter, hp_trend, kunci_trend
+
+hpfilter = pytest.importorskip('statsmodels.tsa.filters.hp_filter').hpfilter
+
+
+def _random_walk(n, seed=0):
+    return 20000 + np.cumsum(np.random.default_rng(seed).normal(0, 150, n))
+
+
+@pytest.mark.parametrize('lamb', [1600, HP_LAMBDA_BULANAN])
+@pytest.mark.parametrize('n', [3, 4, 50, 730])
+def test_sama_dengan_statsmodels(n, lamb):
+    y = _random_walk(n, n)
+    cycle, trend = hp_filter(y, lamb)
+    cycle_sm, trend_sm = hpfilter(y, lamb)
+    assert np.allclose(trend, trend_sm, rtol=0, atol=1e-8 * np.abs(y).max())
+    assert np.allclose(cycle, cycle_sm, rtol=0, atol=1e-8 * np.abs(y).max())
+
+
+@pytest.mark.parametrize('n', [3, 4, 50, 730])
+def test_lambda_harian(n):
+    # Dengan HP_LAMBDA sistemnya sangat ill-conditioned sehingga statsmodels pun meleset
+    # beberapa sen; perbandingan dilakukan pada skala harga
+    y = _random_walk(n, n)
+    trend = hp_trend(y, HP_LAMBDA)
+    assert np.allclose(trend, hpfilter(y, HP_LAMBDA)[1], rtol=0, atol=1e-5 * np.abs(y).max())
+    if n <= 50:
+        # Deret pendek: hasil mendekati garis regresi (limit lambda -> tak hingga)
+        x = np.arange(n)
+        garis = np.polyval(np.polyfit(x, y, 1), x)
+        assert np.allclose(trend, garis, rtol=0, atol=1e-5 * np.abs(y).max())
+
+
+def test_banyak_deret_sekaligus():
+    ys = np.cumsum(np.random.default_rng(0).normal(size=(100, 3)), axis=0)
+    trends = hp_trend(ys, HP_LAMBDA_BULANAN)
+    for kolom in range(3):
+        assert np.allclose(trends[:, kolom], hp_trend(ys[:, kolom], HP_LAMBDA_BULANAN))
+
+
+@pytest.mark.parametrize('y', [[5.0], [5.0, 7.0]])
+def test_deret_pendek(y):
+    # Tanpa selisih kedua trend sama dengan data dan cycle nol
+    cycle, trend = hp_filter(y)
+    assert np.array_equal(trend, y)
+    assert np.array_equal(cycle, np.zeros(len(y)))
+
+
+def _kunci(harga):
+    return kunci_trend(1, 1, 1, HP_LAMBDA, '2024-01-01', '2024-01-04', harga)
+
+
+def test_kunci_berubah_jika_nilai_berubah():
+    harga = np.array([1.0, 2.0, 3.0, 4.0])
+    diperbarui = harga.copy()
+    diperbarui[1] = 2.5
+    assert _kunci(harga) == _kunci(harga.copy())
+    # Ingest yang mengganti nilai tanpa menambah baris tetap mengganti key
+    assert _kunci(diperbarui) != _kunci(harga)
+
+
+def test_trend_cache():
+    cache = TrendCache(max_entries=2)
+    harga = np.cumsum(np.random.default_rng(1).normal(size=20))
+    pertama = cache.get_or_compute(_kunci(harga), harga)
+    assert cache.get_or_compute(_kunci(harga), harga) is pertama
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not pertama.flags.writeable
+
+    # Data berubah: key baru, trend dihitung ulang
+    baru = harga + 1.0
+    assert np.allclose(cache.get_or_compute(_kunci(baru), baru), pertama + 1.0)
+    assert cache.misses == 2
+
+    # LRU: key ketiga mengeluarkan key yang paling lama tidak dipakai
+    lain = harga * 2
+    cache.get_or_compute(_kunci(lain), lain)
+    cache.get_or_compute(_kunci(harga), harga)
+    assert cache.misses == 4
+
+    cache.clear()
+    cache.get_or_compute(_kunci(lain), lain)
+    assert cache.misses == 5
+
+
+def test_trend_cache_banyak():
+    cache = TrendCache()
+    ys = [np.cumsum(np.random.default_rng(i).normal(size=n)) for i, n in enumerate([10, 10, 15])]
+    keys = [_kunci(y) for y in ys]
+    hasil = cache.get_or_compute_banyak(keys, ys)
+    for y, trend in zip(ys, hasil):
+        assert np.allclose(trend, hp_trend(y, HP_LAMBDA))
+    assert cache.get_or_compute_banyak(keys, ys)[0] is hasil[0]
+    assert cache.hits == 3
@@ -0,0 +1,110 @@
+"""Conditional GET: ETag dari watermark dan Last-Modified dari waktu ingest di data_versi."""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from werkzeug.http import http_date
+
+from app.http_cache import VALIDATOR_TTL, validator_cache
+from tests.conftest import INGEST_TOKEN
+
+URL = '/harga_komoditas/1/1?timeRange=1'
+
+
+def _hitung_query(repository, monkeypatch):
+    jumlah = {"n": 0}
+    asli = repository.watermark_harga
+
+    def watermark_harga(*args, **kwargs):
+        jumlah['n'] += 1
+        return asli(*args, **kwargs)
+
+    monkeypatch.setattr(repository, 'watermark_harga', watermark_harga)
+    return jumlah
+
+
+def _ingest(client, repository):
+    # Baris terakhir dikirim ulang: jumlah baris dan tanggal terakhir tetap, hanya versi data yang berubah
+    tanggal = repository.watermark_harga(1, 1)[0]
+    body = 'daerah_id,komoditas_id,tanggal_harga,harga\n1,1,{},12345\n'.format(tanggal)
+    response = client.post('/ingest/harga', data=body, content_type='text/csv',
+                           headers={'Authorization': 'Bearer ' + INGEST_TOKEN})
+    assert response.status_code == 200
+
+
+def test_etag_304(client):
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    # Data sintetis belum pernah di-ingest, jadi waktu perubahannya tidak diketahui
+    assert 'Last-Modified' not in response.headers
+
+    ulang = client.get(URL, headers={'If-None-Match': response.headers['ETag']})
+    assert ulang.status_code == 304
+
+    lama = client.get(URL, headers={'If-Modified-Since': 'Wed, 01 Jan 2100 00:00:00 GMT'})
+    assert lama.status_code == 200
+
+
+def test_last_modified_setelah_ingest(client, repository):
+    _ingest(client, repository)
+    response = client.get(URL)
+    assert response.status_code == 200
+    last_modified = response.headers['Last-Modified']
+    assert abs(response.last_modified - datetime.now(timezone.utc)) < timedelta(minutes=1)
+
+    ulang = client.get(URL, headers={'If-Modified-Since': last_modified})
+    assert ulang.status_code == 304
+
+    sebelum = http_date(response.last_modified - timedelta(hours=1))
+    assert client.get(URL, headers={'If-Modified-Since': sebelum}).status_code == 200
+
+    # If-None-Match didahulukan dari If-Modified-Since
+    beda = client.get(URL, headers={'If-None-Match': '"lain"', 'If-Modified-Since': last_modified})
+    assert beda.status_code == 200
+
+    # Daerah lain tidak tersentuh ingest
+    assert 'Last-Modified' not in client.get('/harga_komoditas/2/1?timeRange=1').headers
+
+
+def test_if_modified_since_setelah_ingest_berikutnya(client, repository):
+    _ingest(client, repository)
+    # Ingest pertama dibuat seolah-olah terjadi sehari lalu
+    with sqlite3.connect(repository.path) as connection:
+        connection.execute("UPDATE data_versi SET diperbarui = datetime('now', '-1 day')")
+    last_modified = client.get(URL).headers['Last-Modified']
+    assert client.get(URL, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    _ingest(client, repository)
+    response = client.get(URL, headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+    assert response.headers['Last-Modified'] != last_modified
+
+
+def test_ttl_default_nol(client, repository, monkeypatch):
+    # Tanpa cache, ingest dari worker lain (tanpa validator_cache.clear) langsung terlihat
+    assert VALIDATOR_TTL == 0
+    jumlah = _hitung_query(repository, monkeypatch)
+    etag = client.get(URL).headers['ETag']
+    repository.upsert('harga', [(1, 1, repository.watermark_harga(1, 1)[0], 12345)])
+    assert client.get(URL, headers={'If-None-Match': etag}).status_code == 200
+    assert jumlah['n'] == 3
+
+
+def test_watermark_di_cache(client, repository, monkeypatch):
+    monkeypatch.setattr(validator_cache, 'ttl', 10)
+    validator_cache.clear()
+    jumlah = _hitung_query(repository, monkeypatch)
+    for _ in range(3):
+        assert client.get(URL).status_code == 200
+    assert jumlah['n'] == 1
+
+
+def test_ingest_mengganti_etag(client, repository, monkeypatch):
+    monkeypatch.setattr(validator_cache, 'ttl', 10)
+    etag = client.get(URL).headers['ETag']
+    _ingest(client, repository)
+
+    # Ingest mengosongkan cache watermark di proses ini walaupun TTL belum habis
+    baru = client.get(URL, headers={'If-None-Match': etag})
+    assert baru.status_code == 200
+    assert baru.headers['ETag'] != etag
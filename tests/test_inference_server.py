@@ -0,0 +1,38 @@
+"""Proses inference bersama: autentikasi socket dengan INFERENCE_AUTHKEY."""
+import threading
+from multiprocessing import AuthenticationError
+
+import numpy as np
+import pytest
+
+from app.inference_server import InferenceClient, InferenceServer, InferenceUnavailableError, authkey_inference
+from app.model_registry import DEFAULT_MODEL_PATH
+
+
+def test_tanpa_authkey_ditolak(monkeypatch):
+    monkeypatch.delenv('INFERENCE_AUTHKEY', raising=False)
+    with pytest.raises(InferenceUnavailableError):
+        authkey_inference()
+    with pytest.raises(InferenceUnavailableError):
+        InferenceClient('/tmp/tidak-ada.sock')._conn()
+
+
+def test_rollout_dengan_authkey(tmp_path, monkeypatch):
+    monkeypatch.setenv('INFERENCE_AUTHKEY', 'rahasia-test')
+    address = str(tmp_path / 'inference.sock')
+    server = InferenceServer(address, max_wait=0.001)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = InferenceClient(address, timeout=30)
+    for _ in range(50):
+        try:
+            client._conn()
+            break
+        except InferenceUnavailableError:
+            threading.Event().wait(0.05)
+    x = np.random.default_rng(0).random((2, 1, 6), dtype=np.float32)
+    assert client.rollout(DEFAULT_MODEL_PATH, x, None, 1).shape == (2, 1)
+
+    # Key lain tidak bisa terhubung
+    with pytest.raises(AuthenticationError):
+        InferenceClient(address, authkey=b'salah')._conn()
@@ -0,0 +1,110 @@
+"""Ingest /ingest/harga dan /ingest/inflasi ke SQLiteRepository: upsert, validasi dan versi data."""
+from tests.conftest import INGEST_TOKEN
+
+AUTH = {'Authorization': 'Bearer ' + INGEST_TOKEN}
+
+
+def _ingest(client, jenis, csv, **args):
+    query = '&'.join('{}={}'.format(k, v) for k, v in args.items())
+    return client.post('/ingest/{}?{}'.format(jenis, query), data=csv.encode(), headers=AUTH)
+
+
+def _harga(repository, tanggal_awal='2099-01-01'):
+    with repository.connection() as connection:
+        rows = connection.execute(
+            "SELECT daerah_id, komoditas_id, tanggal_harga, harga FROM harga_komoditas "
+            "WHERE tanggal_harga >= ? ORDER BY daerah_id, komoditas_id, tanggal_harga", (tanggal_awal,)
+        ).fetchall()
+    return [(daerah_id, komoditas_id, str(tanggal), harga) for daerah_id, komoditas_id, tanggal, harga in rows]
+
+
+CSV_HARGA = (
+    'daerah_id,komoditas_id,tanggal_harga,harga\n'
+    '1,1,2099-01-01,1000\n'
+    '1,2,2099-01-01,2000\n'
+    '2,1,2099-01-02,3000\n'
+)
+
+
+def test_ingest_ulang_idempoten(client, repository):
+    for _ in range(2):
+        response = _ingest(client, 'harga', CSV_HARGA)
+        assert response.status_code == 200
+        assert response.get_json()['data']['diterima'] == 3
+    assert _harga(repository) == [
+        (1, 1, '2099-01-01', 1000), (1, 2, '2099-01-01', 2000), (2, 1, '2099-01-02', 3000),
+    ]
+
+
+def test_versi_data_naik(client, repository):
+    sebelum = repository.versi_data('harga', 1), repository.versi_data('harga', 2), repository.versi_data('harga', 3)
+    data = _ingest(client, 'harga', CSV_HARGA).get_json()['data']
+    assert data['versi'] == {'1': sebelum[0] + 1, '2': sebelum[1] + 1}
+    data = _ingest(client, 'harga', CSV_HARGA).get_json()['data']
+    assert data['versi'] == {'1': sebelum[0] + 2, '2': sebelum[1] + 2}
+    # Daerah yang tidak ada di batch tidak berubah versinya
+    assert repository.versi_data('harga', 3) == sebelum[2]
+    assert repository.versi_data('inflasi', 1) == 0
+
+
+def test_duplikat_dalam_batch_memakai_baris_terakhir(client, repository):
+    csv = (
+        'daerah_id,komoditas_id,tanggal_harga,harga\n'
+        '1,1,2099-01-01,1000\n'
+        '1,1,2099-01-01,1500\n'
+        '1,1,2099-01-01,1700\n'
+    )
+    data = _ingest(client, 'harga', csv).get_json()['data']
+    assert (data['diterima'], data['duplikat']) == (1, 2)
+    assert _harga(repository) == [(1, 1, '2099-01-01', 1700)]
+
+    # Batch berikutnya memperbarui nilai baris yang sudah ada
+    _ingest(client, 'harga', 'daerah_id,komoditas_id,tanggal_harga,harga\n1,1,2099-01-01,1800\n')
+    assert _harga(repository) == [(1, 1, '2099-01-01', 1800)]
+
+
+CSV_INVALID = (
+    'daerah_id,komoditas_id,tanggal_harga,harga\n'
+    '1,1,2099-01-01,1000\n'
+    '1,1,01-02-2099,1000\n'
+    '1,2,2099-01-01,-5\n'
+    '1,3,2099-01-01,1200\n'
+)
+
+
+def test_baris_invalid_menolak_batch(client, repository):
+    response = _ingest(client, 'harga', CSV_INVALID)
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['message'] == '2 baris tidak valid, batch ditolak'
+    assert [(e['baris'], e['kolom']) for e in body['errors']] == [(2, 'tanggal_harga'), (3, 'harga')]
+    assert _harga(repository) == []
+
+
+def test_baris_invalid_dilewati(client, repository):
+    response = _ingest(client, 'harga', CSV_INVALID, on_error='skip')
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert (data['diterima'], data['ditolak']) == (2, 2)
+    assert len(data['errors']) == 2
+    assert _harga(repository) == [(1, 1, '2099-01-01', 1000), (1, 3, '2099-01-01', 1200)]
+
+
+def test_id_referensi_tidak_dikenal(client, repository):
+    # Dataset uji: daerah 1..3, komoditas 1..5
+    csv = (
+        'daerah_id,komoditas_id,tanggal_harga,harga\n'
+        '99,1,2099-01-01,1000\n'
+        '1,9,2099-01-01,1000\n'
+        '1,1,2099-01-01,1000\n'
+    )
+    body = _ingest(client, 'harga', csv).get_json()
+    assert body['errors'] == [
+        {"baris": 1, "kolom": 'daerah_id', "pesan": 'ID tidak dikenal'},
+        {"baris": 2, "kolom": 'komoditas_id', "pesan": 'ID tidak dikenal'},
+    ]
+    assert _harga(repository) == []
+
+    inflasi = _ingest(client, 'inflasi', 'id_daerah,tanggal_inflasi,tingkat_inflasi\n99,2099-01-01,2.5\n')
+    assert inflasi.status_code == 400
+    assert inflasi.get_json()['errors'][0]['kolom'] == 'id_daerah'
@@ -0,0 +1,54 @@
+"""Migrasi unique key pada tabel lama yang berisi baris ganda, dan alias tabel di cek query."""
+import pytest
+
+from app.migrations import MigrasiError, versi_terpasang
+from app.query_plan import TABEL_TURUNAN, _alias_tabel
+from app.repository import SQLiteRepository
+
+
+@pytest.fixture
+def repository_lama(tmp_path):
+    # Skema awal tanpa unique key, berisi baris ganda seperti tabel yang diisi manual
+    repository = SQLiteRepository(str(tmp_path / 'lama.sqlite3'))
+    repository.migrasi(target=1)
+    with repository.connection() as connection:
+        connection.executemany(
+            "INSERT INTO harga_komoditas (daerah_id, komoditas_id, tanggal_harga, harga) VALUES (?, ?, ?, ?)",
+            [(1, 1, '2024-01-01', 100), (1, 1, '2024-01-01', 110), (1, 1, '2024-01-01', 120), (1, 2, '2024-01-01', 50)],
+        )
+        connection.executemany(
+            "INSERT INTO inflasi (id_daerah, tingkat_inflasi, tanggal_inflasi) VALUES (?, ?, ?)",
+            [(1, 2.0, '2024-01-01'), (1, 2.5, '2024-01-01')],
+        )
+        connection.commit()
+    return repository
+
+
+def test_baris_ganda_dilaporkan(repository_lama):
+    with pytest.raises(MigrasiError, match=r'2 baris ganda di harga_komoditas.*contoh: \(1, 1, 2024-01-01\) x3\.'):
+        repository_lama.migrasi()
+    # Tidak ada migrasi yang tercatat setengah jalan
+    assert versi_terpasang(repository_lama) == {1}
+
+
+def test_dedupe_menyimpan_baris_terakhir(repository_lama):
+    log = []
+    assert repository_lama.migrasi(dedupe=True, log=log.append)[0] == 2
+    assert any('2 baris ganda dihapus dari harga_komoditas' in pesan for pesan in log)
+    with repository_lama.connection() as connection:
+        harga = connection.execute(
+            "SELECT komoditas_id, harga FROM harga_komoditas ORDER BY komoditas_id").fetchall()
+        inflasi = connection.execute("SELECT tingkat_inflasi FROM inflasi").fetchall()
+    assert [tuple(row) for row in harga] == [(1, 120), (2, 50)]
+    assert [tuple(row) for row in inflasi] == [(2.5,)]
+
+
+def test_alias_tabel():
+    alias = _alias_tabel("""
+        SELECT * FROM (SELECT daerah_id FROM harga_komoditas h GROUP BY daerah_id) AS a
+        JOIN daerah d ON d.daerah_id = a.daerah_id
+    """)
+    assert alias == {'harga_komoditas': 'harga_komoditas', 'h': 'harga_komoditas', 'a': TABEL_TURUNAN,
+                     'daerah': 'daerah', 'd': 'daerah'}
+    # Nama yang tidak dikenali (misalnya CTE) tidak dianggap tabel referensi
+    assert 'x' not in _alias_tabel("WITH x AS (SELECT 1) SELECT * FROM harga_komoditas")
@@ -0,0 +1,116 @@
+"""
+Registry model: arsip .npz yang ikut di repo, ekspor ulang berdasarkan hash isi .h5, dan
+load di luar lock dengan single-flight per path.
+"""
+import os
+import shutil
+import threading
+
+import numpy as np
+import pytest
+
+from app.forecast import rollout_stats
+from app.model_registry import ModelRegistry, _load_numpy_model, semua_model_h5
+from app.numpy_model import npz_path_for, npz_sesuai
+
+
+@pytest.mark.parametrize('h5_path', semua_model_h5())
+def test_npz_repo_sesuai_h5(h5_path):
+    # Gagal jika .h5 diganti tanpa `flask export-model`
+    assert npz_sesuai(h5_path, npz_path_for(h5_path))
+
+
+def test_ekspor_ulang_berdasarkan_isi(tmp_path):
+    sumber = semua_model_h5()
+    h5_path = str(tmp_path / 'model.h5')
+    shutil.copy(sumber[0], h5_path)
+    npz_path = npz_path_for(h5_path)
+    _load_numpy_model(h5_path)
+    assert npz_sesuai(h5_path, npz_path)
+
+    # mtime .h5 lebih baru (misalnya setelah checkout) tidak memicu ekspor
+    ekspor = os.path.getmtime(npz_path)
+    os.utime(h5_path, (ekspor + 100, ekspor + 100))
+    _load_numpy_model(h5_path)
+    assert os.path.getmtime(npz_path) == ekspor
+
+    # Isi .h5 berubah: arsip diekspor ulang meskipun mtime-nya lebih lama
+    shutil.copy(sumber[1], h5_path)
+    os.utime(h5_path, (ekspor - 100, ekspor - 100))
+    assert not npz_sesuai(h5_path, npz_path)
+    _load_numpy_model(h5_path)
+    assert npz_sesuai(h5_path, npz_path)
+
+
+class _ModelPalsu:
+    input_shape = (None, 1, 3)
+
+    def predict(self, x, verbose=0):
+        return np.zeros((len(x), 1), dtype=np.float32)
+
+    def rollout(self, x, eksogen, horizon):
+        return np.zeros((len(x), horizon), dtype=np.float32)
+
+
+def _file_model(tmp_path, nama):
+    path = str(tmp_path / nama)
+    with open(path, 'wb') as f:
+        f.write(b'model')
+    return path
+
+
+def test_load_bersamaan_sekali(tmp_path):
+    path = _file_model(tmp_path, 'a.h5')
+    mulai, lanjut = threading.Event(), threading.Event()
+    loads = []
+
+    def loader(p):
+        loads.append(p)
+        mulai.set()
+        lanjut.wait(5)
+        return _ModelPalsu()
+
+    registry = ModelRegistry(default_path=path, loader=loader)
+    hasil = []
+    threads = [threading.Thread(target=lambda: hasil.append(registry.get_by_path(path))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    mulai.wait(5)
+    lanjut.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(loads) == 1
+    assert len(hasil) == 4 and all(model is hasil[0] for model in hasil)
+
+
+def test_load_tidak_menahan_model_lain(tmp_path):
+    cepat, lambat = _file_model(tmp_path, 'cepat.h5'), _file_model(tmp_path, 'lambat.h5')
+    mulai, lanjut = threading.Event(), threading.Event()
+
+    def loader(p):
+        if p == lambat:
+            mulai.set()
+            lanjut.wait(5)
+        return _ModelPalsu()
+
+    registry = ModelRegistry(default_path=cepat, loader=loader)
+    model_cepat = registry.get_by_path(cepat)
+    thread = threading.Thread(target=registry.get_by_path, args=(lambat,))
+    thread.start()
+    mulai.wait(5)
+    hasil = []
+    ambil = threading.Thread(target=lambda: hasil.append(registry.get_by_path(cepat)))
+    ambil.start()
+    # Load model lambat sedang berjalan, model yang sudah di-cache tetap bisa diambil
+    ambil.join(1)
+    lanjut.set()
+    thread.join(5)
+    assert hasil == [model_cepat]
+    assert registry.stats()['loads'] == 2
+
+
+def test_warm_up_tidak_dicatat_di_rollout_stats(tmp_path):
+    path = _file_model(tmp_path, 'a.h5')
+    sebelum = rollout_stats.stats()
+    ModelRegistry(default_path=path, loader=lambda p: _ModelPalsu()).warm_up()
+    assert rollout_stats.stats() == sebelum
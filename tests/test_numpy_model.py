@@ -0,0 +1,56 @@
+"""
+Kesamaan output NumpyModel dengan Keras: model kecil yang dibangun di test dan file
+model .h5 yang ada di repo, diekspor dengan export_model lalu dibandingkan.
+"""
+import numpy as np
+import pytest
+
+from app.model_registry import semua_model_h5
+from app.numpy_model import NumpyModel, export_model
+
+keras = pytest.importorskip('tensorflow').keras
+
+ATOL = 1e-5
+
+
+def _input(model, batch=64, timesteps=3):
+    _, langkah, n_fitur = model.input_shape
+    rng = np.random.default_rng(0)
+    return rng.random((batch, langkah or timesteps, n_fitur), dtype=np.float32)
+
+
+def _bandingkan(keras_model, h5_path, tmp_path):
+    npz_path = str(tmp_path / 'model.npz')
+    export_model(h5_path, npz_path)
+    x = _input(keras_model)
+    assert np.allclose(keras_model.predict(x, verbose=0), NumpyModel(npz_path).predict(x), atol=ATOL)
+
+
+@pytest.mark.parametrize('layers', [
+    # Bentuk model bawaan: LSTM satu langkah lalu Dense
+    lambda: [keras.layers.LSTM(16), keras.layers.Dense(6)],
+    # LSTM bertumpuk dengan return_sequences, Dropout dan aktivasi lain
+    lambda: [
+        keras.layers.LSTM(8, return_sequences=True),
+        keras.layers.Dropout(0.2),
+        keras.layers.LSTM(4, activation='relu', recurrent_activation='hard_sigmoid'),
+        keras.layers.Dense(5, activation='tanh'),
+        keras.layers.Dense(1, activation='sigmoid'),
+    ],
+])
+@pytest.mark.parametrize('timesteps', [1, 4])
+def test_model_kecil(tmp_path, layers, timesteps):
+    keras.utils.set_random_seed(0)
+    model = keras.Sequential([keras.Input(shape=(timesteps, 6))] + layers())
+    # Bias acak agar bias ikut teruji (default Keras nol)
+    for layer in model.layers:
+        layer.set_weights([w + np.random.default_rng(1).normal(0, 0.1, w.shape).astype(np.float32)
+                           for w in layer.get_weights()])
+    h5_path = str(tmp_path / 'model.h5')
+    model.save(h5_path)
+    _bandingkan(keras.models.load_model(h5_path, compile=False), h5_path, tmp_path)
+
+
+@pytest.mark.parametrize('h5_path', semua_model_h5())
+def test_model_repo(tmp_path, h5_path):
+    _bandingkan(keras.models.load_model(h5_path, compile=False), h5_path, tmp_path)
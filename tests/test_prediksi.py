@@ -0,0 +1,105 @@
+"""Prediksi: input langkah pertama dari bulan terakhir yang lengkap dan label bulan target."""
+import numpy as np
+
+from utils.preprocessing_prediction import bulan_target, siapkan_input_prediksi, susun_fitur_prediksi
+
+PARAMS = {"min": [0.0, 0.0, 0.0], "max": [10.0, 10.0, 10.0], "tanggal_terakhir": '2024-03-01'}
+TANGGAL = np.array(['2024-01-01', '2024-02-01', '2024-03-01'], dtype='datetime64[D]')
+
+
+def test_input_dari_bulan_terakhir():
+    fitur = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, 9.0]])
+    assert np.allclose(siapkan_input_prediksi(fitur, PARAMS).reshape(-1), [0.7, 0.8, 0.9])
+    target = bulan_target(fitur, TANGGAL, 3)
+    assert [str(bulan) for bulan in target] == ['2024-04-01', '2024-05-01', '2024-06-01']
+
+
+def test_bulan_tidak_lengkap_dilewati():
+    # Inflasi Maret belum ada: input Februari, target Maret
+    fitur = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, np.nan]])
+    assert np.allclose(siapkan_input_prediksi(fitur, PARAMS).reshape(-1), [0.4, 0.5, 0.6])
+    assert str(bulan_target(fitur, TANGGAL)[0]) == '2024-03-01'
+
+
+def test_respons_berlabel_bulan(client):
+    data = client.get('/prediksi/1?horizon=3').get_json()['data']
+    bulan = [entry['bulan'] for entry in data['horizon']]
+    assert data['bulan_prediksi'] == bulan[0]
+    assert len(set(bulan)) == 3
+
+    batch = client.get('/prediksi?id_daerah=1&horizon=3').get_json()['data']['1']
+    assert batch['horizon'] == data['horizon']
+
+
+def test_ingest_membuang_cache_prediksi(client, repository):
+    from app.prediction_cache import prediction_cache
+    from tests.conftest import INGEST_TOKEN
+
+    prediction_cache.clear()
+    awal = client.get('/prediksi/1').get_json()['data']
+    client.get('/prediksi/2')
+    assert prediction_cache.stats()['entries'] == 2
+
+    # Perbarui inflasi bulan terakhir daerah 1 (bulan input prediksi)
+    _, tanggal = repository.inflasi_terakhir(1)
+    csv = 'id_daerah,tanggal_inflasi,tingkat_inflasi\n1,{},9.5\n'.format(tanggal).encode()
+    response = client.post('/ingest/inflasi', data=csv, headers={'Authorization': 'Bearer ' + INGEST_TOKEN})
+    assert response.status_code == 200
+    # Hanya daerah yang tersentuh ingest yang dibuang
+    assert prediction_cache.stats()['entries'] == 1
+    sesudah = client.get('/prediksi/1').get_json()['data']
+    assert sesudah['prediksi_inflasi'] != awal['prediksi_inflasi']
+
+
+def test_susun_fitur_tidak_padat():
+    # Urutan komoditas acak, baris (Februari, komoditas 2) hilang, komoditas 9 di luar model
+    rows = [
+        (1, '2024-01-01', 1.5, 2, 20.0), (1, '2024-01-01', 1.5, 1, 10.0), (1, '2024-01-01', 1.5, 9, 90.0),
+        (1, '2024-02-01', 2.5, 1, 11.0),
+        (2, '2024-01-01', 3.0, 1, None), (2, '2024-01-01', 3.0, 2, None),
+    ]
+    hasil, inflasi_terakhir, tanggal = susun_fitur_prediksi([1, 2, 3], rows, komoditas_ids=(1, 2))
+    assert np.array_equal(hasil[1], [[10.0, 20.0, 1.5], [11.0, np.nan, 2.5]], equal_nan=True)
+    assert inflasi_terakhir[1] == 2.5
+    assert [str(t) for t in tanggal[1]] == ['2024-01-01', '2024-02-01']
+    assert 'error' in hasil[2] and 'error' in hasil[3]
+
+
+def test_komoditas_baru_tidak_mengubah_input(client, repository):
+    from app.prediction_cache import prediction_cache
+
+    prediction_cache.clear()
+    awal = client.get('/prediksi/1').get_json()['data']
+
+    _, tanggal = repository.inflasi_terakhir(1)
+    repository.tulis_dataset([], [(6, 'Komoditas baru', None)], [(1, 6, tanggal, 5000)], [])
+    prediction_cache.clear()
+    response = client.get('/prediksi/1')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['data'] == awal
+
+
+def test_batch_sama_dengan_per_daerah(client, monkeypatch):
+    from app import routes
+    from app.model_registry import model_registry
+
+    satuan = {str(id_daerah): client.get('/prediksi/{}'.format(id_daerah)).get_json()['data'] for id_daerah in (1, 2, 3)}
+
+    # Satu forward pass per file model untuk semua daerah
+    panggilan = []
+    prediksi_model = routes.prediksi_model
+    monkeypatch.setattr(routes, 'prediksi_model', lambda path, batch, *args: panggilan.append(len(batch)) or
+                        prediksi_model(path, batch, *args))
+    data = client.get('/prediksi?id_daerah=all').get_json()['data']
+    assert data == satuan
+    assert len(panggilan) == len({model_registry.path_for(id_daerah) for id_daerah in (1, 2, 3)})
+    assert sum(panggilan) == 3
+
+    response = client.post('/prediksi', json={"id_daerah": [2, 99]})
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['2'] == satuan['2']
+    assert data['99'] == {"error": 'No data found for id_daerah: 99'}
+
+    assert client.get('/prediksi?id_daerah=1,x').status_code == 400
+    assert client.get('/prediksi').status_code == 400
@@ -0,0 +1,104 @@
+"""
+Statement MySQLRepository yang ditulis lewat cursor mysql.connector asli (tanpa server MySQL).
+
+Cursor di sini adalah MySQLCursor dengan execute yang hanya merekam statement, sehingga
+penulisan ulang executemany menjadi INSERT multi-baris (_batch_insert) tetap dijalankan oleh
+connector persis seperti di produksi.
+"""
+from contextlib import contextmanager
+
+import pytest
+from mysql.connector.conversion import MySQLConverter
+from mysql.connector.cursor import MySQLCursor
+
+from app.repository import MySQLRepository
+
+
+class _KoneksiPalsu:
+    python_charset = 'utf8'
+    sql_mode = None
+    unread_result = False
+
+    def __init__(self, hasil):
+        self.converter = MySQLConverter()
+        self.hasil = list(hasil)
+        self.statements = []
+        self.commits = 0
+
+    def handle_unread_result(self):
+        pass
+
+    def cursor(self, dictionary=False, buffered=None):
+        return _CursorRekam(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class _CursorRekam(MySQLCursor):
+    def __init__(self, koneksi):
+        super().__init__()
+        self._connection = koneksi
+
+    def execute(self, operation, params=(), multi=False):
+        # Substitusi parameter memakai converter connector agar jumlah %s ikut dicek
+        if params:
+            operation = operation.encode() % self._process_params(params)
+        self._connection.statements.append(operation if isinstance(operation, bytes) else operation.encode())
+
+    def fetchone(self):
+        return self._connection.hasil.pop(0)
+
+    def fetchall(self):
+        return self._connection.hasil.pop(0)
+
+
+def _repository(hasil):
+    repository = MySQLRepository()
+    koneksi = _KoneksiPalsu(hasil)
+
+    @contextmanager
+    def connection():
+        yield koneksi
+
+    repository.connection = connection
+    repository._harga_bulanan = True
+    return repository, koneksi
+
+
+def test_upsert_harga_dengan_rollup():
+    repository, koneksi = _repository([[(1, 2)]])
+    rows = [(1, 1, '2024-01-31', 1000), (1, 1, '2024-02-01', 1100), (1, 2, '2024-02-03', 900)]
+    assert repository.upsert('harga', rows) == {1: 2}
+    assert koneksi.commits == 1
+
+    rollup = [s for s in koneksi.statements if s.startswith(b'INSERT INTO harga_bulanan')]
+    # Satu statement per (daerah, komoditas, rentang bulan)
+    assert len(rollup) == 2
+    assert b"tanggal_harga >= '2024-01-01' AND tanggal_harga < '2024-03-01'" in rollup[0]
+    # Upsert harga tetap ditulis ulang connector menjadi satu INSERT multi-baris
+    harga = [s for s in koneksi.statements if s.startswith(b'INSERT INTO harga_komoditas')]
+    assert len(harga) == 1 and harga[0].count(b'),(') == 2
+
+
+def test_rollup_inkremental():
+    from datetime import date
+
+    rentang = [(1, 1, date(2024, 1, 5), date(2024, 2, 2)), (2, 1, date(2024, 2, 1), date(2024, 2, 1))]
+    repository, koneksi = _repository([(10,), (5,), rentang])
+    hasil = repository.perbarui_harga_bulanan()
+    assert hasil == {"mode": 'inkremental', "rentang": 2, "id_terakhir": 10}
+    rollup = [s for s in koneksi.statements if s.startswith(b'INSERT INTO harga_bulanan')]
+    assert len(rollup) == 2
+
+
+def test_executemany_insert_select_ditolak_connector():
+    # Alasan _rollup_rentang tidak memakai executemany
+    repository, koneksi = _repository([])
+    cursor = koneksi.cursor()
+    query = repository._sql_rollup("daerah_id = %s AND komoditas_id = %s")
+    with pytest.raises(Exception, match='multi-row INSERT'):
+        cursor.executemany(query, [(1, 1), (1, 2)])
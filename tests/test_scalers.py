@@ -0,0 +1,39 @@
+"""ScalerStore: request path hanya di memori, command CLI menulis file dengan merge di bawah flock."""
+import json
+import os
+
+from app.scalers import ScalerStore, scaler_path_for
+
+PARAMS = {"min": [0.0, 1.0], "max": [2.0, 3.0], "tanggal_terakhir": '2024-01-01'}
+
+
+def test_put_request_tidak_menulis_file(tmp_path):
+    model_path = str(tmp_path / 'model.h5')
+    store = ScalerStore()
+    store.put(model_path, {1: PARAMS}, fit=True)
+    assert store.get(model_path, 1) == PARAMS
+    assert not os.path.exists(scaler_path_for(model_path))
+    # Versi file (key cache prediksi) tidak berubah oleh fit di request
+    assert store.version(model_path) is None
+
+
+def test_simpan_menggabungkan_isi_file(tmp_path):
+    model_path = str(tmp_path / 'model.h5')
+    a, b = ScalerStore(reload_interval=3600), ScalerStore(reload_interval=3600)
+    # Kedua proses sudah me-load file (kosong) sebelum yang lain menulis
+    assert a.get(model_path, 1) is None and b.get(model_path, 2) is None
+    a.put(model_path, {1: PARAMS}, fit=True, simpan=True)
+    b.put(model_path, {2: dict(PARAMS, tanggal_terakhir='2024-02-01')}, fit=True, simpan=True)
+
+    with open(scaler_path_for(model_path)) as f:
+        assert sorted(json.load(f)) == ['1', '2']
+    assert b.get(model_path, 1) == PARAMS
+
+
+def test_file_baru_menggantikan_parameter_lokal(tmp_path):
+    model_path = str(tmp_path / 'model.h5')
+    worker = ScalerStore(reload_interval=0)
+    worker.put(model_path, {1: PARAMS})
+    refit = dict(PARAMS, max=[5.0, 5.0])
+    ScalerStore().put(model_path, {1: refit}, fit=True, simpan=True)
+    assert worker.get(model_path, 1) == refit
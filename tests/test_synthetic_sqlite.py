@@ -0,0 +1,61 @@
+"""Dataset sintetis yang ditulis ke SQLiteRepository terbaca kembali dengan nilai yang sama."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.repository import SQLiteRepository, baris_harga_bulanan
+from app.synthetic_data import buat_dataset
+
+AKHIR = '2024-06-30'
+
+
+@pytest.fixture(scope='module')
+def sintetis(tmp_path_factory):
+    dataset = buat_dataset(2, 3, 1, seed=5, end=AKHIR)
+    repository = SQLiteRepository(str(tmp_path_factory.mktemp('sintetis') / 'sintetis.sqlite3'))
+    repository.buat_schema()
+    repository.tulis_dataset(dataset['daerah'], dataset['komoditas'], dataset['harga'], dataset['inflasi'])
+    repository.perbarui_harga_bulanan(penuh=True)
+    harga = pd.DataFrame(dataset['harga'], columns=['daerah_id', 'komoditas_id', 'tanggal_harga', 'harga'])
+    return dataset, harga, repository
+
+
+def test_dataset_deterministik():
+    assert buat_dataset(2, 3, 1, seed=5, end=AKHIR) == buat_dataset(2, 3, 1, seed=5, end=AKHIR)
+    assert buat_dataset(2, 3, 1, seed=6, end=AKHIR)['harga'] != buat_dataset(2, 3, 1, seed=5, end=AKHIR)['harga']
+
+
+def test_ukuran_dataset(sintetis):
+    dataset, harga, repository = sintetis
+    hari = len(pd.date_range('2023-06-30', AKHIR))
+    assert len(dataset['harga']) == 2 * 3 * hari
+    assert len(dataset['inflasi']) == 2 * 13
+    assert [row[0] for row in repository.daftar_daerah()] == [1, 2]
+    assert repository.komoditas_ids() == [1, 2, 3]
+    assert harga['harga'].gt(0).all()
+
+
+def test_deret_harga_terbaca_sama(sintetis):
+    _, harga, repository = sintetis
+    deret = harga[(harga['daerah_id'] == 2) & (harga['komoditas_id'] == 3) & (harga['tanggal_harga'] >= '2024-01-01')]
+    rows = repository.deret_harga(2, 3, '2024-01-01')
+    assert [str(tanggal) for tanggal, _ in rows] == deret['tanggal_harga'].tolist()
+    assert [nilai for _, nilai in rows] == deret['harga'].tolist()
+
+
+@pytest.mark.parametrize('rollup', [True, False])
+def test_deret_bulanan_sama_dengan_pandas(sintetis, rollup):
+    _, harga, repository = sintetis
+    deret = harga[(harga['daerah_id'] == 1) & (harga['komoditas_id'] == 2)].copy()
+    deret['bulan'] = deret['tanggal_harga'].str[:7] + '-01'
+    acuan = deret.groupby('bulan')['harga'].agg(['count', 'mean', 'min', 'max', 'last'])
+
+    rows = baris_harga_bulanan(repository._fetchall(repository.sql_deret_harga_bulanan(rollup), (1, 2, '2000-01-01')))
+    assert [str(row[0]) for row in rows] == acuan.index.tolist()
+    bulan, jumlah, rata2, minimum, maksimum, terakhir, tanggal_terakhir = zip(*rows)
+    assert list(jumlah) == acuan['count'].tolist()
+    assert np.allclose(rata2, acuan['mean'])
+    assert list(minimum) == acuan['min'].tolist()
+    assert list(maksimum) == acuan['max'].tolist()
+    assert list(terakhir) == acuan['last'].tolist()
+    assert str(tanggal_terakhir[-1]) == AKHIR
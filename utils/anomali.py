@@ -0,0 +1,89 @@
+"""
+Deteksi anomali harga untuk banyak deret sekaligus. Deret (daerah, komoditas) disambung
+berurutan dalam satu array; semua operasi jendela bergulir berjalan atas array itu
+(sliding_window_view per potongan baris), bukan loop per deret.
+
+Lonjakan diukur pada perubahan harian log(harga), bukan level harga: level harga berperilaku
+seperti random walk sehingga selalu menjauh dari median bergulirnya, sedangkan perubahan
+hariannya stasioner dan median/MAD-nya stabil.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# MAD dikali konstanta ini menjadi estimasi simpangan baku untuk data normal
+MAD_KE_SIGMA = 1.4826
+# Jumlah elemen maksimum matriks jendela (baris x window) per potongan
+ANOMALI_CHUNK_ELEMEN = 1 << 20
+
+
+def batas_deret(daerah, komoditas):
+    """
+    Indeks awal dan akhir setiap deret dalam baris urut (daerah_id, komoditas_id, tanggal).
+
+    :return: Tuple (awal, akhir) array int64; deret ke-i adalah baris [awal[i], akhir[i]).
+    """
+    n = len(daerah)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    batas = np.flatnonzero((daerah[1:] != daerah[:-1]) | (komoditas[1:] != komoditas[:-1])) + 1
+    return np.concatenate(([0], batas)), np.concatenate((batas, [n]))
+
+
+def posisi_dalam_deret(awal, akhir):
+    """Posisi setiap baris di dalam deretnya (0 untuk baris pertama deret)."""
+    return np.arange(akhir[-1] if len(akhir) else 0) - np.repeat(awal, akhir - awal)
+
+
+def perubahan_log(harga, posisi):
+    """Perubahan harian log(harga) terhadap baris sebelumnya; NaN di baris pertama setiap deret."""
+    perubahan = np.empty(len(harga))
+    perubahan[0:1] = np.nan
+    perubahan[1:] = np.diff(np.log(harga))
+    perubahan[posisi == 0] = np.nan
+    return perubahan
+
+
+def median_mad_bergulir(nilai, posisi, window):
+    """
+    Median dan MAD dari `window` nilai sebelumnya (tanpa nilai baris itu sendiri) untuk
+    setiap baris. Baris yang belum punya `window` nilai valid sebelumnya di deretnya bernilai
+    NaN, sehingga jendela tidak pernah melewati batas deret.
+
+    :param nilai: Array float64 semua deret yang disambung.
+    :param posisi: Posisi baris di antara nilai valid deretnya (0 untuk nilai valid pertama),
+                   misalnya posisi_dalam_deret - 1 untuk hasil perubahan_log.
+    :param window: Panjang jendela (jumlah observasi).
+    :return: Tuple (median, mad) array float64.
+    """
+    nilai = np.asarray(nilai, dtype=np.float64)
+    median = np.full(len(nilai), np.nan)
+    mad = np.full(len(nilai), np.nan)
+    if len(nilai) <= window:
+        return median, mad
+    # jendela[j] = nilai[j:j + window], yaitu histori baris j + window
+    jendela = sliding_window_view(nilai[:-1], window)
+    baris = np.flatnonzero(posisi[window:] >= window) + window
+    langkah = max(1, ANOMALI_CHUNK_ELEMEN // window)
+    for mulai in range(0, len(baris), langkah):
+        i = baris[mulai:mulai + langkah]
+        w = jendela[i - window]
+        m = np.median(w, axis=1)
+        median[i] = m
+        mad[i] = np.median(np.abs(w - m[:, None]), axis=1)
+    return median, mad
+
+
+def skor_mad(nilai, median, mad, skala_min=0.01):
+    """
+    Skor robust (nilai - median) / (1.4826 * MAD). Skala minimal `skala_min` (dalam satuan
+    nilai) agar deret yang lama tidak berubah (MAD nol) tidak membuat setiap perubahan kecil
+    menjadi anomali.
+    """
+    skala = np.maximum(MAD_KE_SIGMA * mad, skala_min)
+    return (nilai - median) / skala
+
+
+def deviasi_trend(nilai, trend):
+    """Deviasi relatif terhadap trend HP, (nilai - trend) / trend."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (nilai - trend) / trend
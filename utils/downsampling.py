@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+def sumbu_tanggal(tanggal):
+    """
+    Tanggal (date/datetime/string) menjadi jumlah hari sejak epoch, sebagai sumbu x LTTB.
+    """
+    return pd.to_datetime(tanggal).values.astype('datetime64[D]').astype(np.int64).astype(np.float64)
+
+
+# Jumlah elemen maksimum tabel (bucket x kandidat sebelumnya x kandidat) per potongan
+LTTB_CHUNK_ELEMEN = 1 << 20
+# Di atas jumlah kandidat per bucket ini tabel (m x m per bucket) lebih mahal daripada loop argmax per bucket
+LTTB_TABEL_MAKS_KANDIDAT = 20
+
+
+def lttb(x, y, n_out):
+    """
+    Indeks titik hasil downsampling Largest-Triangle-Three-Buckets (Steinarsson, 2013).
+
+    Titik pertama dan terakhir selalu dipertahankan; titik di antaranya dibagi ke n_out - 2
+    bucket dan dari setiap bucket dipilih titik yang membentuk segitiga terbesar dengan titik
+    terpilih di bucket sebelumnya (A) dan rata-rata bucket berikutnya (C), sehingga puncak dan
+    lembah deret tetap terlihat.
+
+    Satu-satunya ketergantungan berurutan adalah A. Karena A selalu salah satu kandidat bucket
+    sebelumnya, pilihan terbaik untuk setiap kemungkinan A dihitung sekaligus sebagai tabel
+    (bucket, kandidat sebelumnya) -> kandidat; yang tersisa berurutan hanya menelusuri tabel
+    itu. Untuk bucket sangat lebar (deret panjang, n_out kecil) dipakai argmax per bucket.
+
+    :param x: Array sumbu x yang naik (misalnya hasil sumbu_tanggal).
+    :param y: Array nilai dengan panjang sama.
+    :param n_out: Jumlah titik keluaran; jika >= len(y) atau < 3 semua titik dikembalikan.
+    :return: Array indeks int64 urut naik.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Batas bucket untuk titik 1..n-2; jarak antar batas > 1 sehingga tidak ada bucket kosong
+    batas = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    awal, akhir = batas[:-1], batas[1:]
+    panjang = akhir - awal
+    n_bucket = len(awal)
+
+    # Titik C tiap bucket: rata-rata bucket berikutnya, untuk bucket terakhir titik terakhir
+    rata_x = np.add.reduceat(x[:n - 1], awal) / panjang
+    rata_y = np.add.reduceat(y[:n - 1], awal) / panjang
+    cx = np.append(rata_x[1:], x[-1])[:, None]
+    cy = np.append(rata_y[1:], y[-1])[:, None]
+
+    # Kandidat per bucket sebagai matriks (n_bucket, m); baris pendek diisi ulang dengan
+    # titik terakhir bucket itu sendiri sehingga tidak butuh mask (argmax memilih yang pertama)
+    m = int(panjang.max())
+    kandidat = np.minimum(awal[:, None] + np.arange(m), akhir[:, None] - 1)
+    px = x[kandidat]
+    py = y[kandidat]
+
+    # Dua kali luas segitiga (A, P, C) = |Ax U + Ay V + W|, dengan U, V, W hanya bergantung
+    # pada kandidat P dan C; konstanta 1/2 tidak mengubah argmax
+    u = py - cy
+    v = cx - px
+    w = px * cy - py * cx
+
+    posisi = np.empty(n_bucket, dtype=np.int64)
+    posisi[0] = np.abs(x[0] * u[0] + y[0] * v[0] + w[0]).argmax()
+    if m <= LTTB_TABEL_MAKS_KANDIDAT:
+        # terbaik[i, a]: kandidat terbaik bucket i jika A = kandidat a bucket i - 1
+        terbaik = np.empty((n_bucket, m), dtype=np.int64)
+        langkah = max(1, LTTB_CHUNK_ELEMEN // (m * m))
+        for mulai in range(1, n_bucket, langkah):
+            i = slice(mulai, min(mulai + langkah, n_bucket))
+            j = slice(mulai - 1, min(mulai + langkah, n_bucket) - 1)
+            luas = np.abs(px[j][:, :, None] * u[i][:, None, :] + py[j][:, :, None] * v[i][:, None, :] + w[i][:, None, :])
+            terbaik[i] = luas.argmax(axis=2)
+        terbaik = terbaik.tolist()
+        pos = int(posisi[0])
+        for i in range(1, n_bucket):
+            pos = terbaik[i][pos]
+            posisi[i] = pos
+    else:
+        x_list, y_list = x.tolist(), y.tolist()
+        k = int(kandidat[0, posisi[0]])
+        for i in range(1, n_bucket):
+            posisi[i] = np.abs(x_list[k] * u[i] + y_list[k] * v[i] + w[i]).argmax()
+            k = int(kandidat[i, posisi[i]])
+
+    terpilih = np.empty(n_out, dtype=np.int64)
+    terpilih[0] = 0
+    terpilih[1:-1] = kandidat[np.arange(n_bucket), posisi]
+    terpilih[-1] = n - 1
+    return terpilih
@@ -0,0 +1,149 @@
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from scipy.linalg import cholesky_banded, cho_solve_banded
+
+# Lambda yang dipakai /harga_normal untuk data harga harian
+HP_LAMBDA = 24414062500
+# Lambda standar untuk data bulanan (granularity=month)
+HP_LAMBDA_BULANAN = 14400
+
+
+@lru_cache(maxsize=64)
+def _faktorisasi(n, lamb):
+    """
+    Faktorisasi Cholesky banded dari (I + lamb * K'K), dengan K matriks selisih kedua.
+    Matriks ini hanya bergantung pada panjang deret dan lambda, jadi di-cache per (n, lamb).
+    """
+    d0 = np.zeros(n)
+    d1 = np.zeros(n - 1)
+    d2 = np.ones(n - 2)
+    d0[:-2] += 1.0
+    d0[1:-1] += 4.0
+    d0[2:] += 1.0
+    d1[:-1] -= 2.0
+    d1[1:] -= 2.0
+
+    # Bentuk banded upper: baris 0 = diagonal +2, baris 1 = diagonal +1, baris 2 = diagonal utama
+    ab = np.zeros((3, n))
+    ab[0, 2:] = lamb * d2
+    ab[1, 1:] = lamb * d1
+    ab[2, :] = 1.0 + lamb * d0
+    cb = cholesky_banded(ab, lower=False)
+    cb.setflags(write=False)
+    return cb
+
+
+def hp_trend(y, lamb=1600):
+    """
+    Komponen trend Hodrick-Prescott, hasilnya sama dengan statsmodels `hpfilter`.
+
+    :param y: Array 1D (n,) atau 2D (n, k) untuk memfilter k deret sepanjang n sekaligus.
+    :param lamb: Parameter smoothing lambda.
+    :return: Array trend dengan bentuk yang sama dengan y.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = y.shape[0]
+    if n < 3:
+        # Tidak ada selisih kedua, trend sama dengan data
+        return y.copy()
+    return cho_solve_banded((_faktorisasi(n, float(lamb)), False), y)
+
+
+def hp_filter(y, lamb=1600):
+    """
+    Pengganti `statsmodels.tsa.filters.hp_filter.hpfilter` dengan urutan hasil yang sama.
+
+    :return: Tuple (cycle, trend).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    trend = hp_trend(y, lamb)
+    return y - trend, trend
+
+
+def kunci_trend(daerah_id, komoditas_id, time_range, lamb, tanggal_awal, tanggal_akhir, harga):
+    """
+    Key TrendCache satu deret. Checksum harga membuat key berubah juga saat ingest
+    memperbarui nilai tanpa menambah baris.
+
+    :param harga: Array float64 deret yang difilter.
+    """
+    return (daerah_id, komoditas_id, time_range, lamb, tanggal_awal, tanggal_akhir, len(harga),
+            zlib.crc32(harga.tobytes()))
+
+
+class TrendCache:
+    """
+    Cache LRU hasil trend per deret, misalnya dengan key
+    (daerah_id, komoditas_id, timeRange, tanggal pertama, tanggal terakhir).
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, y, lamb=HP_LAMBDA):
+        with self._lock:
+            trend = self._entries.get(key)
+            if trend is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return trend
+            self.misses += 1
+
+        trend = hp_trend(y, lamb)
+        trend.setflags(write=False)
+        with self._lock:
+            self._entries[key] = trend
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return trend
+
+    def get_or_compute_banyak(self, keys, ys, lamb=HP_LAMBDA):
+        """
+        Versi banyak deret dari get_or_compute: deret yang belum ada di cache dikelompokkan
+        per panjang dan setiap kelompok difilter dalam satu solve (matriks n x k).
+
+        :param keys: List key cache, satu per deret.
+        :param ys: List array 1D dengan urutan sama.
+        :return: List trend dengan urutan sama.
+        """
+        hasil = [None] * len(keys)
+        kelompok = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                trend = self._entries.get(key)
+                if trend is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    hasil[i] = trend
+                else:
+                    self.misses += 1
+                    kelompok.setdefault(len(ys[i]), []).append(i)
+
+        for indeks in kelompok.values():
+            trends = hp_trend(np.column_stack([np.asarray(ys[i], dtype=np.float64) for i in indeks]), lamb)
+            for kolom, i in enumerate(indeks):
+                trend = np.ascontiguousarray(trends[:, kolom])
+                trend.setflags(write=False)
+                hasil[i] = trend
+        with self._lock:
+            for indeks in kelompok.values():
+                for i in indeks:
+                    self._entries[keys[i]] = hasil[i]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return hasil
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+trend_cache = TrendCache()
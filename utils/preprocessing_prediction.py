@@ -1,158 +1,238 @@
-import os
-from pandas import concat
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
 import numpy as np
-from flask import jsonify
-from app.db_connection import create_db_connection  # Adjust based on your project structure
+from app.metrics import terukur
+from app.repository import KOMODITAS_MODEL, get_repository  # Adjust based on your project structure
 
 
-def data_inflasi(id_daerah):
+def versi_data_prediksi(id_daerah):
     """
-    Fungsi untuk mengambil semua data inflasi untuk wilayah tertentu (id_daerah) dari database
-    dan mengembalikannya dalam bentuk DataFrame.
+    Versi data untuk prediksi sebuah daerah: tanggal inflasi terakhir, tanggal harga terakhir
+    dan versi data ingest kedua tabel. Nilai ini berubah setiap ada data baru atau data lama
+    diperbarui, sehingga bisa dipakai sebagai key cache.
 
-    :param id_daerah: ID wilayah untuk mengambil data inflasi.
-    :return: DataFrame yang berisi data inflasi atau error message jika gagal.
+    :param id_daerah: ID wilayah.
+    :return: Tuple (tanggal_inflasi terakhir, tanggal_harga terakhir, versi inflasi, versi harga).
     """
-    # Membuat koneksi ke database
-    connection = create_db_connection()
-    if not connection:
-        return {"error": "Database connection failed"}
+    repository = get_repository()
+    tanggal_inflasi, tanggal_harga = repository.versi_data_prediksi(id_daerah)
+    return (str(tanggal_inflasi), str(tanggal_harga),
+            repository.versi_data('inflasi', id_daerah), repository.versi_data('harga', id_daerah))
 
-    try:
-        # Query untuk mengambil data inflasi berdasarkan id_daerah
-        query = """
-            SELECT tingkat_inflasi, tanggal_inflasi
-            FROM inflasi
-            WHERE id_daerah = %s
-            ORDER BY tanggal_inflasi ASC
-        """
-        cursor = connection.cursor()
-        cursor.execute(query, (id_daerah,))
-        data = cursor.fetchall()
 
-        # Menutup koneksi database
-        connection.close()
+@terukur('pivot')
+def susun_fitur_prediksi(id_daerah_list, rows, komoditas_ids=KOMODITAS_MODEL):
+    """
+    Membentuk matriks fitur per daerah dari hasil Repository.fitur_bulanan tanpa DataFrame.
+    Setiap harga ditempatkan menurut (bulan, posisi komoditas di `komoditas_ids`), sehingga
+    lebar matriks selalu mengikuti daftar komoditas model. Baris yang hilang (misalnya
+    komoditas model belum ada di tabel komoditas) menjadi NaN, komoditas di luar daftar diabaikan.
+
+    :param id_daerah_list: List ID wilayah yang diminta.
+    :param rows: Baris (id_daerah, tanggal_inflasi, tingkat_inflasi, komoditas_id, harga_rata2).
+    :param komoditas_ids: ID komoditas kolom fitur, urut sesuai kolom input model.
+    :return: Tuple (hasil, inflasi_terakhir, tanggal). `hasil` adalah dict id_daerah -> matriks
+             float64 (n_bulan, len(komoditas_ids) + 1) dengan kolom terakhir tingkat_inflasi (atau
+             dict error), `inflasi_terakhir` adalah dict id_daerah -> inflasi terakhir (float) dan
+             `tanggal` adalah dict id_daerah -> tanggal_inflasi tiap baris (datetime64[D]).
+    """
+    hasil, inflasi_terakhir, tanggal = {}, {}, {}
+    if rows:
+        id_col, tanggal_col, inflasi_col, komoditas_col, harga_col = zip(*rows)
+        id_arr = np.asarray(id_col)
+        tanggal_arr = np.asarray(tanggal_col, dtype='datetime64[D]')
+        inflasi = np.asarray(inflasi_col, dtype=np.float64)
+        harga = np.asarray(harga_col, dtype=np.float64)  # NULL (bulan tanpa harga) menjadi NaN
+
+        # Posisi kolom tiap baris; komoditas di luar komoditas_ids ditandai tidak dikenal
+        komoditas_ids = np.asarray(komoditas_ids)
+        n_komoditas = len(komoditas_ids)
+        urutan = np.argsort(komoditas_ids)
+        komoditas_arr = np.asarray(komoditas_col)
+        posisi = np.searchsorted(komoditas_ids[urutan], komoditas_arr).clip(max=n_komoditas - 1)
+        dikenal = komoditas_ids[urutan][posisi] == komoditas_arr
+        kolom = urutan[posisi]
+
+        # Baris urut id_daerah, jadi batas tiap daerah cukup dicari sekali
+        ids, starts = np.unique(id_arr, return_index=True)
+        ends = np.append(starts[1:], len(id_arr))
+        for id_daerah, start, end in zip(ids.tolist(), starts, ends):
+            bulan, pertama, baris = np.unique(tanggal_arr[start:end], return_index=True, return_inverse=True)
+            fitur = np.full((len(bulan), n_komoditas), np.nan)
+            pilih = dikenal[start:end]
+            fitur[baris[pilih], kolom[start:end][pilih]] = harga[start:end][pilih]
+            if np.isnan(fitur).all():
+                hasil[id_daerah] = {"error": "Data not found for daerah_id: {}".format(id_daerah)}
+                continue
+            target = inflasi[start:end][pertama]
+            hasil[id_daerah] = np.column_stack([fitur, target])
+            inflasi_terakhir[id_daerah] = float(target[-1])
+            tanggal[id_daerah] = bulan
+
+    for id_daerah in id_daerah_list:
+        if id_daerah not in hasil:
+            hasil[id_daerah] = {"error": f"No data found for id_daerah: {id_daerah}"}
+    return hasil, inflasi_terakhir, tanggal
+
+
+def fitur_prediksi_batch(id_daerah_list, sejak=None):
+    """
+    Fitur prediksi banyak daerah: inflasi dan rata-rata harga bulanan tiap komoditas,
+    disejajarkan per bulan tanggal_inflasi, dalam satu query.
+
+    :param id_daerah_list: List ID wilayah, atau "all" untuk semua daerah di tabel daerah.
+    :param sejak: Tanggal awal (yyyy-mm-dd) jika hanya butuh bulan terakhir, None untuk semua.
+    :return: Tuple (hasil, inflasi_terakhir, tanggal), lihat susun_fitur_prediksi.
+    """
+    id_daerah_list, rows = get_repository().fitur_bulanan(id_daerah_list, sejak)
+    return susun_fitur_prediksi(id_daerah_list, rows)
+
 
-        # Cek jika data tidak ditemukan
-        if not data:
-            return {"message": f"No data found for id_daerah: {id_daerah}"}
+def fitur_prediksi(id_daerah, sejak=None):
+    """
+    Fitur prediksi satu daerah (satu query ke database).
 
-        # Mengonversi data ke DataFrame
-        df = pd.DataFrame(data, columns=["tingkat_inflasi", "tanggal_inflasi"])
+    :param id_daerah: ID wilayah.
+    :param sejak: Tanggal awal (yyyy-mm-dd), None untuk semua data.
+    :return: Tuple (matriks, tanggal, inflasi_terakhir), atau dict error jika data tidak ada.
+    """
+    hasil, inflasi_terakhir, tanggal = fitur_prediksi_batch([id_daerah], sejak)
+    if isinstance(hasil[id_daerah], dict):
+        return hasil[id_daerah]
+    return hasil[id_daerah], tanggal[id_daerah], inflasi_terakhir[id_daerah]
 
-        # Menghilangkan kolom tanggal_inflasi
-        df = df.drop(columns=["tanggal_inflasi"])
 
-        # Mengembalikan DataFrame
-        return df
+@terukur('scaler')
+def fit_scaler(fitur, tanggal):
+    """
+    Parameter min-max (sama dengan MinMaxScaler(0, 1)) dari seluruh histori satu daerah.
 
-    except Exception as e:
-        # Menangani kesalahan
-        return {"error": str(e)}
-    
+    :param fitur: Matriks dari fitur_prediksi, kolom terakhir inflasi.
+    :param tanggal: tanggal_inflasi tiap baris.
+    :return: Dict {"min", "max", "tanggal_terakhir"} untuk disimpan di app.scalers.
+    """
+    return {
+        "min": _nanmin_kolom(fitur).tolist(),
+        "max": (-_nanmin_kolom(-fitur)).tolist(),
+        "tanggal_terakhir": str(tanggal[-1]),
+    }
+
+
+def _nanmin_kolom(fitur):
+    # nanmin per kolom tanpa RuntimeWarning untuk kolom yang seluruhnya NaN
+    hasil = np.full(fitur.shape[1], np.nan)
+    ada = ~np.isnan(fitur).all(axis=0)
+    hasil[ada] = np.nanmin(fitur[:, ada], axis=0)
+    return hasil
+
+
+@terukur('scaler')
+def update_scaler(params, fitur, tanggal):
+    """
+    Update inkremental min-max dengan baris sejak tanggal_terakhir parameter (termasuk bulan
+    itu sendiri, karena rata-rata bulan berjalan bisa berubah). Rentang hanya bisa melebar;
+    `flask refit-scalers` menghitung ulang dari seluruh histori.
+
+    :return: Parameter baru, atau None jika tidak ada perubahan.
+    """
+    baru = tanggal >= np.datetime64(params['tanggal_terakhir'])
+    if not baru.any():
+        return None
+    data_min = np.fmin(np.asarray(params['min'], dtype=np.float64), _nanmin_kolom(fitur[baru]))
+    data_max = np.fmax(np.asarray(params['max'], dtype=np.float64), -_nanmin_kolom(-fitur[baru]))
+    tanggal_terakhir = str(tanggal[-1])
+    if (np.array_equal(data_min, params['min'], equal_nan=True)
+            and np.array_equal(data_max, params['max'], equal_nan=True)
+            and tanggal_terakhir == params['tanggal_terakhir']):
+        return None
+    return {"min": data_min.tolist(), "max": data_max.tolist(), "tanggal_terakhir": tanggal_terakhir}
+
+
+def _min_rentang(params):
+    data_min = np.asarray(params['min'], dtype=np.float64)
+    rentang = np.asarray(params['max'], dtype=np.float64) - data_min
+    # Sama dengan MinMaxScaler: kolom konstan tidak diskalakan
+    rentang[rentang == 0] = 1.0
+    return data_min, rentang
+
+
+def baris_input_prediksi(fitur):
+    """
+    Indeks baris bulan terakhir yang lengkap (semua harga komoditas dan inflasi), yaitu input
+    langkah pertama prediksi.
+    """
+    lengkap = ~np.isnan(fitur).any(axis=1)
+    if not lengkap.any():
+        raise ValueError("Data tidak cukup untuk membentuk input prediksi")
+    return int(np.flatnonzero(lengkap)[-1])
+
+
+def siapkan_input_prediksi(fitur, params):
+    """
+    Membentuk input (1, 1, n_fitur) untuk prediksi 1 bulan ke depan. Hanya baris input
+    yang dinormalisasi, memakai parameter scaler yang tersimpan.
+
+    Model dilatih dengan pasangan (bulan t-1 -> bulan t) dari series_to_supervised, jadi
+    input adalah semua variabel di bulan terakhir yang lengkap dan outputnya bulan berikutnya
+    (lihat bulan_target).
+
+    :param fitur: Matriks (n_bulan, n_komoditas + 1) dari fitur_prediksi, kolom terakhir inflasi.
+    :param params: Parameter scaler dari fit_scaler/update_scaler.
+    :return: Array input_seq.
+    """
+    data_min, rentang = _min_rentang(params)
+    input_row = (fitur[baris_input_prediksi(fitur)] - data_min) / rentang
+    return input_row.reshape(1, 1, fitur.shape[1])
+
+
+def bulan_target(fitur, tanggal, horizon=1):
+    """
+    Bulan yang diprediksi tiap langkah: bulan setelah baris input, lalu bulan-bulan berikutnya.
+
+    :param tanggal: tanggal_inflasi tiap baris fitur.
+    :return: Array datetime64[D] berisi tanggal 1 tiap bulan target.
+    """
+    awal = np.datetime64(tanggal[baris_input_prediksi(fitur)], 'M')
+    return (awal + np.arange(1, horizon + 1)).astype('datetime64[D]')
+
+
+def eksogen_prediksi(fitur, params):
+    """
+    Baris input ternormalisasi untuk langkah kedua dan seterusnya pada prediksi multi-bulan:
+    harga komoditas bulan terakhir yang lengkap dianggap tetap, kolom inflasi diisi
+    prediksi langkah sebelumnya saat rollout.
+
+    :return: Array (1, n_fitur).
+    """
+    lengkap = ~np.isnan(fitur[:, :-1]).any(axis=1)
+    if not lengkap.any():
+        raise ValueError("Data harga komoditas tidak cukup untuk prediksi multi-bulan")
+    data_min, rentang = _min_rentang(params)
+    return ((fitur[lengkap][-1] - data_min) / rentang).reshape(1, -1)
+
+
+def denormalisasi_target(pred, params):
+    """
+    Kebalikan normalisasi untuk output model (kolom target).
+    """
+    data_min, rentang = _min_rentang(params)
+    return np.asarray(pred, dtype=np.float64) * rentang[-1] + data_min[-1]
+
+
+def interpretasi_prediksi(predicted_inflation_value, last_inflation):
+    """
+    Membuat deskripsi hasil prediksi dibandingkan inflasi bulan terakhir.
+    """
+    if last_inflation is None:
+        return "Data inflasi terakhir tidak tersedia untuk membuat interpretasi."
+    if predicted_inflation_value > last_inflation:
+        return ("Inflasi diprediksi akan meningkat dibandingkan bulan sebelumnya, "
+                "yang dapat menunjukkan adanya tekanan pada harga komoditas utama di daerah ini.")
+    if predicted_inflation_value < last_inflation:
+        return ("Inflasi diprediksi akan menurun dibandingkan bulan sebelumnya, "
+                "menandakan potensi stabilisasi harga komoditas utama di daerah ini.")
+    return ("Inflasi diprediksi akan tetap stabil dibandingkan bulan sebelumnya, "
+            "mengindikasikan tidak adanya perubahan signifikan pada harga komoditas utama.")
 
-def data_komoditas(daerah_id):
-    """
-    Fungsi untuk mengambil semua data harga komoditas untuk wilayah tertentu (daerah_id) dari database
-    dan mengembalikannya dalam bentuk DataFrame.
-
-    :param daerah_id: ID wilayah untuk mengambil data harga komoditas.
-    :return: DataFrame yang berisi data harga komoditas atau error message jika gagal.
-    """
-    # Membuat koneksi ke database
-    connection = create_db_connection()
-    if not connection:
-        return {"error": "Database connection failed"}
-
-    try:
-        # Query untuk mengambil data harga komoditas berdasarkan daerah_id
-        query = "SELECT * FROM harga_komoditas WHERE daerah_id = %s"
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute(query, (daerah_id,))
-        
-        data_harga_komoditas = {
-        "prices": cursor.fetchall(),
-        }
-        connection.close()
-
-        if not data_harga_komoditas['prices']:
-            return jsonify({"message": "Data not found for daerah_id: {}".format(daerah_id)}), 404
-
-        # Process the data to create a DataFrame with commodity columns
-        prices = data_harga_komoditas['prices']
-        
-        # Create a dictionary to store data for each commodity
-        commodities_data = {}
-
-        # Loop through each price entry to organize data by commodity
-        for price_data in prices:
-            date = price_data['tanggal_harga']
-            komoditas_id = price_data['komoditas_id']
-            harga = price_data['harga']
-
-            # Initialize the commodity list if it doesn't exist
-            if komoditas_id not in commodities_data:
-                commodities_data[komoditas_id] = []
-
-            # Append the price data for the given date
-            commodities_data[komoditas_id].append({"tanggal_harga": date, "harga": harga})
-
-        # Convert the commodity data into a DataFrame
-        df_data = []
-        dates = sorted(set([entry['tanggal_harga'] for entry in prices]))  # Collect unique dates
-
-        # Fill in the data for each commodity and date
-        for date in dates:
-            row = {"tanggal_harga": date}
-            for komoditas_id in range(1, 6):  # Adjust range based on the number of commodities you have
-                filtered_prices = [entry['harga'] for entry in commodities_data.get(komoditas_id, []) if entry['tanggal_harga'] == date]
-                row[f'komoditas_id_{komoditas_id}'] = filtered_prices[0] if filtered_prices else None
-            df_data.append(row)
-
-        # Create a DataFrame from the collected data
-        df = pd.DataFrame(df_data)
-
-
-        # Mengembalikan DataFrame
-        return df
-
-    except Exception as e:
-        # Menangani kesalahan
-        return {"error": str(e)}
-
-def data_inflasi_dan_komoditas(id_daerah):
-    """
-    Fungsi untuk mengambil data inflasi dan harga komoditas untuk wilayah tertentu (id_daerah),
-    kemudian menggabungkan keduanya dalam satu DataFrame.
-
-    :param id_daerah: ID wilayah untuk mengambil data inflasi dan harga komoditas.
-    :return: DataFrame yang berisi gabungan data inflasi dan harga komoditas.
-    """
-    # Ambil data inflasi
-    inflasi_df = data_inflasi(id_daerah)
-    if isinstance(inflasi_df, dict) and "error" in inflasi_df:
-        return inflasi_df  # Jika gagal mengambil data inflasi
-
-    # Ambil data harga komoditas
-    komoditas_df = data_komoditas(id_daerah)
-    if isinstance(komoditas_df, dict) and "error" in komoditas_df:
-        return komoditas_df  # Jika gagal mengambil data harga komoditas
-
-    try:
-        # Drop the tanggal_harga column from komoditas_df
-        komoditas_df = komoditas_df.drop(columns=['tanggal_harga'])
-        # Gabungkan kedua DataFrame berdasarkan indeks
-        merged_df = pd.concat([komoditas_df, inflasi_df], axis=1)
-
-        # Mengembalikan DataFrame hasil penggabungan
-        return merged_df
-
-    except Exception as e:
-        # Tangani kesalahan jika terjadi
-        return {"error": str(e)}
-    
 
 def series_to_supervised(data, n_in=1, n_out=1, dropnan=True):
     n_vars = 1 if type(data) is list else data.shape[1]
@@ -173,7 +253,7 @@ def series_to_supervised(data, n_in=1, n_out=1, dropnan=True):
             names += [('var%d(t+%d)' % (j+1, i)) for j in range(n_vars)]
     
     # Concatenate all columns
-    agg = concat(cols, axis=1)
+    agg = pd.concat(cols, axis=1)
     agg.columns = names
     
     if dropnan: